@@ -384,6 +384,7 @@ async def stream_market(
             get_all_quotes as _get_all_quotes,
             stream_quote_batches as _stream_quote_batches,
             ensure_symbols_subscribed as _ensure_symbols_subscribed,
+            release_symbols as _release_symbols,
         )
     # If import failed, define no-op fallbacks (SSE still works for custom events)
     def _noop(*args, **kwargs):
@@ -392,6 +393,7 @@ async def stream_market(
     _get_all_quotes = locals().get("_get_all_quotes") or _noop  # type: ignore
     _stream_quote_batches = locals().get("_stream_quote_batches") or (lambda *a, **k: _async_empty_gen())  # type: ignore
     _ensure_symbols_subscribed = locals().get("_ensure_symbols_subscribed") or (lambda *a, **k: None)  # type: ignore
+    _release_symbols = locals().get("_release_symbols") or (lambda *a, **k: None)  # type: ignore
 
     origin = request.headers.get("origin", "")
     if not symbols.strip():
@@ -405,12 +407,13 @@ async def stream_market(
 
     # Each client subscribes to the broadcast bus
     sub_q = subscribe()
+    consumer = f"sse:{id(sub_q):x}"
 
     async def event_generator() -> AsyncGenerator[bytes, None]:
         try:
             # Ensure provider stream/poller is running for these symbols
             with contextlib.suppress(Exception):
-                res = _ensure_symbols_subscribed(syms)
+                res = _ensure_symbols_subscribed(syms, consumer=consumer)
                 if asyncio.iscoroutine(res):
                     await res
 
@@ -572,6 +575,10 @@ async def stream_market(
             return
         finally:
             unsubscribe(sub_q)
+            with contextlib.suppress(Exception):
+                res = _release_symbols(syms, consumer=consumer)
+                if asyncio.iscoroutine(res):
+                    await res
 
     headers = {
         "Cache-Control": "no-cache",
@@ -16,6 +16,7 @@ WS_CHANNELS = {
     "BOOK_TICKER": "spot@public.aggre.bookTicker.v3.api.pb",  # best bid/ask
     "DEALS":       "spot@public.aggre.deals.v3.api.pb",       # trades stream
     "DEPTH_LIMIT": "spot@public.limit.depth.v3.api.pb",       # top-N depth
+    "KLINE":       "spot@public.kline.v3.api.pb",             # 1m candles (candles_cache feed)
 }
 
 # Topic update cadence suffix (env: WS_RATE_SUFFIX, default @500ms per stability guidance)
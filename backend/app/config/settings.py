@@ -624,13 +624,19 @@ class Settings(BaseSettings):
     idempotency_backend: str = Field(
         default=os.getenv("IDEMPOTENCY_BACKEND", "memory").lower(),
         validation_alias=AliasChoices("IDEMPOTENCY_BACKEND", "idempotency_backend"),
-        description="Storage backend: 'memory' (in-process dict) or 'redis' (external cache)"
+        description="Storage backend: 'memory' (in-process LRU) or 'sqlite' (LRU + SQLite table shared by workers on one host)"
+    )
+
+    idempotency_sqlite_path: str = Field(
+        default=os.getenv("IDEMPOTENCY_SQLITE_PATH", "idempotency.db"),
+        validation_alias=AliasChoices("IDEMPOTENCY_SQLITE_PATH", "idempotency_sqlite_path"),
+        description="SQLite file for idempotency claims/results when backend=sqlite"
     )
 
     idempotency_redis_url: str | None = Field(
         default=os.getenv("IDEMPOTENCY_REDIS_URL"),
         validation_alias=AliasChoices("IDEMPOTENCY_REDIS_URL", "idempotency_redis_url"),
-        description="Redis URL for idempotency cache (required if backend=redis). Example: redis://localhost:6379/1"
+        description="Unused (Redis backend not implemented; use backend=sqlite to share keys across workers)"
     )
 
     # ======== Inclusion / Exclusions ========
@@ -704,6 +710,131 @@ class Settings(BaseSettings):
         description="Multiplier for recv timeout (ping_interval * multiplier)"
     )
 
+    ws_sub_idle_grace_sec: float = Field(
+        default=float(os.getenv("WS_SUB_IDLE_GRACE_SEC", "60")),
+        validation_alias=AliasChoices("WS_SUB_IDLE_GRACE_SEC", "ws_sub_idle_grace_sec"),
+        ge=0.0,
+        description="Keep a released symbol subscribed this long before sending UNSUBSCRIPTION (0 = immediately)",
+    )
+
+    feed_stale_after_sec: float = Field(
+        default=float(os.getenv("FEED_STALE_AFTER_SEC", "5")),
+        validation_alias=AliasChoices("FEED_STALE_AFTER_SEC", "feed_stale_after_sec"),
+        gt=0.0,
+        description="WS depth/ticker older than this switches the symbol to REST polling",
+    )
+    feed_recover_sec: float = Field(
+        default=float(os.getenv("FEED_RECOVER_SEC", "3")),
+        validation_alias=AliasChoices("FEED_RECOVER_SEC", "feed_recover_sec"),
+        ge=0.0,
+        description="WS must be continuously fresh this long before REST polling stops again (hysteresis)",
+    )
+
+    market_data_mode: str = Field(
+        default=os.getenv("MARKET_DATA_MODE", "inproc"),
+        validation_alias=AliasChoices("MARKET_DATA_MODE", "market_data_mode"),
+        description="inproc: streams in the API process | publish: market-data daemon | attach: read the daemon's shared-memory table",
+    )
+    md_shm_path: str = Field(
+        default=os.getenv("MD_SHM_PATH", ""),
+        validation_alias=AliasChoices("MD_SHM_PATH", "md_shm_path"),
+        description="Shared-memory quote table file (default /dev/shm/mexc_bot_quotes.tbl)",
+    )
+    md_shm_capacity: int = Field(
+        default=int(os.getenv("MD_SHM_CAPACITY", "512")),
+        validation_alias=AliasChoices("MD_SHM_CAPACITY", "md_shm_capacity"),
+        ge=1,
+        description="Max symbols in the shared-memory quote table",
+    )
+
+    md_venues: str = Field(
+        default=os.getenv("MD_VENUES", ""),
+        validation_alias=AliasChoices("MD_VENUES", "md_venues"),
+        description="Venues streamed concurrently besides the active provider (comma-separated, e.g. gate,mexc); "
+                    "switching between them re-points the book tracker without reconnecting",
+    )
+
+    absorption_bands_bps: str = Field(
+        default=os.getenv("ABSORPTION_BANDS_BPS", "5,10"),
+        validation_alias=AliasChoices("ABSORPTION_BANDS_BPS", "absorption_bands_bps"),
+        description="Depth@bps bands (comma-separated) the book tracker precomputes on every book change",
+    )
+
+    strategy_idle_wake_ms: int = Field(
+        default=int(os.getenv("STRATEGY_IDLE_WAKE_MS", "1000")),
+        validation_alias=AliasChoices("STRATEGY_IDLE_WAKE_MS", "strategy_idle_wake_ms"),
+        ge=10,
+        description="Longest a strategy symbol loop parks without a quote/fill/timer/param event before re-checking",
+    )
+
+    ws_metrics_flush_ms: int = Field(
+        default=int(os.getenv("WS_METRICS_FLUSH_MS", "1000")),
+        validation_alias=AliasChoices("WS_METRICS_FLUSH_MS", "ws_metrics_flush_ms"),
+        ge=50,
+        description="How often per-symbol WS tick/lag metrics accumulated in-process are flushed to Prometheus",
+    )
+
+    latency_tracing_enabled: bool = Field(
+        default=os.getenv("LATENCY_TRACING_ENABLED", "true").lower() in {"1", "true", "yes", "on"},
+        validation_alias=AliasChoices("LATENCY_TRACING_ENABLED", "latency_tracing_enabled"),
+        description="Stamp decode/book/decision/risk/submit/persist times per quote and keep per-stage latency histograms",
+    )
+
+    latency_trace_slowest_n: int = Field(
+        default=int(os.getenv("LATENCY_TRACE_SLOWEST_N", "50")),
+        validation_alias=AliasChoices("LATENCY_TRACE_SLOWEST_N", "latency_trace_slowest_n"),
+        ge=1,
+        description="How many of the slowest finished tick-to-order traces are kept for /api/latency",
+    )
+
+    log_json: bool = Field(
+        default=os.getenv("LOG_JSON", "false").lower() in {"1", "true", "yes", "on"},
+        validation_alias=AliasChoices("LOG_JSON", "log_json"),
+        description="Write log records as one JSON object per line",
+    )
+
+    log_rate_limits: str = Field(
+        default=os.getenv("LOG_RATE_LIMITS", "app.strategy.engine=20,app.services.allocation_manager=10"),
+        validation_alias=AliasChoices("LOG_RATE_LIMITS", "log_rate_limits"),
+        description="Per-logger INFO/DEBUG rate limits as 'prefix=records_per_sec,...' (per log call site)",
+    )
+
+    pnl_rollup_interval_sec: int = Field(
+        default=int(os.getenv("PNL_ROLLUP_INTERVAL_SEC", "60")),
+        validation_alias=AliasChoices("PNL_ROLLUP_INTERVAL_SEC", "pnl_rollup_interval_sec"),
+        description="Period of the incremental pnl_ledger → pnl_daily rollup (0 disables)",
+    )
+
+    pnl_rollup_reconcile_sec: int = Field(
+        default=int(os.getenv("PNL_ROLLUP_RECONCILE_SEC", "3600")),
+        validation_alias=AliasChoices("PNL_ROLLUP_RECONCILE_SEC", "pnl_rollup_reconcile_sec"),
+        description="Period of the absolute re-roll of yesterday+today that picks up late-committed ledger rows (0 disables)",
+    )
+
+    alert_dedupe_window_sec: float = Field(
+        default=float(os.getenv("ALERT_DEDUPE_WINDOW_SEC", "300")),
+        validation_alias=AliasChoices("ALERT_DEDUPE_WINDOW_SEC", "alert_dedupe_window_sec"),
+        description="Alerts with the same dedupe key within this window are folded into one (count ×N)",
+    )
+
+    alert_flush_interval_sec: float = Field(
+        default=float(os.getenv("ALERT_FLUSH_INTERVAL_SEC", "5")),
+        validation_alias=AliasChoices("ALERT_FLUSH_INTERVAL_SEC", "alert_flush_interval_sec"),
+        description="Alert outbox worker period; alerts queued within one period go out as one digest",
+    )
+
+    alert_max_attempts: int = Field(
+        default=int(os.getenv("ALERT_MAX_ATTEMPTS", "8")),
+        validation_alias=AliasChoices("ALERT_MAX_ATTEMPTS", "alert_max_attempts"),
+        description="Delivery attempts (exponential backoff) before an alert is marked FAILED",
+    )
+
+    ws_kline_enabled: bool = Field(
+        default=os.getenv("WS_KLINE_ENABLED", "true").lower() in {"1", "true", "yes", "on"},
+        validation_alias=AliasChoices("WS_KLINE_ENABLED", "ws_kline_enabled"),
+        description="Subscribe to 1m kline streams (MEXC/Gate) to feed candles_cache incrementally",
+    )
+
     gate_depth_limit: int = Field(
         default=int(os.getenv("GATE_DEPTH_LIMIT", "10")),
         validation_alias=AliasChoices("GATE_DEPTH_LIMIT", "gate_depth_limit"),
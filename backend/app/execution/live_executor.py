@@ -8,6 +8,7 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 
 from app.config.settings import settings
+from app.infra.tracing import get_tracer
 from app.pnl.service import PnlService
 from app.services.exchange_private import (
     get_private_client,
@@ -18,7 +19,7 @@ from app.services.exchange_private import (
 
 # Для mark-price в get_position
 from app.services import book_tracker as bt_service
-from app.services.book_tracker import ensure_symbols_subscribed
+from app.services.book_tracker import ONE_SHOT_HOLD_SEC, ensure_symbols_subscribed, release_symbols
 
 # МОДЕЛИ БД (исправление ошибки "Position is not defined")
 from app.models.positions import Position, PositionSide, PositionStatus
@@ -97,13 +98,16 @@ class LiveExecutor:
     async def start_symbol(self, symbol: str) -> None:
         """Подписка на котировки — best-effort (полезно для mark-price)."""
         try:
-            await ensure_symbols_subscribed([symbol.upper()])
+            await ensure_symbols_subscribed([symbol.upper()], consumer="execution")
         except Exception:
             pass
 
     async def stop_symbol(self, symbol: str) -> None:
-        """Для spot обычно NOP (отмена ордеров делает cancel_orders)."""
-        return None
+        """Отпустить подписку на котировки (отмена ордеров делает cancel_orders)."""
+        try:
+            await release_symbols([symbol.upper()], consumer="execution")
+        except Exception:
+            pass
 
     async def cancel_orders(self, symbol: str) -> None:
         """Отмена всех открытых ордеров по символу."""
@@ -171,7 +175,7 @@ class LiveExecutor:
             return None
 
         try:
-            await ensure_symbols_subscribed([sym])
+            await ensure_symbols_subscribed([sym], consumer="execution:order", ttl_sec=ONE_SHOT_HOLD_SEC)
         except Exception:
             pass
 
@@ -197,13 +201,21 @@ class LiveExecutor:
                 tag=tag,
             )
 
+        tracer = get_tracer()
+        tracer.mark(sym, "submit")
         try:
             result: OrderResult = await self._client.place_order(req)
             # PnL: если сразу исполнилось — залогируем
+            persisted = False
             try:
-                await self._try_log_pnl(sym, s_up, result)
+                persisted = await self._try_log_pnl(sym, s_up, result)
             except Exception:
                 pass
+            # persist stamp only for a fill actually written (resting LIMIT / rejects are dropped)
+            if persisted:
+                tracer.finish(sym)
+            else:
+                tracer.discard(sym)
             return str(result.client_order_id or "") if getattr(result, "ok", False) else None
         except Exception:
             return None
@@ -360,21 +372,22 @@ class LiveExecutor:
 
     # ------------------- PnL helpers -------------------
 
-    async def _try_log_pnl(self, symbol: str, side: Side, result: Any) -> None:
+    async def _try_log_pnl(self, symbol: str, side: Side, result: Any) -> bool:
         """
         Если есть DB-сессия и была сделка — пишем TRADE_REALIZED и FEE.
+        Возвращает True, если сделка записана в БД.
         """
         if not self._session_factory:
-            return
+            return False
         if not getattr(result, "filled_qty", None):
-            return
+            return False
         filled_qty = _dec(result.filled_qty)
         if filled_qty <= 0:
-            return
+            return False
 
         avg_fill_price = _dec(getattr(result, "avg_fill_price", 0))
         if avg_fill_price <= 0:
-            return
+            return False
 
         # executed_at → naive UTC
         executed_at = getattr(result, "executed_at", None)
@@ -385,67 +398,70 @@ class LiveExecutor:
 
         session: Session = self._session_factory()
         try:
-            # Только SELL против открытого лонга
-            if side == "SELL":
-                pos: Optional[Position] = (
-                    session.query(Position)
-                    .filter(
-                        Position.workspace_id == self._wsid,
-                        Position.symbol == symbol.upper(),
-                        Position.side == PositionSide.BUY,
-                        Position.is_open == True,  # noqa: E712
-                        Position.status == PositionStatus.OPEN,
-                    )
-                    .order_by(Position.id.desc())
-                    .first()
-                )
-                if pos and _dec(pos.qty) > 0:
-                    close_qty = min(filled_qty, _dec(pos.qty))
-                    if close_qty > 0:
-                        pnl_usd = (avg_fill_price - _dec(pos.entry_price)) * close_qty
-                        base, quote = _split_symbol(symbol)
-                        ex = getattr(settings, "active_provider", None) or "LIVE"
-                        acc = getattr(settings, "account_id", None) or "spot"
-
-                        meta = {
-                            "meta_ver": 1,
-                            "mode": "live",
-                            "side": "SELL",
-                            "qty": float(close_qty),
-                            "price": float(avg_fill_price),
-                            "fee": float(getattr(result, "fee", 0.0) or 0.0),
-                            "fee_asset": str(getattr(result, "fee_asset", "USDT") or "USDT"),
-                            "client_order_id": getattr(result, "client_order_id", None),
-                            "exchange_order_id": getattr(result, "exchange_order_id", None),
-                            "trade_id": str(getattr(result, "trade_id", "") or ""),
-                            "strategy_tag": getattr(result, "tag", None),
-                        }
-
-                        self._pnl.log_trade_realized(
-                            session,
-                            ts=executed_at,
-                            exchange=str(ex),
-                            account_id=str(acc),
-                            symbol=symbol.upper(),
-                            base_asset=base,
-                            quote_asset=quote,
-                            realized_asset=pnl_usd,
-                            realized_usd=pnl_usd,
-                            price_usd=(Decimal("1") if _is_usd_quote(quote) else None),
-                            ref_order_id=str(
-                                getattr(result, "exchange_order_id", "")
-                                or getattr(result, "client_order_id", "")
-                            ),
-                            ref_trade_id=str(getattr(result, "trade_id", "") or ""),
-                            meta=meta,
-                            emit_sse=True,
+            # realized PnL + fee rows go to the ledger in one INSERT ... ON CONFLICT DO NOTHING
+            with self._pnl.batch(session):
+                # Только SELL против открытого лонга
+                if side == "SELL":
+                    pos: Optional[Position] = (
+                        session.query(Position)
+                        .filter(
+                            Position.workspace_id == self._wsid,
+                            Position.symbol == symbol.upper(),
+                            Position.side == PositionSide.BUY,
+                            Position.is_open == True,  # noqa: E712
+                            Position.status == PositionStatus.OPEN,
                         )
-
-            # Комиссия (best-effort)
-            raw = getattr(result, "raw", None) or {}
-            self._try_log_fee_from_raw(session, symbol, raw, result, executed_at)
+                        .order_by(Position.id.desc())
+                        .first()
+                    )
+                    if pos and _dec(pos.qty) > 0:
+                        close_qty = min(filled_qty, _dec(pos.qty))
+                        if close_qty > 0:
+                            pnl_usd = (avg_fill_price - _dec(pos.entry_price)) * close_qty
+                            base, quote = _split_symbol(symbol)
+                            ex = getattr(settings, "active_provider", None) or "LIVE"
+                            acc = getattr(settings, "account_id", None) or "spot"
+
+                            meta = {
+                                "meta_ver": 1,
+                                "mode": "live",
+                                "side": "SELL",
+                                "qty": float(close_qty),
+                                "price": float(avg_fill_price),
+                                "fee": float(getattr(result, "fee", 0.0) or 0.0),
+                                "fee_asset": str(getattr(result, "fee_asset", "USDT") or "USDT"),
+                                "client_order_id": getattr(result, "client_order_id", None),
+                                "exchange_order_id": getattr(result, "exchange_order_id", None),
+                                "trade_id": str(getattr(result, "trade_id", "") or ""),
+                                "strategy_tag": getattr(result, "tag", None),
+                            }
+
+                            self._pnl.log_trade_realized(
+                                session,
+                                ts=executed_at,
+                                exchange=str(ex),
+                                account_id=str(acc),
+                                symbol=symbol.upper(),
+                                base_asset=base,
+                                quote_asset=quote,
+                                realized_asset=pnl_usd,
+                                realized_usd=pnl_usd,
+                                price_usd=(Decimal("1") if _is_usd_quote(quote) else None),
+                                ref_order_id=str(
+                                    getattr(result, "exchange_order_id", "")
+                                    or getattr(result, "client_order_id", "")
+                                ),
+                                ref_trade_id=str(getattr(result, "trade_id", "") or ""),
+                                meta=meta,
+                                emit_sse=True,
+                            )
+
+                # Комиссия (best-effort)
+                raw = getattr(result, "raw", None) or {}
+                self._try_log_fee_from_raw(session, symbol, raw, result, executed_at)
 
             session.commit()
+            return True
         except Exception:
             session.rollback()
             raise
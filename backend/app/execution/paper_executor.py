@@ -11,8 +11,9 @@ from typing import Any, Dict, Optional, Protocol, Tuple, List
 from sqlalchemy.orm import Session
 
 from app.config.settings import settings
+from app.infra.tracing import get_tracer
 from app.services import book_tracker as bt_service
-from app.services.book_tracker import ensure_symbols_subscribed
+from app.services.book_tracker import ONE_SHOT_HOLD_SEC, ensure_symbols_subscribed, release_symbols
 from app.models.orders import Order, OrderSide, OrderType, OrderStatus, TimeInForce
 from app.models.fills import Fill, FillSide, Liquidity
 from app.models.positions import Position, PositionSide, PositionStatus
@@ -387,13 +388,16 @@ class PaperExecutor:
     async def start_symbol(self, symbol: str) -> None:
         # best-effort: разогреть котировки
         try:
-            await ensure_symbols_subscribed([symbol.upper()])
+            await ensure_symbols_subscribed([symbol.upper()], consumer="execution")
         except Exception:
             pass
 
     async def stop_symbol(self, symbol: str) -> None:
-        # для paper сейчас нечего отменять — ордеров как таковых нет
-        return None
+        # для paper нечего отменять — ордеров как таковых нет; отпускаем котировки
+        try:
+            await release_symbols([symbol.upper()], consumer="execution")
+        except Exception:
+            pass
 
     async def flatten_symbol(self, symbol: str) -> None:
         """Закрыть все лонг-позиции по bid (или mid/avg как фоллбек)."""
@@ -418,7 +422,7 @@ class PaperExecutor:
                 prev_avg = Decimal("0")
 
         try:
-            await ensure_symbols_subscribed([sym])
+            await ensure_symbols_subscribed([sym], consumer="execution:order", ttl_sec=ONE_SHOT_HOLD_SEC)
         except Exception:
             pass
 
@@ -481,6 +485,7 @@ class PaperExecutor:
             price = Decimal(str(price)) if not isinstance(price, Decimal) else price
 
         sym = symbol.upper()
+        get_tracer().mark(sym, "submit")
         s_up = side.upper().strip()
         qty_raw = _dec(qty)
         qty_dec = _round_qty(sym, qty_raw)
@@ -490,7 +495,7 @@ class PaperExecutor:
 
         # ensure quotes flow
         try:
-            await ensure_symbols_subscribed([sym])
+            await ensure_symbols_subscribed([sym], consumer="execution:order", ttl_sec=ONE_SHOT_HOLD_SEC)
         except Exception:
             pass
 
@@ -856,14 +861,48 @@ class PaperExecutor:
                 acc = "paper"
                 # ========== END DEFINE ==========
 
-                # ---- PnL ledger for realized PnL on SELL ----
-                if side == "SELL" and prev_qty > 0:
-                    close_qty = min(qty, prev_qty)
-                    if close_qty > 0:
-                        pnl_usd = (fill_price - (prev_avg_for_pnl or prev_avg)) * close_qty
-                        price_usd = Decimal("1") if _is_usd_quote(quote) else None
+                # realized PnL + fee rows go to the ledger in one INSERT ... ON CONFLICT DO NOTHING
+                with self._pnl.batch(session):
+                    # ---- PnL ledger for realized PnL on SELL ----
+                    if side == "SELL" and prev_qty > 0:
+                        close_qty = min(qty, prev_qty)
+                        if close_qty > 0:
+                            pnl_usd = (fill_price - (prev_avg_for_pnl or prev_avg)) * close_qty
+                            price_usd = Decimal("1") if _is_usd_quote(quote) else None
+
+                            self._pnl.log_trade_realized(
+                                session,
+                                ts=executed_at,
+                                exchange=str(ex),
+                                account_id=acc,
+                                symbol=symbol,
+                                base_asset=base,
+                                quote_asset=quote,
+                                realized_asset=pnl_usd,
+                                realized_usd=pnl_usd,
+                                price_usd=price_usd,
+                                ref_order_id=str(order.id),
+                                ref_trade_id=str(ts_ms),
+                                meta={
+                                    "meta_ver": 1,
+                                    "mode": "paper",
+                                    "side": side,
+                                    "qty": float(qty),
+                                    "price": float(fill_price),
+                                    "fee": 0.0,
+                                    "fee_asset": "USDT",
+                                    "client_order_id": client_order_id,
+                                    "exchange_order_id": None,
+                                    "trade_id": str(ts_ms),
+                                    "strategy_tag": strategy_tag,
+                                },
+                                emit_sse=True,
+                            )
 
-                        self._pnl.log_trade_realized(
+                    # ========== LOG FEE TO PNL LEDGER ==========
+                    # Логируем комиссию для обоих BUY и SELL
+                    if fee_usd > 0:
+                        self._pnl.log_fee(
                             session,
                             ts=executed_at,
                             exchange=str(ex),
@@ -871,73 +910,44 @@ class PaperExecutor:
                             symbol=symbol,
                             base_asset=base,
                             quote_asset=quote,
-                            realized_asset=pnl_usd,
-                            realized_usd=pnl_usd,
-                            price_usd=price_usd,
+                            fee_asset_delta=-fee_usd,      # ← Правильное имя параметра!
+                            fee_usd=-fee_usd,
+                            price_usd=Decimal("1") if _is_usd_quote(quote) else None,
                             ref_order_id=str(order.id),
                             ref_trade_id=str(ts_ms),
                             meta={
                                 "meta_ver": 1,
-                                "mode": "paper",
-                                "side": side,
-                                "qty": float(qty),
-                                "price": float(fill_price),
-                                "fee": 0.0,
-                                "fee_asset": "USDT",
+                                "mode": "paper_realistic",
+                                "fee": float(fee_usd),
+                                "fee_asset": "USDT",       
+                                "fee_rate": self._simulation.maker_fee_pct,  # ✅ FIXED: Use maker fee rate (0%)
                                 "client_order_id": client_order_id,
-                                "exchange_order_id": None,
                                 "trade_id": str(ts_ms),
                                 "strategy_tag": strategy_tag,
                             },
                             emit_sse=True,
                         )
+                    # ========== END LOG FEE ==========
 
-                # ========== LOG FEE TO PNL LEDGER ==========
-                # Логируем комиссию для обоих BUY и SELL
-                if fee_usd > 0:
-                    self._pnl.log_fee(
-                        session,
-                        ts=executed_at,
-                        exchange=str(ex),
-                        account_id=acc,
-                        symbol=symbol,
-                        base_asset=base,
-                        quote_asset=quote,
-                        fee_asset_delta=-fee_usd,      # ← Правильное имя параметра!
-                        fee_usd=-fee_usd,
-                        price_usd=Decimal("1") if _is_usd_quote(quote) else None,
-                        ref_order_id=str(order.id),
-                        ref_trade_id=str(ts_ms),
-                        meta={
-                            "meta_ver": 1,
-                            "mode": "paper_realistic",
-                            "fee": float(fee_usd),
-                            "fee_asset": "USDT",       
-                            "fee_rate": self._simulation.maker_fee_pct,  # ✅ FIXED: Use maker fee rate (0%)
-                            "client_order_id": client_order_id,
-                            "trade_id": str(ts_ms),
-                            "strategy_tag": strategy_tag,
-                        },
-                        emit_sse=True,
-                    )
-                # ========== END LOG FEE ==========
-
-                # ========== LOG FEE METRIC ==========
-                    try:
-                        from app.infra import metrics
-                        metrics.simulation_fees_total_usd.labels(
-                            symbol=symbol
-                        ).inc(float(fee_usd))
-                    except Exception:
-                        pass
-                    # ========== END LOG FEE METRIC ==========
+                    # ========== LOG FEE METRIC ==========
+                        try:
+                            from app.infra import metrics
+                            metrics.simulation_fees_total_usd.labels(
+                                symbol=symbol
+                            ).inc(float(fee_usd))
+                        except Exception:
+                            pass
+                        # ========== END LOG FEE METRIC ==========
 
                 session.commit()
+                get_tracer().finish(symbol.upper())  # fill persisted
             except Exception:
                 session.rollback()
                 raise
             finally:
                 session.close()
+        else:
+            get_tracer().discard(symbol.upper())
 
         return client_order_id
     
@@ -966,7 +976,8 @@ class PaperExecutor:
             from decimal import Decimal
             qty = Decimal(str(qty)) if not isinstance(qty, Decimal) else qty
 
-        await ensure_symbols_subscribed([symbol])
+        get_tracer().mark(symbol.upper(), "submit")
+        await ensure_symbols_subscribed([symbol], consumer="execution:order", ttl_sec=ONE_SHOT_HOLD_SEC)
         
         ts_ms = _now_ms()
         strategy_tag = tag  # Use tag parameter
@@ -1178,14 +1189,46 @@ class PaperExecutor:
                 ex = getattr(settings, "active_provider", None) or "PAPER"
                 acc = "paper"
                 
-                # PnL ledger for SELL
-                if side == "SELL" and prev_qty > 0:
-                    close_qty = min(fill_qty, prev_qty)
-                    if close_qty > 0:
-                        pnl_usd = (fill_price - (prev_avg_for_pnl or prev_avg)) * close_qty
-                        price_usd = Decimal("1") if _is_usd_quote(quote) else None
+                # realized PnL + fee rows go to the ledger in one INSERT ... ON CONFLICT DO NOTHING
+                with self._pnl.batch(session):
+                    # PnL ledger for SELL
+                    if side == "SELL" and prev_qty > 0:
+                        close_qty = min(fill_qty, prev_qty)
+                        if close_qty > 0:
+                            pnl_usd = (fill_price - (prev_avg_for_pnl or prev_avg)) * close_qty
+                            price_usd = Decimal("1") if _is_usd_quote(quote) else None
                         
-                        self._pnl.log_trade_realized(
+                            self._pnl.log_trade_realized(
+                                session,
+                                ts=executed_at,
+                                exchange=str(ex),
+                                account_id=acc,
+                                symbol=symbol,
+                                base_asset=base,
+                                quote_asset=quote,
+                                realized_asset=pnl_usd,
+                                realized_usd=pnl_usd,
+                                price_usd=price_usd,
+                                ref_order_id=str(order.id),
+                                ref_trade_id=str(ts_ms),
+                                meta={
+                                    "meta_ver": 1,
+                                    "mode": "paper_market",
+                                    "side": side,
+                                    "qty": float(fill_qty),
+                                    "price": float(fill_price),
+                                    "fee": float(fee_usd),
+                                    "fee_asset": "USDT",
+                                    "client_order_id": client_order_id,
+                                    "trade_id": str(ts_ms),
+                                    "strategy_tag": strategy_tag,
+                                },
+                                emit_sse=True,
+                            )
+                
+                    # Log fee
+                    if fee_usd > 0:
+                        self._pnl.log_fee(
                             session,
                             ts=executed_at,
                             exchange=str(ex),
@@ -1193,70 +1236,43 @@ class PaperExecutor:
                             symbol=symbol,
                             base_asset=base,
                             quote_asset=quote,
-                            realized_asset=pnl_usd,
-                            realized_usd=pnl_usd,
-                            price_usd=price_usd,
+                            fee_asset_delta=-fee_usd,
+                            fee_usd=-fee_usd,
+                            price_usd=Decimal("1") if _is_usd_quote(quote) else None,
                             ref_order_id=str(order.id),
                             ref_trade_id=str(ts_ms),
                             meta={
                                 "meta_ver": 1,
                                 "mode": "paper_market",
-                                "side": side,
-                                "qty": float(fill_qty),
-                                "price": float(fill_price),
                                 "fee": float(fee_usd),
                                 "fee_asset": "USDT",
+                                "fee_rate": self._simulation.taker_fee_pct,  # ← TAKER fee
                                 "client_order_id": client_order_id,
                                 "trade_id": str(ts_ms),
                                 "strategy_tag": strategy_tag,
                             },
                             emit_sse=True,
                         )
-                
-                # Log fee
-                if fee_usd > 0:
-                    self._pnl.log_fee(
-                        session,
-                        ts=executed_at,
-                        exchange=str(ex),
-                        account_id=acc,
-                        symbol=symbol,
-                        base_asset=base,
-                        quote_asset=quote,
-                        fee_asset_delta=-fee_usd,
-                        fee_usd=-fee_usd,
-                        price_usd=Decimal("1") if _is_usd_quote(quote) else None,
-                        ref_order_id=str(order.id),
-                        ref_trade_id=str(ts_ms),
-                        meta={
-                            "meta_ver": 1,
-                            "mode": "paper_market",
-                            "fee": float(fee_usd),
-                            "fee_asset": "USDT",
-                            "fee_rate": self._simulation.taker_fee_pct,  # ← TAKER fee
-                            "client_order_id": client_order_id,
-                            "trade_id": str(ts_ms),
-                            "strategy_tag": strategy_tag,
-                        },
-                        emit_sse=True,
-                    )
                     
-                    # Metric
-                    try:
-                        from app.infra import metrics
-                        metrics.simulation_fees_total_usd.labels(
-                            symbol=symbol
-                        ).inc(float(fee_usd))
-                    except Exception:
-                        pass
+                        # Metric
+                        try:
+                            from app.infra import metrics
+                            metrics.simulation_fees_total_usd.labels(
+                                symbol=symbol
+                            ).inc(float(fee_usd))
+                        except Exception:
+                            pass
                 
                 session.commit()
+                get_tracer().finish(symbol.upper())  # fill persisted
             except Exception:
                 session.rollback()
                 raise
             finally:
                 session.close()
-        
+        else:
+            get_tracer().discard(symbol.upper())
+
         return {
             "order_id": client_order_id,
             "fill_price": float(fill_price),
@@ -11,6 +11,11 @@ ticks_total = Counter(
     ["symbol", "type"],  # ← added "type" to match ws_client usage
 )
 
+book_metrics_invalidations_total = Counter(
+    "book_metrics_invalidations_total",
+    "Book-tracker snapshots recomputed because the top of book or depth changed",
+)
+
 ws_lag_seconds = Histogram(
     "ws_lag_seconds",
     "Book/deals lag (receive_now - send_time), seconds",
@@ -154,6 +159,20 @@ strategy_edge_bps_at_entry = Histogram(
     buckets=(0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 10.0),
 )
 
+strategy_decision_seconds = Histogram(
+    "strategy_decision_seconds",
+    "Strategy loop decision latency (wake → next park), seconds, by state-machine phase.",
+    ["phase"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+trace_stage_seconds = Histogram(
+    "trace_stage_seconds",
+    "Tick-to-order trace: time from the previous stage to this one, seconds.",
+    ["stage"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
 # ▶︎ Optional separate “time in book” (may differ from full trade duration if partials)
 strategy_time_in_book_seconds = Histogram(
     "strategy_time_in_book_seconds",
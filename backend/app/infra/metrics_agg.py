@@ -0,0 +1,154 @@
+# app/infra/metrics_agg.py
+"""
+Hot-path metrics aggregation for per-symbol WS series.
+
+`counter.labels(symbol=..., type=...).inc()` on every frame costs a label
+tuple build, a dict lookup under the metric's lock and a MutexValue
+increment. At a few hundred symbols that is a visible slice of the
+per-frame budget. MetricsAggregator instead:
+
+  • pre-binds the label children of a symbol once (`bind`, on subscribe),
+  • accumulates counts and histogram buckets in plain ints/floats on a
+    per-symbol __slots__ record,
+  • pushes the deltas into the same prometheus_client children every
+    `flush_interval` seconds (`flush`, driven by `run`).
+
+The exposed series names and labels are unchanged; only their update
+cadence becomes the flush interval. Without prometheus_client (or with
+its histogram internals missing) it degrades to direct observe().
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _SymbolSeries:
+    __slots__ = ("counter_children", "counts", "hist_child", "bounds", "buckets", "hist_sum", "hist_n")
+
+    def __init__(self, counter_children: List[Any], hist_child: Any) -> None:
+        self.counter_children = counter_children
+        self.counts = [0] * len(counter_children)
+        self.hist_child = hist_child
+        # prometheus_client keeps non-cumulative per-bucket MutexValues; mirror them locally
+        self.bounds: Optional[List[float]] = None
+        if hist_child is not None and hasattr(hist_child, "_buckets") and hasattr(hist_child, "_sum"):
+            self.bounds = list(getattr(hist_child, "_upper_bounds", []) or []) or None
+        self.buckets = [0] * len(self.bounds) if self.bounds else []
+        self.hist_sum = 0.0
+        self.hist_n = 0
+
+
+class MetricsAggregator:
+    """
+    Per-symbol counter (one label for the symbol plus a fixed `types`
+    label) and histogram (symbol label), flushed on a cadence.
+    """
+
+    def __init__(
+        self,
+        counter: Any,
+        types: Sequence[str],
+        histogram: Any = None,
+        *,
+        counter_symbol_label: str = "symbol",
+        counter_type_label: str = "type",
+        histogram_symbol_label: str = "symbol",
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._counter = counter
+        self._types = tuple(types)
+        self._type_idx = {t: i for i, t in enumerate(self._types)}
+        self._hist = histogram
+        self._c_sym = counter_symbol_label
+        self._c_type = counter_type_label
+        self._h_sym = histogram_symbol_label
+        self.flush_interval = max(0.05, float(flush_interval))
+        self._series: Dict[str, _SymbolSeries] = {}
+        self.flushes = 0
+
+    # ───────── binding ─────────
+    def bind(self, symbol: str) -> _SymbolSeries:
+        s = self._series.get(symbol)
+        if s is not None:
+            return s
+        children: List[Any] = []
+        hist_child = None
+        try:
+            if self._counter is not None:
+                children = [self._counter.labels(**{self._c_sym: symbol, self._c_type: t}) for t in self._types]
+            if self._hist is not None:
+                hist_child = self._hist.labels(**{self._h_sym: symbol})
+        except Exception as e:
+            logger.debug(f"Metric bind failed for {symbol}: {e}")
+            children, hist_child = [], None
+        s = _SymbolSeries(children, hist_child)
+        self._series[symbol] = s
+        return s
+
+    def bind_many(self, symbols: Sequence[str]) -> None:
+        for sym in symbols:
+            self.bind(sym)
+
+    # ───────── hot path ─────────
+    def inc(self, symbol: str, type_: str, n: int = 1) -> None:
+        s = self._series.get(symbol) or self.bind(symbol)
+        i = self._type_idx.get(type_)
+        if i is not None and s.counter_children:
+            s.counts[i] += n
+
+    def observe(self, symbol: str, value: float) -> None:
+        s = self._series.get(symbol) or self.bind(symbol)
+        if s.bounds is not None:
+            s.buckets[bisect_left(s.bounds, value)] += 1
+            s.hist_sum += value
+            s.hist_n += 1
+        elif s.hist_child is not None:
+            try:
+                s.hist_child.observe(value)
+            except Exception:
+                pass
+
+    # ───────── flushing ─────────
+    def flush(self) -> int:
+        """Push accumulated deltas into the registry; returns how many symbols had any."""
+        touched = 0
+        for s in self._series.values():
+            dirty = False
+            for i, n in enumerate(s.counts):
+                if n:
+                    try:
+                        s.counter_children[i].inc(n)
+                    except Exception:
+                        pass
+                    s.counts[i] = 0
+                    dirty = True
+            if s.hist_n:
+                try:
+                    child = s.hist_child
+                    for i, n in enumerate(s.buckets):
+                        if n:
+                            child._buckets[i].inc(n)
+                    child._sum.inc(s.hist_sum)
+                except Exception as e:
+                    logger.debug(f"Histogram flush failed: {e}")
+                s.buckets = [0] * len(s.buckets)
+                s.hist_sum = 0.0
+                s.hist_n = 0
+                dirty = True
+            touched += dirty
+        self.flushes += 1
+        return touched
+
+    async def run(self) -> None:
+        """Flush every `flush_interval` seconds until cancelled (final flush on the way out)."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                self.flush()
+        finally:
+            self.flush()
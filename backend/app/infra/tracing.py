@@ -0,0 +1,216 @@
+# app/infra/tracing.py
+"""
+Tick-to-order latency tracing.
+
+A trace follows one market-data frame of a symbol through the pipeline
+and stamps time.perf_counter() at each stage:
+
+  recv → decode → book → decision → risk → submit → persist
+
+  decode    frame parsed in the WS client
+  book      snapshot published by BookTracker
+  decision  StrategyEngine evaluated its entry filters on the quote
+  risk      RiskManager checks done
+  submit    executor place_maker / place_market entered
+  persist   fill written to the DB (trace finished)
+
+There is at most one open trace per symbol: a new frame replaces it
+unless an order from it is already in flight (submit stamped, younger
+than `inflight_timeout`). Stages only move forward, so a late stamp from
+an older quote never rewinds a trace. Each stamp feeds the per-stage
+histogram with the time since the previous stamp; finished traces go into
+a bounded min-heap that keeps the slowest N end to end.
+
+All calls are synchronous, O(1) (O(log N) on finish) and never raise.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from app.infra.metrics import trace_stage_seconds
+    _METRICS_OK = True
+except Exception:
+    _METRICS_OK = False
+
+STAGES = ("recv", "decode", "book", "decision", "risk", "submit", "persist")
+_IDX = {s: i for i, s in enumerate(STAGES)}
+_SUBMIT = _IDX["submit"]
+
+# seconds (upper bounds; last bucket is +Inf)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _Trace:
+    __slots__ = ("trace_id", "symbol", "stamps", "last")
+
+    def __init__(self, trace_id: int, symbol: str, t0: float) -> None:
+        self.trace_id = trace_id
+        self.symbol = symbol
+        self.stamps: List[Optional[float]] = [None] * len(STAGES)
+        self.stamps[0] = t0
+        self.last = 0  # index of the latest stamped stage
+
+    def as_dict(self) -> Dict[str, Any]:
+        t0 = self.stamps[0] or 0.0
+        prev = t0
+        stages: Dict[str, float] = {}
+        for name, ts in zip(STAGES[1:], self.stamps[1:]):
+            if ts is None:
+                continue
+            stages[name] = round((ts - prev) * 1e3, 3)
+            prev = ts
+        return {
+            "trace_id": self.trace_id,
+            "symbol": self.symbol,
+            "total_ms": round((prev - t0) * 1e3, 3),
+            "stages_ms": stages,
+        }
+
+
+class _StageHistogram:
+    __slots__ = ("counts", "total", "n", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def observe(self, dt: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, dt)] += 1
+        self.total += dt
+        self.n += 1
+        if dt > self.max:
+            self.max = dt
+
+    def quantile(self, q: float) -> float:
+        if not self.n:
+            return 0.0
+        rank, acc = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.n,
+            "avg_ms": round(self.total / self.n * 1e3, 4) if self.n else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1e3, 4),
+            "p99_ms": round(self.quantile(0.99) * 1e3, 4),
+            "max_ms": round(self.max * 1e3, 4),
+        }
+
+
+class LatencyTracer:
+    def __init__(self, slowest_n: int = 50, inflight_timeout: float = 5.0, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.slowest_n = max(1, int(slowest_n))
+        self.inflight_timeout = float(inflight_timeout)
+        self._open: Dict[str, _Trace] = {}
+        self._hist = [_StageHistogram() for _ in STAGES]
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []  # min-heap on total
+        self._ids = itertools.count(1)
+        self.started = 0
+        self.finished = 0
+        self.dropped = 0  # replaced before reaching submit, or discarded without a fill
+
+    # ───────── stamping ─────────
+    def begin(self, symbol: str, t0: Optional[float] = None) -> None:
+        """Open a trace for a frame received at `t0` (perf_counter)."""
+        if not self.enabled or not symbol:
+            return
+        now = time.perf_counter() if t0 is None else t0
+        cur = self._open.get(symbol)
+        if cur is not None:
+            if cur.last >= _SUBMIT and now - (cur.stamps[_SUBMIT] or now) < self.inflight_timeout:
+                return  # an order from this trace is still in flight
+            self.dropped += 1
+        self._open[symbol] = _Trace(next(self._ids), symbol, now)
+        self.started += 1
+
+    def mark(self, symbol: str, stage: str) -> None:
+        if not self.enabled:
+            return
+        tr = self._open.get(symbol)
+        i = _IDX.get(stage, 0)
+        if tr is None or i <= tr.last:
+            return
+        now = time.perf_counter()
+        dt = now - (tr.stamps[tr.last] or now)
+        tr.stamps[i] = now
+        tr.last = i
+        self._hist[i].observe(dt)
+        if _METRICS_OK:
+            try:
+                trace_stage_seconds.labels(stage).observe(dt)
+            except Exception:
+                pass
+
+    def finish(self, symbol: str, stage: str = "persist") -> None:
+        """Stamp the final stage and retire the trace into the slowest-N set."""
+        if not self.enabled:
+            return
+        tr = self._open.get(symbol)
+        if tr is None or tr.last < _SUBMIT:
+            return  # nothing was ordered from this frame
+        self.mark(symbol, stage)
+        del self._open[symbol]
+        self.finished += 1
+        rec = tr.as_dict()
+        item = (rec["total_ms"], tr.trace_id, rec)
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def discard(self, symbol: str) -> None:
+        """Drop the open trace without stamping (order placed but nothing filled/persisted)."""
+        if not self.enabled:
+            return
+        if self._open.pop(symbol, None) is not None:
+            self.dropped += 1
+
+    # ───────── diagnostics ─────────
+    def slowest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        out = [rec for _, _, rec in sorted(self._slowest, reverse=True)]
+        return out[:limit] if limit else out
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "open": len(self._open),
+            "started": self.started,
+            "finished": self.finished,
+            "dropped": self.dropped,
+            "stages": {name: self._hist[i].as_dict() for i, name in enumerate(STAGES) if i},
+        }
+
+    def reset(self) -> None:
+        self._open.clear()
+        self._hist = [_StageHistogram() for _ in STAGES]
+        self._slowest.clear()
+        self.started = self.finished = self.dropped = 0
+
+
+_TRACER: Optional[LatencyTracer] = None
+
+
+def get_tracer() -> LatencyTracer:
+    global _TRACER
+    if _TRACER is None:
+        try:
+            from app.config.settings import settings
+            _TRACER = LatencyTracer(
+                slowest_n=int(getattr(settings, "latency_trace_slowest_n", 50)),
+                enabled=bool(getattr(settings, "latency_tracing_enabled", True)),
+            )
+        except Exception:
+            _TRACER = LatencyTracer()
+    return _TRACER
@@ -40,6 +40,9 @@ import app.models.fills                     # noqa: F401
 import app.models.sessions                  # noqa: F401
 import app.models.pnl_ledger                # noqa: F401
 import app.models.pnl_daily                 # noqa: F401
+import app.models.pnl_rollup_watermark      # noqa: F401
+import app.models.symbol_perf_stats         # noqa: F401
+import app.models.alert_outbox              # noqa: F401
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
@@ -116,6 +119,24 @@ def _health_snapshot(app: FastAPI) -> dict[str, Any]:
     except Exception:
         cache_hit = None
 
+    try:
+        from app.market_data.subscriptions import get_subscription_registry
+        subscriptions = get_subscription_registry().get_stats()
+    except Exception:
+        subscriptions = None
+
+    try:
+        from app.market_data.venues import get_venue_book
+        venues = get_venue_book().get_stats()
+    except Exception:
+        venues = None
+
+    try:
+        from app.market_data.book_tracker import book_tracker as _bt
+        book = _bt.get_stats()
+    except Exception:
+        book = None
+
     return {
         "status": "ok",
         "version": APP_VERSION,
@@ -127,6 +148,9 @@ def _health_snapshot(app: FastAPI) -> dict[str, Any]:
         "depth_updates_per_sec": depth_updates_per_sec,
         "ticks_per_sec": ticks_per_sec,
         "cache_hitrate": cache_hit,
+        "subscriptions": subscriptions,
+        "venues": venues,
+        "book": book,
         "uptime_sec": round(uptime_sec, 3) if uptime_sec is not None else None,
     }
 
@@ -147,6 +171,12 @@ async def lifespan(app: FastAPI):
             print("⚠️  WARNING: PnL tables missing — check model imports and Base.metadata registration.")
     except Exception as e:
         print(f"⚠️ DB schema init failed: {e}")
+    try:
+        from app.services.symbol_stats import ensure_symbol_stats
+        with SessionLocal() as _db:
+            ensure_symbol_stats(_db)
+    except Exception as e:
+        print(f"⚠️ symbol_perf_stats backfill failed (non-critical): {e}")
 
     app.state.start_mono = time.monotonic()
 
@@ -154,6 +184,7 @@ async def lifespan(app: FastAPI):
     app.state.ws_client = cast(Optional[Any], None)
     app.state.ws_task = cast(Optional[asyncio.Task], None)
     app.state.ps_poller = cast(Optional[Any], None)
+    app.state.venue_feeds = {}  # venue → (client, task) for every concurrently streaming venue
 
     # Resolved provider/mode + REST base (initial)
     initial_provider = str(getattr(settings, "active_provider", getattr(settings, "exchange_provider", "MEXC"))).lower()
@@ -212,13 +243,24 @@ async def lifespan(app: FastAPI):
                 logger.warning(f"PS poller stop error: {e}")
             finally:
                 app.state.ps_poller = None
-        # WS client
-        if app.state.ws_client:
+        # WS clients (the active one is also one of the venue feeds)
+        feeds = dict(getattr(app.state, "venue_feeds", {}) or {})
+        if app.state.ws_client and all(app.state.ws_client is not c for c, _ in feeds.values()):
+            feeds["_active"] = (app.state.ws_client, app.state.ws_task)
+        for client, task in feeds.values():
             with suppress(Exception):
-                await app.state.ws_client.stop()
-        await _cancel_and_await(app.state.ws_task, timeout=3.0)
+                await client.stop()
+            await _cancel_and_await(task, timeout=3.0)
+        app.state.venue_feeds = {}
         app.state.ws_task = None
         app.state.ws_client = None
+        with suppress(Exception):
+            from app.market_data.venues import get_venue_book
+            get_venue_book().forget()
+        # shared MEXC subscription feeds (also held by SSE/strategy consumers)
+        with suppress(Exception):
+            from app.market_data.subscriptions import get_subscription_registry
+            await get_subscription_registry().stop()
         logger.info("Streams stopped.")
 
     def _hook_reset_book_tracker() -> None:
@@ -248,43 +290,63 @@ async def lifespan(app: FastAPI):
 
         ws_enabled_flag = False
 
+        # Attach mode: the market-data daemon owns the exchange streams; mirror its shared-memory table
+        if str(getattr(settings, "market_data_mode", "inproc")).lower() == "attach":
+            from app.market_data.daemon import get_quote_mirror
+            mirror = get_quote_mirror()
+            if _symbols_ok(symbols):
+                await mirror.want(symbols, consumer="config")
+            mirror.start()
+            app.state.ws_client = mirror
+            logger.info(f"✅ Attached to market-data daemon table: {mirror.path}")
+            return True
+
+        # Multi-venue: every venue in MD_VENUES streams; quotes reach the tracker only from `prov`
+        from app.market_data.venues import get_venue_book, streaming_venues
+        get_venue_book().set_active(prov)
+        venues = streaming_venues(prov) if enable_ws else []
+        if len(venues) > 1:
+            logger.info(f"🔀 Streaming venues: {venues} (trading venue: {prov})")
+
         #Always try (re)subscription via service layer
         if ensure_symbols_subscribed and _symbols_ok(symbols):
             try:
-                await ensure_symbols_subscribed(symbols)
+                await ensure_symbols_subscribed(
+                    symbols, consumer="config", channels=["BOOK_TICKER", "DEALS", "DEPTH_LIMIT"]
+                )
             except Exception as e:
                 logger.warning(f"ensure_symbols_subscribed failed: {e}")
 
-        #MEXC WS
-        if prov == "mexc" and enable_ws and _symbols_ok(symbols):
+        #MEXC WS — the configured symbols ride on the shared registry feed, no second client
+        if "mexc" in venues and _symbols_ok(symbols):
             try:
-                from app.market_data.ws_client import MEXCWebSocketClient
-                app.state.ws_client = MEXCWebSocketClient([s for s in symbols if str(s).strip()])
-                app.state.ws_task = asyncio.create_task(app.state.ws_client.run())
-                logger.info("✅ WS market client started (MEXC).")
-                ws_enabled_flag = True
+                from app.market_data.subscriptions import get_subscription_registry
+                registry = get_subscription_registry()
+                if registry.symbols():
+                    app.state.venue_feeds["mexc"] = (registry, None)
+                    logger.info(f"✅ WS market feed active (MEXC): {registry.get_stats()['shards']}")
             except Exception as e:
-                logger.error(f"❌ Failed to start MEXC WS client: {e}")
-                app.state.ws_client = None
-                app.state.ws_task = None
+                logger.error(f"❌ Failed to attach MEXC WS feed: {e}")
 
         #GATE WS
-        if prov == "gate" and enable_ws and _symbols_ok(symbols) and app.state.ws_client is None:
+        if "gate" in venues and _symbols_ok(symbols):
             try:
                 from app.market_data.gate_ws import GateWebSocketClient
-                app.state.ws_client = GateWebSocketClient(
+                client = GateWebSocketClient(
                     [s for s in symbols if str(s).strip()],
                     depth_limit=getattr(settings, "depth_limit", 10),
                     want_tickers=True,
                     want_order_book=True,
                 )
-                app.state.ws_task = asyncio.create_task(app.state.ws_client.run())
+                app.state.venue_feeds["gate"] = (client, asyncio.create_task(client.run()))
                 logger.info("✅ WS market client started (GATE).")
-                ws_enabled_flag = True
             except Exception as e:
                 logger.error(f"❌ Failed to start GATE WS client: {e}")
-                app.state.ws_client = None
-                app.state.ws_task = None
+
+        # the trading venue's feed is "the" ws_client; the others only feed the consolidated view
+        if prov in app.state.venue_feeds:
+            app.state.ws_client, app.state.ws_task = app.state.venue_feeds[prov]
+            ws_enabled_flag = True
 
         #PS poller (fallback)
         if app.state.ws_client is None and getattr(settings, "enable_ps_poller", True):
@@ -307,12 +369,26 @@ async def lifespan(app: FastAPI):
 
         return ws_enabled_flag
 
+    async def _hook_switch_venue(provider: str) -> bool:
+        # Only when the target venue already streams: swap the tracker's source, keep every connection
+        prov = (provider or "").strip().lower()
+        feeds = getattr(app.state, "venue_feeds", {}) or {}
+        if prov not in feeds or app.state.ps_poller:
+            return False
+        from app.market_data.venues import switch_active_venue
+        t0 = time.perf_counter()
+        n = await switch_active_venue(prov)
+        app.state.ws_client, app.state.ws_task = feeds[prov]
+        logger.info(f"🔀 Trading venue → {prov.upper()}: {n} symbols replayed in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return True
+
     # Wire hooks into ConfigManager
     config_manager.set_hooks(
         stop_all_strategies=_hook_stop_all_strategies,
         stop_streams=_hook_stop_streams,
         start_streams=_hook_start_streams,
         reset_book_tracker=_hook_reset_book_tracker,
+        switch_venue=_hook_switch_venue,
     )
 
     # Initialize ConfigManager state and start initial streams
@@ -336,15 +412,20 @@ async def lifespan(app: FastAPI):
 #         print(f"⚠️ ML logger init failed (non-critical): {e}")
 
 # ────────────────────── Telegram Service ──────────────────────
+    alert_outbox = None
     try:
-        from app.services.telegram_bot import get_telegram_service
-        telegram = get_telegram_service()
-        if telegram.is_enabled():
-            test_result = await telegram.test_connection()
-            if test_result:
-                print("✅ Telegram bot connected and ready")
-            else:
-                print("⚠️ Telegram bot initialized but test failed")
+        from app.services.alert_outbox import get_alert_outbox
+        alert_outbox = get_alert_outbox()
+        if alert_outbox.is_enabled():
+            # delivered by the outbox worker — startup never waits on the Telegram API
+            await alert_outbox.start()
+            alert_outbox.enqueue(
+                "INFO", "Telegram Bot Connected",
+                f"Trading bot started ({initial_provider.upper()} / {initial_mode}).",
+                key=f"startup:{int(time.time())}",  # per boot — restarts are not deduped
+                force=True,  # like the old test_connection: sent even in quiet hours
+            )
+            print("✅ Telegram alert outbox started")
         else:
             print("ℹ️ Telegram alerts disabled")
     except Exception as e:
@@ -355,10 +436,14 @@ async def lifespan(app: FastAPI):
     try:
         scheduler = get_scheduler()
         await scheduler.start()
-        print("✅ Task scheduler started (daily reports, risk resets)")
+        print("✅ Task scheduler started (daily reports, risk resets, pnl rollup)")
     except Exception as e:
         print(f"⚠️ Task scheduler start failed (non-critical): {e}")
 
+    # purge expired idempotency keys (LRU + SQLite table)
+    with suppress(Exception):
+        await idempotency_mgr.start()
+
     print("🚀 Application startup complete (managed by ConfigManager).")
     try:
         yield
@@ -370,6 +455,10 @@ async def lifespan(app: FastAPI):
         
         with suppress(Exception):
             await idempotency_mgr.stop()
+        # one last delivery attempt for queued alerts
+        if alert_outbox is not None:
+            with suppress(Exception):
+                await asyncio.wait_for(alert_outbox.stop(drain=True), timeout=10)
         with suppress(Exception):
             await _hook_stop_streams()
         # Stop ML logger
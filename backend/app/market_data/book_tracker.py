@@ -4,14 +4,39 @@ from __future__ import annotations
 import asyncio
 import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Sequence, Tuple, AsyncIterator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, AsyncIterator
 
-# settings for default absorption window
+from app.infra.tracing import get_tracer
+
+# settings for default absorption window and the depth@bps bands precomputed per update
 try:
     from app.config.settings import settings
     _DEFAULT_ABS_BPS = float(getattr(settings, "absorption_x_bps", 5.0) or 5.0)
+    _BANDS_RAW = str(getattr(settings, "absorption_bands_bps", "") or "")
 except Exception:
     _DEFAULT_ABS_BPS = 5.0
+    _BANDS_RAW = ""
+
+
+def _parse_bands(raw: str) -> Tuple[float, ...]:
+    out = {_DEFAULT_ABS_BPS}
+    for part in raw.replace(";", ",").split(","):
+        try:
+            v = float(part)
+        except ValueError:
+            continue
+        if v > 0:
+            out.add(v)
+    return tuple(sorted(out))
+
+
+ABSORPTION_BANDS_BPS: Tuple[float, ...] = _parse_bands(_BANDS_RAW or "5,10")
+
+try:
+    from app.infra.metrics import book_metrics_invalidations_total
+    _METRICS_OK = True
+except Exception:
+    _METRICS_OK = False
 
 
 # ───────────────────────────── helpers ─────────────────────────────
@@ -33,9 +58,50 @@ def bps(a: float, b: float) -> float:
     return (a - b) / m * 10_000.0
 
 
+def _band_key(x_bps: float) -> float | int:
+    return int(x_bps) if float(x_bps).is_integer() else float(x_bps)
+
+
+def depth_at_bps(
+    bids: Sequence[Tuple[float, float]],
+    asks: Sequence[Tuple[float, float]],
+    mid: float,
+    bands_bps: Sequence[float],
+) -> Dict[float | int, Dict[str, float]]:
+    """
+    USD notional within ±X bps of mid for every band, one pass per side.
+    bids DESC / asks ASC; bands are processed widest-last so each level is
+    visited once. Same definition as the absorption_* fields.
+    """
+    out: Dict[float | int, Dict[str, float]] = {}
+    bands = sorted(b for b in bands_bps if b > 0)
+    if mid <= 0 or not bands:
+        return out
+    for side, levels in (("bid_usd", bids), ("ask_usd", asks)):
+        i, acc = 0, 0.0
+        n = len(levels)
+        for b in bands:
+            if side == "bid_usd":
+                floor = mid * (1.0 - b / 10_000.0)
+                while i < n and levels[i][0] >= floor:
+                    p, q = levels[i]
+                    if p > 0 and q > 0:
+                        acc += p * q
+                    i += 1
+            else:
+                cap = mid * (1.0 + b / 10_000.0)
+                while i < n and levels[i][0] <= cap:
+                    p, q = levels[i]
+                    if p > 0 and q > 0:
+                        acc += p * q
+                    i += 1
+            out.setdefault(_band_key(b), {})[side] = acc
+    return out
+
+
 # ───────────────────────────── models ─────────────────────────────
 
-@dataclass
+@dataclass(frozen=True)
 class TopOfBook:
     bid: float = 0.0
     bid_qty: float = 0.0
@@ -44,12 +110,13 @@ class TopOfBook:
     ts_ms: int = 0  # биржевой/серверный timestamp последнего апдейта
 
 
-@dataclass
+@dataclass(frozen=True)
 class L2Book:
     """
     Лёгкий L2-срез стакана (например L10).
     bids: отсортированы по цене убыванию (best -> worse)
     asks: отсортированы по цене возрастанию (best -> worse)
+    Объект не меняется после публикации: апдейт создаёт новый L2Book.
     """
     bids: List[Tuple[float, float]] = field(default_factory=list)  # (price, qty)
     asks: List[Tuple[float, float]] = field(default_factory=list)
@@ -61,6 +128,10 @@ class SymbolState:
     top: TopOfBook = field(default_factory=TopOfBook)
     l2: Optional[L2Book] = None
     depth_enabled: bool = True  # keep for API compatibility; we no longer gate updates on it
+    # snapshot published by the last writer (metrics at the default absorption band);
+    # read-only for consumers, replaced — never mutated — on the next update
+    snap: Optional[Dict[str, Any]] = None
+    version: int = 0
 
 
 # ───────────────────────────── tracker ─────────────────────────────
@@ -75,13 +146,27 @@ class BookTracker:
     - subscribe()/unsubscribe() — подписки для SSE/WS (через очередь)
     - subscribe_stream() — асинхронный генератор событий (удобно для SSE/WS)
     - compute_metrics(...) — считает spread, spread_bps, imbalance, microprice, absorption@Xbps
+
+    Copy-on-write: writers build new TopOfBook/L2Book objects, compute the
+    metrics once and publish the snapshot dict on SymbolState. Everything
+    runs on the event loop with no await between reading the old state and
+    publishing the new one, so neither writers nor readers take a lock;
+    a reader sees either the previous or the new snapshot, never a mix.
+    Readers get the shared snapshot itself and must not modify it.
+    The subscriber list is also replaced rather than mutated, so broadcast
+    iterates a stable list outside any critical section.
     """
 
     def __init__(self) -> None:
         self._states: Dict[str, SymbolState] = {}
-        self._lock = asyncio.Lock()
         self._subscribers: List[asyncio.Queue] = []
         self._sub_qsize = 256  # per-subscriber backpressure cap
+        # sync-колбэки на каждый апдейт (feature store и т.п.)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # derived-metrics cache accounting
+        self.invalidations = 0   # snapshots recomputed because the book changed
+        self.cache_hits = 0      # reads served from the published snapshot
+        self.cache_misses = 0    # reads at a band outside ABSORPTION_BANDS_BPS
 
     # ───────────────── subscriptions (для SSE/WS) ─────────────────
 
@@ -91,14 +176,12 @@ class BookTracker:
         удаляется самый старый элемент (чтобы не расти по памяти).
         """
         q: asyncio.Queue = asyncio.Queue(maxsize=self._sub_qsize)
-        async with self._lock:
-            self._subscribers.append(q)
+        self._subscribers = [*self._subscribers, q]
         return q
 
     async def unsubscribe(self, q: asyncio.Queue) -> None:
-        async with self._lock:
-            if q in self._subscribers:
-                self._subscribers.remove(q)
+        if q in self._subscribers:
+            self._subscribers = [x for x in self._subscribers if x is not q]
 
     async def subscribe_stream(self) -> AsyncIterator[Dict[str, Any]]:
         """
@@ -113,32 +196,62 @@ class BookTracker:
         finally:
             await self.unsubscribe(q)
 
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Регистрирует синхронный колбэк, который получает каждый snapshot
+        после апдейта. Колбэк должен быть дешёвым и не бросать исключений.
+        """
+        if fn not in self._listeners:
+            self._listeners = [*self._listeners, fn]
+
+    def remove_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        if fn in self._listeners:
+            self._listeners = [x for x in self._listeners if x is not fn]
+
     async def _broadcast(self, payload: Dict[str, Any]) -> None:
         """
         Рассылает событие всем подписчикам. Если очередь переполнена — дропаем
         самый старый элемент и кладём новый (держим стрим «свежим»).
         """
+        for fn in self._listeners:
+            try:
+                fn(payload)
+            except Exception:
+                pass
+        subs = self._subscribers
         dead: List[asyncio.Queue] = []
-        async with self._lock:
-            for q in self._subscribers:
-                try:
-                    if q.full():
-                        _ = q.get_nowait()  # drop oldest to keep latency low
-                    q.put_nowait(payload)
-                except Exception:
-                    dead.append(q)
-            if dead:
-                self._subscribers = [q for q in self._subscribers if q not in dead]
+        for q in subs:
+            try:
+                if q.full():
+                    _ = q.get_nowait()  # drop oldest to keep latency low
+                q.put_nowait(payload)
+            except Exception:
+                dead.append(q)
+        if dead:
+            self._subscribers = [q for q in self._subscribers if q not in dead]
 
     # ───────────────── updates ─────────────────
 
+    def _publish(self, sym: str, st: SymbolState) -> Dict[str, Any]:
+        """Compute the snapshot once for the new state and make it the one readers get."""
+        snap = self._snapshot(sym, st)
+        st.snap = snap
+        st.version += 1
+        self.invalidations += 1
+        if _METRICS_OK:
+            try:
+                book_metrics_invalidations_total.inc()
+            except Exception:
+                pass
+        get_tracer().mark(sym, "book")
+        return snap
+
     async def enable_depth(self, symbol: str, enabled: bool = True) -> None:
         sym = symbol.upper()
-        async with self._lock:
-            st = self._states.setdefault(sym, SymbolState())
-            st.depth_enabled = bool(enabled)
-            if st.l2 is None and enabled:
-                st.l2 = L2Book()
+        st = self._states.setdefault(sym, SymbolState())
+        st.depth_enabled = bool(enabled)
+        if st.l2 is None and enabled:
+            st.l2 = L2Book()
 
     async def update_book_ticker(
         self,
@@ -151,17 +264,45 @@ class BookTracker:
     ) -> None:
         sym = symbol.upper()
         t = ts_ms if ts_ms is not None else now_ms()
-        async with self._lock:
+        st = self._states.setdefault(sym, SymbolState())
+        st.top = TopOfBook(
+            bid=max(0.0, float(bid)),
+            bid_qty=max(0.0, float(bid_qty)),
+            ask=max(0.0, float(ask)),
+            ask_qty=max(0.0, float(ask_qty)),
+            ts_ms=int(t),
+        )
+        await self._broadcast(self._publish(sym, st))
+
+    async def update_book_tickers(
+        self,
+        rows: Sequence[Tuple[str, float, float, float, float, Optional[int]]],
+    ) -> int:
+        """
+        Batched top-of-book update (bulk REST snapshot): rows whose
+        bid/ask/qty did not change are skipped and not broadcast.
+        Returns the number of symbols that changed.
+        """
+        payloads: List[Dict[str, Any]] = []
+        t_default = now_ms()
+        for symbol, bid, bid_qty, ask, ask_qty, ts_ms in rows:
+            sym = symbol.upper()
             st = self._states.setdefault(sym, SymbolState())
-            st.top = TopOfBook(
+            top = TopOfBook(
                 bid=max(0.0, float(bid)),
                 bid_qty=max(0.0, float(bid_qty)),
                 ask=max(0.0, float(ask)),
                 ask_qty=max(0.0, float(ask_qty)),
-                ts_ms=int(t),
+                ts_ms=int(ts_ms if ts_ms is not None else t_default),
             )
-            payload = self._snapshot_locked(sym, st)
-        await self._broadcast(payload)
+            old = st.top
+            if (old.bid, old.bid_qty, old.ask, old.ask_qty) == (top.bid, top.bid_qty, top.ask, top.ask_qty):
+                continue
+            st.top = top
+            payloads.append(self._publish(sym, st))
+        for payload in payloads:
+            await self._broadcast(payload)
+        return len(payloads)
 
     async def update_partial_depth(
         self,
@@ -191,49 +332,48 @@ class BookTracker:
         nbids.sort(key=lambda x: x[0], reverse=True)
         nasks.sort(key=lambda x: x[0])
 
-        nbids = nbids[:keep_levels]
-        nasks = nasks[:keep_levels]
-
-        async with self._lock:
-            st = self._states.setdefault(sym, SymbolState())
-            if st.l2 is None:
-                st.l2 = L2Book()
-            # we no longer gate on st.depth_enabled — always accept updates
-            st.l2.bids = nbids
-            st.l2.asks = nasks
-            st.l2.ts_ms = int(t)
-            payload = self._snapshot_locked(sym, st)
-        await self._broadcast(payload)
+        st = self._states.setdefault(sym, SymbolState())
+        # we no longer gate on st.depth_enabled — always accept updates
+        st.l2 = L2Book(bids=nbids[:keep_levels], asks=nasks[:keep_levels], ts_ms=int(t))
+        await self._broadcast(self._publish(sym, st))
 
     # Совместимость с прежним REST-пуллером (last, bid, ask)
     async def set_quote(self, symbol: str, last: float | None, bid: float | None, ask: float | None) -> None:
         sym = symbol.upper()
-        t = now_ms()
-        b = float(bid or 0.0)
-        a = float(ask or 0.0)
-        async with self._lock:
-            st = self._states.setdefault(sym, SymbolState())
-            # qty неизвестны — поставим 0.0
-            st.top = TopOfBook(
-                bid=b,
-                bid_qty=0.0,
-                ask=a,
-                ask_qty=0.0,
-                ts_ms=t,
-            )
-            payload = self._snapshot_locked(sym, st)
-        await self._broadcast(payload)
+        st = self._states.setdefault(sym, SymbolState())
+        # qty неизвестны — поставим 0.0
+        st.top = TopOfBook(
+            bid=float(bid or 0.0),
+            bid_qty=0.0,
+            ask=float(ask or 0.0),
+            ask_qty=0.0,
+            ts_ms=now_ms(),
+        )
+        await self._broadcast(self._publish(sym, st))
 
     # ───────────────── reads ─────────────────
 
+    def _read(self, sym: str, xbps: float) -> Dict[str, Any]:
+        st = self._states.get(sym)
+        if not st:
+            return self._empty_snapshot(sym)
+        snap = st.snap
+        if snap is not None:
+            if xbps == _DEFAULT_ABS_BPS:
+                self.cache_hits += 1
+                return snap
+            band = snap["depth_at_bps"].get(_band_key(xbps))
+            if band is not None:
+                self.cache_hits += 1
+                return {**snap, "absorption_bid_usd": band["bid_usd"], "absorption_ask_usd": band["ask_usd"]}
+        # band outside the precomputed set: computed from the (immutable) published top/l2
+        self.cache_misses += 1
+        return self._snapshot(sym, st, xbps)
+
     async def get_quote(self, symbol: str, absorption_x_bps: Optional[float] = None) -> Dict[str, Any]:
-        sym = symbol.upper()
+        """Latest published snapshot (shared, read-only) — no lock, no copy."""
         xbps = float(_DEFAULT_ABS_BPS if absorption_x_bps is None else absorption_x_bps)
-        async with self._lock:
-            st = self._states.get(sym)
-            if not st:
-                return self._empty_snapshot(sym)
-            return self._snapshot_locked(sym, st, xbps)
+        return self._read(symbol.upper(), xbps)
 
     async def get_quotes(
         self,
@@ -244,35 +384,41 @@ class BookTracker:
         Возвращает список котировок/метрик для указанного набора символов (или для всех известных).
         """
         xbps = float(_DEFAULT_ABS_BPS if absorption_x_bps is None else absorption_x_bps)
-        syms: List[str]
-        if symbols:
-            syms = [s.upper() for s in symbols]
-        else:
-            syms = list(self._states.keys())
-
-        out: List[Dict[str, Any]] = []
-        async with self._lock:
-            for sym in syms:
-                st = self._states.get(sym)
-                if not st:
-                    out.append(self._empty_snapshot(sym))
-                    continue
-                out.append(self._snapshot_locked(sym, st, xbps))
-        return out
+        syms = [s.upper() for s in symbols] if symbols else list(self._states.keys())
+        return [self._read(sym, xbps) for sym in syms]
+
+    def depth_usd(self, symbol: str, x_bps: float = _DEFAULT_ABS_BPS) -> Optional[float]:
+        """Bid+ask USD within ±x_bps of mid from the published snapshot; None without a live L2 book."""
+        sym = symbol.upper()
+        st = self._states.get(sym)
+        if st is None or st.l2 is None or not (st.l2.bids or st.l2.asks):
+            return None
+        q = self._read(sym, float(x_bps))
+        if not q.get("mid"):
+            return None
+        return float(q["absorption_bid_usd"]) + float(q["absorption_ask_usd"])
 
     # Совместимость с роутером /api/market/quotes
     async def get_all(self) -> List[Dict[str, Any]]:
         return await self.get_quotes()
 
     async def reset_symbol(self, symbol: str) -> None:
-        async with self._lock:
-            self._states.pop(symbol.upper(), None)
+        self._states.pop(symbol.upper(), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._states),
+            "bands_bps": list(ABSORPTION_BANDS_BPS),
+            "invalidations": self.invalidations,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
 
     # ───────────────── metrics & snapshots ─────────────────
 
-    def _snapshot_locked(self, sym: str, st: SymbolState, absorption_x_bps: float = _DEFAULT_ABS_BPS) -> Dict[str, Any]:
+    def _snapshot(self, sym: str, st: SymbolState, absorption_x_bps: float = _DEFAULT_ABS_BPS) -> Dict[str, Any]:
         top = st.top
-        metrics = self._compute_metrics_locked(st, absorption_x_bps=absorption_x_bps)
+        metrics = self._compute_metrics(st, absorption_x_bps=absorption_x_bps)
         return {
             "symbol": sym,
             "bid": top.bid,
@@ -298,16 +444,21 @@ class BookTracker:
             "microprice": 0.0,
             "absorption_bid_usd": 0.0,
             "absorption_ask_usd": 0.0,
+            "depth_imbalance": 0.5,
+            "depth_at_bps": {},
             "ts_ms": 0,
         }
 
-    def _compute_metrics_locked(self, st: SymbolState, absorption_x_bps: float = _DEFAULT_ABS_BPS) -> Dict[str, Any]:
+    def _compute_metrics(self, st: SymbolState, absorption_x_bps: float = _DEFAULT_ABS_BPS) -> Dict[str, Any]:
         """
         Расчёт метрик для стратегии:
         - mid, spread, spread_bps
         - imbalance
         - microprice
         - absorption_bid/ask (в USD) до смещения mid на X bps
+        - depth_at_bps: {band: {bid_usd, ask_usd}} для ABSORPTION_BANDS_BPS (+X)
+        - depth_imbalance: abs_bid / (abs_bid + abs_ask) в полосе X (0.5 без стакана)
+        Считается один раз на апдейт (см. _publish), читатели получают готовое.
         """
         top = st.top
         bid, ask = float(top.bid), float(top.ask)
@@ -326,10 +477,16 @@ class BookTracker:
             microprice = (ask * bid_q + bid * ask_q) / denom
 
         # absorption оценим на основе L10, если доступно
+        depth: Dict[float | int, Dict[str, float]] = {}
         abs_bid_usd, abs_ask_usd = 0.0, 0.0
         if st.l2 and mid > 0 and absorption_x_bps > 0:
-            abs_bid_usd = self._absorption_notional_bid(st.l2.bids, mid, absorption_x_bps)
-            abs_ask_usd = self._absorption_notional_ask(st.l2.asks, mid, absorption_x_bps)
+            bands = ABSORPTION_BANDS_BPS
+            if absorption_x_bps not in bands:
+                bands = (*bands, absorption_x_bps)
+            depth = depth_at_bps(st.l2.bids, st.l2.asks, mid, bands)
+            band = depth[_band_key(absorption_x_bps)]
+            abs_bid_usd, abs_ask_usd = band["bid_usd"], band["ask_usd"]
+        abs_total = abs_bid_usd + abs_ask_usd
 
         return {
             "mid": mid,
@@ -339,42 +496,10 @@ class BookTracker:
             "microprice": microprice,
             "absorption_bid_usd": abs_bid_usd,
             "absorption_ask_usd": abs_ask_usd,
+            "depth_imbalance": (abs_bid_usd / abs_total) if abs_total > 0 else 0.5,
+            "depth_at_bps": depth,
         }
 
-    @staticmethod
-    def _absorption_notional_bid(bids: Sequence[Tuple[float, float]], mid: float, x_bps: float) -> float:
-        """
-        Сколько можно ПРОДАТЬ (ударяя по bid-уровням) до того, как цена mid
-        сместится на X bps вниз. threshold = mid * (1 - X_bps/10000).
-        """
-        if mid <= 0 or x_bps <= 0:
-            return 0.0
-        threshold = mid * (1.0 - x_bps / 10_000.0)
-        notional = 0.0
-        for price, qty in bids:
-            if price < threshold:
-                break
-            if price > 0 and qty > 0:
-                notional += price * qty
-        return notional
-
-    @staticmethod
-    def _absorption_notional_ask(asks: Sequence[Tuple[float, float]], mid: float, x_bps: float) -> float:
-        """
-        Сколько можно КУПИТЬ (ударяя по ask-уровням) до того, как mid
-        сместится на X bps вверх. threshold = mid * (1 + X_bps/10000).
-        """
-        if mid <= 0 or x_bps <= 0:
-            return 0.0
-        threshold = mid * (1.0 + x_bps / 10_000.0)
-        notional = 0.0
-        for price, qty in asks:
-            if price > threshold:
-                break
-            if price > 0 and qty > 0:
-                notional += price * qty
-        return notional
-
 
 # ───────────────────────────── singleton & WS-callbacks ─────────────────────────────
 
@@ -386,6 +511,12 @@ async def on_book_ticker(symbol: str, bid: float, bid_qty: float, ask: float, as
     """
     await book_tracker.update_book_ticker(symbol, bid, bid_qty, ask, ask_qty, ts_ms=ts_ms)
 
+async def on_book_tickers(rows: Sequence[Tuple[str, float, float, float, float, Optional[int]]]) -> int:
+    """
+    Batch-обёртка для bulk REST snapshot: (symbol, bid, bid_qty, ask, ask_qty, ts_ms)
+    """
+    return await book_tracker.update_book_tickers(rows)
+
 async def on_partial_depth(symbol: str, bids: Sequence[Tuple[float, float]], asks: Sequence[Tuple[float, float]], ts_ms: Optional[int]) -> None:
     """
     WS callback-обёртка: обновляет лёгкий стакан (совместима с ws_client.py)
@@ -0,0 +1,328 @@
+# app/market_data/daemon.py
+"""
+Market-data daemon mode.
+
+    python -m app.market_data.daemon --symbols BTCUSDT,ETHUSDT
+
+The daemon is the only process that talks to the exchange: it runs the WS
+feeds (through the subscription registry) and the REST backstops, and
+publishes every BookTracker update into the shared-memory quote table
+(`shm_quotes`). API / strategy workers start with MARKET_DATA_MODE=attach:
+instead of opening streams they run a `QuoteMirror` that copies changed
+slots into their local BookTracker, so SSE, strategy and scanner code keep
+working unchanged, and several uvicorn workers can share one feed.
+
+Extra symbols requested in a worker (`ensure_symbols_subscribed`) are
+written to the worker's want-file; the daemon acquires them under the
+consumer "worker:<pid>" and releases them when the file changes or the
+worker exits.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from app.config.settings import settings
+from app.market_data.shm_quotes import (
+    QuoteTableReader,
+    QuoteTableWriter,
+    read_wants,
+    slot_to_quote,
+    write_wants,
+)
+
+logger = logging.getLogger(__name__)
+
+DAEMON_CHANNELS = ["BOOK_TICKER", "DEALS", "DEPTH_LIMIT"]
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def market_data_mode() -> str:
+    """inproc (default: streams in this process) | publish (daemon) | attach (read the daemon's table)."""
+    return str(getattr(settings, "market_data_mode", "inproc") or "inproc").strip().lower()
+
+
+def table_path() -> str:
+    from app.market_data.shm_quotes import default_path
+
+    return str(getattr(settings, "md_shm_path", "") or "") or default_path()
+
+
+# ═══════════════════════════════ daemon side ═══════════════════════════════
+
+class QuotePublisher:
+    """BookTracker listener → shared-memory table (runs inside the tracker's update path)."""
+
+    def __init__(self, writer: QuoteTableWriter, tracker: Any):
+        self.writer = writer
+        self.tracker = tracker
+        self._depth_ts: Dict[str, int] = {}
+        self._tape: Dict[str, tuple] = {}
+        self.dropped = 0
+
+    def on_update(self, payload: Dict[str, Any]) -> None:
+        sym = payload.get("symbol") or ""
+        if not sym:
+            return
+        ok = self.writer.write_top(
+            sym,
+            float(payload.get("bid") or 0.0),
+            float(payload.get("bidQty") or 0.0),
+            float(payload.get("ask") or 0.0),
+            float(payload.get("askQty") or 0.0),
+            int(payload.get("ts_ms") or 0),
+        )
+        if not ok:
+            self.dropped += 1
+            return
+        st = getattr(self.tracker, "_states", {}).get(sym)
+        l2 = getattr(st, "l2", None)
+        if l2 is not None and l2.ts_ms and self._depth_ts.get(sym) != l2.ts_ms:
+            self._depth_ts[sym] = l2.ts_ms
+            self.writer.write_depth(sym, l2.bids, l2.asks, int(l2.ts_ms))
+
+    def publish_tape(self, now_ms: int) -> int:
+        """Tape aggregates are per-minute numbers kept on the tracker by the WS deals handler."""
+        usdpm = getattr(self.tracker, "usdpm", None) or {}
+        tpm = getattr(self.tracker, "tpm", None) or {}
+        n = 0
+        for sym, u in list(usdpm.items()):
+            cur = (float(u or 0.0), float(tpm.get(sym, 0.0) or 0.0))
+            if self._tape.get(sym) == cur:
+                continue
+            if self.writer.write_tape(sym, cur[0], cur[1], now_ms):
+                self._tape[sym] = cur
+                n += 1
+        return n
+
+
+async def run_daemon(
+    symbols: Iterable[str],
+    *,
+    path: Optional[str] = None,
+    capacity: Optional[int] = None,
+    poll_sec: float = 1.0,
+) -> None:
+    from app.services.book_tracker import book_tracker, ensure_symbols_subscribed, release_symbols
+
+    if market_data_mode() == "attach":
+        raise RuntimeError("market-data daemon cannot run with MARKET_DATA_MODE=attach")
+    path = path or table_path()
+    writer = QuoteTableWriter(path, capacity or int(getattr(settings, "md_shm_capacity", 512)))
+    pub = QuotePublisher(writer, book_tracker)
+    book_tracker.add_listener(pub.on_update)
+    logger.info(f"📤 Market-data daemon publishing to {path} (capacity={writer.capacity})")
+
+    base = sorted({s.strip().upper() for s in symbols if s and s.strip()})
+    if base:
+        await ensure_symbols_subscribed(base, consumer="daemon", channels=DAEMON_CHANNELS)
+
+    held: Dict[int, Set[str]] = {}
+    try:
+        while True:
+            wants = read_wants(path)
+            for pid in list(held):
+                if pid not in wants:
+                    await release_symbols(None, consumer=f"worker:{pid}")
+                    held.pop(pid, None)
+            for pid, syms in wants.items():
+                old = held.get(pid, set())
+                if syms - old:
+                    await ensure_symbols_subscribed(sorted(syms - old), consumer=f"worker:{pid}", channels=DAEMON_CHANNELS)
+                if old - syms:
+                    await release_symbols(sorted(old - syms), consumer=f"worker:{pid}")
+                held[pid] = syms
+            pub.publish_tape(_now_ms())
+            writer.heartbeat()
+            await asyncio.sleep(poll_sec)
+    finally:
+        book_tracker.remove_listener(pub.on_update)
+        with suppress(Exception):
+            from app.market_data.subscriptions import get_subscription_registry
+
+            await get_subscription_registry().stop()
+        writer.close()
+
+
+# ═══════════════════════════════ worker side ═══════════════════════════════
+
+class QuoteMirror:
+    """
+    Attach-mode reader: polls the table every `interval_sec` and replays
+    changed slots into this process's BookTracker. Also owns this worker's
+    want-file (ref-counted per consumer, like the subscription registry).
+    """
+
+    def __init__(self, path: Optional[str] = None, interval_sec: float = 0.05):
+        self.path = path or table_path()
+        self.interval_sec = interval_sec
+        self._reader: Optional[QuoteTableReader] = None
+        self._writer_pid = 0
+        self._seqs: Optional[np.ndarray] = None
+        self._last: Dict[str, tuple] = {}      # sym → (ts_ms, depth_ts_ms, tape_ts_ms) replayed
+        self._holds: Dict[str, Set[str]] = {}  # consumer → symbols
+        self._task: Optional[asyncio.Task] = None
+        self.replayed = 0
+
+    # wants
+    def _publish_wants(self) -> None:
+        wanted: Set[str] = set().union(*self._holds.values()) if self._holds else set()
+        with suppress(Exception):
+            write_wants(self.path, wanted)
+
+    async def want(self, symbols: Iterable[str], consumer: str = "default") -> None:
+        syms = {s.strip().upper() for s in symbols if s and s.strip()}
+        if not syms - self._holds.get(consumer, set()):
+            return
+        self._holds.setdefault(consumer, set()).update(syms)
+        self._publish_wants()
+        self.start()
+
+    async def release(self, symbols: Optional[Iterable[str]] = None, consumer: str = "default") -> None:
+        if consumer not in self._holds:
+            return
+        if symbols is None:
+            self._holds.pop(consumer, None)
+        else:
+            self._holds[consumer].difference_update(s.strip().upper() for s in symbols if s)
+            if not self._holds[consumer]:
+                self._holds.pop(consumer, None)
+        self._publish_wants()
+
+    # lifecycle
+    def start(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with suppress(BaseException):
+                await self._task
+        self._task = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self._seqs = None
+        self._last.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self._attach():
+                    await asyncio.sleep(1.0)
+                    continue
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Quote mirror error: {e}")
+                self._reader = None
+                await asyncio.sleep(1.0)
+                continue
+            await asyncio.sleep(self.interval_sec)
+
+    def _attach(self) -> bool:
+        if self._reader is not None:
+            # a restarted writer os.replace()s a fresh file: our mapping would
+            # keep showing the old table (and its old writer_pid) forever
+            if self._reader.is_current() and self._reader.writer_pid() == self._writer_pid:
+                return True
+            self._reader.close()   # daemon restarted: map the new table
+            self._reader = None
+        try:
+            self._reader = QuoteTableReader(self.path)
+        except (OSError, ValueError):
+            return False
+        self._writer_pid = self._reader.writer_pid()
+        self._seqs = None
+        self._last.clear()
+        logger.info(f"📥 Attached to market-data table {self.path} (writer pid={self._writer_pid})")
+        return True
+
+    async def sync_once(self) -> int:
+        """Replay every slot that changed since the previous call; returns how many were applied."""
+        from app.services.book_tracker import book_tracker
+
+        if not self._attach():
+            return 0
+        reader = self._reader
+        assert reader is not None
+        seqs = reader.seqs()
+        n = 0
+        for _, rec in reader.changed(self._seqs):
+            q = slot_to_quote(rec)
+            sym = q["symbol"]
+            prev = self._last.get(sym, (0, 0, 0))
+            if q["ts_ms"] and q["ts_ms"] != prev[0]:
+                await book_tracker.update_book_ticker(sym, q["bid"], q["bidQty"], q["ask"], q["askQty"], ts_ms=q["ts_ms"])
+            if q["depth_ts_ms"] and q["depth_ts_ms"] != prev[1]:
+                await book_tracker.update_partial_depth(sym, q["bids"], q["asks"], ts_ms=q["depth_ts_ms"])
+            if q["tape_ts_ms"] and q["tape_ts_ms"] != prev[2]:
+                for attr, val in (("usdpm", q["usdpm"]), ("tpm", q["tpm"])):
+                    if not hasattr(book_tracker, attr):
+                        setattr(book_tracker, attr, {})
+                    getattr(book_tracker, attr)[sym] = val
+            self._last[sym] = (q["ts_ms"], q["depth_ts_ms"], q["tape_ts_ms"])
+            n += 1
+        self._seqs = seqs
+        self.replayed += n
+        return n
+
+    def get_stats(self) -> Dict[str, Any]:
+        r = self._reader
+        return {
+            "mode": "attach",
+            "path": self.path,
+            "attached": r is not None,
+            "writer_pid": self._writer_pid,
+            "symbols": r.n_used() if r is not None else 0,
+            "heartbeat_age_ms": r.heartbeat_age_ms() if r is not None else None,
+            "wanted": sorted(set().union(*self._holds.values())) if self._holds else [],
+            "replayed": self.replayed,
+        }
+
+
+_MIRROR: Optional[QuoteMirror] = None
+
+
+def get_quote_mirror() -> QuoteMirror:
+    global _MIRROR
+    if _MIRROR is None:
+        _MIRROR = QuoteMirror()
+    return _MIRROR
+
+
+# ═══════════════════════════════ entrypoint ═══════════════════════════════
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Market-data daemon: exchange feeds → shared-memory quote table")
+    ap.add_argument("--symbols", default=",".join(getattr(settings, "symbols", []) or []),
+                    help="comma-separated base symbols (default: SYMBOLS from settings)")
+    ap.add_argument("--path", default=None, help="table file (default: MD_SHM_PATH or /dev/shm/mexc_bot_quotes.tbl)")
+    ap.add_argument("--capacity", type=int, default=None, help="max symbols in the table")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    syms = [s for s in args.symbols.split(",") if s.strip()]
+    try:
+        asyncio.run(run_daemon(syms, path=args.path, capacity=args.capacity))
+    except KeyboardInterrupt:
+        logger.info("Interrupted by user")
+
+
+if __name__ == "__main__":
+    main()
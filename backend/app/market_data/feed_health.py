@@ -0,0 +1,133 @@
+# app/market_data/feed_health.py
+"""
+Feed-health supervisor — decides per symbol whether quotes come from the
+WS push feed or need REST polling.
+
+Every WS book-ticker / depth update calls `mark(symbol, kind)`. A
+(symbol, kind) pair starts on "rest" and switches:
+
+- rest → ws  once WS updates have arrived without a gap longer than
+  `fresh_sec` for at least `recover_sec`;
+- ws → rest  when the last WS update is older than `stale_after_sec`.
+
+The gap between the two thresholds is the hysteresis: a feed that
+flickers around one value does not toggle REST polling on every cycle.
+REST loops ask `rest_symbols(symbols, kind)` which symbols still need them.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config.settings import settings
+
+KINDS: Tuple[str, ...] = ("ticker", "depth")
+
+
+@dataclass
+class _FeedState:
+    source: str = "rest"
+    last_ws: float = 0.0          # monotonic ts of the latest WS update
+    streak_start: float = 0.0     # start of the current gap-free WS run
+    switches: int = 0
+
+
+class FeedHealthSupervisor:
+    """Per-(symbol, kind) WS freshness with hysteresis between WS and REST sources."""
+
+    def __init__(
+        self,
+        *,
+        stale_after_sec: Optional[float] = None,
+        recover_sec: Optional[float] = None,
+        fresh_sec: Optional[float] = None,
+    ):
+        self.stale_after_sec = float(
+            stale_after_sec if stale_after_sec is not None else getattr(settings, "feed_stale_after_sec", 5.0)
+        )
+        self.recover_sec = float(
+            recover_sec if recover_sec is not None else getattr(settings, "feed_recover_sec", 3.0)
+        )
+        # a gap longer than this breaks the recovery streak
+        self.fresh_sec = float(fresh_sec if fresh_sec is not None else min(2.0, self.stale_after_sec))
+        self._state: Dict[Tuple[str, str], _FeedState] = {}
+
+    # ─────────────────────────── updates ───────────────────────────
+
+    def mark(self, symbol: str, kind: str, now: Optional[float] = None) -> None:
+        """Record a WS update (hot path: two dict ops and a float compare)."""
+        now = time.monotonic() if now is None else now
+        key = ((symbol or "").upper(), kind)
+        st = self._state.get(key)
+        if st is None:
+            st = self._state[key] = _FeedState(streak_start=now)
+        elif now - st.last_ws > self.fresh_sec:
+            st.streak_start = now
+        st.last_ws = now
+
+    def evaluate(self, symbol: str, kind: str, now: Optional[float] = None) -> str:
+        """Current source ("ws" | "rest") after applying the hysteresis rules."""
+        now = time.monotonic() if now is None else now
+        key = ((symbol or "").upper(), kind)
+        st = self._state.get(key)
+        if st is None:
+            return "rest"
+        age = now - st.last_ws
+        if st.source == "ws":
+            if age > self.stale_after_sec:
+                st.source = "rest"
+                st.switches += 1
+        elif age <= self.fresh_sec and now - st.streak_start >= self.recover_sec:
+            st.source = "ws"
+            st.switches += 1
+        return st.source
+
+    def rest_symbols(self, symbols: Iterable[str], kind: str, now: Optional[float] = None) -> List[str]:
+        """Subset of `symbols` whose `kind` feed must be polled over REST right now."""
+        now = time.monotonic() if now is None else now
+        return [s for s in symbols if self.evaluate(s, kind, now) == "rest"]
+
+    def forget(self, symbols: Iterable[str]) -> None:
+        for s in symbols:
+            for k in KINDS:
+                self._state.pop(((s or "").upper(), k), None)
+
+    def reset(self) -> None:
+        self._state.clear()
+
+    # ─────────────────────────── reporting ───────────────────────────
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        symbols: Dict[str, Dict[str, Any]] = {}
+        for (sym, kind) in sorted(self._state):
+            st = self._state[(sym, kind)]
+            src = self.evaluate(sym, kind, now)
+            symbols.setdefault(sym, {})[kind] = {
+                "source": src,
+                "ws_age_ms": int((now - st.last_ws) * 1000) if st.last_ws else None,
+                "stale": (now - st.last_ws) > self.stale_after_sec,
+                "switches": st.switches,
+            }
+        return {
+            "stale_after_sec": self.stale_after_sec,
+            "recover_sec": self.recover_sec,
+            "rest_polled": {
+                k: sum(1 for v in symbols.values() if v.get(k, {}).get("source") == "rest") for k in KINDS
+            },
+            "symbols": symbols,
+        }
+
+
+_SUPERVISOR: Optional[FeedHealthSupervisor] = None
+
+
+def get_feed_health() -> FeedHealthSupervisor:
+    global _SUPERVISOR
+    if _SUPERVISOR is None:
+        _SUPERVISOR = FeedHealthSupervisor()
+    return _SUPERVISOR
+
+
+__all__ = ["FeedHealthSupervisor", "get_feed_health"]
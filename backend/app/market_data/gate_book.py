@@ -0,0 +1,102 @@
+# app/market_data/gate_book.py
+"""
+Local Gate.io order book maintained from `spot.order_book_update` diffs.
+
+Sync protocol (Gate v4 spot docs):
+  1. buffer WS updates for the pair;
+  2. GET /spot/order_book?with_id=true → snapshot with `id`;
+  3. drop buffered updates with `u` <= id; the first one applied must have
+     `U` <= id + 1; afterwards every update must start at last `u` + 1;
+  4. any gap → resync from step 1. A quantity of 0 removes the level.
+
+Updates flagged `full: true` replace the book (no REST round trip).
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+Level = Tuple[float, float]
+
+# apply() results
+OK, STALE, GAP, UNSYNCED = "ok", "stale", "gap", "unsynced"
+
+
+def _levels(raw: Any) -> Iterable[Level]:
+    """[[price, qty], ...] with string numbers; qty may be 0 (deletion). Bad rows are skipped."""
+    if not isinstance(raw, list):
+        return ()
+    out: List[Level] = []
+    for row in raw:
+        try:
+            out.append((float(row[0]), float(row[1])))
+        except Exception:
+            continue
+    return out
+
+
+class GateOrderBook:
+    """Price → qty maps per side plus the id of the last applied update."""
+
+    __slots__ = ("pair", "bids", "asks", "last_id", "synced", "max_levels")
+
+    def __init__(self, pair: str, max_levels: int = 200):
+        self.pair = pair
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.last_id = 0
+        self.synced = False
+        # far-from-touch levels stop getting updates once they leave Gate's window; trim them
+        self.max_levels = max_levels
+
+    def clear(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self.last_id = 0
+        self.synced = False
+
+    def load_snapshot(self, update_id: int, bids: Any, asks: Any) -> None:
+        self.bids = {p: q for p, q in _levels(bids) if q > 0}
+        self.asks = {p: q for p, q in _levels(asks) if q > 0}
+        self.last_id = int(update_id)
+        self.synced = True
+
+    def apply(self, first_id: int, last_id: int, bids: Any, asks: Any) -> str:
+        if not self.synced:
+            return UNSYNCED
+        if last_id <= self.last_id:
+            return STALE
+        if first_id > self.last_id + 1:
+            self.synced = False
+            return GAP
+        for side, raw in ((self.bids, bids), (self.asks, asks)):
+            for p, q in _levels(raw):
+                if q > 0:
+                    side[p] = q
+                else:
+                    side.pop(p, None)
+        self.last_id = last_id
+        if len(self.bids) > 2 * self.max_levels or len(self.asks) > 2 * self.max_levels:
+            self._trim()
+        return OK
+
+    def _trim(self) -> None:
+        self.bids = dict(heapq.nlargest(self.max_levels, self.bids.items()))
+        self.asks = dict(heapq.nsmallest(self.max_levels, self.asks.items()))
+
+    def top(self, n: int) -> Tuple[List[Level], List[Level]]:
+        """Best `n` levels per side: bids descending, asks ascending."""
+        return heapq.nlargest(n, self.bids.items()), heapq.nsmallest(n, self.asks.items())
+
+    def crossed(self) -> bool:
+        return bool(self.bids and self.asks and max(self.bids) >= min(self.asks))
+
+
+def sync_buffered(book: GateOrderBook, buffered: Sequence[Dict[str, Any]]) -> str:
+    """Replay updates buffered while the snapshot was fetched; GAP means the snapshot is too old/new → resync."""
+    status = OK
+    for upd in buffered:
+        status = book.apply(int(upd.get("U", 0)), int(upd.get("u", 0)), upd.get("b"), upd.get("a"))
+        if status == GAP:
+            return GAP
+    return OK if book.synced else status
@@ -8,10 +8,20 @@ import time
 from contextlib import suppress
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import httpx
 import websockets
 
+try:  # ~3-5x faster decode of the WS frames
+    import orjson as _orjson
+except Exception:  # pragma: no cover
+    _orjson = None  # type: ignore[assignment]
+
 from app.config.settings import settings
-from app.services.book_tracker import on_book_ticker, on_partial_depth
+from app.market_data.gate_book import GAP, OK, STALE, GateOrderBook, sync_buffered
+from app.market_data.venues import venue_callbacks
+
+# venue-qualified: reaches the BookTracker only while Gate is the trading venue
+on_book_ticker, on_partial_depth = venue_callbacks("gate")
 
 # Best-effort: enable depth on the real tracker when available
 try:
@@ -19,6 +29,12 @@ try:
 except Exception:
     _BOOK_TRACKER = None  # type: ignore
 
+# 1m candlesticks feed candles_cache ring buffers
+try:
+    from app.services.candles_cache import candles_cache as _CANDLES
+except Exception:
+    _CANDLES = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +53,10 @@ def _to_gate_pair(sym: str) -> str:
     return s
 
 
+def _loads(raw: Any) -> Any:
+    return _orjson.loads(raw) if _orjson is not None else json.loads(raw)
+
+
 def _to_float(x: Any) -> float:
     """Safe float conversion."""
     try:
@@ -68,7 +88,10 @@ class GateWebSocketClient:
     Gate.io Public Spot WebSocket Client (Settings-Integrated)
     
     Features:
-    • Subscribes to spot.tickers (L1) and spot.order_book (L2 snapshots)
+    • Subscribes to spot.book_ticker (L1 with sizes) and spot.order_book_update
+      (L2 diffs applied to a local GateOrderBook; REST snapshot + update-id
+      validation, resync on gaps)
+    • Optional spot.candlesticks (1m) → candles_cache incremental bars
     • Uses centralized settings for all configuration
     • Exponential backoff reconnection using REST retry settings
     • Graceful shutdown and cleanup
@@ -89,6 +112,7 @@ class GateWebSocketClient:
         depth_limit: Optional[int] = None,
         want_tickers: bool = True,
         want_order_book: bool = True,
+        want_candles: Optional[bool] = None,
         ping_interval: Optional[float] = None,
         ping_timeout: Optional[float] = None,
     ) -> None:
@@ -96,8 +120,9 @@ class GateWebSocketClient:
         Args:
             symbols: List of symbols to subscribe (e.g., ["BTCUSDT", "ETHUSDT"])
             depth_limit: Order book depth (default: from settings.gate_depth_limit)
-            want_tickers: Subscribe to spot.tickers (L1)
-            want_order_book: Subscribe to spot.order_book (L2)
+            want_tickers: Subscribe to spot.book_ticker (L1)
+            want_order_book: Subscribe to spot.order_book_update (incremental L2)
+            want_candles: Subscribe to spot.candlesticks 1m (default: settings.ws_kline_enabled)
             ping_interval: Ping interval override (default: from settings)
             ping_timeout: Ping timeout override (default: from settings)
         """
@@ -118,15 +143,26 @@ class GateWebSocketClient:
         
         self.want_tickers = bool(want_tickers)
         self.want_order_book = bool(want_order_book)
+        if want_candles is None:
+            want_candles = bool(getattr(settings, "ws_kline_enabled", True))
+        self.want_candles = bool(want_candles) and _CANDLES is not None
 
-        # WS URL from settings (auto-detects live/testnet)
-        self._ws_url = settings.ws_base_url_resolved
+        # WS URL from settings (auto-detects live/testnet); Gate may also stream next to another trading venue
+        self._ws_url = settings.ws_base_url_resolved if settings.is_gate else settings.gate_ws_url
         self._stop_evt = asyncio.Event()
         self._conn: Optional[websockets.WebSocketClientProtocol] = None
 
         # Backoff tracking
         self._attempt = 0
 
+        # Incremental order books: pair → local book, diffs buffered while a REST snapshot is in flight
+        self._books: Dict[str, GateOrderBook] = {}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._resync_tasks: Dict[str, asyncio.Task] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self.resyncs = 0
+        self.gaps = 0
+
         # Ping/pong settings
         self._ping_interval = float(ping_interval if ping_interval is not None else settings.ws_ping_interval_sec)
         self._ping_timeout = float(ping_timeout if ping_timeout is not None else settings.ws_ping_timeout)
@@ -187,13 +223,26 @@ class GateWebSocketClient:
 
     # ───────── internals ─────────
 
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self.symbols),
+            "books_synced": sum(1 for b in self._books.values() if b.synced),
+            "resyncs": self.resyncs,
+            "gaps": self.gaps,
+        }
+
     async def _cleanup(self) -> None:
-        """Clean up heartbeat task and websocket connection."""
+        """Clean up heartbeat/resync tasks, the snapshot client and the websocket connection."""
         if self._hb_task:
             self._hb_task.cancel()
             with suppress(Exception):
                 await self._hb_task
             self._hb_task = None
+        self._reset_books()
+        if self._http is not None:
+            with suppress(Exception):
+                await self._http.aclose()
+            self._http = None
         if self._conn:
             with suppress(Exception):
                 await self._conn.close(code=1000)
@@ -215,7 +264,8 @@ class GateWebSocketClient:
         ) as ws:
             self._conn = ws
 
-            # Subscribe to channels
+            # Subscribe to channels (a new connection starts a new update-id sequence)
+            self._reset_books()
             await self._subscribe(ws)
             
             # Start heartbeat task
@@ -236,7 +286,7 @@ class GateWebSocketClient:
 
                 # Parse JSON
                 try:
-                    data = json.loads(msg)
+                    data = _loads(msg)
                 except Exception:
                     continue
 
@@ -259,43 +309,58 @@ class GateWebSocketClient:
     async def _subscribe(self, ws: websockets.WebSocketClientProtocol) -> None:
         """
         Subscribe to Gate.io v4 WS channels:
-        • spot.tickers: payload = [<pair>, <pair>, ...]
-        • spot.order_book: payload = [<pair>, "<limit>", "100ms"]
+        • spot.book_ticker: payload = [<pair>, <pair>, ...]
+        • spot.order_book_update: payload = [<pair>, "100ms"] (diffs only)
         """
         pairs = [_to_gate_pair(s) for s in self.symbols]
 
-        # Subscribe to tickers (L1)
+        # Subscribe to best bid/ask with sizes (L1)
         if self.want_tickers and pairs:
             sub = {
                 "time": int(time.time()),
-                "channel": "spot.tickers",
+                "channel": "spot.book_ticker",
                 "event": "subscribe",
                 "payload": pairs,
             }
             with suppress(Exception):
                 await ws.send(json.dumps(sub))
-                logger.debug(f"Gate WS: subscribed to spot.tickers for {len(pairs)} pairs")
+                logger.debug(f"Gate WS: subscribed to spot.book_ticker for {len(pairs)} pairs")
 
-        # Subscribe to order book (L2)
+        # Subscribe to incremental order book (L2)
         if self.want_order_book and pairs:
             for p in pairs:
                 sub = {
                     "time": int(time.time()),
-                    "channel": "spot.order_book",
+                    "channel": "spot.order_book_update",
                     "event": "subscribe",
-                    "payload": [p, str(self.depth_limit), "100ms"],
+                    "payload": [p, "100ms"],
                 }
                 with suppress(Exception):
                     await ws.send(json.dumps(sub))
-            logger.debug(f"Gate WS: subscribed to spot.order_book for {len(pairs)} pairs (depth={self.depth_limit})")
+            logger.debug(f"Gate WS: subscribed to spot.order_book_update for {len(pairs)} pairs (publish depth={self.depth_limit})")
+
+        # Subscribe to 1m candlesticks (one payload per pair: ["1m", pair])
+        if self.want_candles and pairs:
+            for p in pairs:
+                sub = {
+                    "time": int(time.time()),
+                    "channel": "spot.candlesticks",
+                    "event": "subscribe",
+                    "payload": ["1m", p],
+                }
+                with suppress(Exception):
+                    await ws.send(json.dumps(sub))
+            logger.debug(f"Gate WS: subscribed to spot.candlesticks 1m for {len(pairs)} pairs")
 
     async def _handle_message(self, data: Any) -> None:
         """
         Route Gate.io messages to appropriate handlers.
         
         Expected shapes:
-        • {"channel": "spot.tickers", "event": "update", "result": {...} | [{...}, ...]}
-        • {"channel": "spot.order_book", "event": "update", "result": {...}}
+        • {"channel": "spot.book_ticker", "event": "update", "result": {"s", "u", "b", "B", "a", "A", "t"}}
+        • {"channel": "spot.order_book_update", "event": "update", "result": {"s", "U", "u", "b", "a", "t"}}
+        • {"channel": "spot.tickers" | "spot.order_book", ...} (legacy snapshot channels)
+        • {"channel": "spot.candlesticks", "event": "update", "result": {"n": "1m_BTC_USDT", ...}}
         """
         if not isinstance(data, dict):
             return
@@ -308,13 +373,146 @@ class GateWebSocketClient:
         if event not in {"update", "subscribe"}:
             return
 
-        if channel == "spot.tickers":
+        if channel == "spot.order_book_update":
+            if event == "update":
+                await self._handle_order_book_update(result)
+        elif channel == "spot.book_ticker":
+            await self._handle_book_ticker_result(result)
+        elif channel == "spot.tickers":
             await self._handle_ticker_result(result)
         elif channel == "spot.order_book":
             await self._handle_order_book_result(result)
+        elif channel == "spot.candlesticks":
+            self._handle_candle_result(result)
 
     # ───────── handlers ─────────
 
+    async def _handle_book_ticker_result(self, result: Any) -> None:
+        """Handle spot.book_ticker (L1 with sizes, pushed on every top-of-book change)."""
+        if not isinstance(result, dict):
+            return
+        pair = str(result.get("s") or "").upper()
+        if not pair:
+            return
+        with suppress(Exception):
+            await on_book_ticker(
+                pair.replace("_", ""),
+                _to_float(result.get("b")),
+                _to_float(result.get("B")),
+                _to_float(result.get("a")),
+                _to_float(result.get("A")),
+                ts_ms=int(result.get("t") or 0) or int(time.time() * 1000),
+            )
+
+    # ───────── incremental order book ─────────
+
+    _PENDING_MAX = 500        # buffered diffs per pair while resyncing
+    _SNAPSHOT_LIMIT = 100     # REST snapshot depth
+    _RESYNC_ATTEMPTS = 5
+
+    def _reset_books(self) -> None:
+        for t in self._resync_tasks.values():
+            t.cancel()
+        self._resync_tasks.clear()
+        self._pending.clear()
+        for book in self._books.values():
+            book.clear()
+
+    async def _handle_order_book_update(self, result: Any) -> None:
+        if not isinstance(result, dict):
+            return
+        pair = str(result.get("s") or "").upper()
+        if not pair:
+            return
+        book = self._books.get(pair)
+        if book is None:
+            book = self._books[pair] = GateOrderBook(pair, max_levels=max(self._SNAPSHOT_LIMIT, self.depth_limit))
+        ts_ms = int(result.get("t") or 0) or int(time.time() * 1000)
+
+        if result.get("full"):
+            book.load_snapshot(int(result.get("u") or 0), result.get("b"), result.get("a"))
+            self._pending.pop(pair, None)
+            await self._publish_book(book, ts_ms)
+            return
+
+        status = book.apply(int(result.get("U") or 0), int(result.get("u") or 0), result.get("b"), result.get("a"))
+        if status == OK:
+            await self._publish_book(book, ts_ms)
+            return
+        if status == STALE:
+            return
+        if status == GAP:
+            self.gaps += 1
+            logger.debug(f"Gate WS: update-id gap on {pair} (U={result.get('U')}, have {book.last_id}) — resync")
+        buf = self._pending.setdefault(pair, [])
+        buf.append(result)
+        if len(buf) > self._PENDING_MAX:
+            del buf[: len(buf) - self._PENDING_MAX]
+        self._ensure_resync(pair)
+
+    def _ensure_resync(self, pair: str) -> None:
+        t = self._resync_tasks.get(pair)
+        if t is None or t.done():
+            self._resync_tasks[pair] = asyncio.create_task(self._resync(pair))
+
+    async def _resync(self, pair: str) -> None:
+        """REST snapshot + replay of the buffered diffs; retried while the two don't line up."""
+        try:
+            for attempt in range(self._RESYNC_ATTEMPTS):
+                snap = await self._fetch_snapshot(pair)
+                book = self._books.get(pair)
+                if book is None or self._stop_evt.is_set():
+                    return
+                if snap is None:
+                    await asyncio.sleep(min(0.5 * (2 ** attempt), 5.0))
+                    continue
+                book.load_snapshot(snap["id"], snap.get("bids"), snap.get("asks"))
+                if sync_buffered(book, self._pending.pop(pair, [])) == GAP or book.crossed():
+                    book.clear()   # snapshot older than the buffered stream: fetch a newer one
+                    continue
+                self.resyncs += 1
+                await self._publish_book(book, int(time.time() * 1000))
+                return
+            logger.warning(f"Gate WS: order book resync for {pair} failed after {self._RESYNC_ATTEMPTS} attempts")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Gate WS: order book resync for {pair} failed: {e!r}")
+        finally:
+            if self._resync_tasks.get(pair) is asyncio.current_task():
+                self._resync_tasks.pop(pair, None)
+
+    async def _fetch_snapshot(self, pair: str) -> Optional[Dict[str, Any]]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(base_url=settings.gate_rest_base, timeout=6.0)
+        try:
+            r = await self._http.get(
+                "/spot/order_book",
+                params={"currency_pair": pair, "limit": self._SNAPSHOT_LIMIT, "with_id": "true"},
+            )
+            if r.status_code != 200:
+                return None
+            data = _loads(r.content)
+        except Exception:
+            return None
+        if not isinstance(data, dict) or "id" not in data:
+            return None
+        return data
+
+    async def _publish_book(self, book: GateOrderBook, ts_ms: int) -> None:
+        if book.crossed():
+            # a crossed local book means a missed diff that the ids did not reveal
+            book.clear()
+            self._ensure_resync(book.pair)
+            return
+        bids, asks = book.top(self.depth_limit)
+        if not bids and not asks:
+            return
+        with suppress(Exception):
+            await on_partial_depth(book.pair.replace("_", ""), bids, asks, ts_ms=ts_ms)
+
+    # ───────── legacy snapshot channels ─────────
+
     async def _handle_ticker_result(self, result: Any) -> None:
         """Handle spot.tickers updates (L1 best bid/ask)."""
         items: List[Dict[str, Any]] = []
@@ -370,5 +568,30 @@ class GateWebSocketClient:
                 ts_ms=ts_ms
             )
 
+    def _handle_candle_result(self, result: Any) -> None:
+        """Handle spot.candlesticks updates: t (sec), o/h/l/c, v (quote volume), n = '1m_BASE_QUOTE'."""
+        if _CANDLES is None or not isinstance(result, dict):
+            return
+        name = str(result.get("n") or "")
+        interval, _, pair = name.partition("_")
+        if interval != "1m" or not pair:
+            return
+        try:
+            ts = int(float(result.get("t", 0)))
+        except Exception:
+            return
+        if ts <= 0:
+            return
+        _CANDLES.on_kline(
+            pair.upper().replace("_", ""),
+            "gate",
+            ts,
+            _to_float(result.get("o")),
+            _to_float(result.get("h")),
+            _to_float(result.get("l")),
+            _to_float(result.get("c")),
+            _to_float(result.get("v")),
+        )
+
 
 __all__ = ["GateWebSocketClient"]
\ No newline at end of file
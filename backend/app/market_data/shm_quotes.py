@@ -0,0 +1,373 @@
+# app/market_data/shm_quotes.py
+"""
+Shared-memory quote table.
+
+One process (the market-data daemon) owns the exchange connections and
+publishes top-of-book, L10 depth and tape aggregates into a fixed-layout
+mmap file; any number of API / strategy workers attach read-only.
+
+Layout (little-endian, offsets fixed by the numpy dtypes below):
+
+    [ header: 64 bytes ][ slot 0 ][ slot 1 ] ... [ slot capacity-1 ]
+
+Each slot belongs to one symbol for the lifetime of the file (the writer
+assigns slots in order and bumps `n_used`). Slots are versioned seqlock
+style: the writer makes `seq` odd, writes the fields, then makes it even;
+a reader copies the slot and retries if `seq` was odd or changed meanwhile.
+Readers therefore never block the writer and never see a torn quote.
+
+Workers tell the daemon which extra symbols they need by writing
+`<path>.want.<pid>` (one symbol per line); the daemon polls these files
+and drops the ones whose pid is gone.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+MAGIC = b"MDQT0001"
+LAYOUT_VERSION = 1
+LEVELS = 10
+HEADER_SIZE = 64
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("capacity", "<u4"),
+        ("slot_size", "<u4"),
+        ("n_used", "<u4"),
+        ("writer_pid", "<i8"),
+        ("heartbeat_ms", "<i8"),
+        ("_pad", "S24"),
+    ]
+)
+assert HEADER_DTYPE.itemsize == HEADER_SIZE
+
+SLOT_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("symbol", "S16"),
+        ("ts_ms", "<i8"),            # top-of-book update
+        ("depth_ts_ms", "<i8"),
+        ("tape_ts_ms", "<i8"),
+        ("bid", "<f8"),
+        ("bid_qty", "<f8"),
+        ("ask", "<f8"),
+        ("ask_qty", "<f8"),
+        ("usdpm", "<f8"),
+        ("tpm", "<f8"),
+        ("n_bids", "<u4"),
+        ("n_asks", "<u4"),
+        ("bids", "<f8", (LEVELS, 2)),
+        ("asks", "<f8", (LEVELS, 2)),
+    ]
+)
+
+SEQLOCK_RETRIES = 64
+
+
+def default_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "mexc_bot_quotes.tbl")
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# ───────────────────────────── writer ─────────────────────────────
+
+class QuoteTableWriter:
+    """Single writer. Creates (or re-creates) the table file at `path`."""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 512):
+        self.path = path or default_path()
+        self.capacity = int(capacity)
+        size = HEADER_SIZE + self.capacity * SLOT_DTYPE.itemsize
+
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.truncate(size)
+        os.replace(tmp, self.path)  # readers of an older table keep their old mapping
+
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._mm = mmap.mmap(self._fd, size, access=mmap.ACCESS_WRITE)
+        self._hdr = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self._mm, offset=0)
+        self._slots = np.ndarray((self.capacity,), dtype=SLOT_DTYPE, buffer=self._mm, offset=HEADER_SIZE)
+        self._index: Dict[str, int] = {}
+
+        h = self._hdr[0]
+        h["version"] = LAYOUT_VERSION
+        h["capacity"] = self.capacity
+        h["slot_size"] = SLOT_DTYPE.itemsize
+        h["n_used"] = 0
+        h["writer_pid"] = os.getpid()
+        h["heartbeat_ms"] = _now_ms()
+        h["magic"] = MAGIC  # last: readers treat the table as valid from here on
+
+    # slot management
+    def slot_of(self, symbol: str) -> Optional[int]:
+        sym = symbol.upper()
+        i = self._index.get(sym)
+        if i is not None:
+            return i
+        n = len(self._index)
+        if n >= self.capacity:
+            return None
+        self._slots[n]["symbol"] = sym.encode()[:16]
+        self._index[sym] = n
+        self._hdr[0]["n_used"] = n + 1
+        return n
+
+    def _begin(self, i: int) -> Any:
+        rec = self._slots[i : i + 1]
+        rec["seq"] += 1          # odd: write in progress
+        return rec
+
+    @staticmethod
+    def _end(rec: Any) -> None:
+        rec["seq"] += 1          # even: consistent
+
+    # updates
+    def write_top(self, symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float, ts_ms: int) -> bool:
+        i = self.slot_of(symbol)
+        if i is None:
+            return False
+        rec = self._begin(i)
+        rec["bid"] = bid
+        rec["bid_qty"] = bid_qty
+        rec["ask"] = ask
+        rec["ask_qty"] = ask_qty
+        rec["ts_ms"] = ts_ms
+        self._end(rec)
+        return True
+
+    def write_depth(
+        self,
+        symbol: str,
+        bids: Sequence[Tuple[float, float]],
+        asks: Sequence[Tuple[float, float]],
+        ts_ms: int,
+    ) -> bool:
+        i = self.slot_of(symbol)
+        if i is None:
+            return False
+        nb, na = min(len(bids), LEVELS), min(len(asks), LEVELS)
+        rec = self._begin(i)
+        if nb:
+            rec["bids"][0, :nb] = bids[:nb]
+        if na:
+            rec["asks"][0, :na] = asks[:na]
+        rec["n_bids"] = nb
+        rec["n_asks"] = na
+        rec["depth_ts_ms"] = ts_ms
+        self._end(rec)
+        return True
+
+    def write_tape(self, symbol: str, usdpm: float, tpm: float, ts_ms: int) -> bool:
+        i = self.slot_of(symbol)
+        if i is None:
+            return False
+        rec = self._begin(i)
+        rec["usdpm"] = usdpm
+        rec["tpm"] = tpm
+        rec["tape_ts_ms"] = ts_ms
+        self._end(rec)
+        return True
+
+    def heartbeat(self) -> None:
+        self._hdr[0]["heartbeat_ms"] = _now_ms()
+
+    def close(self) -> None:
+        with suppress(Exception):
+            self._mm.flush()
+        del self._hdr, self._slots
+        with suppress(Exception):
+            self._mm.close()
+        with suppress(Exception):
+            os.close(self._fd)
+
+
+# ───────────────────────────── reader ─────────────────────────────
+
+class QuoteTableReader:
+    """Read-only view of a table. Safe to use from any number of processes."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_path()
+        self._fd = os.open(self.path, os.O_RDONLY)
+        size = os.fstat(self._fd).st_size
+        if size < HEADER_SIZE:
+            os.close(self._fd)
+            raise ValueError(f"quote table too small: {self.path}")
+        self._mm = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        self._hdr = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self._mm, offset=0)
+        h = self._hdr[0]
+        if bytes(h["magic"]) != MAGIC or int(h["slot_size"]) != SLOT_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"not a quote table (or layout mismatch): {self.path}")
+        self.capacity = int(h["capacity"])
+        self._slots = np.ndarray((self.capacity,), dtype=SLOT_DTYPE, buffer=self._mm, offset=HEADER_SIZE)
+        self._index: Dict[str, int] = {}
+        self._indexed = 0
+
+    # header
+    def n_used(self) -> int:
+        return int(self._hdr[0]["n_used"])
+
+    def heartbeat_age_ms(self) -> int:
+        return _now_ms() - int(self._hdr[0]["heartbeat_ms"])
+
+    def writer_pid(self) -> int:
+        return int(self._hdr[0]["writer_pid"])
+
+    def is_current(self) -> bool:
+        """False once the path was replaced by a new table (writer restart) or removed."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        cur = os.fstat(self._fd)
+        return (st.st_ino, st.st_dev) == (cur.st_ino, cur.st_dev)
+
+    # index
+    def _refresh_index(self) -> None:
+        n = self.n_used()
+        for i in range(self._indexed, n):
+            self._index[bytes(self._slots[i]["symbol"]).decode()] = i
+        self._indexed = max(self._indexed, n)
+
+    def symbols(self) -> List[str]:
+        self._refresh_index()
+        return list(self._index)
+
+    # reads
+    def read_slot(self, i: int) -> Optional[np.ndarray]:
+        """Consistent copy of slot `i` (1-element structured array) or None if the writer kept it busy."""
+        slot = self._slots[i : i + 1]
+        for _ in range(SEQLOCK_RETRIES):
+            s1 = int(slot["seq"][0])
+            if s1 & 1:
+                continue
+            rec = slot.copy()
+            if int(slot["seq"][0]) == s1:
+                return rec
+        return None
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        sym = symbol.upper()
+        i = self._index.get(sym)
+        if i is None:
+            self._refresh_index()
+            i = self._index.get(sym)
+            if i is None:
+                return None
+        rec = self.read_slot(i)
+        return None if rec is None else slot_to_quote(rec)
+
+    def seqs(self) -> np.ndarray:
+        """Current seq of every used slot (cheap change detection for mirrors)."""
+        return np.array(self._slots["seq"][: self.n_used()])
+
+    def changed(self, last: Optional[np.ndarray]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (slot, consistent copy) for slots whose seq moved since `last`."""
+        self._refresh_index()
+        cur = self.seqs()
+        if last is None or len(last) == 0:
+            idx = np.nonzero(cur)[0]
+        else:
+            n = min(len(last), len(cur))
+            idx = np.nonzero(cur[:n] != last[:n])[0]
+            if len(cur) > n:
+                idx = np.concatenate([idx, np.arange(n, len(cur))])
+        for i in idx:
+            rec = self.read_slot(int(i))
+            if rec is not None:
+                yield int(i), rec
+
+    def close(self) -> None:
+        for attr in ("_hdr", "_slots"):
+            if hasattr(self, attr):
+                delattr(self, attr)
+        with suppress(Exception):
+            self._mm.close()
+        with suppress(Exception):
+            os.close(self._fd)
+
+
+def slot_to_quote(rec: np.ndarray) -> Dict[str, Any]:
+    r = rec[0]
+    nb, na = int(r["n_bids"]), int(r["n_asks"])
+    return {
+        "symbol": bytes(r["symbol"]).decode(),
+        "bid": float(r["bid"]),
+        "bidQty": float(r["bid_qty"]),
+        "ask": float(r["ask"]),
+        "askQty": float(r["ask_qty"]),
+        "ts_ms": int(r["ts_ms"]),
+        "bids": [(float(p), float(q)) for p, q in r["bids"][:nb]],
+        "asks": [(float(p), float(q)) for p, q in r["asks"][:na]],
+        "depth_ts_ms": int(r["depth_ts_ms"]),
+        "usdpm": float(r["usdpm"]),
+        "tpm": float(r["tpm"]),
+        "tape_ts_ms": int(r["tape_ts_ms"]),
+        "seq": int(r["seq"]),
+    }
+
+
+# ───────────────────────────── worker → daemon wants ─────────────────────────────
+
+def write_wants(path: str, symbols: Set[str], pid: Optional[int] = None) -> None:
+    pid = pid or os.getpid()
+    target = f"{path}.want.{pid}"
+    tmp = f"{target}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(symbols)))
+    os.replace(tmp, target)
+
+
+def read_wants(path: str) -> Dict[int, Set[str]]:
+    """{pid: symbols} for live worker pids; files of dead pids are removed."""
+    p = Path(path)
+    out: Dict[int, Set[str]] = {}
+    for f in p.parent.glob(f"{p.name}.want.*"):
+        tail = f.name.rsplit(".", 1)[-1]
+        if not tail.isdigit():
+            continue
+        pid = int(tail)
+        if not _pid_alive(pid):
+            with suppress(Exception):
+                f.unlink()
+            continue
+        with suppress(Exception):
+            out[pid] = {s.strip().upper() for s in f.read_text(encoding="utf-8").split() if s.strip()}
+    return out
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+__all__ = [
+    "QuoteTableWriter",
+    "QuoteTableReader",
+    "slot_to_quote",
+    "default_path",
+    "write_wants",
+    "read_wants",
+    "LEVELS",
+]
@@ -0,0 +1,356 @@
+# app/market_data/subscriptions.py
+"""
+Subscription registry — exactly one upstream feed per topic.
+
+Consumers (SSE streams, strategy engine, scanner, ML logger, startup
+config, ...) `acquire` symbols together with the channels they need. The
+registry ref-counts every (symbol, channel) pair per consumer and keeps the
+union applied on the live MEXC WS connection(s) through incremental
+SUBSCRIPTION / UNSUBSCRIPTION messages — a change of the wanted set never
+rebuilds the socket.
+
+- additions are applied at once;
+- removals wait `grace_sec`: a symbol released and re-acquired inside the
+  window (SSE reconnects, strategy restarts) costs no upstream traffic;
+- each symbol lives on exactly one shard (connection); a new shard is
+  opened only when no existing one has room under MAX_TOPICS_PER_CONN,
+  and an emptied shard is closed.
+
+Feeds are built by `feed_factory(symbols, channels)` and must provide
+`run()`, `stop()` and `set_symbol_channels(symbol, channels)`
+(MEXCWebSocketClient by default).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNELS: Tuple[str, ...] = ("BOOK_TICKER", "DEPTH_LIMIT")
+
+FeedFactory = Callable[[List[str], List[str]], Any]
+
+
+def _mexc_feed(symbols: List[str], channels: List[str]) -> Any:
+    from app.market_data.ws_client import MEXCWebSocketClient
+
+    return MEXCWebSocketClient(symbols, channels=channels)
+
+
+@dataclass
+class _Shard:
+    feed: Any
+    task: Optional[asyncio.Task] = None
+    topics: int = 0
+
+
+class SubscriptionRegistry:
+    """Ref-counted (symbol, channel) subscriptions mapped onto sharded WS feeds."""
+
+    def __init__(
+        self,
+        feed_factory: Optional[FeedFactory] = None,
+        *,
+        grace_sec: Optional[float] = None,
+        max_topics: Optional[int] = None,
+        sweep_interval_sec: float = 5.0,
+    ):
+        self._factory: FeedFactory = feed_factory or _mexc_feed
+        self.grace_sec = float(
+            grace_sec if grace_sec is not None else getattr(settings, "ws_sub_idle_grace_sec", 60.0)
+        )
+        if max_topics is None:
+            max_topics = int(getattr(settings, "ws_max_topics", 30) or 30)
+        self.max_topics = max(1, int(max_topics))
+        self.sweep_interval_sec = sweep_interval_sec
+
+        self._refs: Dict[str, Dict[str, Set[str]]] = {}    # symbol → channel → consumers
+        self._held: Dict[str, Set[str]] = {}               # consumer → symbols it holds
+        self._applied: Dict[str, FrozenSet[str]] = {}      # symbol → channels live upstream
+        self._pending: Dict[str, float] = {}               # symbol → monotonic ts a removal became due
+        self._shard_of: Dict[str, int] = {}
+        self._shards: Dict[int, _Shard] = {}
+        self._next_shard = 0
+
+        self._lock: Optional[asyncio.Lock] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+        self.subs_sent = 0
+        self.unsubs_sent = 0
+        self.feeds_started = 0
+
+    # ─────────────────────────── public API ───────────────────────────
+
+    async def acquire(
+        self,
+        consumer: str,
+        symbols: Iterable[str],
+        channels: Sequence[str] = DEFAULT_CHANNELS,
+    ) -> List[str]:
+        """
+        Hold `symbols` × `channels` for `consumer`. Returns the symbols that
+        were not live upstream before this call (callers seed them via REST).
+        """
+        syms = _norm(symbols)
+        chans = [c for c in channels if c]
+        if not syms or not chans:
+            return []
+        fresh: List[str] = []
+        async with self._get_lock():
+            now = time.monotonic()
+            held = self._held.setdefault(consumer, set())
+            for sym in syms:
+                by_chan = self._refs.setdefault(sym, {})
+                for ch in chans:
+                    by_chan.setdefault(ch, set()).add(consumer)
+                held.add(sym)
+                if sym not in self._applied:
+                    fresh.append(sym)
+                await self._reconcile(sym, now)
+        self._ensure_reaper()
+        return fresh
+
+    async def release(
+        self,
+        consumer: str,
+        symbols: Optional[Iterable[str]] = None,
+        channels: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Drop `consumer`'s hold; `symbols=None` releases everything it holds."""
+        want_chans = None if channels is None else set(channels)
+        async with self._get_lock():
+            held = self._held.get(consumer)
+            if not held:
+                return
+            syms = list(held) if symbols is None else [s for s in _norm(symbols) if s in held]
+            touched: Set[str] = set()
+            for sym in syms:
+                by_chan = self._refs.get(sym, {})
+                for ch in list(by_chan) if want_chans is None else [c for c in want_chans if c in by_chan]:
+                    holders = by_chan[ch]
+                    if consumer not in holders:
+                        continue
+                    holders.discard(consumer)
+                    if not holders:
+                        del by_chan[ch]
+                    touched.add(sym)
+                if not by_chan:
+                    self._refs.pop(sym, None)
+                if not any(consumer in h for h in by_chan.values()):
+                    held.discard(sym)
+            if not held:
+                del self._held[consumer]
+            now = time.monotonic()
+            for sym in sorted(touched):
+                await self._reconcile(sym, now)
+        self._ensure_reaper()
+
+    async def sweep(self, now: Optional[float] = None) -> List[str]:
+        """Apply removals whose grace period has expired; returns affected symbols."""
+        now = time.monotonic() if now is None else now
+        done: List[str] = []
+        async with self._get_lock():
+            for sym, since in list(self._pending.items()):
+                if now - since < self.grace_sec:
+                    continue
+                self._pending.pop(sym, None)
+                await self._apply(sym, self._desired(sym))
+                done.append(sym)
+        return done
+
+    async def stop(self) -> None:
+        """Stop every feed and forget all holds (provider switch / shutdown)."""
+        if self._reaper and not self._reaper.done():
+            self._reaper.cancel()
+            with suppress(BaseException):
+                await self._reaper
+        self._reaper = None
+        for sid in list(self._shards):
+            await self._close_shard(sid)
+        self._refs.clear()
+        self._held.clear()
+        self._applied.clear()
+        self._pending.clear()
+        self._shard_of.clear()
+
+    def wanted(self, symbol: str) -> Set[str]:
+        return set(self._desired(symbol.strip().upper()))
+
+    def symbols(self) -> List[str]:
+        """Symbols currently live upstream (including those inside their grace period)."""
+        return sorted(self._applied)
+
+    def consumers(self) -> Dict[str, List[str]]:
+        return {c: sorted(s) for c, s in sorted(self._held.items()) if s}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._applied),
+            "topics": sum(len(c) for c in self._applied.values()),
+            "pending_removals": len(self._pending),
+            "grace_sec": self.grace_sec,
+            "shards": [
+                {"id": sid, "topics": sh.topics, "running": bool(sh.task and not sh.task.done())}
+                for sid, sh in sorted(self._shards.items())
+            ],
+            "consumers": {c: len(s) for c, s in self.consumers().items()},
+            "subs_sent": self.subs_sent,
+            "unsubs_sent": self.unsubs_sent,
+            "feeds_started": self.feeds_started,
+        }
+
+    # ─────────────────────────── internals ───────────────────────────
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _desired(self, sym: str) -> FrozenSet[str]:
+        return frozenset(ch for ch, holders in self._refs.get(sym, {}).items() if holders)
+
+    async def _reconcile(self, sym: str, now: float) -> None:
+        desired = self._desired(sym)
+        applied = self._applied.get(sym, frozenset())
+        if desired - applied:
+            # keep channels that are only waiting out their grace period
+            applied = desired | applied
+            await self._apply(sym, applied)
+        if applied - desired:
+            if self.grace_sec <= 0:
+                self._pending.pop(sym, None)
+                await self._apply(sym, desired)
+            else:
+                self._pending.setdefault(sym, now)
+        else:
+            self._pending.pop(sym, None)
+
+    async def _apply(self, sym: str, channels: FrozenSet[str]) -> None:
+        before = self._applied.get(sym, frozenset())
+        if channels == before:
+            return
+        added, removed = len(channels - before), len(before - channels)
+        sid = self._shard_of.get(sym)
+
+        if sid is not None:
+            shard = self._shards[sid]
+            if not channels or shard.topics - len(before) + len(channels) <= self.max_topics:
+                await shard.feed.set_symbol_channels(sym, sorted(channels))
+                shard.topics += len(channels) - len(before)
+                self._count(added, removed)
+                if channels:
+                    self._applied[sym] = channels
+                else:
+                    self._applied.pop(sym, None)
+                    self._shard_of.pop(sym, None)
+                    if shard.topics <= 0:
+                        await self._close_shard(sid)
+                return
+            # no room to grow here: move the symbol to a shard that fits
+            await shard.feed.set_symbol_channels(sym, [])
+            shard.topics -= len(before)
+            self._count(0, len(before))
+            self._applied.pop(sym, None)
+            self._shard_of.pop(sym, None)
+            if shard.topics <= 0:
+                await self._close_shard(sid)
+            added = len(channels)
+
+        if not channels:
+            return
+        for sid, shard in self._shards.items():
+            if shard.topics + len(channels) <= self.max_topics:
+                await shard.feed.set_symbol_channels(sym, sorted(channels))
+                break
+        else:
+            sid = self._open_shard(sym, channels)
+            shard = self._shards[sid]
+        shard.topics += len(channels)
+        self._shard_of[sym] = sid
+        self._applied[sym] = channels
+        self._count(added, 0)
+
+    def _open_shard(self, sym: str, channels: FrozenSet[str]) -> int:
+        sid = self._next_shard
+        self._next_shard += 1
+        feed = self._factory([sym], sorted(channels))
+        task: Optional[asyncio.Task] = None
+        with suppress(RuntimeError):
+            task = asyncio.get_running_loop().create_task(feed.run())
+        self._shards[sid] = _Shard(feed=feed, task=task)
+        self.feeds_started += 1
+        logger.info(f"📡 Subscription shard #{sid} opened for {sym}")
+        return sid
+
+    async def _close_shard(self, sid: int) -> None:
+        shard = self._shards.pop(sid, None)
+        if shard is None:
+            return
+        with suppress(Exception):
+            await shard.feed.stop()
+        if shard.task and not shard.task.done():
+            shard.task.cancel()
+            with suppress(BaseException):
+                await asyncio.wait_for(shard.task, timeout=3.0)
+        for sym in [s for s, i in self._shard_of.items() if i == sid]:
+            self._shard_of.pop(sym, None)
+            self._applied.pop(sym, None)
+        logger.info(f"📴 Subscription shard #{sid} closed")
+
+    def _count(self, added: int, removed: int) -> None:
+        self.subs_sent += added
+        self.unsubs_sent += removed
+
+    def _ensure_reaper(self) -> None:
+        if self.grace_sec <= 0:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._reaper and not self._reaper.done() and self._reaper.get_loop() is loop:
+            return
+        self._reaper = loop.create_task(self._reaper_loop())
+
+    async def _reaper_loop(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.sweep_interval_sec)
+                if self._pending:
+                    await self.sweep()
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.warning(f"Subscription reaper stopped: {e}")
+
+
+def _norm(symbols: Iterable[str]) -> List[str]:
+    out: List[str] = []
+    seen: Set[str] = set()
+    for s in symbols or []:
+        sym = (s or "").strip().upper()
+        if sym and sym not in seen:
+            seen.add(sym)
+            out.append(sym)
+    return out
+
+
+# ── singleton ───────────────────────────────────────────────────────────────
+_REGISTRY: Optional[SubscriptionRegistry] = None
+
+
+def get_subscription_registry() -> SubscriptionRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = SubscriptionRegistry()
+    return _REGISTRY
+
+
+__all__ = ["SubscriptionRegistry", "DEFAULT_CHANNELS", "get_subscription_registry"]
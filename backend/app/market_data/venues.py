@@ -0,0 +1,257 @@
+# app/market_data/venues.py
+"""
+Venue-qualified quote state for concurrent Gate + MEXC streaming.
+
+Both WS clients push through `venue_callbacks(venue)`: every update lands
+in the `VenueQuoteBook` keyed by (symbol, venue), and only updates from
+the *active* (trading) venue are forwarded into the symbol-keyed
+BookTracker that SSE / strategy / scanner read. Switching the trading
+venue is then a re-point plus a replay of the stored venue book into the
+tracker — no stream is stopped or reconnected.
+
+`consolidated(symbol)` is the cross-venue view: best bid/ask over the
+venues with fresh quotes, the cross-venue spread (negative = crossed,
+i.e. one venue's bid is above the other's ask) and per-venue staleness.
+
+Streaming venues: MD_VENUES (e.g. "gate,mexc") plus the active provider.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.config.settings import settings
+
+VENUES: Tuple[str, ...] = ("gate", "mexc")
+
+Levels = Sequence[Tuple[float, float]]
+
+
+def _norm_venue(venue: Any) -> str:
+    v = str(venue or "").strip().lower()
+    return "gate" if v in {"gateio", "gate.io", "gateio_spot"} else v
+
+
+def streaming_venues(active: Optional[str] = None) -> List[str]:
+    """Venues whose WS feeds run concurrently: MD_VENUES ∪ {active provider}, in VENUES order."""
+    raw = str(getattr(settings, "md_venues", "") or "")
+    wanted: Set[str] = {_norm_venue(v) for v in raw.split(",") if v.strip()}
+    act = _norm_venue(active if active is not None else getattr(settings, "active_provider", ""))
+    if act:
+        wanted.add(act)
+    return [v for v in VENUES if v in wanted]
+
+
+@dataclass
+class _VenueTop:
+    bid: float
+    bid_qty: float
+    ask: float
+    ask_qty: float
+    ts_ms: int
+    recv: float  # monotonic receive time (staleness is measured locally, not from exchange clocks)
+
+
+class VenueQuoteBook:
+    """(symbol, venue) → latest top of book + depth; single-threaded (event loop), no locks."""
+
+    def __init__(self, active: Optional[str] = None, *, stale_after_ms: Optional[float] = None):
+        self._active: Optional[str] = _norm_venue(active) if active else None
+        self.stale_after_ms = float(
+            stale_after_ms if stale_after_ms is not None
+            else float(getattr(settings, "feed_stale_after_sec", 5.0)) * 1000.0
+        )
+        self._top: Dict[str, Dict[str, _VenueTop]] = {}
+        self._depth: Dict[str, Dict[str, Tuple[List[Tuple[float, float]], List[Tuple[float, float]], int]]] = {}
+        self._updates: Dict[str, int] = {}
+
+    # ─────────────────────────── updates ───────────────────────────
+
+    @property
+    def active(self) -> str:
+        """Trading venue; follows ACTIVE_PROVIDER until a switch sets it explicitly."""
+        return self._active or _norm_venue(getattr(settings, "active_provider", "mexc"))
+
+    def is_active(self, venue: str) -> bool:
+        return venue == self.active
+
+    def set_active(self, venue: str) -> None:
+        self._active = _norm_venue(venue)
+
+    def update_top(
+        self, venue: str, symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float,
+        ts_ms: Optional[int] = None, now: Optional[float] = None,
+    ) -> None:
+        now = time.monotonic() if now is None else now
+        self._top.setdefault(symbol, {})[venue] = _VenueTop(
+            float(bid or 0.0), float(bid_qty or 0.0), float(ask or 0.0), float(ask_qty or 0.0),
+            int(ts_ms or 0), now,
+        )
+        self._updates[venue] = self._updates.get(venue, 0) + 1
+
+    def update_depth(
+        self, venue: str, symbol: str, bids: Levels, asks: Levels,
+        ts_ms: Optional[int] = None, now: Optional[float] = None,
+    ) -> None:
+        self._depth.setdefault(symbol, {})[venue] = (list(bids), list(asks), int(ts_ms or 0))
+        # depth also carries the top (with sizes, which Gate tickers lack) unless a newer ticker is already in
+        if bids and asks:
+            top = self._top.get(symbol, {}).get(venue)
+            if top is None or int(ts_ms or 0) >= top.ts_ms:
+                self.update_top(venue, symbol, bids[0][0], bids[0][1], asks[0][0], asks[0][1], ts_ms, now)
+
+    def forget(self, venue: Optional[str] = None) -> None:
+        """Drop a venue's state (all venues if None), e.g. when its feed is stopped."""
+        for table in (self._top, self._depth):
+            for sym in list(table):
+                if venue is None:
+                    table.pop(sym, None)
+                    continue
+                table[sym].pop(venue, None)
+                if not table[sym]:
+                    table.pop(sym, None)
+
+    # ─────────────────────────── views ───────────────────────────
+
+    def venue_quote(self, symbol: str, venue: str) -> Optional[Dict[str, Any]]:
+        top = self._top.get(symbol.upper(), {}).get(venue)
+        if top is None:
+            return None
+        return {"bid": top.bid, "bidQty": top.bid_qty, "ask": top.ask, "askQty": top.ask_qty, "ts_ms": top.ts_ms}
+
+    def consolidated(self, symbol: str, now: Optional[float] = None) -> Dict[str, Any]:
+        sym = symbol.upper()
+        now = time.monotonic() if now is None else now
+        per_venue: Dict[str, Dict[str, Any]] = {}
+        best_bid = best_ask = 0.0
+        bid_venue = ask_venue = None
+        for venue, top in self._top.get(sym, {}).items():
+            age_ms = (now - top.recv) * 1000.0
+            stale = age_ms > self.stale_after_ms
+            mid = (top.bid + top.ask) / 2.0 if top.bid > 0 and top.ask > 0 else 0.0
+            per_venue[venue] = {
+                "bid": top.bid,
+                "bidQty": top.bid_qty,
+                "ask": top.ask,
+                "askQty": top.ask_qty,
+                "spread_bps": ((top.ask - top.bid) / mid * 1e4) if mid > 0 else 0.0,
+                "age_ms": round(age_ms, 1),
+                "stale": stale,
+                "active": venue == self.active,
+            }
+            if stale:
+                continue
+            if top.bid > 0 and top.bid > best_bid:
+                best_bid, bid_venue = top.bid, venue
+            if top.ask > 0 and (best_ask == 0.0 or top.ask < best_ask):
+                best_ask, ask_venue = top.ask, venue
+
+        mid = (best_bid + best_ask) / 2.0 if best_bid > 0 and best_ask > 0 else 0.0
+        return {
+            "symbol": sym,
+            "best_bid": best_bid,
+            "best_bid_venue": bid_venue,
+            "best_ask": best_ask,
+            "best_ask_venue": ask_venue,
+            "mid": mid,
+            # consolidated spread across venues; < 0 means the book is crossed between venues
+            "cross_spread_bps": ((best_ask - best_bid) / mid * 1e4) if mid > 0 else None,
+            "crossed": bool(mid > 0 and best_bid > best_ask and bid_venue != ask_venue),
+            "active": self.active,
+            "venues": per_venue,
+        }
+
+    def consolidated_many(self, symbols: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        syms = sorted(self._top) if symbols is None else [s.upper() for s in symbols if s]
+        return [self.consolidated(s, now=now) for s in syms]
+
+    def get_stats(self) -> Dict[str, Any]:
+        per_venue: Dict[str, int] = {}
+        for venues in self._top.values():
+            for v in venues:
+                per_venue[v] = per_venue.get(v, 0) + 1
+        return {"active": self.active, "symbols": per_venue, "updates": dict(self._updates)}
+
+    # ─────────────────────────── switching ───────────────────────────
+
+    async def replay(self, venue: str, tracker: Any) -> int:
+        """Seed `tracker` with the stored state of `venue` (depth first, then the latest top)."""
+        n = 0
+        for sym, venues in list(self._top.items()):
+            top = venues.get(venue)
+            if top is None:
+                continue
+            depth = self._depth.get(sym, {}).get(venue)
+            if depth is not None and (depth[0] or depth[1]):
+                await tracker.update_partial_depth(sym, depth[0], depth[1], ts_ms=depth[2] or None)
+            await tracker.update_book_ticker(sym, top.bid, top.bid_qty, top.ask, top.ask_qty, ts_ms=top.ts_ms or None)
+            n += 1
+        return n
+
+
+_BOOK: Optional[VenueQuoteBook] = None
+
+
+def get_venue_book() -> VenueQuoteBook:
+    global _BOOK
+    if _BOOK is None:
+        _BOOK = VenueQuoteBook()
+    return _BOOK
+
+
+def active_venue() -> str:
+    return get_venue_book().active
+
+
+# ───────────────────────── feed callbacks ─────────────────────────
+
+# tracker entry points (services.book_tracker imports the WS clients, so resolve lazily)
+_FWD: Optional[Tuple[Callable[..., Awaitable[None]], Callable[..., Awaitable[None]]]] = None
+
+
+def _forwarders() -> Tuple[Callable[..., Awaitable[None]], Callable[..., Awaitable[None]]]:
+    global _FWD
+    if _FWD is None:
+        from app.services.book_tracker import on_book_ticker, on_partial_depth
+
+        _FWD = (on_book_ticker, on_partial_depth)
+    return _FWD
+
+
+def venue_callbacks(venue: str) -> Tuple[Callable[..., Awaitable[None]], Callable[..., Awaitable[None]]]:
+    """(on_book_ticker, on_partial_depth) for a WS client of `venue` — same signatures as the tracker hooks."""
+    venue = _norm_venue(venue)
+
+    async def _on_book_ticker(
+        symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float, ts_ms: Optional[int] = None
+    ) -> None:
+        book = get_venue_book()
+        book.update_top(venue, symbol, bid, bid_qty, ask, ask_qty, ts_ms)
+        if book.active == venue:
+            await _forwarders()[0](symbol, bid, bid_qty, ask, ask_qty, ts_ms=ts_ms)
+
+    async def _on_partial_depth(
+        symbol: str, bids: Levels, asks: Levels, ts_ms: Optional[int] = None
+    ) -> None:
+        book = get_venue_book()
+        book.update_depth(venue, symbol, bids, asks, ts_ms)
+        if book.active == venue:
+            await _forwarders()[1](symbol, bids, asks, ts_ms=ts_ms)
+
+    return _on_book_ticker, _on_partial_depth
+
+
+async def switch_active_venue(venue: str) -> int:
+    """
+    Make `venue` the trading venue without touching the streams: drop the
+    tracker's quotes (they belong to the old venue) and replay the new
+    venue's book into it. Returns the number of symbols replayed.
+    """
+    from app.services import book_tracker as bt
+
+    book = get_venue_book()
+    book.set_active(venue)
+    bt.reset_quotes()
+    return await book.replay(book.active, bt.book_tracker)
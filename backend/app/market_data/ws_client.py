@@ -28,6 +28,8 @@ from app.market_data.helpers.proto_utils import (
     bruteforce_decode_book,
 )
 from app.market_data.helpers.quote_logging import QuoteLogger
+from app.infra.metrics_agg import MetricsAggregator
+from app.infra.tracing import get_tracer
 
 # ✅ Gate client export (kept for compatibility)
 from app.market_data.gate_ws import GateWebSocketClient
@@ -83,17 +85,13 @@ except Exception:
 
 # ── service callbacks ───────────────────────────────────────────────────────
 try:
-    from app.services.book_tracker import (
-        on_book_ticker as _bt_cb,
-        on_partial_depth as _depth_cb,
-        update_tape_metrics,
-    )
+    # venue-qualified: updates land in the venue book and reach the tracker only while MEXC is the trading venue
+    from app.market_data.venues import get_venue_book as _venue_book, venue_callbacks
+    _bt_cb, _depth_cb = venue_callbacks("mexc")
     BOOK_TRACKER_AVAILABLE = True
 except Exception:
     BOOK_TRACKER_AVAILABLE = False
     logger.warning("book_tracker module not fully available, using fallback stubs")
-    
-    from app.services.book_tracker import book_tracker as _book_tracker
 
     async def _bt_cb(symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float, ts_ms: Optional[int]):
         logger.debug(f"📊 Book ticker stub for {symbol}: bid={bid:.4f}, ask={ask:.4f}, ts_ms={ts_ms}")
@@ -101,6 +99,12 @@ except Exception:
     async def _depth_cb(symbol: str, bids: list[tuple[float, float]], asks: list[tuple[float, float]], ts_ms: Optional[int]):
         return
 
+# tape aggregates: service-level hook if present, else kept on the tracker object below
+try:
+    from app.services.book_tracker import update_tape_metrics
+except Exception:
+    from app.services.book_tracker import book_tracker as _book_tracker
+
     async def update_tape_metrics(
         symbol: str, usdpm: float, tpm: float, trades: Optional[List[Tuple[float, float, int]]] = None
     ):
@@ -186,6 +190,18 @@ except Exception as e:
     PROTO_AVAILABLE = False
     EnvelopeModule = None
 
+KlineModule = None
+try:
+    from app.market_data.mexc_pb import PublicSpotKlineV3Api_pb2 as KlineModule
+except Exception:
+    KlineModule = None
+
+# ── candles feed (kline channel → candles_cache ring buffers) ──────────────
+try:
+    from app.services.candles_cache import candles_cache as _candles_cache
+except Exception:
+    _candles_cache = None
+
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
@@ -363,6 +379,11 @@ class MEXCWebSocketClient:
         self._want_stop = False
         self._id_counter = 1
         self._subscribed_topics: set[str] = set()
+        self._pending_unsub: set[str] = set()
+
+        # per-symbol channel topics; changed live via set_symbol_channels()
+        self._sym_channels: dict[str, list[str]] = {s: list(self.channels) for s in self.symbols}
+        self._kline_syms: set[str] = set()
 
         self._reconnect_floor = reconnect_floor
         self._reconnect_ceil = reconnect_ceil
@@ -391,6 +412,10 @@ class MEXCWebSocketClient:
         self._deals_cls: Optional[type] = None
         self._book_modules = [m for m in (AggreBookTickerModule, BookTickerModule) if m]
 
+        # 1m klines feed candles_cache; added only while under the topic cap
+        self._want_kline = bool(getattr(settings, "ws_kline_enabled", True)) and KlineModule is not None
+        self._kline_topic = WS_CHANNELS.get("KLINE", "spot@public.kline.v3.api.pb")
+
         # logging helpers
         self._verbose_frames = bool(getattr(settings, "ws_verbose_frames", False))
         self._verbose_hexdump = bool(getattr(settings, "ws_verbose_hexdump", False))
@@ -414,6 +439,19 @@ class MEXCWebSocketClient:
         self._total_book_tickers = 0
         self._total_deals = 0
         self._total_depth_updates = 0
+        self._total_klines = 0
+
+        # per-tick ws_ticks_total / ws_lag_seconds go through pre-bound children
+        # accumulated locally and flushed to the registry on a cadence
+        self._metrics = MetricsAggregator(
+            ticks_total if METRICS_AVAILABLE else None,
+            ("book_ticker", "deals", "kline"),
+            ws_lag_seconds if METRICS_AVAILABLE else None,
+            flush_interval=float(getattr(settings, "ws_metrics_flush_ms", 1000)) / 1000.0,
+        )
+        self._metrics.bind_many(self.symbols)
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._tracer = get_tracer()
 
     # ───────────── lifecycle ─────────────
     async def run(self) -> None:
@@ -428,6 +466,7 @@ class MEXCWebSocketClient:
         _health_started()
 
         self._want_stop = False
+        self._metrics_task = asyncio.create_task(self._metrics.run())
         try:
             while not self._want_stop:
                 try:
@@ -446,6 +485,9 @@ class MEXCWebSocketClient:
         except asyncio.CancelledError:
             logger.info("WS client task cancelled, shutting down")
         finally:
+            if self._metrics_task is not None:
+                self._metrics_task.cancel()
+                self._metrics_task = None
             await self._graceful_close()
             _health_stopped()
             logger.info(
@@ -553,6 +595,7 @@ class MEXCWebSocketClient:
         self._last_ping_ts_ms = 0
         self._reconnect_delay = self._reconnect_floor
         self._subscribed_topics.clear()
+        self._pending_unsub.clear()
         self._started_at_ms = now
         self._blocked_seen = 0
         self._downgraded_once = False
@@ -621,24 +664,58 @@ class MEXCWebSocketClient:
         # Non-aggre topics (fallback) - just symbol
         return f"{topic}@{sym}"
 
+    def _symbol_topics(self, sym: str, levels: int) -> list[str]:
+        """Channel (+ optional debug) topics of one symbol under the current downgrade policy."""
+        topics = [self._topic_for(ch, sym, levels) for ch in self._sym_channels.get(sym, self.channels)]
+        if self._dbg_json_parity:
+            suf = "" if self._blocked_seen >= 1 else self.rate_suffix
+            topics.append(f"spot@public.aggre.bookTicker.v3.api{suf}@{sym}")
+        if self._dbg_pb_variants:
+            suf = "" if self._blocked_seen >= 1 else self.rate_suffix
+            topics.append(f"spot@public.bookTicker.v3.api.pb{suf}@{sym}")
+        return topics
+
+    def _kline_for(self, sym: str) -> str:
+        return f"{self._kline_topic}@{sym}@Min1"
+
+    def topic_count(self) -> int:
+        """Topics this connection wants (channel topics + kline topics)."""
+        levels = int(getattr(settings, "ws_orderbook_snapshot_levels", 10))
+        return sum(len(self._symbol_topics(s, levels)) for s in self.symbols) + len(self._kline_syms)
+
+    async def _send_topics(self, method: str, topics: list[str]) -> None:
+        """Rate-limited SUBSCRIPTION / UNSUBSCRIPTION sends, one topic per message."""
+        for i, t in enumerate(topics, 1):
+            try:
+                if method == "UNSUBSCRIPTION":
+                    self._pending_unsub.add(t)
+                    self._subscribed_topics.discard(t)
+                await self._send_json({"method": method, "params": [t], "id": self._next_id()})
+                if i % 10 == 0 or i == len(topics):
+                    logger.debug(f"📡 {method} {i}/{len(topics)} topics")
+                await asyncio.sleep(self._sub_interval)
+            except Exception as e:
+                logger.error(f"Failed {method} {t}: {e}")
+
     async def _subscribe_all(self) -> None:
         """Subscribe to all topics with rate limiting."""
         assert self._ws and self._connected, "Must be connected before subscribing"
         
-        topics: list[str] = []
         levels = int(getattr(settings, "ws_orderbook_snapshot_levels", 10))
-
-        for sym in self.symbols:
-            for ch in self.channels:
-                topics.append(self._topic_for(ch, sym, levels))
-
-            # Optional debug topics
-            if self._dbg_json_parity:
-                suf = "" if self._blocked_seen >= 1 else self.rate_suffix
-                topics.append(f"spot@public.aggre.bookTicker.v3.api{suf}@{sym}")
-            if self._dbg_pb_variants:
-                suf = "" if self._blocked_seen >= 1 else self.rate_suffix
-                topics.append(f"spot@public.bookTicker.v3.api.pb{suf}@{sym}")
+        topics: list[str] = [t for sym in self.symbols for t in self._symbol_topics(sym, levels)]
+
+        # Kline topics are optional (REST delta covers them) — never shard for them
+        self._kline_syms.clear()
+        if self._want_kline:
+            kline_topics = [self._kline_for(sym) for sym in self.symbols]
+            if len(topics) + len(kline_topics) <= self.MAX_TOPICS_PER_CONN:
+                topics.extend(kline_topics)
+                self._kline_syms.update(self.symbols)
+            else:
+                logger.info(
+                    f"Kline topics skipped ({len(topics)}+{len(kline_topics)} > "
+                    f"{self.MAX_TOPICS_PER_CONN}); candles use REST delta"
+                )
 
         if len(topics) > self.MAX_TOPICS_PER_CONN:
             logger.error(
@@ -652,20 +729,65 @@ class MEXCWebSocketClient:
         logger.info(f"📡 Subscribing to {len(topics)} topics (rate: {self._subs_per_sec}/sec)...")
         _metric_set(ws_active_subscriptions, float(len(topics)))
 
-        # Rate-limited subscription sends
-        for i, t in enumerate(topics, 1):
-            try:
-                await self._send_json(
-                    {"method": "SUBSCRIPTION", "params": [t], "id": self._next_id()}
-                )
-                if i % 10 == 0 or i == len(topics):
-                    logger.debug(f"📡 Subscribed {i}/{len(topics)} topics")
-                await asyncio.sleep(self._sub_interval)
-            except Exception as e:
-                logger.error(f"Failed to subscribe to {t}: {e}")
+        await self._send_topics("SUBSCRIPTION", topics)
 
         logger.info(f"✅ Subscription phase complete ({len(topics)} topics)")
 
+    async def set_symbol_channels(self, symbol: str, channels: Optional[List[str]]) -> None:
+        """
+        Change the channels of one symbol without reconnecting.
+
+        Only the topic diff goes over the live socket (UNSUBSCRIPTION first,
+        then SUBSCRIPTION). Empty `channels` drops the symbol. While
+        disconnected the new set is just recorded and `_subscribe_all` picks
+        it up on the next connect. Kline topics are kept only while there is
+        room under MAX_TOPICS_PER_CONN and are evicted first.
+        """
+        sym = (symbol or "").strip().upper()
+        if not sym:
+            return
+        levels = int(getattr(settings, "ws_orderbook_snapshot_levels", 10))
+        old = set(self._symbol_topics(sym, levels)) if sym in self._sym_channels else set()
+
+        remove: list[str] = []
+        add: list[str] = []
+        if channels:
+            self._sym_channels[sym] = _resolve_channels(channels)
+            if sym not in self.symbols:
+                self.symbols.append(sym)
+            self._metrics.bind(sym)
+            new = set(self._symbol_topics(sym, levels))
+        else:
+            self._sym_channels.pop(sym, None)
+            if sym in self.symbols:
+                self.symbols.remove(sym)
+            if sym in self._kline_syms:
+                self._kline_syms.discard(sym)
+                remove.append(self._kline_for(sym))
+            new = set()
+        remove.extend(sorted(old - new))
+        add.extend(sorted(new - old))
+
+        # channel topics always win over klines
+        while self._kline_syms and self.topic_count() > self.MAX_TOPICS_PER_CONN:
+            victim = self._kline_syms.pop()
+            remove.append(self._kline_for(victim))
+        if (
+            channels and self._want_kline and sym not in self._kline_syms
+            and self.topic_count() + 1 <= self.MAX_TOPICS_PER_CONN
+        ):
+            self._kline_syms.add(sym)
+            add.append(self._kline_for(sym))
+
+        if not (self._ws and self._connected):
+            return
+        if remove:
+            await self._send_topics("UNSUBSCRIPTION", remove)
+        if add:
+            await self._send_topics("SUBSCRIPTION", add)
+        _metric_set(ws_active_subscriptions, float(self.topic_count()))
+        logger.debug(f"🔁 {sym}: +{len(add)} / -{len(remove)} topics (live)")
+
     async def _listen_loop(self) -> None:
         """Main message reception loop with heartbeat and lifecycle management."""
         assert self._ws and self._connected
@@ -755,7 +877,10 @@ class MEXCWebSocketClient:
                         await self._downgrade_and_resubscribe()
                 else:
                     # Successful subscription
-                    if msg.startswith("spot@"):
+                    if msg in self._pending_unsub:
+                        self._pending_unsub.discard(msg)
+                        logger.debug(f"✅ Unsubscribed: {msg}")
+                    elif msg.startswith("spot@"):
                         self._subscribed_topics.add(msg)
                         logger.debug(f"✅ Subscribed: {msg}")
                     # NOTE: Don't reset _blocked_seen immediately!
@@ -827,6 +952,7 @@ class MEXCWebSocketClient:
 
     async def _handle_binary(self, payload: bytes) -> None:
         """Handle binary (protobuf) messages: book ticker, deals, depth."""
+        t_recv = time.perf_counter()
         if not PROTO_AVAILABLE or EnvelopeModule is None:
             logger.warning("🟡 Binary frame but protobuf env not available")
             return
@@ -886,7 +1012,10 @@ class MEXCWebSocketClient:
                 
                 # Route to appropriate handler
                 if "bookTicker" in ch_str:
+                    self._tracer.begin(sym or "", t_recv)
                     self._on_book_ticker(sym or "", data_bytes, int(ts or 0))
+                elif ".kline." in ch_str or "Kline" in ch_str:
+                    self._on_kline(sym or "", data_bytes, int(ts or 0))
                 elif ".deals." in ch_str:
                     self._on_deals(sym or "", data_bytes, int(ts or 0))
                 elif ".limit.depth" in ch_str or ".increase.depth" in ch_str or "Depth" in ch_str:
@@ -1047,6 +1176,7 @@ class MEXCWebSocketClient:
                         ):
                             self._total_book_tickers += 1
                             self._on_tick_metrics(send_time, symbol=symbol)
+                            self._tracer.mark(symbol, "decode")
                             if not self._want_stop and self._can_call_callback():
                                 asyncio.create_task(_bt_cb(symbol, b, float(bq), a, float(aq), ts_ms=send_time))
                         return
@@ -1066,6 +1196,7 @@ class MEXCWebSocketClient:
                     ):
                         self._total_book_tickers += 1
                         self._on_tick_metrics(send_time, symbol=symbol)
+                        self._tracer.mark(symbol, "decode")
                         if not self._want_stop and self._can_call_callback():
                             asyncio.create_task(_bt_cb(symbol, b, float(bq), a, float(aq), ts_ms=send_time))
                     return
@@ -1075,12 +1206,13 @@ class MEXCWebSocketClient:
 
     def _on_tick_metrics(self, send_time_ms: Optional[int], *, symbol: Optional[str] = None) -> None:
         """Update metrics and health after receiving a tick."""
-        _metric_inc(ticks_total, symbol=symbol or "unknown", type="book_ticker")
-        
+        sym = symbol or "unknown"
+        self._metrics.inc(sym, "book_ticker")
+
         if send_time_ms:
             now_ms = _now_ms()
             lag_sec = max(0.0, (now_ms - int(send_time_ms)) / 1000.0)
-            _metric_observe(ws_lag_seconds, lag_sec, symbol=symbol or "unknown")
+            self._metrics.observe(sym, lag_sec)
             
         _health_tick()
 
@@ -1152,7 +1284,7 @@ class MEXCWebSocketClient:
 
             self._total_deals += 1
             self._on_tick_metrics(send_time, symbol=symbol)
-            _metric_inc(ticks_total, symbol=symbol or "unknown", type="deals")
+            self._metrics.inc(symbol or "unknown", "deals")
 
             # Update tape metrics asynchronously
             if self._can_call_callback():
@@ -1167,10 +1299,38 @@ class MEXCWebSocketClient:
         except Exception as e:
             logger.error(f"❌ deals decode error for {symbol}: {e}", exc_info=self._verbose_frames)
 
+    def _on_kline(self, symbol: str, data_bytes: bytes, send_time: int) -> None:
+        """Parse 1m kline push and upsert it into candles_cache."""
+        if self._want_stop or KlineModule is None or _candles_cache is None:
+            return
+
+        data_bytes, _ = maybe_gunzip(data_bytes)
+        try:
+            msg = KlineModule.PublicSpotKlineV3Api()
+            msg.ParseFromString(data_bytes)
+            if msg.interval and msg.interval != "Min1":
+                return
+            _candles_cache.on_kline(
+                symbol,
+                "mexc",
+                int(msg.windowStart),
+                float(msg.openingPrice or 0),
+                float(msg.highestPrice or 0),
+                float(msg.lowestPrice or 0),
+                float(msg.closingPrice or 0),
+                float(msg.volume or 0),
+            )
+            self._total_klines += 1
+            self._metrics.inc(symbol or "unknown", "kline")
+        except Exception as e:
+            logger.error(f"❌ kline decode error for {symbol}: {e}", exc_info=self._verbose_frames)
+
     async def _update_live_tape(
         self, symbol: str, usdpm: float, tpm: float, trades: List[Tuple[float, float, int]]
     ) -> None:
         """Update tape metrics in book tracker."""
+        if BOOK_TRACKER_AVAILABLE and not _venue_book().is_active("mexc"):
+            return  # tape aggregates are only kept for the trading venue
         try:
             await update_tape_metrics(symbol, usdpm, tpm, trades)
         except Exception as e:
@@ -1277,11 +1437,14 @@ class MEXCWebSocketClient:
             "connected": self._connected,
             "symbols": len(self.symbols),
             "subscribed_topics": len(self._subscribed_topics),
+            "wanted_topics": self.topic_count(),
+            "kline_topics": len(self._kline_syms),
             "total_reconnects": self._total_reconnects,
             "total_messages": self._total_messages_received,
             "total_book_tickers": self._total_book_tickers,
             "total_deals": self._total_deals,
             "total_depth_updates": self._total_depth_updates,
+            "total_klines": self._total_klines,
             "blocked_seen": self._blocked_seen,
             "downgraded": self._downgraded_once,
             "connection_age_sec": (
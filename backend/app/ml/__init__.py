@@ -0,0 +1,17 @@
+# app/ml/__init__.py
+from app.ml.features import FEATURES, FEATURE_NAMES, FeatureSpec, compute_features, compute_vector
+from app.ml.feature_store import FeatureSnapshot, FeatureStore, get_feature_store
+from app.ml.registry import ModelEntry, ModelRegistry
+
+__all__ = [
+    "FEATURES",
+    "FEATURE_NAMES",
+    "FeatureSpec",
+    "compute_features",
+    "compute_vector",
+    "FeatureSnapshot",
+    "FeatureStore",
+    "get_feature_store",
+    "ModelEntry",
+    "ModelRegistry",
+]
@@ -0,0 +1,499 @@
+# app/ml/export.py
+"""
+Columnar bulk export for ML training data.
+
+Streams `ml_trade_outcomes` / `ml_snapshots` out of the DB in fixed-size
+chunks (server-side cursor, bounded memory) and writes typed NumPy columns
+partitioned by day and symbol:
+
+    <root>/<dataset>/date=2025-11-06/symbol=LINKUSDT/part-000000000123.col
+    <root>/<dataset>/_manifest.json          # schema + watermark
+
+A part file is a small JSON header followed by each column as one
+contiguous, 64-byte aligned little-endian array.
+
+Incremental: each run only fetches rows with id > manifest["watermark_id"].
+
+Loading: part files are mmap'ed and columns are np.frombuffer views, so
+reading a part is zero-copy. With compress=True every column blob is
+zlib-compressed instead — smaller on disk, but it has to be inflated on
+load and therefore cannot be memory-mapped.
+
+Feature columns come from app.ml.features, so exported values are the same
+numbers the online store serves at inference.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.ml.features import FEATURE_DEFAULTS, FEATURE_NAMES, INT_FEATURES, RAW_INPUTS, compute_vector, normalize_raw
+
+MANIFEST = "_manifest.json"
+PART_SUFFIX = ".col"
+PART_MAGIC = b"MLCOL1\n\x00"
+_ALIGN = 64
+DEFAULT_CHUNK_ROWS = 50_000
+SYMBOL_DTYPE = "S20"
+REASON_DTYPE = "S32"  # engine reasons reach e.g. "TIMEOUT_EXPIRED_MARKET"
+
+
+# ───────────────────────────── dataset specs ─────────────────────────────
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    dtype: str
+    default: Any = 0
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    name: str
+    table: str
+    ts_column: str
+    columns: Tuple[Column, ...]               # selected as-is from the table
+    derive_features: bool = False             # compute registry features from raw columns
+    where: str = ""
+
+    @property
+    def select_columns(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    @property
+    def schema(self) -> Dict[str, str]:
+        out = {"id": "int64", "ts_ms": "int64", "symbol": SYMBOL_DTYPE}
+        for c in self.columns:
+            if c.name not in ("id", "symbol", self.ts_column):
+                out[c.name] = c.dtype
+        if self.derive_features:
+            for n in FEATURE_NAMES:
+                out[n] = _feature_dtype(n)
+        return out
+
+
+def _feature_dtype(name: str) -> str:
+    return "int32" if name in INT_FEATURES else "float64"
+
+
+_OUTCOME_COLUMNS: Tuple[Column, ...] = (
+    Column("id", "int64"),
+    Column("symbol", SYMBOL_DTYPE, b""),
+    Column("entry_time", "int64"),
+    *(Column(n, _feature_dtype(n), d) for n, d in zip(FEATURE_NAMES, FEATURE_DEFAULTS)),
+    Column("hour_of_day", "int8"),
+    Column("day_of_week", "int8"),
+    Column("minute_of_hour", "int8"),
+    Column("take_profit_bps", "float64"),
+    Column("stop_loss_bps", "float64"),
+    Column("trailing_stop_enabled", "int8"),
+    Column("timeout_seconds", "float64"),
+    Column("exploration_mode", "int8"),
+    Column("exit_reason", REASON_DTYPE, b""),
+    Column("pnl_usd", "float64"),
+    Column("pnl_bps", "float64"),
+    Column("hold_duration_sec", "float64"),
+    Column("max_favorable_excursion_bps", "float64"),
+    Column("max_adverse_excursion_bps", "float64"),
+    Column("win", "int8"),
+    Column("hit_tp", "int8"),
+    Column("hit_sl", "int8"),
+    Column("hit_trailing", "int8"),
+    Column("timed_out", "int8"),
+)
+
+_SNAPSHOT_COLUMNS: Tuple[Column, ...] = (
+    Column("id", "int64"),
+    Column("symbol", SYMBOL_DTYPE, b""),
+    Column("ts", "int64"),
+    Column("bid", "float64"),
+    Column("ask", "float64"),
+    Column("mid", "float64"),
+    Column("last", "float64"),
+    *(Column(n, "float64") for n in (
+        "spread_bps", "eff_spread_bps_maker",
+        "depth5_bid_usd", "depth5_ask_usd", "depth10_bid_usd", "depth10_ask_usd",
+        "imbalance", "trades_per_min", "usd_per_min", "median_trade_usd",
+        "atr1m_pct", "grinder_ratio", "pullback_median_retrace",
+    )),
+    Column("spike_count_90m", "int32"),
+    Column("ws_lag_ms", "int32"),
+    Column("filled_20s", "int8", -1),
+    Column("profit_bps", "float64", np.nan),
+)
+
+DATASETS: Dict[str, DatasetSpec] = {
+    "outcomes": DatasetSpec(
+        name="outcomes",
+        table="ml_trade_outcomes",
+        ts_column="entry_time",
+        columns=_OUTCOME_COLUMNS,
+        where="exit_time IS NOT NULL",
+    ),
+    "snapshots": DatasetSpec(
+        name="snapshots",
+        table="ml_snapshots",
+        ts_column="ts",
+        columns=_SNAPSHOT_COLUMNS,
+        derive_features=True,
+    ),
+}
+
+
+# ───────────────────────────── helpers ─────────────────────────────
+
+def _to_epoch_ms(v: Any) -> int:
+    """TIMESTAMP (datetime / ISO text from SQLite) or epoch ms → epoch ms (UTC)."""
+    if v is None:
+        return 0
+    if isinstance(v, (int, float)):
+        return int(v)
+    if isinstance(v, str):
+        try:
+            v = datetime.fromisoformat(v.replace("Z", "+00:00"))
+        except ValueError:
+            return 0
+    if isinstance(v, datetime):
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        return int(v.timestamp() * 1000)
+    return 0
+
+
+def _days(ts_ms: np.ndarray) -> np.ndarray:
+    """epoch ms → 'YYYY-MM-DD' (UTC), vectorised."""
+    return np.datetime_as_string((ts_ms // 86_400_000).astype("datetime64[D]"), unit="D")
+
+
+def _column_array(values: Sequence[Any], dtype: str, default: Any) -> np.ndarray:
+    if dtype.startswith("S"):
+        return np.array([(v or "").encode() if isinstance(v, str) else (v or default) for v in values], dtype=dtype)
+    # None → NaN in C, then NULLs get the column default
+    arr = np.array(values, dtype=np.float64)
+    if len(arr):
+        nulls = np.isnan(arr)
+        if nulls.any():
+            arr[nulls] = default
+    return arr if dtype == "float64" else arr.astype(dtype)
+
+
+def _atomic_write_json(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def read_manifest(root: Path, dataset: str) -> Dict[str, Any]:
+    path = Path(root) / dataset / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ───────────────────────────── export ─────────────────────────────
+
+@dataclass
+class ExportResult:
+    dataset: str
+    rows: int = 0
+    parts: int = 0
+    watermark_id: int = 0
+    elapsed_sec: float = 0.0
+    partitions: List[str] = field(default_factory=list)
+
+
+def _chunk_to_columns(spec: DatasetSpec, rows: Sequence[Sequence[Any]]) -> Dict[str, np.ndarray]:
+    names = spec.select_columns
+    by_name = dict(zip(names, zip(*rows))) if rows else {n: () for n in names}
+    cols: Dict[str, np.ndarray] = {}
+
+    ts_raw = by_name[spec.ts_column]
+    cols["ts_ms"] = np.fromiter((_to_epoch_ms(v) for v in ts_raw), dtype=np.int64, count=len(rows))
+    for c in spec.columns:
+        if c.name == spec.ts_column:
+            continue
+        cols[c.name] = _column_array(by_name[c.name], c.dtype, c.default)
+
+    if spec.derive_features:
+        raw_keys = [n for n in names if n in RAW_INPUTS]
+        idx = [names.index(n) for n in raw_keys]
+        mat = np.array(
+            [compute_vector(normalize_raw({k: r[i] for k, i in zip(raw_keys, idx)})) for r in rows],
+            dtype=np.float64,
+        ).reshape(len(rows), len(FEATURE_NAMES))
+        for j, n in enumerate(FEATURE_NAMES):
+            cols[n] = mat[:, j].astype(_feature_dtype(n))
+    return cols
+
+
+def _write_part(path: Path, cols: Dict[str, np.ndarray], compress: bool) -> None:
+    """One file per part: MAGIC | u64 header_len | JSON header | aligned column blobs."""
+    blobs: List[bytes] = []
+    meta: List[Dict[str, Any]] = []
+    for name, arr in cols.items():
+        a = np.ascontiguousarray(arr)
+        a = a.astype(a.dtype.newbyteorder("<"), copy=False)
+        raw = a.tobytes()
+        if compress:
+            raw = zlib.compress(raw, 6)
+        meta.append({"name": name, "dtype": a.dtype.str, "nbytes": len(raw)})
+        blobs.append(raw)
+
+    n = len(next(iter(cols.values()))) if cols else 0
+    header = {"rows": n, "codec": "zlib" if compress else "raw", "columns": meta}
+    # offsets depend on header size; iterate until stable (one extra pass at most)
+    offset_base = 0
+    while True:
+        off = offset_base
+        for m in meta:
+            off = -(-off // _ALIGN) * _ALIGN
+            m["offset"] = off
+            off += m["nbytes"]
+        hdr = json.dumps(header, separators=(",", ":")).encode()
+        data_start = -(-(len(PART_MAGIC) + 8 + len(hdr)) // _ALIGN) * _ALIGN
+        if data_start == offset_base:
+            break
+        offset_base = data_start
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(PART_MAGIC)
+        f.write(struct.pack("<Q", len(hdr)))
+        f.write(hdr)
+        for m, raw in zip(meta, blobs):
+            f.write(b"\x00" * (m["offset"] - f.tell()))
+            f.write(raw)
+    os.replace(tmp, path)
+
+
+def _read_header(f) -> Dict[str, Any]:
+    if f.read(len(PART_MAGIC)) != PART_MAGIC:
+        raise ValueError(f"not a columnar part file: {getattr(f, 'name', '?')}")
+    (hlen,) = struct.unpack("<Q", f.read(8))
+    return json.loads(f.read(hlen))
+
+
+def _open_part(path: Path, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Raw parts → read-only zero-copy views over one mmap; zlib parts → inflated arrays."""
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        wanted = [m for m in header["columns"] if columns is None or m["name"] in columns]
+        if header["codec"] == "zlib":
+            out = {}
+            for m in wanted:
+                f.seek(m["offset"])
+                out[m["name"]] = np.frombuffer(zlib.decompress(f.read(m["nbytes"])), dtype=m["dtype"])
+            return out
+        if header["rows"] == 0:
+            return {m["name"]: np.empty(0, dtype=m["dtype"]) for m in wanted}
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return {
+        m["name"]: np.frombuffer(mm, dtype=m["dtype"], count=m["nbytes"] // np.dtype(m["dtype"]).itemsize, offset=m["offset"])
+        for m in wanted
+    }
+
+
+def part_rows(path: Path) -> int:
+    with open(path, "rb") as f:
+        return int(_read_header(f)["rows"])
+
+
+def _flush(
+    root: Path,
+    spec: DatasetSpec,
+    cols: Dict[str, np.ndarray],
+    compress: bool,
+    result: ExportResult,
+) -> None:
+    """Split one chunk by (day, symbol) and write a part per partition."""
+    n = len(cols["id"])
+    if n == 0:
+        return
+    keys = np.char.add(np.char.add(_days(cols["ts_ms"]), "|"), cols["symbol"].astype("U20"))
+    uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    # one stable reorder per column, then every partition is a contiguous slice
+    order = np.argsort(inverse, kind="stable")
+    ordered = {name: arr[order] for name, arr in cols.items()}
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    for k, key in enumerate(uniq):
+        lo, hi = int(bounds[k]), int(bounds[k + 1])
+        day, sym = str(key).split("|", 1)
+        part_cols = {name: arr[lo:hi] for name, arr in ordered.items()}
+        first_id = int(part_cols["id"][0])
+        rel = Path(f"date={day}") / f"symbol={sym or '_'}" / f"part-{first_id:012d}{PART_SUFFIX}"
+        _write_part(root / spec.name / rel, part_cols, compress)
+        result.parts += 1
+        result.partitions.append(str(rel))
+
+
+def export_dataset(
+    engine: Engine,
+    root: Path | str,
+    dataset: str = "outcomes",
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    full: bool = False,
+    compress: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+) -> ExportResult:
+    """
+    Export new rows of `dataset` into `root`.
+
+    full=True ignores the stored watermark (and should be pointed at an empty
+    root); otherwise only rows with id > watermark_id are fetched.
+    """
+    spec = DATASETS[dataset]
+    root = Path(root)
+    (root / spec.name).mkdir(parents=True, exist_ok=True)
+
+    manifest = {} if full else read_manifest(root, spec.name)
+    watermark = int(manifest.get("watermark_id", 0))
+    result = ExportResult(dataset=spec.name, watermark_id=watermark)
+    t0 = time.perf_counter()
+
+    where = "id > :wm" + (f" AND {spec.where}" if spec.where else "")
+    sql = text(f"SELECT {', '.join(spec.select_columns)} FROM {spec.table} WHERE {where} ORDER BY id")
+
+    with engine.connect() as conn:
+        res = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(sql, {"wm": watermark})
+        for chunk in res.partitions(chunk_rows):
+            cols = _chunk_to_columns(spec, chunk)
+            _flush(root, spec, cols, compress, result)
+            result.rows += len(chunk)
+            result.watermark_id = max(result.watermark_id, int(cols["id"].max()))
+            if progress:
+                progress(result.rows)
+
+    result.elapsed_sec = time.perf_counter() - t0
+    manifest.update({
+        "dataset": spec.name,
+        "table": spec.table,
+        "schema": spec.schema,
+        "feature_names": list(FEATURE_NAMES),
+        "watermark_id": result.watermark_id,
+        "rows": int(manifest.get("rows", 0)) + result.rows,
+        "compressed": bool(compress),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    })
+    _atomic_write_json(root / spec.name / MANIFEST, manifest)
+    return result
+
+
+# ───────────────────────────── load ─────────────────────────────
+
+def part_files(
+    root: Path | str,
+    dataset: str = "outcomes",
+    symbols: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[Path]:
+    """Part files matching the partition filters, in (date, symbol, id) order."""
+    base = Path(root) / dataset
+    want = {s.upper() for s in symbols} if symbols else None
+    out: List[Path] = []
+    for ddir in sorted(base.glob("date=*")):
+        day = date.fromisoformat(ddir.name[5:])
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        for sdir in sorted(ddir.glob("symbol=*")):
+            if want is not None and sdir.name[7:] not in want:
+                continue
+            out.extend(sorted(sdir.glob(f"part-*{PART_SUFFIX}")))
+    return out
+
+
+def iter_parts(
+    root: Path | str,
+    dataset: str = "outcomes",
+    *,
+    columns: Optional[Sequence[str]] = None,
+    symbols: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield one {column: array} per part (zero-copy views for raw parts)."""
+    for path in part_files(root, dataset, symbols, date_from, date_to):
+        yield _open_part(path, columns)
+
+
+def load_columns(
+    root: Path | str,
+    dataset: str = "outcomes",
+    *,
+    columns: Optional[Sequence[str]] = None,
+    symbols: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Column arrays across all matching parts.
+    A single part is returned as-is (zero-copy). Several parts are copied
+    once into preallocated arrays, opening one part at a time so the number
+    of live mappings stays at one.
+    """
+    paths = part_files(root, dataset, symbols, date_from, date_to)
+    if not paths:
+        schema = read_manifest(Path(root), dataset).get("schema", {})
+        names = columns or list(schema)
+        return {n: np.empty(0, dtype=schema.get(n, "float64")) for n in names}
+    if len(paths) == 1:
+        return _open_part(paths[0], columns)
+
+    total = 0
+    dtypes: Dict[str, np.dtype] = {}
+    for p in paths:
+        with open(p, "rb") as f:
+            header = _read_header(f)
+        total += int(header["rows"])
+        for m in header["columns"]:
+            if columns is None or m["name"] in columns:
+                # widest wins, so parts written with a narrower string dtype still fit
+                dt = np.dtype(m["dtype"])
+                dtypes[m["name"]] = np.result_type(dtypes[m["name"]], dt) if m["name"] in dtypes else dt
+    out: Dict[str, np.ndarray] = {n: np.empty(total, dtype=dt) for n, dt in dtypes.items()}
+    pos = 0
+    for p in paths:
+        part = _open_part(p, columns)
+        n = 0
+        for name, arr in part.items():
+            n = len(arr)
+            out[name][pos:pos + n] = arr
+        pos += n
+        del part
+    return out
+
+
+_TP_REASONS = (b"TP",)
+_LOSS_REASONS = (b"TIMEOUT", b"TO", b"SL", b"STOP_LOSS", b"STOPLOSS")
+
+
+def tp_label(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    TP-vs-rest training label (int8) from exported outcome columns, same rule
+    as the former trades-based CSV export: exit_reason TP → 1; TIMEOUT / SL
+    → 0; any other reason falls back to pnl_usd > 0.
+    """
+    reason = np.char.upper(np.asarray(cols["exit_reason"]).astype(REASON_DTYPE))
+    label = (np.asarray(cols["pnl_usd"], dtype=np.float64) > 0).astype(np.int8)
+    label[np.isin(reason, _LOSS_REASONS)] = 0
+    label[np.isin(reason, _TP_REASONS)] = 1
+    return label
+
+
+def feature_matrix(cols: Dict[str, np.ndarray], names: Sequence[str]) -> np.ndarray:
+    """Stack feature columns into an (n, len(names)) float matrix in `names` order."""
+    return np.column_stack([np.asarray(cols[n], dtype=np.float64) for n in names]) if names else np.empty((0, 0))
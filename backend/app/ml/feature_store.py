@@ -0,0 +1,192 @@
+# app/ml/feature_store.py
+"""
+Online feature store.
+
+Keeps one pre-computed feature vector per symbol (layout = app.ml.features
+registry). Producers push raw inputs as they change:
+
+    - BookTracker quote events      → spread/imbalance/bid/ask
+    - market scanner ScanRow         → depth, tape, candles, fees, score
+    - MMDetector / EnhancedBookTracker → phase-2 microstructure features
+
+Only features whose inputs actually changed are recomputed. Consumers
+(MLTradeLogger at entry, MLPredictor) take a point-in-time snapshot, which
+is just a copy of the vector — no recomputation on the hot path.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from app.ml.features import (
+    DEPENDENTS,
+    FEATURE_DEFAULTS,
+    FEATURE_INDEX,
+    FEATURE_NAMES,
+    FEATURES,
+    normalize_raw,
+    select,
+    vector_to_record,
+)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+@dataclass(frozen=True)
+class FeatureSnapshot:
+    """Immutable point-in-time copy of a symbol's feature vector."""
+    symbol: str
+    ts_ms: int
+    version: int
+    values: array
+
+    def __getitem__(self, name: str) -> float:
+        return self.values[FEATURE_INDEX[name]]
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(zip(FEATURE_NAMES, self.values))
+
+    def as_record(self) -> Dict[str, Any]:
+        """DB-ready dict for ml_trade_outcomes (*_entry columns)."""
+        return vector_to_record(self.values)
+
+    def select(self, names: Iterable[str]) -> List[float]:
+        """Values in model feature order (handles sym_* one-hot)."""
+        return select(self.as_dict(), names, symbol=self.symbol)
+
+
+class _SymbolFeatures:
+    __slots__ = ("raw", "values", "ts_ms", "version")
+
+    def __init__(self) -> None:
+        self.raw: Dict[str, Any] = {}
+        self.values = array("d", FEATURE_DEFAULTS)
+        self.ts_ms = 0
+        self.version = 0
+
+
+class FeatureStore:
+    """
+    Per-symbol incremental feature vectors.
+
+    update() is synchronous and cheap (dict merge + recompute of dependent
+    features only); it is safe to call from WS callbacks on the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._symbols: Dict[str, _SymbolFeatures] = {}
+        self._updates = 0
+        self._recomputed = 0
+
+    # ───────────────── producers ─────────────────
+
+    def update(self, symbol: str, raw: Mapping[str, Any], ts_ms: Optional[int] = None) -> int:
+        """
+        Merge raw inputs for `symbol`, recompute dependent features.
+        Returns the number of features recomputed.
+        """
+        sym = symbol.upper()
+        st = self._symbols.get(sym)
+        if st is None:
+            st = self._symbols[sym] = _SymbolFeatures()
+
+        dirty: set = set()
+        cur = st.raw
+        for key, value in raw.items():
+            deps = DEPENDENTS.get(key)
+            if deps is None or cur.get(key) == value:
+                continue
+            cur[key] = value
+            dirty.update(deps)
+
+        if dirty:
+            vals = st.values
+            for i in dirty:
+                vals[i] = float(FEATURES[i].fn(cur))
+            st.version += 1
+            self._recomputed += len(dirty)
+        st.ts_ms = int(ts_ms) if ts_ms is not None else _now_ms()
+        self._updates += 1
+        return len(dirty)
+
+    def update_scan_row(self, scan_row: Any, symbol: Optional[str] = None) -> int:
+        """Ingest a ScanRow (or scanner dict) produced by market_scanner."""
+        sym = symbol or (scan_row.get("symbol") if isinstance(scan_row, Mapping) else getattr(scan_row, "symbol", None))
+        if not sym:
+            return 0
+        return self.update(sym, normalize_raw(scan_row))
+
+    def on_quote(self, payload: Mapping[str, Any]) -> None:
+        """BookTracker listener: top-of-book derived fields."""
+        sym = payload.get("symbol")
+        if not sym:
+            return
+        bid = payload.get("bid") or 0.0
+        ask = payload.get("ask") or 0.0
+        if bid <= 0.0 or ask <= 0.0:
+            return
+        self.update(
+            sym,
+            {
+                "bid": bid,
+                "ask": ask,
+                "spread_bps": payload.get("spread_bps", 0.0),
+                "spread_abs": payload.get("spread", 0.0),
+                "imbalance": payload.get("imbalance", 0.5),
+            },
+            ts_ms=payload.get("ts_ms") or None,
+        )
+
+    def reset(self, symbol: Optional[str] = None) -> None:
+        if symbol is None:
+            self._symbols.clear()
+        else:
+            self._symbols.pop(symbol.upper(), None)
+
+    # ───────────────── consumers ─────────────────
+
+    def snapshot(self, symbol: str) -> FeatureSnapshot:
+        """Point-in-time copy. Unknown symbols get the registry defaults."""
+        sym = symbol.upper()
+        st = self._symbols.get(sym)
+        if st is None:
+            return FeatureSnapshot(sym, 0, 0, array("d", FEATURE_DEFAULTS))
+        return FeatureSnapshot(sym, st.ts_ms, st.version, st.values[:])
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols.keys())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._symbols),
+            "features": len(FEATURE_NAMES),
+            "updates": self._updates,
+            "features_recomputed": self._recomputed,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════════════════
+
+_feature_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """
+    Get singleton feature store. On first use it registers itself as a
+    BookTracker listener so quote-driven features stay current.
+    """
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+        try:
+            from app.market_data.book_tracker import book_tracker
+            book_tracker.add_listener(_feature_store.on_quote)
+        except Exception:
+            pass
+    return _feature_store
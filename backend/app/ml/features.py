@@ -0,0 +1,289 @@
+# app/ml/features.py
+"""
+Feature registry — single source of truth for ML entry features.
+
+Every feature that lands in `ml_trade_outcomes.*_entry`, that the predictor
+feeds to XGBoost, or that an export script writes for training is declared
+here exactly once:
+
+    FeatureSpec(name, default, group, inputs, fn)
+
+`inputs` are *raw* market fields (scanner / book tracker / MM detector names,
+e.g. "spread_bps", "depth5_bid_usd", "mm_confidence"). `fn(raw)` turns the
+raw mapping into one float. The online store (app.ml.feature_store) and the
+batch export path both call the same `fn`, so train/serve values are
+bit-identical.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+RawInputs = Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    name: str
+    default: float
+    group: str
+    inputs: Tuple[str, ...]
+    fn: Callable[[RawInputs], float]
+
+
+# ───────────────────────────── helpers ─────────────────────────────
+
+def _num(raw: RawInputs, key: str, default: float = 0.0) -> float:
+    """Raw value as float; None/garbage → default (scanner fields are Optional)."""
+    v = raw.get(key)
+    if v is None:
+        return default
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def _passthrough(name: str, key: str, default: float, group: str) -> FeatureSpec:
+    return FeatureSpec(name, default, group, (key,), lambda r, k=key, d=default: _num(r, k, d))
+
+
+def _ratio(num: float, den: float, default: float) -> float:
+    return num / den if den > 0 else default
+
+
+def _depth5_total(r: RawInputs) -> float:
+    return _num(r, "depth5_bid_usd") + _num(r, "depth5_ask_usd")
+
+
+def _depth10_total(r: RawInputs) -> float:
+    return _num(r, "depth10_bid_usd") + _num(r, "depth10_ask_usd")
+
+
+def _price_precision(r: RawInputs) -> float:
+    s = str(_num(r, "bid"))
+    return float(len(s.split(".")[-1])) if "." in s else 0.0
+
+
+# ───────────────────────────── registry ─────────────────────────────
+# Order matters: it is the vector layout of the online store and the
+# column order of batch exports. Append new features at the end.
+
+FEATURES: Tuple[FeatureSpec, ...] = (
+    # base
+    _passthrough("spread_bps_entry", "spread_bps", 0.0, "base"),
+    _passthrough("spread_pct_entry", "spread_pct", 0.0, "base"),
+    _passthrough("spread_abs_entry", "spread_abs", 0.0, "base"),
+    _passthrough("imbalance_entry", "imbalance", 0.5, "base"),
+
+    # effective spreads
+    _passthrough("eff_spread_bps_entry", "eff_spread_bps", 0.0, "eff_spread"),
+    _passthrough("eff_spread_pct_entry", "eff_spread_pct", 0.0, "eff_spread"),
+    _passthrough("eff_spread_abs_entry", "eff_spread_abs", 0.0, "eff_spread"),
+    _passthrough("eff_spread_maker_bps_entry", "eff_spread_bps_maker", 0.0, "eff_spread"),
+    _passthrough("eff_spread_taker_bps_entry", "eff_spread_bps_taker", 0.0, "eff_spread"),
+
+    # depth
+    _passthrough("depth5_bid_usd_entry", "depth5_bid_usd", 0.0, "depth"),
+    _passthrough("depth5_ask_usd_entry", "depth5_ask_usd", 0.0, "depth"),
+    _passthrough("depth10_bid_usd_entry", "depth10_bid_usd", 0.0, "depth"),
+    _passthrough("depth10_ask_usd_entry", "depth10_ask_usd", 0.0, "depth"),
+
+    # volume
+    _passthrough("base_volume_24h_entry", "base_volume_24h", 0.0, "volume"),
+    _passthrough("quote_volume_24h_entry", "quote_volume_24h", 0.0, "volume"),
+    _passthrough("trades_per_min_entry", "trades_per_min", 0.0, "volume"),
+    _passthrough("usd_per_min_entry", "usd_per_min", 0.0, "volume"),
+    _passthrough("median_trade_usd_entry", "median_trade_usd", 0.0, "volume"),
+
+    # fees
+    _passthrough("maker_fee_entry", "maker_fee", 0.0, "fees"),
+    _passthrough("taker_fee_entry", "taker_fee", 0.0, "fees"),
+    FeatureSpec("zero_fee_entry", 0.0, "fees", ("zero_fee",),
+                lambda r: 1.0 if r.get("zero_fee") else 0.0),
+
+    # volatility (candles_cache)
+    _passthrough("atr1m_pct_entry", "atr1m_pct", 0.0, "volatility"),
+    _passthrough("spike_count_90m_entry", "spike_count_90m", 0.0, "volatility"),
+    _passthrough("grinder_ratio_entry", "grinder_ratio", 0.0, "volatility"),
+    _passthrough("pullback_median_retrace_entry", "pullback_median_retrace", 0.35, "volatility"),
+    _passthrough("range_stable_pct_entry", "range_stable_pct", 0.0, "volatility"),
+    _passthrough("vol_pattern_entry", "vol_pattern", 0.0, "volatility"),
+
+    # pattern scores / ws
+    _passthrough("dca_potential_entry", "dca_potential", 0.0, "scores"),
+    _passthrough("scanner_score_entry", "score", 0.0, "scores"),
+    _passthrough("ws_lag_ms_entry", "ws_lag_ms", 0.0, "scores"),
+
+    # derived
+    FeatureSpec("depth_imbalance_entry", 1.0, "derived", ("depth5_bid_usd", "depth5_ask_usd"),
+                lambda r: _ratio(_num(r, "depth5_bid_usd"), _num(r, "depth5_ask_usd"), 1.0)),
+    FeatureSpec("depth5_total_usd_entry", 0.0, "derived", ("depth5_bid_usd", "depth5_ask_usd"),
+                _depth5_total),
+    FeatureSpec("depth10_total_usd_entry", 0.0, "derived", ("depth10_bid_usd", "depth10_ask_usd"),
+                _depth10_total),
+    FeatureSpec("depth_ratio_5_to_10_entry", 0.5, "derived",
+                ("depth5_bid_usd", "depth5_ask_usd", "depth10_bid_usd", "depth10_ask_usd"),
+                lambda r: _ratio(_depth5_total(r), _depth10_total(r), 0.5)),
+    FeatureSpec("spread_to_depth5_ratio_entry", 0.0, "derived",
+                ("spread_bps", "depth5_bid_usd", "depth5_ask_usd"),
+                lambda r: _ratio(_num(r, "spread_bps"), _depth5_total(r), 0.0)),
+    FeatureSpec("volume_to_depth_ratio_entry", 0.0, "derived",
+                ("usd_per_min", "depth5_bid_usd", "depth5_ask_usd"),
+                lambda r: _ratio(_num(r, "usd_per_min"), _depth5_total(r), 0.0)),
+    FeatureSpec("trades_per_dollar_entry", 0.0, "derived", ("trades_per_min", "usd_per_min"),
+                lambda r: _ratio(_num(r, "trades_per_min"), _num(r, "usd_per_min"), 0.0)),
+    FeatureSpec("avg_trade_size_entry", 0.0, "derived", ("trades_per_min", "usd_per_min"),
+                lambda r: _ratio(_num(r, "usd_per_min"), _num(r, "trades_per_min"), 0.0)),
+    FeatureSpec("mid_price_entry", 0.0, "derived", ("bid", "ask"),
+                lambda r: (_num(r, "bid") + _num(r, "ask")) / 2.0),
+    FeatureSpec("price_precision_entry", 0.0, "derived", ("bid",), _price_precision),
+
+    # phase 2: enhanced book tracker
+    _passthrough("spoofing_score_entry", "spoofing_score", 0.0, "book"),
+    _passthrough("spread_stability_entry", "spread_stability", 0.5, "book"),
+    _passthrough("order_lifetime_avg_entry", "order_lifetime_avg", 1.0, "book"),
+    _passthrough("book_refresh_rate_entry", "book_refresh_rate", 1.0, "book"),
+
+    # phase 2: MM detector
+    FeatureSpec("mm_detected_entry", 0.0, "mm", ("mm_detected",),
+                lambda r: 1.0 if r.get("mm_detected") else 0.0),
+    _passthrough("mm_confidence_entry", "mm_confidence", 0.0, "mm"),
+    _passthrough("mm_safe_size_entry", "mm_safe_size", 50.0, "mm"),
+    _passthrough("mm_lower_bound_entry", "mm_lower_bound", 0.0, "mm"),
+    _passthrough("mm_upper_bound_entry", "mm_upper_bound", 0.0, "mm"),
+)
+
+FEATURE_NAMES: Tuple[str, ...] = tuple(f.name for f in FEATURES)
+FEATURE_INDEX: Dict[str, int] = {name: i for i, name in enumerate(FEATURE_NAMES)}
+FEATURE_DEFAULTS: Tuple[float, ...] = tuple(float(f.default) for f in FEATURES)
+
+# raw input → indices of features that must be recomputed when it changes
+DEPENDENTS: Dict[str, Tuple[int, ...]] = {}
+for _i, _spec in enumerate(FEATURES):
+    for _key in _spec.inputs:
+        DEPENDENTS[_key] = DEPENDENTS.get(_key, ()) + (_i,)
+RAW_INPUTS: Tuple[str, ...] = tuple(DEPENDENTS)
+
+# Integer-valued columns in ml_trade_outcomes (stored as INTEGER)
+INT_FEATURES = frozenset({
+    "zero_fee_entry", "spike_count_90m_entry", "vol_pattern_entry",
+    "dca_potential_entry", "ws_lag_ms_entry", "price_precision_entry",
+    "mm_detected_entry",
+})
+
+# Predictor models one-hot the symbol as "sym_<SYMBOL>"
+SYMBOL_ONEHOT_PREFIX = "sym_"
+
+
+# ───────────────────────────── normalisation ─────────────────────────────
+
+def normalize_raw(source: Any) -> Dict[str, Any]:
+    """
+    Flatten a ScanRow / scanner dict / ml_snapshots row into raw inputs.
+
+    - dataclass rows are read by attribute (no asdict() deep copy)
+    - nested depth_at_bps {5: {...}, 10: {...}} is flattened to depthN_*_usd,
+      with flat fields as fallback
+    - eff_spread_{maker,taker}_bps is accepted under both spellings
+    """
+    if isinstance(source, Mapping):
+        get = source.get
+    else:
+        def get(key: str, default: Any = None) -> Any:
+            return getattr(source, key, default)
+
+    raw: Dict[str, Any] = {}
+    for key in RAW_INPUTS:
+        v = get(key, None)
+        if v is not None:
+            raw[key] = v
+
+    maker = get("eff_spread_bps_maker", None)
+    if maker is None:
+        maker = get("eff_spread_maker_bps", None)
+    if maker is not None:
+        raw["eff_spread_bps_maker"] = maker
+    taker = get("eff_spread_bps_taker", None)
+    if taker is None:
+        taker = get("eff_spread_taker_bps", None)
+    if taker is not None:
+        raw["eff_spread_bps_taker"] = taker
+
+    depth_map = get("depth_at_bps", None)
+    if isinstance(depth_map, Mapping):
+        for band in (5, 10):
+            lvl = depth_map.get(band) or depth_map.get(str(band)) or {}
+            for side in ("bid", "ask"):
+                v = lvl.get(f"{side}_usd") if isinstance(lvl, Mapping) else None
+                if v:
+                    raw[f"depth{band}_{side}_usd"] = v
+    return raw
+
+
+# ───────────────────────────── compute ─────────────────────────────
+
+def compute_vector(raw: RawInputs) -> List[float]:
+    """Full feature vector (registry order) from raw inputs."""
+    return [float(spec.fn(raw)) for spec in FEATURES]
+
+
+def compute_features(raw: RawInputs) -> Dict[str, float]:
+    """Same as compute_vector, keyed by feature name."""
+    return dict(zip(FEATURE_NAMES, compute_vector(raw)))
+
+
+def vector_to_record(values: Iterable[float]) -> Dict[str, Any]:
+    """Vector → DB-ready dict (ints for INTEGER columns)."""
+    out: Dict[str, Any] = {}
+    for name, v in zip(FEATURE_NAMES, values):
+        out[name] = int(v) if name in INT_FEATURES else float(v)
+    return out
+
+
+def select(
+    values: Mapping[str, float],
+    names: Iterable[str],
+    *,
+    symbol: Optional[str] = None,
+) -> List[float]:
+    """
+    Pick `names` (model feature order) from a feature mapping.
+    `sym_<SYMBOL>` one-hot columns are resolved against `symbol`.
+    Unknown names fall back to their registry default (0.0 if unregistered).
+    """
+    out: List[float] = []
+    for name in names:
+        if name.startswith(SYMBOL_ONEHOT_PREFIX):
+            out.append(1.0 if symbol and name[len(SYMBOL_ONEHOT_PREFIX):] == symbol else 0.0)
+            continue
+        v = values.get(name)
+        if v is None:
+            idx = FEATURE_INDEX.get(name)
+            v = FEATURE_DEFAULTS[idx] if idx is not None else 0.0
+        out.append(float(v))
+    return out
+
+
+# ───────────────────────────── batch path ─────────────────────────────
+
+def iter_feature_rows(rows: Iterable[Any]) -> Iterator[List[float]]:
+    """
+    Batch export path: raw rows (ml_snapshots rows, scanner dicts, ScanRow)
+    → feature vectors. Uses exactly the same specs as the online store.
+    """
+    for row in rows:
+        yield compute_vector(normalize_raw(row))
+
+
+def outcome_row_vector(row: Mapping[str, Any]) -> List[float]:
+    """
+    ml_trade_outcomes row (already *_entry columns) → vector in registry order,
+    NULLs replaced by registry defaults.
+    """
+    out: List[float] = []
+    for name, default in zip(FEATURE_NAMES, FEATURE_DEFAULTS):
+        v = row.get(name)
+        out.append(default if v is None else float(v))
+    return out
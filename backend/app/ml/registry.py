@@ -0,0 +1,176 @@
+# app/ml/registry.py
+"""
+Model registry.
+
+A single JSON file (`ml_models/registry.json`) lists every trained model
+together with its feature order, hyper-parameters and CV metrics, plus a
+pointer to the *current* model:
+
+    {
+      "current": "v5_20251120_101500",
+      "models": [
+        {"version": "...", "path": "xgb_v5_....json", "format": "xgb_json",
+         "feature_names": [...], "params": {...}, "metrics": {...},
+         "cv": {...}, "trained_at": "...", "train_samples": 1234}
+      ]
+    }
+
+Paths are stored relative to the registry directory. MLPredictor reads
+`current()` to pick the model and its feature order; training scripts call
+`register(..., promote=True)` instead of hand-writing model_info.json.
+Writes are atomic (tmp + os.replace).
+
+Only serving features can be registered: names from the app.ml.features
+registry plus `sym_<SYMBOL>` one-hots. Anything else (labels, outcomes,
+ad-hoc encodings) would be zero-filled by the predictor at inference.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.ml.features import FEATURE_NAMES, SYMBOL_ONEHOT_PREFIX
+
+REGISTRY_FILE = "registry.json"
+
+
+def unknown_features(names: Sequence[str]) -> List[str]:
+    """Names the predictor cannot compute at serving time."""
+    known = set(FEATURE_NAMES)
+    return [n for n in names if n not in known and not n.startswith(SYMBOL_ONEHOT_PREFIX)]
+
+
+@dataclass
+class ModelEntry:
+    version: str
+    path: str                                  # relative to the registry dir
+    feature_names: List[str]
+    format: str = "xgb_json"
+    params: Dict[str, Any] = field(default_factory=dict)
+    metrics: Dict[str, float] = field(default_factory=dict)
+    cv: Dict[str, Any] = field(default_factory=dict)
+    trained_at: str = ""
+    train_samples: int = 0
+    notes: str = ""
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ModelEntry":
+        known = {k: d[k] for k in cls.__dataclass_fields__ if k in d}
+        return cls(**known)
+
+
+class ModelRegistry:
+    """File-backed list of trained models with a promoted `current` entry."""
+
+    def __init__(self, root: str | Path = "ml_models"):
+        self.root = Path(root)
+        self.path = self.root / REGISTRY_FILE
+        self._lock = threading.Lock()
+
+    # ─────────────────────────── storage ───────────────────────────
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {"current": None, "models": []}
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.setdefault("current", None)
+        data.setdefault("models", [])
+        return data
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=float)
+        os.replace(tmp, self.path)
+
+    # ─────────────────────────── queries ───────────────────────────
+
+    def list(self) -> List[ModelEntry]:
+        return [ModelEntry.from_dict(m) for m in self._read()["models"]]
+
+    def get(self, version: str) -> Optional[ModelEntry]:
+        for m in self._read()["models"]:
+            if m.get("version") == version:
+                return ModelEntry.from_dict(m)
+        return None
+
+    def current(self) -> Optional[ModelEntry]:
+        data = self._read()
+        cur = data.get("current")
+        if not cur:
+            return None
+        for m in data["models"]:
+            if m.get("version") == cur:
+                return ModelEntry.from_dict(m)
+        return None
+
+    def resolve(self, entry: ModelEntry) -> Path:
+        """Absolute path of an entry's model file."""
+        p = Path(entry.path)
+        return p if p.is_absolute() else self.root / p
+
+    # ─────────────────────────── mutations ─────────────────────────
+
+    def register(
+        self,
+        model_path: str | Path,
+        feature_names: Sequence[str],
+        *,
+        version: Optional[str] = None,
+        fmt: str = "xgb_json",
+        params: Optional[Dict[str, Any]] = None,
+        metrics: Optional[Dict[str, float]] = None,
+        cv: Optional[Dict[str, Any]] = None,
+        train_samples: int = 0,
+        notes: str = "",
+        promote: bool = False,
+    ) -> ModelEntry:
+        bad = unknown_features(feature_names)
+        if bad:
+            raise ValueError(f"not serving features (see app.ml.features): {bad}")
+        model_path = Path(model_path)
+        try:
+            rel = model_path.resolve().relative_to(self.root.resolve())
+            stored = str(rel)
+        except ValueError:
+            stored = str(model_path.resolve())
+
+        now = datetime.now(timezone.utc)
+        entry = ModelEntry(
+            version=version or f"{model_path.stem}_{now.strftime('%Y%m%d_%H%M%S')}",
+            path=stored,
+            feature_names=list(feature_names),
+            format=fmt,
+            params=dict(params or {}),
+            metrics={k: float(v) for k, v in (metrics or {}).items()},
+            cv=dict(cv or {}),
+            trained_at=now.isoformat(),
+            train_samples=int(train_samples),
+            notes=notes,
+        )
+
+        with self._lock:
+            data = self._read()
+            data["models"] = [m for m in data["models"] if m.get("version") != entry.version]
+            data["models"].append(asdict(entry))
+            if promote:
+                data["current"] = entry.version
+            self._write(data)
+        return entry
+
+    def promote(self, version: str) -> ModelEntry:
+        with self._lock:
+            data = self._read()
+            for m in data["models"]:
+                if m.get("version") == version:
+                    data["current"] = version
+                    self._write(data)
+                    return ModelEntry.from_dict(m)
+        raise KeyError(f"unknown model version: {version}")
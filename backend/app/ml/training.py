@@ -0,0 +1,259 @@
+# app/ml/training.py
+"""
+Training harness: time-series cross-validation + parallel parameter sweep.
+
+- `time_series_splits` — walk-forward folds over rows sorted by time. Each
+  fold trains on everything strictly before its test block; `gap_ms`
+  purges training rows whose timestamp is within the gap of the test start
+  (trade outcomes overlap in time, so neighbours leak labels).
+- `cross_validate` — fit/score one parameter set over all folds.
+- `run_sweep` — evaluates many parameter sets in a process pool. The
+  dataset is written once to .npy files and every worker opens them with
+  mmap_mode="r", so N workers share one copy of X/y through the page cache
+  instead of each receiving a pickled copy per task.
+
+Estimators are built by a picklable `factory(params)` returning an object
+with fit(X, y) and predict_proba(X) (XGBClassifier by default). Metrics
+are plain NumPy so the harness has no sklearn dependency.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Fold = Tuple[int, int, int]            # (train_stop, test_start, test_stop) on sorted rows
+Factory = Callable[[Dict[str, Any]], Any]
+
+
+# ───────────────────────────── folds ─────────────────────────────
+
+def time_series_splits(
+    ts_ms: np.ndarray,
+    n_splits: int = 5,
+    *,
+    gap_ms: int = 0,
+    min_train: int = 1,
+) -> List[Fold]:
+    """
+    Expanding-window folds over time-sorted rows (like sklearn's
+    TimeSeriesSplit, plus a purge gap). Returned as index bounds so they
+    are cheap to ship to worker processes.
+    """
+    ts_ms = np.asarray(ts_ms)
+    n = len(ts_ms)
+    if n_splits < 1:
+        raise ValueError("n_splits must be >= 1")
+    if np.any(np.diff(ts_ms) < 0):
+        raise ValueError("ts_ms must be sorted ascending")
+
+    test_size = n // (n_splits + 1)
+    if test_size == 0:
+        raise ValueError(f"not enough rows ({n}) for {n_splits} splits")
+
+    folds: List[Fold] = []
+    for k in range(n_splits):
+        test_start = n - (n_splits - k) * test_size
+        test_stop = test_start + test_size
+        train_stop = int(np.searchsorted(ts_ms, ts_ms[test_start] - gap_ms, side="left")) if gap_ms else test_start
+        if train_stop < min_train:
+            continue
+        folds.append((train_stop, test_start, test_stop))
+    if not folds:
+        raise ValueError("no fold has enough training rows")
+    return folds
+
+
+# ───────────────────────────── metrics ─────────────────────────────
+
+def roc_auc(y: np.ndarray, p: np.ndarray) -> float:
+    """Rank-based AUC (Mann–Whitney U) with average ranks for ties."""
+    y = np.asarray(y).astype(bool)
+    n_pos = int(y.sum())
+    n_neg = len(y) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+    order = np.argsort(p, kind="mergesort")
+    sorted_p = np.asarray(p)[order]
+    ranks = np.empty(len(p), dtype=np.float64)
+    # average rank per group of equal scores
+    _, first, counts = np.unique(sorted_p, return_index=True, return_counts=True)
+    avg = first + (counts + 1) / 2.0
+    ranks[order] = np.repeat(avg, counts)
+    return float((ranks[y].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def classification_metrics(y: np.ndarray, p: np.ndarray, threshold: float = 0.5) -> Dict[str, float]:
+    y = np.asarray(y).astype(np.int64)
+    p = np.asarray(p, dtype=np.float64)
+    pred = (p >= threshold).astype(np.int64)
+    tp = int(((pred == 1) & (y == 1)).sum())
+    fp = int(((pred == 1) & (y == 0)).sum())
+    fn = int(((pred == 0) & (y == 1)).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    eps = 1e-15
+    pc = np.clip(p, eps, 1 - eps)
+    logloss = float(-np.mean(y * np.log(pc) + (1 - y) * np.log(1 - pc)))
+    return {
+        "auc": roc_auc(y, p),
+        "logloss": logloss,
+        "accuracy": float((pred == y).mean()),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
+
+
+# ───────────────────────────── estimators ─────────────────────────────
+
+def xgb_factory(params: Dict[str, Any]):
+    """Default estimator. One thread per model — the sweep parallelises across processes."""
+    from xgboost import XGBClassifier
+
+    kw = {"eval_metric": "logloss", "random_state": 42, "n_jobs": 1}
+    kw.update(params)
+    return XGBClassifier(**kw)
+
+
+# ───────────────────────────── CV ─────────────────────────────
+
+@dataclass
+class TrialResult:
+    params: Dict[str, Any]
+    metrics: Dict[str, float]                       # mean over folds
+    folds: List[Dict[str, float]] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+    error: Optional[str] = None
+
+
+def cross_validate(
+    X: np.ndarray,
+    y: np.ndarray,
+    folds: Sequence[Fold],
+    params: Dict[str, Any],
+    factory: Factory = xgb_factory,
+) -> TrialResult:
+    t0 = time.perf_counter()
+    per_fold: List[Dict[str, float]] = []
+    for train_stop, test_start, test_stop in folds:
+        model = factory(dict(params))
+        # slices of a mmap'ed array are views — no copy until the estimator converts
+        model.fit(X[:train_stop], y[:train_stop])
+        proba = np.asarray(model.predict_proba(X[test_start:test_stop]))[:, 1]
+        per_fold.append(classification_metrics(y[test_start:test_stop], proba))
+
+    keys = per_fold[0].keys() if per_fold else ()
+    mean = {k: float(np.nanmean([f[k] for f in per_fold])) for k in keys}
+    return TrialResult(params=dict(params), metrics=mean, folds=per_fold, elapsed_sec=time.perf_counter() - t0)
+
+
+# ───────────────────────────── search spaces ─────────────────────────────
+
+def param_grid(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    keys = list(space)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+
+
+def sample_params(space: Dict[str, Sequence[Any]], n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Random search: n distinct draws from the grid (all of it if smaller)."""
+    grid = param_grid(space)
+    if n >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, n)
+
+
+# ───────────────────────────── parallel sweep ─────────────────────────────
+
+# per-worker state, set once by the pool initializer
+_W_X: Optional[np.ndarray] = None
+_W_Y: Optional[np.ndarray] = None
+_W_FOLDS: List[Fold] = []
+_W_FACTORY: Optional[Factory] = None
+
+
+def _init_worker(data_dir: str, folds: List[Fold], factory: Factory) -> None:
+    global _W_X, _W_Y, _W_FOLDS, _W_FACTORY
+    _W_X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _W_Y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    _W_FOLDS = folds
+    _W_FACTORY = factory
+
+
+def _run_trial(params: Dict[str, Any]) -> TrialResult:
+    try:
+        return cross_validate(_W_X, _W_Y, _W_FOLDS, params, _W_FACTORY)
+    except Exception as e:  # one bad config must not kill the sweep
+        return TrialResult(params=dict(params), metrics={}, error=f"{type(e).__name__}: {e}")
+
+
+def run_sweep(
+    X: np.ndarray,
+    y: np.ndarray,
+    ts_ms: np.ndarray,
+    configs: Iterable[Dict[str, Any]],
+    *,
+    n_splits: int = 5,
+    gap_ms: int = 0,
+    factory: Factory = xgb_factory,
+    workers: Optional[int] = None,
+    metric: str = "auc",
+    progress: Optional[Callable[[int, int, TrialResult], None]] = None,
+) -> List[TrialResult]:
+    """
+    Cross-validate every config; returns results sorted best-first by `metric`
+    (lower is better for logloss). `workers` defaults to all cores; 1 runs
+    in-process.
+    """
+    configs = list(configs)
+    order = np.argsort(np.asarray(ts_ms), kind="stable")
+    ts_sorted = np.asarray(ts_ms)[order]
+    folds = time_series_splits(ts_sorted, n_splits, gap_ms=gap_ms)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configs) or 1))
+
+    results: List[TrialResult] = []
+    tmp = tempfile.mkdtemp(prefix="ml_sweep_")
+    try:
+        np.save(os.path.join(tmp, "X.npy"), np.ascontiguousarray(np.asarray(X)[order], dtype=np.float32))
+        np.save(os.path.join(tmp, "y.npy"), np.ascontiguousarray(np.asarray(y)[order]))
+
+        if workers == 1:
+            _init_worker(tmp, folds, factory)
+            for i, params in enumerate(configs, 1):
+                r = _run_trial(params)
+                results.append(r)
+                if progress:
+                    progress(i, len(configs), r)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(tmp, folds, factory),
+            ) as pool:
+                futs = [pool.submit(_run_trial, p) for p in configs]
+                for i, fut in enumerate(as_completed(futs), 1):
+                    r = fut.result()
+                    results.append(r)
+                    if progress:
+                        progress(i, len(configs), r)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return sorted(results, key=lambda r: _rank_key(r, metric))
+
+
+def _rank_key(r: TrialResult, metric: str) -> Tuple[int, float]:
+    """Sort key: failed / NaN trials last, then best metric first."""
+    v = r.metrics.get(metric, float("nan"))
+    if r.error is not None or v != v:
+        return (1, 0.0)
+    return (0, v if metric == "logloss" else -v)
@@ -46,4 +46,19 @@ try:
 except Exception:
     pass
 
+try:
+    import app.models.pnl_rollup_watermark  # noqa: F401
+except Exception:
+    pass
+
+try:
+    import app.models.symbol_perf_stats  # noqa: F401
+except Exception:
+    pass
+
+try:
+    import app.models.alert_outbox  # noqa: F401
+except Exception:
+    pass
+
 __all__ = ["Base"]
@@ -0,0 +1,52 @@
+# app/models/alert_outbox.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AlertOutbox(Base):
+    """
+    Persistent queue of outgoing notifications (Telegram).
+
+    Producers only insert/bump rows (app.services.alert_outbox.enqueue); a
+    background worker coalesces due PENDING rows into digest messages and
+    delivers them with retry/backoff.
+
+    status: PENDING → SENT | FAILED (max attempts) | DROPPED (quiet hours)
+    dedupe_key: repeats of the same key within the dedupe window bump
+      `count` / `last_seen_at` on the existing row instead of adding one.
+    """
+
+    __tablename__ = "alert_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    level: Mapped[str] = mapped_column(String(16), nullable=False, default="INFO")
+    title: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    body: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    force: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)  # ignore quiet hours
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="PENDING")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("alert_outbox_due_idx", "status", "next_attempt_at"),
+        Index("alert_outbox_key_idx", "dedupe_key", "created_at"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AlertOutbox #{self.id} {self.status} {self.level} {self.title!r} x{self.count}>"
@@ -50,11 +50,17 @@ class PnlLedger(Base):
     # Raw details for audit. On SQLite this is TEXT with JSON1-enabled ops.
     meta: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
 
+    # Natural dedupe key ("t:<trade_id>" | "o:<order_id>" | "ts:<ts>"), unique per
+    # (exchange, account_id, symbol, event_type). NULL = not deduplicated.
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(300), nullable=True)
+
     __table_args__ = (
         # Helpful composite scope indexes
         Index("pnl_ledger_ts_idx", "ts"),
         Index("pnl_ledger_scope_idx", "exchange", "account_id", "symbol"),
         Index("pnl_ledger_event_idx", "event_type"),
+        # DB-level dedupe for INSERT ... ON CONFLICT DO NOTHING
+        Index("pnl_ledger_dedupe_uq", "exchange", "account_id", "symbol", "event_type", "dedupe_key", unique=True),
     )
 
     def __repr__(self) -> str:  # pragma: no cover
@@ -0,0 +1,34 @@
+# app/models/pnl_rollup_watermark.py
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class PnlRollupWatermark(Base):
+    """
+    Progress marker of the incremental pnl_ledger → pnl_daily rollup.
+
+    last_ledger_id is the highest pnl_ledger.id already folded into pnl_daily;
+    the next incremental pass aggregates only rows with a greater id.
+    One row per rollup target (name), currently just "pnl_daily".
+    """
+
+    __tablename__ = "pnl_rollup_watermark"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_ledger_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<PnlRollupWatermark {self.name} last_ledger_id={self.last_ledger_id}>"
@@ -0,0 +1,78 @@
+# app/models/symbol_perf_stats.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SymbolPerfStats(Base):
+    """
+    Per-symbol performance of closed trades, maintained incrementally as
+    trades close (see app.services.symbol_stats) so allocation can read all
+    symbols in one query instead of scanning `trades` per symbol.
+
+    Two sets of accumulators:
+    - lifetime sums (trade_count, win_count, pnl_*_sum, hold_sec_sum)
+    - recent_* : exponentially decayed sums (each close multiplies the old
+      value by RECENT_DECAY before adding), i.e. a ~last-100-trades window.
+      Averages are recent_x / recent_weight.
+    """
+
+    __tablename__ = "symbol_perf_stats"
+
+    symbol: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    trade_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    win_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pnl_usd_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    pnl_bps_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    hold_sec_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    recent_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    recent_wins: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    recent_pnl_bps: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    recent_spread_bps: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    last_exit_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+    )
+
+    @property
+    def win_rate(self) -> float:
+        """Lifetime win rate, %."""
+        return self.win_count / self.trade_count * 100 if self.trade_count else 0.0
+
+    @property
+    def avg_pnl_usd(self) -> float:
+        return self.pnl_usd_sum / self.trade_count if self.trade_count else 0.0
+
+    @property
+    def avg_pnl_bps(self) -> float:
+        return self.pnl_bps_sum / self.trade_count if self.trade_count else 0.0
+
+    @property
+    def avg_hold_sec(self) -> float:
+        return self.hold_sec_sum / self.trade_count if self.trade_count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "trade_count": self.trade_count,
+            "win_rate": round(self.win_rate, 2),
+            "avg_pnl_usd": round(self.avg_pnl_usd, 4),
+            "avg_pnl_bps": round(self.avg_pnl_bps, 2),
+            "avg_hold_sec": round(self.avg_hold_sec, 1),
+            "last_exit_time": self.last_exit_time.isoformat() if self.last_exit_time else None,
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<SymbolPerfStats {self.symbol} n={self.trade_count} wr={self.win_rate:.1f}%>"
@@ -1,16 +1,50 @@
 # app/pnl/eod_rollup.py
+"""
+pnl_ledger → pnl_daily rollup.
+
+Two entry points, both built on one grouped aggregate
+(UTC day, exchange, account_id, symbol) → (realized_usd, fees_usd):
+
+  rollup_incremental  folds only ledger rows with id > watermark into pnl_daily
+                      as deltas (INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x)
+                      and advances the watermark. Cheap enough to run every minute.
+                      The first pass (no watermark row yet) is absolute instead:
+                      it rewrites every day the ledger covers, so pnl_daily rows
+                      left by earlier full rollups are not counted twice.
+
+  rollup_range        re-rolls a window of days with a single query over the whole
+                      range and writes absolute totals, so re-running it is
+                      idempotent. It first catches the incremental rollup up and
+                      only counts ledger rows up to the watermark, which keeps both
+                      paths consistent: pnl_daily == Σ ledger rows with id <= watermark.
+
+On Postgres ids are handed out at INSERT but become visible at COMMIT, so a
+slow transaction can commit a row below a watermark that has already moved
+past it; the incremental pass never sees that row. rollup_range counts every
+row up to the watermark, so a periodic re-roll of recent days (the scheduler
+re-rolls yesterday and today every PNL_ROLLUP_RECONCILE_SEC) repairs it.
+
+FEE rows go to fees_usd; TRADE_REALIZED, FUNDING and CONVERSION_PNL to realized_usd.
+Nothing here commits — the caller owns the transaction.
+"""
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, case, delete, func, select
 from sqlalchemy.orm import Session
 
+from app.models.pnl_daily import PnlDaily
 from app.models.pnl_ledger import PnlLedger
+from app.models.pnl_rollup_watermark import PnlRollupWatermark
 from . import repository as repo
 
+WATERMARK_NAME = "pnl_daily"
+
+_Key = Tuple[date, str, str, str]
+
 
 def _utc_day_bounds(day: date) -> Tuple[datetime, datetime]:
     """
@@ -22,85 +56,192 @@ def _utc_day_bounds(day: date) -> Tuple[datetime, datetime]:
     return start, end
 
 
-def rollup_day(db: Session, day: date, scope: Optional[repo.Scope] = None) -> int:
-    """
-    Aggregate pnl_ledger into pnl_daily for a single UTC day.
+def _as_date(v: Any) -> date:
+    # SQLite returns date(ts) as 'YYYY-MM-DD' text, Postgres as a date
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return date.fromisoformat(str(v)[:10])
 
-    For each (exchange, account_id, symbol) on this day:
-      - realized_usd = sum(amount_usd WHERE event_type=TRADE_REALIZED OR CONVERSION_PNL OR FUNDING)
-      - fees_usd     = sum(amount_usd WHERE event_type=FEE)
 
-    Returns number of upserted rows.
-    """
-    start_naive, end_naive = _utc_day_bounds(day)
+def _apply_scope(q, model, scope: Optional[repo.Scope]):
+    if scope:
+        if scope.get("exchange"):
+            q = q.where(model.exchange == scope["exchange"])
+        if scope.get("account_id"):
+            q = q.where(model.account_id == scope["account_id"])
+        if scope.get("symbol"):
+            q = q.where(model.symbol == scope["symbol"])
+    return q
+
 
+def _aggregate(db: Session, *conds, scope: Optional[repo.Scope] = None) -> Dict[_Key, Tuple[Decimal, Decimal]]:
+    """One GROUP BY pass: {(day, ex, acc, sym): (realized_usd, fees_usd)}."""
+    day_col = func.date(PnlLedger.ts)
+    is_fee = PnlLedger.event_type == "FEE"
     q = (
         select(
+            day_col,
             PnlLedger.exchange,
             PnlLedger.account_id,
             PnlLedger.symbol,
-            PnlLedger.event_type,
-            func.coalesce(func.sum(PnlLedger.amount_usd), 0),
+            func.coalesce(func.sum(case((is_fee, 0), else_=PnlLedger.amount_usd)), 0),
+            func.coalesce(func.sum(case((is_fee, PnlLedger.amount_usd), else_=0)), 0),
         )
-        .where(PnlLedger.ts >= start_naive)
-        .where(PnlLedger.ts < end_naive)
-        .group_by(PnlLedger.exchange, PnlLedger.account_id, PnlLedger.symbol, PnlLedger.event_type)
+        .where(*conds)
+        .group_by(day_col, PnlLedger.exchange, PnlLedger.account_id, PnlLedger.symbol)
+    )
+    q = _apply_scope(q, PnlLedger, scope)
+    out: Dict[_Key, Tuple[Decimal, Decimal]] = {}
+    for d, ex, acc_id, sym, realized, fees in db.execute(q).all():
+        out[(_as_date(d), ex, acc_id, sym)] = (Decimal(str(realized or 0)), Decimal(str(fees or 0)))
+    return out
+
+
+def _upsert_stmt(db: Session, additive: bool):
+    """INSERT ... ON CONFLICT (date, exchange, account_id, symbol) DO UPDATE, or None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as _insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as _insert
+    else:
+        return None
+    t = PnlDaily.__table__
+    stmt = _insert(t)
+    if additive:
+        realized = t.c.realized_usd + stmt.excluded.realized_usd
+        fees = t.c.fees_usd + stmt.excluded.fees_usd
+    else:
+        realized = stmt.excluded.realized_usd
+        fees = stmt.excluded.fees_usd
+    return stmt.on_conflict_do_update(
+        index_elements=[t.c.date, t.c.exchange, t.c.account_id, t.c.symbol],
+        set_={"realized_usd": realized, "fees_usd": fees, "updated_at": func.current_timestamp()},
     )
 
-    # Apply scope if provided
-    if scope:
-        if scope.get("exchange"):
-            q = q.where(PnlLedger.exchange == scope["exchange"])
-        if scope.get("account_id"):
-            q = q.where(PnlLedger.account_id == scope["account_id"])
-        if scope.get("symbol"):
-            q = q.where(PnlLedger.symbol == scope["symbol"])
-
-    rows = db.execute(q).all()
 
-    # Accumulate per (ex, acc, sym)
-    acc: Dict[Tuple[str, str, str], Dict[str, Decimal]] = {}
-    for ex, acc_id, sym, etype, amt in rows:
-        key = (ex, acc_id, sym)
-        bucket = acc.setdefault(
-            key,
-            {"realized": Decimal("0"), "fees": Decimal("0")},
-        )
-        amt_dec = Decimal(amt or 0)
-
-        if etype == "FEE":
-            bucket["fees"] += amt_dec
-        else:
-            # TRADE_REALIZED, FUNDING, CONVERSION_PNL all affect realized bucket
-            bucket["realized"] += amt_dec
-
-    upserts = 0
-    for (ex, acc_id, sym), parts in acc.items():
-        repo.upsert_daily_row(
-            db,
-            day=day,
-            exchange=ex,
-            account_id=acc_id,
-            symbol=sym,
-            realized_usd=parts["realized"],
-            fees_usd=parts["fees"],
+def _write_daily(db: Session, agg: Dict[_Key, Tuple[Decimal, Decimal]], *, additive: bool) -> int:
+    if not agg:
+        return 0
+    stmt = _upsert_stmt(db, additive)
+    if stmt is not None:
+        db.execute(stmt, [
+            {"date": d, "exchange": ex, "account_id": acc_id, "symbol": sym,
+             "realized_usd": realized, "fees_usd": fees}
+            for (d, ex, acc_id, sym), (realized, fees) in agg.items()
+        ])
+        db.flush()
+        return len(agg)
+
+    # Generic dialects: get-or-create per row
+    for (d, ex, acc_id, sym), (realized, fees) in agg.items():
+        if additive:
+            cur = db.execute(
+                select(PnlDaily.realized_usd, PnlDaily.fees_usd)
+                .where(PnlDaily.date == d, PnlDaily.exchange == ex,
+                       PnlDaily.account_id == acc_id, PnlDaily.symbol == sym)
+            ).first()
+            if cur is not None:
+                realized += Decimal(str(cur[0] or 0))
+                fees += Decimal(str(cur[1] or 0))
+        repo.upsert_daily_row(db, day=d, exchange=ex, account_id=acc_id, symbol=sym,
+                              realized_usd=realized, fees_usd=fees)
+    return len(agg)
+
+
+# ─────────────────────────── watermark ───────────────────────────
+
+def get_watermark(db: Session, name: str = WATERMARK_NAME) -> int:
+    wm = db.get(PnlRollupWatermark, name)
+    return int(wm.last_ledger_id) if wm is not None else 0
+
+
+def _set_watermark(db: Session, last_id: int, name: str = WATERMARK_NAME) -> None:
+    wm = db.get(PnlRollupWatermark, name)
+    if wm is None:
+        db.add(PnlRollupWatermark(name=name, last_ledger_id=last_id))
+    else:
+        wm.last_ledger_id = last_id
+    db.flush()
+
+
+# ─────────────────────────── rollups ───────────────────────────
+
+def rollup_incremental(db: Session) -> int:
+    """
+    Fold ledger rows appended since the last pass into pnl_daily (deltas) and
+    advance the watermark. Returns the number of pnl_daily rows touched.
+    """
+    hi = db.execute(select(func.max(PnlLedger.id))).scalar()
+    if db.get(PnlRollupWatermark, WATERMARK_NAME) is None:
+        return _bootstrap(db, int(hi or 0))
+    last_id = get_watermark(db)
+    if hi is None or int(hi) <= last_id:
+        return 0
+    hi = int(hi)
+    agg = _aggregate(db, PnlLedger.id > last_id, PnlLedger.id <= hi)
+    touched = _write_daily(db, agg, additive=True)
+    _set_watermark(db, hi)
+    return touched
+
+
+def _bootstrap(db: Session, hi: int) -> int:
+    """First pass: absolute totals for every ledger day up to `hi`, then start the watermark there."""
+    agg = _aggregate(db, PnlLedger.id <= hi)
+    if agg:
+        days = [k[0] for k in agg]
+        db.execute(
+            delete(PnlDaily).where(and_(PnlDaily.date >= min(days), PnlDaily.date <= max(days))),
+            execution_options={"synchronize_session": False},
         )
-        upserts += 1
-
-    return upserts
+    touched = _write_daily(db, agg, additive=False)
+    _set_watermark(db, hi)
+    return touched
 
 
 def rollup_range(db: Session, start_day: date, end_day: date, scope: Optional[repo.Scope] = None) -> int:
     """
-    Aggregate inclusive range of days [start_day, end_day].
-    Returns total number of upserted rows across the range.
+    Recompute pnl_daily for the inclusive range [start_day, end_day] (optionally
+    scoped) from the ledger with one grouped query. Rows of the window that no
+    longer have ledger events are removed. Idempotent.
+    Returns the number of upserted rows.
     """
     if end_day < start_day:
         return 0
 
-    total = 0
-    cur = start_day
-    while cur <= end_day:
-        total += rollup_day(db, cur, scope=scope)
-        cur = cur + timedelta(days=1)
-    return total
+    rollup_incremental(db)
+    last_id = get_watermark(db)
+
+    start_naive, _ = _utc_day_bounds(start_day)
+    _, end_naive = _utc_day_bounds(end_day)
+    agg = _aggregate(
+        db,
+        PnlLedger.ts >= start_naive,
+        PnlLedger.ts < end_naive,
+        PnlLedger.id <= last_id,
+        scope=scope,
+    )
+
+    stale = delete(PnlDaily).where(and_(PnlDaily.date >= start_day, PnlDaily.date <= end_day))
+    stale = _apply_scope(stale, PnlDaily, scope)
+    db.execute(stale, execution_options={"synchronize_session": False})
+
+    return _write_daily(db, agg, additive=False)
+
+
+def rollup_day(db: Session, day: date, scope: Optional[repo.Scope] = None) -> int:
+    """
+    Aggregate pnl_ledger into pnl_daily for a single UTC day.
+    Returns number of upserted rows.
+    """
+    return rollup_range(db, day, day, scope=scope)
+
+
+def pending_rows(db: Session) -> int:
+    """Ledger rows not yet folded into pnl_daily (diagnostics)."""
+    last_id = get_watermark(db)
+    n = db.execute(select(func.count()).select_from(PnlLedger).where(PnlLedger.id > last_id)).scalar()
+    return int(n or 0)
+
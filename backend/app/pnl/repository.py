@@ -6,7 +6,8 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, Dict, Iterable, List, Optional, Tuple, TypedDict
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.pnl_ledger import PnlLedger
@@ -48,101 +49,99 @@ def _apply_date_scope_daily(query, scope: Optional[Scope]):
 
 # ─────────────────────────────── Repository API ──────────────────────────────
 
-def _find_existing_ledger(
-    db: Session,
+def ledger_dedupe_key(
     *,
-    exchange: str,
-    account_id: str,
-    symbol: str,
-    event_type: str,
     ts_naive_utc: datetime,
     ref_trade_id: Optional[str],
     ref_order_id: Optional[str],
-) -> Optional[PnlLedger]:
+) -> str:
     """
-    Tries to find an existing row using a natural unique key.
-    Strategy:
-      1) If ref_trade_id present → use it
-      2) Else if ref_order_id present → use it
-      3) Else fall back to (ts, event_type, symbol, exchange, account_id)
+    Natural unique key of a ledger row within (exchange, account_id, symbol, event_type):
+      1) If ref_trade_id present → "t:<trade_id>"
+      2) Else if ref_order_id present → "o:<order_id>"
+      3) Else the event time → "ts:<YYYY-MM-DD HH:MM:SS.ffffff>" (SQLite's DateTime text form)
     """
     if ref_trade_id:
-        q = (
-            select(PnlLedger)
-            .where(PnlLedger.exchange == exchange)
-            .where(PnlLedger.account_id == account_id)
-            .where(PnlLedger.symbol == symbol)
-            .where(PnlLedger.event_type == event_type)
-            .where(PnlLedger.ref_trade_id == ref_trade_id)
-            .limit(1)
-        )
-        return db.execute(q).scalar_one_or_none()
-
+        return f"t:{ref_trade_id}"
     if ref_order_id:
-        q = (
-            select(PnlLedger)
-            .where(PnlLedger.exchange == exchange)
-            .where(PnlLedger.account_id == account_id)
-            .where(PnlLedger.symbol == symbol)
-            .where(PnlLedger.event_type == event_type)
-            .where(PnlLedger.ref_order_id == ref_order_id)
-            .limit(1)
-        )
-        return db.execute(q).scalar_one_or_none()
+        return f"o:{ref_order_id}"
+    return f"ts:{ts_naive_utc.strftime('%Y-%m-%d %H:%M:%S.%f')}"
 
-    q = (
-        select(PnlLedger)
-        .where(PnlLedger.exchange == exchange)
-        .where(PnlLedger.account_id == account_id)
-        .where(PnlLedger.symbol == symbol)
-        .where(PnlLedger.event_type == event_type)
-        .where(PnlLedger.ts == ts_naive_utc)
-        .limit(1)
-    )
-    return db.execute(q).scalar_one_or_none()
+
+def _ledger_values(e: PNLLedgerEvent, dedupe: bool) -> Dict[str, Any]:
+    ts_naive = ensure_utc(e.ts).replace(tzinfo=None)
+    event_type_str = e.event_type.value if isinstance(e.event_type, PNLEventType) else str(e.event_type)
+    return {
+        "ts": ts_naive,
+        "exchange": e.exchange,
+        "account_id": e.account_id,
+        "symbol": e.symbol,
+        "base_asset": e.base_asset,
+        "quote_asset": e.quote_asset,
+        "event_type": event_type_str,
+        "amount_asset": Decimal(e.amount_asset),
+        "amount_usd": Decimal(e.amount_usd),
+        "ref_order_id": e.ref_order_id,
+        "ref_trade_id": e.ref_trade_id,
+        "meta": (e.meta or {}),
+        "dedupe_key": (
+            ledger_dedupe_key(ts_naive_utc=ts_naive, ref_trade_id=e.ref_trade_id, ref_order_id=e.ref_order_id)
+            if dedupe else None
+        ),
+    }
+
+
+def _insert_ignore_stmt(db: Session):
+    """INSERT ... ON CONFLICT DO NOTHING for dialects that have it (SQLite, Postgres)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as _insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as _insert
+    else:
+        return None
+    return _insert(PnlLedger.__table__).on_conflict_do_nothing()
 
 
-def insert_ledger_event(db: Session, e: PNLLedgerEvent, *, dedupe: bool = True) -> PnlLedger:
+def insert_ledger_events(db: Session, events: Iterable[PNLLedgerEvent], *, dedupe: bool = True) -> int:
+    """
+    Bulk-insert ledger events as one INSERT ... ON CONFLICT DO NOTHING executed
+    with all parameter sets (driver executemany; the statement compiles once).
+    With dedupe=True rows colliding with pnl_ledger_dedupe_uq (already stored, or
+    repeated within the batch) are skipped by the database — no pre-SELECT.
+    Returns the number of rows written (0 if the driver reports no executemany
+    rowcount). Does not commit.
+    """
+    rows = [_ledger_values(e, dedupe) for e in events]
+    if not rows:
+        return 0
+
+    stmt = _insert_ignore_stmt(db)
+    if stmt is None:
+        # Generic dialects: per-row savepoint, duplicates rejected by the unique index
+        written = 0
+        for r in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(PnlLedger.__table__), r)
+                written += 1
+            except IntegrityError:
+                pass
+        return written
+
+    res = db.execute(stmt, rows[0] if len(rows) == 1 else rows)
+    return max(0, res.rowcount or 0)
+
+
+def insert_ledger_event(db: Session, e: PNLLedgerEvent, *, dedupe: bool = True) -> bool:
     """
     Insert a realized-affecting event into pnl_ledger.
     - Keeps Decimal internally; convert to float only for API responses.
     - Stores timestamps as naive UTC (SQLite-friendly).
-    - If dedupe=True, performs a pre-select to avoid duplicates.
+    - If dedupe=True, a duplicate (same natural key) is ignored by the database.
+    Returns True if a row was written.
     """
-    ts_naive = ensure_utc(e.ts).replace(tzinfo=None)
-    event_type_str = e.event_type.value if isinstance(e.event_type, PNLEventType) else str(e.event_type)
-
-    if dedupe:
-        existing = _find_existing_ledger(
-            db,
-            exchange=e.exchange,
-            account_id=e.account_id,
-            symbol=e.symbol,
-            event_type=event_type_str,
-            ts_naive_utc=ts_naive,
-            ref_trade_id=e.ref_trade_id,
-            ref_order_id=e.ref_order_id,
-        )
-        if existing:
-            return existing
-
-    row = PnlLedger(
-        ts=ts_naive,
-        exchange=e.exchange,
-        account_id=e.account_id,
-        symbol=e.symbol,
-        base_asset=e.base_asset,
-        quote_asset=e.quote_asset,
-        event_type=event_type_str,
-        amount_asset=Decimal(e.amount_asset),
-        amount_usd=Decimal(e.amount_usd),
-        ref_order_id=e.ref_order_id,
-        ref_trade_id=e.ref_trade_id,
-        meta=(e.meta or {}),
-    )
-    db.add(row)
-    db.flush()  # get row.id without committing
-    return row
+    return insert_ledger_events(db, [e], dedupe=dedupe) == 1
 
 
 def fetch_last_events(
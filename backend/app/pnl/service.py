@@ -1,9 +1,10 @@
 # app/pnl/service.py
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import datetime, timezone, date
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, Optional, Tuple, List
+from typing import Any, Dict, Iterator, Optional, Tuple, List
 
 from sqlalchemy.orm import Session
 
@@ -215,6 +216,8 @@ def _normalize_event_row(raw: Any) -> Dict[str, Any]:
 
 # ─────────────────────────────── Service API ───────────────────────────────
 
+_BATCH_KEY = "pnl_ledger_batch"  # Session.info slot holding events of an open PnlService.batch()
+
 class PnlService:
     """
     High-level PnL service:
@@ -243,6 +246,31 @@ class PnlService:
         raise ValueError("normalize_event requires amount_usd or price_usd when quote_asset is not a stablecoin")
 
     # ── Write operations ──────────────────────────────────────────────────
+    @contextmanager
+    def batch(self, db: Session) -> Iterator[None]:
+        """
+        Collect ledger writes made on `db` inside the block and insert them with
+        one INSERT ... ON CONFLICT DO NOTHING on exit (nested blocks join the outer one).
+        """
+        if db.info.get(_BATCH_KEY) is not None:
+            yield
+            return
+        buf: List[PNLLedgerEvent] = []
+        db.info[_BATCH_KEY] = buf
+        try:
+            yield
+        finally:
+            db.info.pop(_BATCH_KEY, None)
+        if buf:
+            repo.insert_ledger_events(db, buf, dedupe=True)
+
+    def _write(self, db: Session, event: PNLLedgerEvent) -> None:
+        buf = db.info.get(_BATCH_KEY)
+        if buf is not None:
+            buf.append(event)
+        else:
+            repo.insert_ledger_event(db, event, dedupe=True)
+
     def log_trade_realized(self, db: Session, *, ts: datetime, exchange: str, account_id: str,
                            symbol: str, base_asset: str, quote_asset: str,
                            realized_asset: Decimal, realized_usd: Optional[Decimal] = None,
@@ -271,7 +299,7 @@ class PnlService:
             ref_trade_id=ref_trade_id,
             meta=meta or {},
         )
-        repo.insert_ledger_event(db, event, dedupe=True)
+        self._write(db, event)
         if emit_sse:
             try:
                 _emit_pnl_tick({
@@ -312,7 +340,7 @@ class PnlService:
             ref_trade_id=ref_trade_id,
             meta=meta or {},
         )
-        repo.insert_ledger_event(db, event, dedupe=True)
+        self._write(db, event)
         if emit_sse:
             try:
                 _emit_pnl_tick({
@@ -352,7 +380,7 @@ class PnlService:
             ref_trade_id=ref_trade_id,
             meta=meta or {},
         )
-        repo.insert_ledger_event(db, event, dedupe=True)
+        self._write(db, event)
         if emit_sse:
             try:
                 _emit_pnl_tick({
@@ -392,7 +420,7 @@ class PnlService:
             ref_trade_id=ref_trade_id,
             meta=meta or {},
         )
-        repo.insert_ledger_event(db, event, dedupe=True)
+        self._write(db, event)
         if emit_sse:
             try:
                 _emit_pnl_tick({
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Header, HTTPException, status, Depends
 from pydantic import BaseModel, Field
 
 from app.services.config_manager import config_manager
+from app.services.idempotency import IdempotencyInProgress
 from app.db.session import get_db  # yields SQLAlchemy Session
 
 logger = logging.getLogger(__name__)
@@ -93,6 +94,8 @@ async def switch_provider_config(
     except ValueError as ve:
         # validation errors from ConfigManager (unsupported provider/mode)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(ve))
+    except IdempotencyInProgress as ip:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ip))
     except Exception as e:
         logger.exception("config/switch_provider failed: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal error")
@@ -9,7 +9,7 @@ from app.config.settings import settings
 from app.execution.router import exec_router
 
 # Subscribe symbols to market data before actions
-from app.services.book_tracker import ensure_symbols_subscribed, get_all_quotes
+from app.services.book_tracker import ONE_SHOT_HOLD_SEC, ensure_symbols_subscribed, get_all_quotes
 
 # NEW: Import standardized idempotency system
 from app.utils.idempotency import idempotent, get_idempotency_key
@@ -61,7 +61,7 @@ async def place_order(
 
     # make sure data stream is hot for this symbol (best-effort)
     try:
-        await ensure_symbols_subscribed([sym])
+        await ensure_symbols_subscribed([sym], consumer="api", ttl_sec=ONE_SHOT_HOLD_SEC)
     except Exception:
         pass
 
@@ -87,7 +87,7 @@ async def flatten_symbol(
 
     # keep quotes fresh (best-effort)
     try:
-        await ensure_symbols_subscribed([sym])
+        await ensure_symbols_subscribed([sym], consumer="api", ttl_sec=ONE_SHOT_HOLD_SEC)
     except Exception:
         pass
 
@@ -106,7 +106,7 @@ async def get_position(symbol: str = Path(..., description="e.g. BTCUSDT")) -> d
     if not sym:
         raise HTTPException(status_code=400, detail="symbol is required")
     try:
-        await ensure_symbols_subscribed([sym])
+        await ensure_symbols_subscribed([sym], consumer="api", ttl_sec=ONE_SHOT_HOLD_SEC)
     except Exception:
         pass
     port = exec_router.get_port()
@@ -140,7 +140,7 @@ async def get_positions(symbols: Optional[List[str]] = Query(None)) -> list[dict
 
     try:
         if syms:
-            await ensure_symbols_subscribed(syms)
+            await ensure_symbols_subscribed(syms, consumer="api", ttl_sec=ONE_SHOT_HOLD_SEC)
     except Exception:
         pass
 
@@ -4,11 +4,12 @@ from __future__ import annotations
 import logging
 from typing import Any, Optional
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, status
 from fastapi.responses import JSONResponse
 
 from app.config.settings import settings
 from app.infra import metrics as m  # Prometheus gauges/counters (optional fields handled)
+from app.infra.tracing import get_tracer
 
 # ↓ helper & cache import for hit-rate display
 #    if your helper lives elsewhere, adjust the import path accordingly.
@@ -87,6 +88,16 @@ def _get_ml_stats() -> dict:
         }
 
 
+def _get_feed_stats() -> dict:
+    """Per-symbol quote source (ws | rest) and WS staleness from the feed-health supervisor."""
+    try:
+        from app.market_data.feed_health import get_feed_health
+        return get_feed_health().snapshot()
+    except Exception as e:
+        log.warning(f"Feed health unavailable: {e}")
+        return {"error": str(e)}
+
+
 @router.get("/healthz")
 async def healthz():
     """
@@ -162,6 +173,7 @@ async def healthz():
             "uptime_sec": uptime_sec,
         },
         "ml": _get_ml_stats(),  # ← ML STATS ADDED HERE
+        "feeds": _get_feed_stats(),
         "warnings": warnings,
     }
 
@@ -178,4 +190,14 @@ async def sanity() -> dict:
         "issues": settings.explain_sanity(),
         "active_provider": settings.active_provider,
         "active_mode": settings.active_mode,
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/latency")
+async def latency(limit: int = Query(20, ge=1, le=500)) -> dict:
+    """
+    Tick-to-order latency: per-stage histograms (time since the previous
+    stage) and the slowest finished traces, slowest first.
+    """
+    tracer = get_tracer()
+    return {**tracer.get_stats(), "slowest": tracer.slowest(limit)}
@@ -13,6 +13,7 @@ from app.services.book_tracker import (
     get_all_quotes,
     stream_quote_batches,
     ensure_symbols_subscribed,
+    release_symbols,
 )
 
 router = APIRouter(prefix="/api/market", tags=["market"])
@@ -137,6 +138,8 @@ async def stream_market(
         start_eid = 0
     eid = start_eid
 
+    consumer = f"sse:market:{id(request):x}"
+
     async def event_generator() -> AsyncGenerator[bytes, None]:
         # first message includes server-suggested retry backoff
         retry_ms = int(getattr(settings, "sse_retry_base_ms", 1000) or 1000)
@@ -147,7 +150,7 @@ async def stream_market(
         try:
             # 0) ensure live ingestion
             try:
-                await ensure_symbols_subscribed(syms)
+                await ensure_symbols_subscribed(syms, consumer=consumer)
             except Exception:
                 pass  # best-effort
 
@@ -214,6 +217,12 @@ async def stream_market(
         except Exception:
             # swallow to keep connection from crashing with stack traces
             return
+        finally:
+            # drop this stream's hold; upstream unsubscribe follows the grace period
+            try:
+                await release_symbols(syms, consumer=consumer)
+            except Exception:
+                pass
 
     headers = {
         "Cache-Control": "no-cache",
@@ -267,3 +276,15 @@ async def get_quote(
         "last": last,
         "timestamp": int(time.time() * 1000)
     }
+
+
+@router.get("/consolidated")
+async def get_consolidated(
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols; all streamed symbols if omitted"),
+) -> dict:
+    """Cross-venue view (Gate + MEXC when MD_VENUES streams both): best bid/ask, cross spread, per-venue staleness."""
+    from app.market_data.venues import get_venue_book
+
+    book = get_venue_book()
+    syms = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+    return {"active": book.active, "items": book.consolidated_many(syms)}
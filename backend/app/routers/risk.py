@@ -9,6 +9,7 @@ import logging
 
 from app.strategy.risk import get_risk_manager
 from app.services.alerts import send_test_alert
+from app.utils.idempotency import idempotent
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +66,7 @@ async def get_risk_limits():
 # ═══════════════════════════════════════════════════════════
 
 @router.post("/panic")
+@idempotent(ttl_seconds=300)
 async def panic_button(
     x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key")
 ):
@@ -103,6 +105,7 @@ async def panic_button(
 
 
 @router.post("/resume")
+@idempotent(ttl_seconds=300)
 async def resume_trading(
     x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key")
 ):
@@ -259,6 +262,9 @@ async def update_risk_limits(payload: dict):
                 except Exception as e:
                     logger.warning(f"Failed to update {field}: {e}")
         
+        # Пересобрать правила для проверок перед входом
+        risk_manager.reconfigure()
+        
         logger.info(f"✅ Risk limits updated: {updated}")
         
         return {
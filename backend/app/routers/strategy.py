@@ -207,7 +207,7 @@ async def start_symbols(
         
         # Try WebSocket as optional enhancement (don't block if fails)
         try:
-            await ensure_symbols_subscribed(syms)
+            await ensure_symbols_subscribed(syms, consumer="strategy")
         except Exception as e:
             print(f"⚠️ WebSocket subscription failed (OK, using REST): {e}")
         
@@ -237,7 +237,7 @@ async def stop_symbols(
         # ensure we have fresh data if flatten requested
         if flatten:
             try:
-                await ensure_symbols_subscribed(syms)
+                await ensure_symbols_subscribed(syms, consumer="strategy")
             except Exception:
                 pass
         await _engine.stop_symbols(syms, flatten=bool(flatten))
@@ -265,7 +265,7 @@ async def stop_all(
                 quotes = await bt_service.get_all_quotes()
                 syms = [q["symbol"] for q in quotes if q.get("symbol")]
                 if syms:
-                    await ensure_symbols_subscribed(syms)
+                    await ensure_symbols_subscribed(syms, consumer="strategy")
             except Exception:
                 pass
 
@@ -380,3 +380,9 @@ async def strategy_metrics() -> dict:
         "open_positions": open_flags,
         "realized_pnl": realized_pnl,
     }
+
+
+@router.get("/scheduler")
+async def strategy_scheduler() -> dict:
+    """Event scheduler state: per-symbol phase, wake reasons and decision latency."""
+    return _engine.scheduler_stats()
@@ -6,6 +6,8 @@ from fastapi import APIRouter, HTTPException, Header
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 
+from app.utils.idempotency import idempotent
+
 router = APIRouter(prefix="/api/strategy", tags=["strategy"])
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -103,9 +105,10 @@ async def get_full_params() -> Dict[str, Any]:
     }
 
 @router.patch("/params/ml")
+@idempotent(ttl_seconds=600)
 async def update_ml_settings(
     settings: MLSettings,
-    idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
+    x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
 ) -> Dict[str, Any]:
     """
     Update ML filter settings without restarting backend.
@@ -133,9 +136,10 @@ async def update_ml_settings(
     }
 
 @router.patch("/params/entry")
+@idempotent(ttl_seconds=600)
 async def update_entry_filters(
     filters: EntryFilters,
-    idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
+    x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
 ) -> Dict[str, Any]:
     """
     Update entry filter parameters without restarting.
@@ -165,9 +169,10 @@ async def update_entry_filters(
     }
 
 @router.patch("/params/exit")
+@idempotent(ttl_seconds=600)
 async def update_exit_params(
     exit_params: ExitParams,
-    idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
+    x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
 ) -> Dict[str, Any]:
     """
     Update exit parameters without restarting.
@@ -197,9 +202,10 @@ async def update_exit_params(
     }
 
 @router.patch("/params/risk")
+@idempotent(ttl_seconds=600)
 async def update_risk_params(
     risk: RiskParams,
-    idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
+    x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
 ) -> Dict[str, Any]:
     """
     Update risk management parameters without restarting.
@@ -229,8 +235,9 @@ async def update_risk_params(
     }
 
 @router.post("/params/reset")
+@idempotent(ttl_seconds=600)
 async def reset_params_to_default(
-    idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
+    x_idempotency_key: Optional[str] = Header(None, alias="X-Idempotency-Key"),
 ) -> Dict[str, Any]:
     """
     Reset all parameters to default values.
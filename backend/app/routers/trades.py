@@ -5,8 +5,9 @@ Provides endpoints for retrieving trade logs with cost analysis.
 from __future__ import annotations
 
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.models.trades import Trade
 from app.db.session import SessionLocal
@@ -214,21 +215,28 @@ async def get_symbol_trades(
 
 @router.get("/export")
 async def export_trades_csv(
-    period: str = Query("today", description="today | wtd | mtd | all"),
-    symbol: Optional[str] = Query(None, description="Filter by symbol"),
+    period: str = Query("today", description="today | wtd | mtd | all (ignored when start is set)"),
+    symbol: Optional[str] = Query(None, description="Filter by symbol (comma-separated for several)"),
     status: Optional[str] = Query(None, description="Filter by status: OPEN, CLOSED"),
-) -> str:
+    start: Optional[datetime] = Query(None, description="Entry time from (inclusive, UTC)"),
+    end: Optional[datetime] = Query(None, description="Entry time to (exclusive, UTC)"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv | ndjson"),
+    chunk_rows: int = Query(1000, ge=100, le=10000, description="Rows per streamed chunk"),
+) -> StreamingResponse:
     """
-    Export trades to CSV format.
-    
-    Returns CSV file with trade history.
+    Export trades as CSV or NDJSON.
+
+    Rows are streamed from a server-side cursor in chunks, so memory use does
+    not depend on the size of the export.
     """
-    import csv
-    from io import StringIO
-    from fastapi.responses import StreamingResponse
-    
-    db = SessionLocal()
-    try:
+    from app.services.trade_export import TradeExportFilter, iter_trades_csv, iter_trades_ndjson
+
+    def _utc_naive(ts: Optional[datetime]) -> Optional[datetime]:
+        if ts is not None and ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        return ts
+
+    if start is None:
         # Determine date range (same logic as stats)
         if period == "today":
             start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -238,73 +246,25 @@ async def export_trades_csv(
         elif period == "mtd":
             start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         else:  # all
-            start = datetime(2020, 1, 1)
-        
-        # Build query
-        query = db.query(Trade).filter(Trade.entry_time >= start).order_by(desc(Trade.entry_time))
-        
-        if symbol:
-            query = query.filter(Trade.symbol == symbol.upper())
-        
-        if status:
-            query = query.filter(Trade.status == status.upper())
-        
-        trades = query.all()
-        
-        # Create CSV
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        # Header
-        writer.writerow([
-            "Entry Time",
-            "Exit Time",
-            "Symbol",
-            "Entry Side",  # ✅ ИСПРАВЛЕНО
-            "Status",
-            "Entry Price",
-            "Exit Price",
-            "Entry Qty",   # ✅ ИСПРАВЛЕНО
-            "P&L USD",
-            "P&L %",
-            "Total Fee",
-            "Hold Duration (sec)",
-            "Exit Reason",
-            "Strategy Tag"
-        ])
-        
-        # Data rows
-        # Data rows
-        for t in trades:
-            writer.writerow([
-                t.entry_time.isoformat() if t.entry_time else "",
-                t.exit_time.isoformat() if t.exit_time else "",
-                t.symbol or "",
-                t.entry_side or "",  # ✅ ИСПРАВЛЕНО: entry_side вместо side
-                t.status or "",
-                f"{t.entry_price:.8f}" if t.entry_price else "",
-                f"{t.exit_price:.8f}" if t.exit_price else "",
-                f"{t.entry_qty:.8f}" if t.entry_qty else "",  # ✅ ИСПРАВЛЕНО: entry_qty вместо quantity
-                f"{t.pnl_usd:.4f}" if t.pnl_usd else "",
-                f"{t.pnl_percent:.2f}" if t.pnl_percent else "",
-                f"{t.total_fee:.4f}" if t.total_fee else "",
-                f"{t.hold_duration_sec:.2f}" if t.hold_duration_sec else "",
-                t.exit_reason or "",
-                t.strategy_tag or ""
-            ])
-        
-        # Prepare response
-        output.seek(0)
-        filename = f"trades_{period}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
-        )
-        
-    finally:
-        db.close()
\ No newline at end of file
+            start = None
+
+    flt = TradeExportFilter(
+        start=_utc_naive(start),
+        end=_utc_naive(end),
+        symbols=[s for s in (symbol or "").split(",") if s.strip()],
+        status=status,
+    )
+
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    if format == "ndjson":
+        body, media_type, filename = iter_trades_ndjson(flt, chunk_rows), "application/x-ndjson", f"trades_{period}_{stamp}.ndjson"
+    else:
+        body, media_type, filename = iter_trades_csv(flt, chunk_rows), "text/csv", f"trades_{period}_{stamp}.csv"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+    )
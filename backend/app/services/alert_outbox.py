@@ -0,0 +1,436 @@
+"""
+Alert Outbox
+Персистентная очередь уведомлений (Telegram) с дедупликацией и дайджестами.
+
+Producers call `enqueue()` — an append to an in-memory buffer, no DB and
+no network — and return immediately, so neither a slow Telegram API nor a
+locked SQLite file stalls the code path that raised the alert. Repeats of
+a dedupe key within the dedupe window are folded into the existing row
+(count ×N, latest body) when the buffer is persisted.
+
+A background worker (`start()` / `stop()`) wakes every `flush_interval`
+seconds, writes the buffer to the outbox table (off the event loop), takes
+all due PENDING rows, coalesces them into digest messages
+(one message for a single alert, a numbered digest for a burst, split at
+the Telegram size limit) and hands them to the transport. Failures are
+retried with exponential backoff until `max_attempts`, then FAILED.
+
+Transports are anything with `async send(text: str) -> None` that raises
+on failure: TelegramTransport for production, MemoryTransport for tests
+and local runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.alert_outbox import AlertOutbox
+
+logger = logging.getLogger(__name__)
+
+# Telegram hard limit is 4096 chars per message; keep headroom for HTML
+MAX_MESSAGE_CHARS = 3800
+
+# Alerts waiting to be written (bounded: oldest are dropped if the DB is gone for long)
+MAX_BUFFERED = 10_000
+
+_EMOJI = {
+    "INFO": "ℹ️",
+    "WARNING": "⚠️",
+    "ERROR": "🔴",
+    "CRITICAL": "🚨",
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ═══════════════════════════════════════════════════════════
+# TRANSPORTS
+# ═══════════════════════════════════════════════════════════
+
+class AlertTransport(Protocol):
+    async def send(self, text: str) -> None:
+        """Deliver one message; raise on failure."""
+        ...
+
+
+class TelegramTransport:
+    """Delivers through TelegramAlertService.send_message (HTML)."""
+
+    def __init__(self, service: Any) -> None:
+        self.service = service
+
+    def is_enabled(self) -> bool:
+        return bool(self.service.is_enabled())
+
+    async def send(self, text: str) -> None:
+        ok = await self.service.send_message(text, parse_mode="HTML")
+        if not ok:
+            raise RuntimeError("telegram send_message failed")
+
+
+class MemoryTransport:
+    """Local fake: keeps sent messages; `fail_next` makes the next N sends raise."""
+
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+        self.fail_next = 0
+
+    async def send(self, text: str) -> None:
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise RuntimeError("transport unavailable")
+        self.sent.append(text)
+
+
+# ═══════════════════════════════════════════════════════════
+# FORMATTING
+# ═══════════════════════════════════════════════════════════
+
+def _format_single(row: Dict[str, Any]) -> str:
+    if not row["title"]:
+        return row["body"]  # pre-formatted (daily report etc.)
+    emoji = _EMOJI.get(row["level"].upper(), "📢")
+    times = f" (×{row['count']})" if row["count"] > 1 else ""
+    return (
+        f"{emoji} <b>{row['title']}</b>{times}\n\n"
+        f"{row['body']}\n\n"
+        f"<i>{row['created_at'].strftime('%Y-%m-%d %H:%M:%S UTC')}</i>"
+    )
+
+
+def _format_entry(row: Dict[str, Any]) -> str:
+    emoji = _EMOJI.get(row["level"].upper(), "📢")
+    times = f" ×{row['count']}" if row["count"] > 1 else ""
+    return (
+        f"{emoji} <b>{row['title'] or row['level']}</b>{times} "
+        f"<i>{row['created_at'].strftime('%H:%M:%S')}</i>\n{row['body']}"
+    )
+
+
+def build_messages(rows: Sequence[Dict[str, Any]], limit: int = MAX_MESSAGE_CHARS) -> List[tuple]:
+    """
+    Coalesce rows into messages: [(text, [row ids])].
+    A lone row (or a pre-formatted one) is sent on its own; the rest are
+    packed into digests of up to `limit` chars (an oversized entry gets a
+    digest to itself).
+    """
+    plain = [r for r in rows if r["title"]]
+    out: List[tuple] = [(_format_single(r), [r["id"]]) for r in rows if not r["title"]]
+    if len(plain) == 1:
+        out.append((_format_single(plain[0]), [plain[0]["id"]]))
+        return out
+
+    parts: List[str] = []
+    ids: List[int] = []
+    size = 0
+
+    def _flush() -> None:
+        if parts:
+            header = f"📬 <b>{len(parts)} alerts</b>\n\n"
+            out.append((header + "\n\n".join(parts), list(ids)))
+            parts.clear()
+            ids.clear()
+
+    for r in plain:
+        entry = _format_entry(r)
+        if parts and size + len(entry) + 2 > limit - 64:
+            _flush()
+            size = 0
+        parts.append(entry)
+        ids.append(r["id"])
+        size += len(entry) + 2
+    _flush()
+    return out
+
+
+# ═══════════════════════════════════════════════════════════
+# OUTBOX
+# ═══════════════════════════════════════════════════════════
+
+class AlertOutboxService:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        transport: Optional[AlertTransport],
+        *,
+        dedupe_window_sec: float = 300.0,
+        flush_interval: float = 5.0,
+        max_batch: int = 50,
+        max_attempts: int = 8,
+        backoff_base_sec: float = 5.0,
+        backoff_max_sec: float = 600.0,
+        send_timeout: float = 15.0,
+        retention_days: int = 7,
+        quiet_hours: Optional[Callable[[], bool]] = None,
+        now_fn: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        self._session_factory = session_factory
+        self.transport = transport
+        self.dedupe_window = timedelta(seconds=dedupe_window_sec)
+        self.flush_interval = float(flush_interval)
+        self.max_batch = int(max_batch)
+        self.max_attempts = int(max_attempts)
+        self.backoff_base = float(backoff_base_sec)
+        self.backoff_max = float(backoff_max_sec)
+        self.send_timeout = float(send_timeout)
+        self.retention = timedelta(days=retention_days)
+        self._quiet_hours = quiet_hours or (lambda: False)
+        self._now = now_fn
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._last_purge: Optional[datetime] = None
+        # (level, title, body, key, force, ts); deque append/popleft are thread-safe
+        self._buffer: deque = deque(maxlen=MAX_BUFFERED)
+        self.stats = {"enqueued": 0, "deduped": 0, "sent_messages": 0, "sent_alerts": 0,
+                      "failed_sends": 0, "dropped": 0}
+
+    def is_enabled(self) -> bool:
+        if self.transport is None:
+            return False
+        check = getattr(self.transport, "is_enabled", None)
+        return bool(check()) if callable(check) else True
+
+    # ───────── producer side ─────────
+
+    def enqueue(
+        self,
+        level: str,
+        title: str,
+        body: str,
+        *,
+        key: Optional[str] = None,
+        force: bool = False,
+    ) -> bool:
+        """
+        Queue an alert (in-memory append; the worker persists it). Returns
+        False when alerts are disabled; never blocks, never raises.
+        """
+        if not self.is_enabled():
+            return False
+        self._buffer.append((level, title, body, key, force, self._now()))
+        return True
+
+    def _persist_buffered(self) -> int:
+        """Write buffered alerts to the outbox, folding dedupe repeats. Returns alerts taken."""
+        items = []
+        while self._buffer:
+            try:
+                items.append(self._buffer.popleft())
+            except IndexError:
+                break
+        if not items:
+            return 0
+        enqueued = deduped = 0
+        try:
+            with self._session_factory() as db:
+                for level, title, body, key, force, ts in items:
+                    if key:
+                        prev = db.execute(
+                            select(AlertOutbox)
+                            .where(AlertOutbox.dedupe_key == key)
+                            .where(AlertOutbox.created_at >= ts - self.dedupe_window)
+                            .where(AlertOutbox.status != "FAILED")
+                            .order_by(AlertOutbox.id.desc())
+                            .limit(1)
+                        ).scalar_one_or_none()
+                        if prev is not None:
+                            prev.count += 1
+                            prev.last_seen_at = ts
+                            if prev.status == "PENDING":
+                                prev.body = body
+                                prev.force = prev.force or force
+                            deduped += 1
+                            continue
+                    db.add(AlertOutbox(
+                        dedupe_key=key, level=level.upper(), title=title, body=body, force=force,
+                        count=1, status="PENDING", attempts=0,
+                        created_at=ts, last_seen_at=ts, next_attempt_at=ts,
+                    ))
+                    db.flush()
+                    enqueued += 1
+                db.commit()
+        except Exception as e:
+            logger.error(f"Alert outbox persist failed ({len(items)} alerts kept in memory): {e}")
+            self._buffer.extendleft(reversed(items))
+            return 0
+        self.stats["enqueued"] += enqueued
+        self.stats["deduped"] += deduped
+        return len(items)
+
+    # ───────── worker side ─────────
+
+    def _claim_due(self) -> List[Dict[str, Any]]:
+        now = self._now()
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(AlertOutbox)
+                .where(AlertOutbox.status == "PENDING")
+                .where(AlertOutbox.next_attempt_at <= now)
+                .order_by(AlertOutbox.id)
+                .limit(self.max_batch)
+            ).scalars().all()
+            out: List[Dict[str, Any]] = []
+            quiet = self._quiet_hours()
+            for r in rows:
+                if quiet and not r.force:
+                    r.status = "DROPPED"
+                    r.last_error = "quiet hours"
+                    self.stats["dropped"] += 1
+                    continue
+                out.append({"id": r.id, "level": r.level, "title": r.title, "body": r.body,
+                            "count": r.count, "attempts": r.attempts, "created_at": r.created_at})
+            db.commit()
+        return out
+
+    def _mark(self, sent_ids: List[int], failed: Dict[int, int], error: str) -> None:
+        now = self._now()
+        with self._session_factory() as db:
+            if sent_ids:
+                db.execute(
+                    update(AlertOutbox).where(AlertOutbox.id.in_(sent_ids))
+                    .values(status="SENT", sent_at=now, attempts=AlertOutbox.attempts + 1, last_error=None)
+                )
+            for rid, attempts in failed.items():
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    values = {"status": "FAILED", "attempts": attempts, "last_error": error}
+                else:
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+                    values = {"attempts": attempts, "last_error": error,
+                              "next_attempt_at": now + timedelta(seconds=delay)}
+                db.execute(update(AlertOutbox).where(AlertOutbox.id == rid).values(**values))
+            db.commit()
+
+    def _purge(self) -> int:
+        cutoff = self._now() - self.retention
+        with self._session_factory() as db:
+            res = db.execute(
+                delete(AlertOutbox)
+                .where(AlertOutbox.status != "PENDING")
+                .where(AlertOutbox.created_at < cutoff)
+            )
+            db.commit()
+            return int(res.rowcount or 0)
+
+    async def flush_once(self) -> int:
+        """Deliver everything due right now. Returns the number of alerts sent."""
+        if self.transport is None:
+            return 0
+        if self._buffer:
+            await asyncio.to_thread(self._persist_buffered)
+        rows = await asyncio.to_thread(self._claim_due)
+        if not rows:
+            return 0
+        attempts = {r["id"]: r["attempts"] for r in rows}
+        sent_ids: List[int] = []
+        failed: Dict[int, int] = {}
+        error = ""
+        for text, ids in build_messages(rows):
+            try:
+                await asyncio.wait_for(self.transport.send(text), timeout=self.send_timeout)
+                sent_ids.extend(ids)
+                self.stats["sent_messages"] += 1
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                failed.update({i: attempts[i] for i in ids})
+                self.stats["failed_sends"] += 1
+        await asyncio.to_thread(self._mark, sent_ids, failed, error)
+        self.stats["sent_alerts"] += len(sent_ids)
+        if failed:
+            logger.warning(f"Alert outbox: {len(failed)} alerts not delivered ({error}), will retry")
+        return len(sent_ids)
+
+    async def _loop(self) -> None:
+        logger.info(f"📬 Alert outbox worker started (every {self.flush_interval}s)")
+        try:
+            while self._running:
+                try:
+                    await self.flush_once()
+                    now = self._now()
+                    if self._last_purge is None or now - self._last_purge > timedelta(hours=1):
+                        self._last_purge = now
+                        await asyncio.to_thread(self._purge)
+                except Exception as e:
+                    logger.error(f"Error in alert outbox loop: {e}")
+                await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            pass
+
+    async def start(self) -> None:
+        if self._running or not self.is_enabled():
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the worker; with drain=True make one last delivery attempt."""
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if drain:
+            try:
+                await self.flush_once()
+            except Exception as e:
+                logger.error(f"Alert outbox drain failed: {e}")
+
+    def pending_count(self) -> int:
+        self._persist_buffered()
+        with self._session_factory() as db:
+            n = db.execute(
+                select(func.count()).select_from(AlertOutbox).where(AlertOutbox.status == "PENDING")
+            ).scalar()
+        return int(n or 0)
+
+
+# ═══════════════════════════════════════════════════════════
+# SINGLETON INSTANCE
+# ═══════════════════════════════════════════════════════════
+
+_outbox: Optional[AlertOutboxService] = None
+
+
+def get_alert_outbox() -> AlertOutboxService:
+    """Получить глобальный экземпляр outbox (Telegram transport, SessionLocal)"""
+    global _outbox
+    if _outbox is None:
+        from app.db.session import SessionLocal
+        from app.services.telegram_bot import get_telegram_service
+
+        telegram = get_telegram_service()
+        try:
+            from app.config.settings import settings
+            window = float(getattr(settings, "alert_dedupe_window_sec", 300.0))
+            interval = float(getattr(settings, "alert_flush_interval_sec", 5.0))
+            attempts = int(getattr(settings, "alert_max_attempts", 8))
+        except Exception:
+            window, interval, attempts = 300.0, 5.0, 8
+
+        _outbox = AlertOutboxService(
+            SessionLocal,
+            TelegramTransport(telegram),
+            dedupe_window_sec=window,
+            flush_interval=interval,
+            max_attempts=attempts,
+            quiet_hours=telegram.is_quiet_hours,
+        )
+    return _outbox
+
+
+def enqueue_alert(level: str, title: str, body: str, *, key: Optional[str] = None, force: bool = False) -> bool:
+    """Shortcut for get_alert_outbox().enqueue(...)."""
+    return get_alert_outbox().enqueue(level, title, body, key=key, force=force)
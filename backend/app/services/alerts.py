@@ -1,11 +1,17 @@
 """
 Centralized Alert Functions
 Централизованные функции для отправки алертов
+
+Alerts are queued in the alert outbox (app.services.alert_outbox) and
+delivered by its background worker: these calls never wait on Telegram.
+Each alert has a dedupe key, so a repeat within the dedupe window is
+folded into the queued one instead of sending another message.
+Return value: True if the alert was queued.
 """
 
 import logging
 from typing import Optional
-from app.services.telegram_bot import get_telegram_service
+from app.services.alert_outbox import enqueue_alert
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +24,17 @@ async def alert_daily_loss_limit(pnl_usd: float, limit_usd: float) -> bool:
     """
     Алерт: Достигнут дневной лимит убытков
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"Daily P&L: <b>${pnl_usd:.2f}</b>\n"
         f"Loss Limit: ${limit_usd:.2f}\n\n"
         f"<b>Trading has been halted automatically.</b>"
     )
     
-    return await telegram.send_alert(
-        level="CRITICAL",
-        title="🚨 Daily Loss Limit Reached",
-        message=message,
+    return enqueue_alert(
+        "CRITICAL",
+        "🚨 Daily Loss Limit Reached",
+        message,
+        key="daily_loss_limit",
         force=True  # Игнорировать quiet hours
     )
 
@@ -38,8 +43,6 @@ async def alert_symbol_cooldown(symbol: str, minutes: int) -> bool:
     """
     Алерт: Символ на cooldown после последовательных убытков
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"Symbol: <b>{symbol}</b>\n"
         f"Reason: 3 consecutive losses\n"
@@ -47,10 +50,11 @@ async def alert_symbol_cooldown(symbol: str, minutes: int) -> bool:
         f"Trading paused for this symbol."
     )
     
-    return await telegram.send_alert(
-        level="WARNING",
-        title=f"⚠️ Cooldown: {symbol}",
-        message=message,
+    return enqueue_alert(
+        "WARNING",
+        f"⚠️ Cooldown: {symbol}",
+        message,
+        key=f"cooldown:{symbol}",
         force=False
     )
 
@@ -59,14 +63,13 @@ async def alert_trading_resumed() -> bool:
     """
     Алерт: Торговля возобновлена
     """
-    telegram = get_telegram_service()
-    
     message = "System is ready for trading."
     
-    return await telegram.send_alert(
-        level="INFO",
-        title="✅ Trading Resumed",
-        message=message,
+    return enqueue_alert(
+        "INFO",
+        "✅ Trading Resumed",
+        message,
+        key="trading_resumed",
         force=False
     )
 
@@ -79,18 +82,17 @@ async def alert_ws_disconnect(provider: str, duration_sec: int) -> bool:
     """
     Алерт: WebSocket отключен
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"Provider: <b>{provider}</b>\n"
         f"Disconnected for: {duration_sec} seconds\n\n"
         f"Attempting to reconnect..."
     )
     
-    return await telegram.send_alert(
-        level="ERROR",
-        title="🔴 WebSocket Disconnected",
-        message=message,
+    return enqueue_alert(
+        "ERROR",
+        "🔴 WebSocket Disconnected",
+        message,
+        key=f"ws_disconnect:{provider}",
         force=True  # Критичная ошибка
     )
 
@@ -99,8 +101,6 @@ async def alert_system_error(module: str, error: str, traceback: str = "") -> bo
     """
     Алерт: Системная ошибка
     """
-    telegram = get_telegram_service()
-    
     # Обрезать traceback если слишком длинный
     tb_preview = traceback[:500] if traceback else "N/A"
     
@@ -110,10 +110,11 @@ async def alert_system_error(module: str, error: str, traceback: str = "") -> bo
         f"Traceback:\n<pre>{tb_preview}</pre>"
     )
     
-    return await telegram.send_alert(
-        level="CRITICAL",
-        title="🚨 System Error",
-        message=message,
+    return enqueue_alert(
+        "CRITICAL",
+        "🚨 System Error",
+        message,
+        key=f"system_error:{module}:{error[:100]}",
         force=True  # Критичная ошибка
     )
 
@@ -122,18 +123,17 @@ async def alert_emergency_stop(positions_closed: int) -> bool:
     """
     Алерт: Аварийная остановка активирована
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"All trading has been halted.\n"
         f"Positions closed: {positions_closed}\n\n"
         f"<b>Manual intervention required.</b>"
     )
     
-    return await telegram.send_alert(
-        level="CRITICAL",
-        title="🚨 EMERGENCY STOP",
-        message=message,
+    return enqueue_alert(
+        "CRITICAL",
+        "🚨 EMERGENCY STOP",
+        message,
+        key="emergency_stop",
         force=True  # Всегда отправлять
     )
 
@@ -146,18 +146,17 @@ async def alert_profit_target(pnl_usd: float, target_usd: float) -> bool:
     """
     Алерт: Достигнута целевая прибыль
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"Daily P&L: <b>${pnl_usd:.2f}</b>\n"
         f"Target: ${target_usd:.2f}\n\n"
         f"🎉 <b>Great job!</b>"
     )
     
-    return await telegram.send_alert(
-        level="INFO",
-        title="🎉 Daily Profit Target Reached",
-        message=message,
+    return enqueue_alert(
+        "INFO",
+        "🎉 Daily Profit Target Reached",
+        message,
+        key="profit_target",
         force=False
     )
 
@@ -166,18 +165,17 @@ async def alert_win_rate_drop(win_rate: float, threshold: float) -> bool:
     """
     Алерт: Win rate упал ниже порога
     """
-    telegram = get_telegram_service()
-    
     message = (
         f"Current Win Rate: <b>{win_rate:.1f}%</b>\n"
         f"Threshold: {threshold:.1f}%\n\n"
         f"Review strategy parameters."
     )
     
-    return await telegram.send_alert(
-        level="WARNING",
-        title="📉 Win Rate Drop",
-        message=message,
+    return enqueue_alert(
+        "WARNING",
+        "📉 Win Rate Drop",
+        message,
+        key="win_rate_drop",
         force=False
     )
 
@@ -190,13 +188,12 @@ async def send_test_alert() -> bool:
     """
     Отправить тестовый алерт
     """
-    telegram = get_telegram_service()
-    
     message = "This is a test alert from your trading bot."
     
-    return await telegram.send_alert(
-        level="INFO",
-        title="🧪 Test Alert",
-        message=message,
+    return enqueue_alert(
+        "INFO",
+        "🧪 Test Alert",
+        message,
+        key=None,
         force=False
     )
\ No newline at end of file
@@ -1,9 +1,13 @@
 # app/services/allocation_manager.py
 from __future__ import annotations
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set, Tuple
 from sqlalchemy.orm import Session
 
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
 # Глобальная переменная для хранения режима (in-memory)
 _ALLOCATION_MODE: str = "equal"  # "equal", "dynamic", or "smart"
 
@@ -22,6 +26,36 @@ def set_allocation_mode(mode: str) -> str:
     return _ALLOCATION_MODE
 
 
+
+# Neutral depth@5bps (USD) for symbols without a live L2 book
+DEFAULT_DEPTH_USD = 50_000.0
+
+
+def _live_depths(symbols: List[str]) -> Tuple[Dict[str, float], Set[str]]:
+    """
+    depth@5bps (bid+ask USD) per symbol from the book tracker's published
+    snapshots. Returns (depth_map, symbols_with_live_depth).
+    """
+    depth_map: Dict[str, float] = {}
+    live: Set[str] = set()
+    try:
+        from app.market_data.book_tracker import book_tracker
+    except Exception:
+        book_tracker = None
+    for symbol in symbols:
+        depth = None
+        if book_tracker is not None:
+            try:
+                depth = book_tracker.depth_usd(symbol, 5.0)
+            except Exception:
+                depth = None
+        if depth is None:
+            depth_map[symbol] = DEFAULT_DEPTH_USD
+        else:
+            depth_map[symbol] = depth
+            live.add(symbol)
+    return depth_map, live
+
 def calculate_dynamic_allocation(
     symbols: List[str],
     total_capital: float,
@@ -31,32 +65,13 @@ def calculate_dynamic_allocation(
     """
     Calculate dynamic allocation based on liquidity.
     
-    TEMPORARY: Uses mock depth values for testing.
-    TODO: Replace with real-time scanner API calls.
+    Uses live depth@5bps from the book tracker; symbols without an L2 book
+    get DEFAULT_DEPTH_USD.
     """
     if not symbols:
         return {}
     
-    # Mock liquidity depths (USD at 5bps)
-    # These values simulate real market liquidity
-    MOCK_DEPTHS = {
-        "XRPUSDT": 180000,   # Very high liquidity
-        "BTCUSDT": 250000,   # Highest liquidity
-        "ETHUSDT": 200000,
-        "AVAXUSDT": 120000,  # High liquidity
-        "NEARUSDT": 80000,   # Medium liquidity
-        "LINKUSDT": 70000,
-        "ADAUSDT": 50000,    # Lower liquidity
-        "ALGOUSDT": 40000,
-        "VETUSDT": 10000,    # Low liquidity
-        "DOTUSDT": 90000,
-        "MATICUSDT": 60000,
-    }
-    
-    # Get depth for each symbol (use mock or default)
-    depth_map = {}
-    for symbol in symbols:
-        depth_map[symbol] = MOCK_DEPTHS.get(symbol, 50000.0)  # Default 50k
+    depth_map, live = _live_depths(symbols)
     
     total_depth = sum(depth_map.values())
     
@@ -76,11 +91,12 @@ def calculate_dynamic_allocation(
             "allocation_pct": round(allocation_pct, 1),
             "max_positions": max_positions,
             "depth_5bps": round(depth, 2),
+            "depth_live": symbol in live,
         }
     
-    print(f"[ALLOCATION] Dynamic (MOCK) allocation: {len(symbols)} symbols")
+    logger.info(f"[ALLOCATION] Dynamic allocation: {len(symbols)} symbols")
     for sym, alloc in allocations.items():
-        print(f"  {sym}: ${alloc['allocated_usd']:.0f} ({alloc['allocation_pct']:.1f}%) - depth ${alloc['depth_5bps']:.0f}")
+        logger.debug(f"  {sym}: ${alloc['allocated_usd']:.0f} ({alloc['allocation_pct']:.1f}%) - depth ${alloc['depth_5bps']:.0f}")
     
     return allocations
 
@@ -130,60 +146,47 @@ def calculate_smart_allocation(
     - Spread quality: 10%
     
     Symbols with better historical performance get more capital.
+    Performance comes from symbol_perf_stats (one query for all symbols),
+    liquidity from the live book.
     """
     if not symbols:
         return {}
     
     if db is None:
         # Fallback to equal if no DB
-        print("[ALLOCATION] No DB connection, falling back to equal")
+        logger.info("[ALLOCATION] No DB connection, falling back to equal")
         return calculate_equal_allocation(symbols, total_capital, position_size_usd)
     
     try:
-        from app.models.trades import Trade
-        from sqlalchemy import func
+        from app.services.symbol_stats import load_symbol_stats
         
         # Calculate scores for each symbol
         scores = {}
         
-        # Mock liquidity (same as dynamic)
-        MOCK_DEPTHS = {
-            "XRPUSDT": 180000, "BTCUSDT": 250000, "ETHUSDT": 200000,
-            "AVAXUSDT": 120000, "NEARUSDT": 80000, "LINKUSDT": 70000,
-            "ADAUSDT": 50000, "ALGOUSDT": 40000, "VETUSDT": 10000,
-            "DOTUSDT": 90000, "MATICUSDT": 60000,
-        }
+        # One query for all symbols (materialised per-symbol stats) + live depth
+        stats = load_symbol_stats(db, symbols)
+        depth_map, live = _live_depths(symbols)
         
         for symbol in symbols:
-            # Get historical stats from last 100 trades
-            trades = (
-                db.query(Trade)
-                .filter(Trade.symbol == symbol)
-                .filter(Trade.status == "CLOSED")
-                .order_by(Trade.created_at.desc())
-                .limit(100)
-                .all()
-            )
+            st = stats.get(symbol)
             
-            if not trades or len(trades) < 5:
+            if st is None or st.trade_count < 5:
                 # Not enough data, use neutral score
                 scores[symbol] = 50.0  # Neutral
-                print(f"[ALLOCATION] {symbol}: Not enough data ({len(trades) if trades else 0} trades), neutral score")
+                logger.debug(f"[ALLOCATION] {symbol}: Not enough data ({st.trade_count if st else 0} trades), neutral score")
                 continue
             
-            # Calculate metrics
-            total_trades = len(trades)
-            winning_trades = sum(1 for t in trades if t.pnl_usd and t.pnl_usd > 0)
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 50.0
-            
-            avg_pnl_bps = sum(t.pnl_bps for t in trades if t.pnl_bps) / total_trades if total_trades > 0 else 0.0
+            # Recent (decayed, ~last 100 trades) metrics
+            weight = st.recent_weight or 1.0
+            win_rate = st.recent_wins / weight * 100
+            avg_pnl_bps = st.recent_pnl_bps / weight
             
             # Get liquidity
-            depth = MOCK_DEPTHS.get(symbol, 50000.0)
+            depth = depth_map[symbol]
             liquidity_score = min(depth / 100000 * 100, 100)  # Normalize to 0-100
             
             # Get avg spread (higher is better for our strategy)
-            avg_spread = sum(t.spread_bps_entry for t in trades if t.spread_bps_entry) / total_trades if total_trades > 0 else 5.0
+            avg_spread = st.recent_spread_bps / weight
             spread_score = min(avg_spread / 10 * 100, 100)  # Normalize to 0-100
             
             # Calculate composite score
@@ -196,7 +199,7 @@ def calculate_smart_allocation(
             
             scores[symbol] = max(score, 1.0)  # Minimum score of 1
             
-            print(f"[ALLOCATION] {symbol}: WR={win_rate:.1f}% PnL={avg_pnl_bps:.2f}bps Spread={avg_spread:.1f}bps → Score={score:.1f}")
+            logger.debug(f"[ALLOCATION] {symbol}: WR={win_rate:.1f}% PnL={avg_pnl_bps:.2f}bps Spread={avg_spread:.1f}bps → Score={score:.1f}")
         
         # Allocate based on scores
         total_score = sum(scores.values())
@@ -211,24 +214,20 @@ def calculate_smart_allocation(
             allocated_usd = (allocation_pct / 100) * total_capital
             max_positions = int(allocated_usd / position_size_usd) if position_size_usd > 0 else 0
             
-            # Get depth for display
-            depth = MOCK_DEPTHS.get(symbol, 50000.0)
-            
             allocations[symbol] = {
                 "allocated_usd": round(allocated_usd, 2),
                 "allocation_pct": round(allocation_pct, 1),
                 "max_positions": max_positions,
-                "depth_5bps": round(depth, 2),
+                "depth_5bps": round(depth_map[symbol], 2),
+                "depth_live": symbol in live,
                 "smart_score": round(score, 1),  # NEW: show the score
             }
         
-        print(f"[ALLOCATION] Smart allocation: {len(symbols)} symbols based on historical performance")
+        logger.info(f"[ALLOCATION] Smart allocation: {len(symbols)} symbols based on historical performance")
         return allocations
         
     except Exception as e:
-        print(f"[WARN] Smart allocation failed: {e}, falling back to equal")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[WARN] Smart allocation failed: {e}, falling back to equal")
         return calculate_equal_allocation(symbols, total_capital, position_size_usd)
 
 
@@ -15,12 +15,35 @@ import httpx
 
 from app.config.settings import settings
 
+try:  # fast path for the large all-symbols ticker payloads
+    import orjson as _orjson
+except Exception:  # pragma: no cover
+    _orjson = None  # type: ignore[assignment]
+    import json as _json
+
 # ---- constants (guarded import) ---------------------------------
 try:
     from app.config.constants import ABSORPTION_X_BPS as DEFAULT_ABS_BPS  # type: ignore
 except Exception:
     DEFAULT_ABS_BPS = 5.0  # safe default: ±5 bps
 
+# same band sums as the tracker snapshots and the scanner
+try:
+    from app.market_data.book_tracker import _band_key, depth_at_bps as _depth_at_bps
+except Exception:  # pragma: no cover
+    def _band_key(x_bps: float) -> float | int:
+        return int(x_bps) if float(x_bps).is_integer() else float(x_bps)
+
+    def _depth_at_bps(bids, asks, mid, bands_bps):
+        out: Dict[Any, Dict[str, float]] = {}
+        for b in bands_bps:
+            floor, cap = mid * (1.0 - b / 1e4), mid * (1.0 + b / 1e4)
+            out[_band_key(b)] = {
+                "bid_usd": sum(p * q for p, q in bids if p >= floor and p > 0 and q > 0),
+                "ask_usd": sum(p * q for p, q in asks if p <= cap and p > 0 and q > 0),
+            }
+        return out
+
 # ----- ScanRow dataclass (temporary; move to scanner.py later) -----
 @dataclass
 class ScanRow:
@@ -47,6 +70,10 @@ class ScanRow:
 
 # ----- provider helpers -----
 def _provider() -> str:
+    # the trading venue can be switched at runtime without touching settings (multi-venue streaming)
+    with suppress(Exception):
+        from app.market_data.venues import active_venue
+        return active_venue().upper()
     try:
         ap = getattr(settings, "active_provider", None)
         if ap:
@@ -117,6 +144,7 @@ try:
     from app.market_data.book_tracker import (
         book_tracker,
         on_book_ticker as _on_bt,
+        on_book_tickers as _on_bts,
         on_partial_depth as _on_depth,
     )
 except Exception:
@@ -391,6 +419,18 @@ except Exception:
     ) -> None:
         await book_tracker.update_tape_metrics(symbol, usdpm, tpm, ts_ms=ts_ms)
 
+    async def _on_bts(rows: Sequence[Tuple[str, float, float, float, float, Optional[int]]]) -> int:
+        for sym, b, bq, a, aq, ts in rows:
+            await book_tracker.update_book_ticker(sym, b, bq, a, aq, ts_ms=ts)
+        return len(rows)
+
+
+try:
+    from app.market_data.feed_health import get_feed_health
+    _FEED_HEALTH = get_feed_health()
+except Exception:
+    _FEED_HEALTH = None  # type: ignore[assignment]
+
 
 # SSE publisher helper
 def _get_sse_publisher():
@@ -402,6 +442,14 @@ def _get_sse_publisher():
 
 
 # ── Public API ───────────────────────────────────────────────────────────────
+def _float_levels(levels: Sequence[Any]) -> List[Tuple[float, float]]:
+    out: List[Tuple[float, float]] = []
+    for lvl in levels:
+        with suppress(Exception):
+            out.append((float(lvl[0]), float(lvl[1])))
+    return out
+
+
 def _with_derived(q: Dict[str, Any]) -> Dict[str, Any]:
     if not q:
         return {}
@@ -448,62 +496,41 @@ def _with_derived(q: Dict[str, Any]) -> Dict[str, Any]:
     if asks_l2:
         out["asks"] = asks_l2
 
-    # Absorption over ±X bps band (USD)
+    # Absorption over ±X bps band (USD): the tracker snapshot's cached band when it has
+    # one, otherwise the same depth_at_bps sum over the quote's levels
     try:
         x_bps = float(getattr(settings, "absorption_x_bps", DEFAULT_ABS_BPS) or DEFAULT_ABS_BPS)
     except Exception:
         x_bps = float(DEFAULT_ABS_BPS)
-    if mid > 0 and (bids_l2 or asks_l2) and x_bps > 0:
-        band = x_bps / 1e4
-        bid_floor = mid * (1.0 - band)
-        ask_cap = mid * (1.0 + band)
-
-        def _sum_usd(levels, side: str) -> float:
-            total = 0.0
-            if side == "bid":
-                for p, q in levels:
-                    with suppress(Exception):
-                        pf, qf = float(p), float(q)
-                        if pf > 0 and qf > 0 and pf >= bid_floor:
-                            total += pf * qf
-                        elif pf < bid_floor:
-                            break
-            else:
-                for p, q in levels:
-                    with suppress(Exception):
-                        pf, qf = float(p), float(q)
-                        if pf > 0 and qf > 0 and pf <= ask_cap:
-                            total += pf * qf
-                        elif pf > ask_cap:
-                            break
-            return total
-
-        out["absorption_bid_usd"] = _sum_usd(bids_l2, "bid") if bids_l2 else 0.0
-        out["absorption_ask_usd"] = _sum_usd(asks_l2, "ask") if asks_l2 else 0.0
-    else:
-        out["absorption_bid_usd"] = 0.0
-        out["absorption_ask_usd"] = 0.0
-
-    # ✅ NOW calculate imbalance AFTER absorption is computed
-    try:
-        abs_bid = float(out.get("absorption_bid_usd", 0.0))
-        abs_ask = float(out.get("absorption_ask_usd", 0.0))
-        out["imbalance"] = (abs_bid / (abs_bid + abs_ask)) if (abs_bid + abs_ask) > 0 else 0.5
-    except Exception:
-        out["imbalance"] = 0.5
+    band = (q.get("depth_at_bps") or {}).get(_band_key(x_bps)) if x_bps > 0 else None
+    if band is None and mid > 0 and (bids_l2 or asks_l2) and x_bps > 0:
+        with suppress(Exception):
+            band = _depth_at_bps(_float_levels(bids_l2), _float_levels(asks_l2), mid, (x_bps,))[_band_key(x_bps)]
+    abs_bid = float(band.get("bid_usd", 0.0)) if band else 0.0
+    abs_ask = float(band.get("ask_usd", 0.0)) if band else 0.0
+    out["absorption_bid_usd"] = abs_bid
+    out["absorption_ask_usd"] = abs_ask
+    out["imbalance"] = (abs_bid / (abs_bid + abs_ask)) if (abs_bid + abs_ask) > 0 else 0.5
+    if "depth_at_bps" in q:
+        out["depth_at_bps"] = q["depth_at_bps"]
 
     return out
 
 
+# Public hooks are the WS entry points (MEXC/Gate clients); REST paths call _on_bt/_on_depth directly.
 async def on_book_ticker(
     symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float, ts_ms: Optional[int] = None
 ) -> None:
+    if _FEED_HEALTH is not None:
+        _FEED_HEALTH.mark(symbol, "ticker")
     await _on_bt(symbol, bid, bid_qty, ask, ask_qty, ts_ms)
 
 
 async def on_partial_depth(
     symbol: str, bids: Sequence[Tuple[float, float]], asks: Sequence[Tuple[float, float]], ts_ms: Optional[int] = None
 ) -> None:
+    if _FEED_HEALTH is not None:
+        _FEED_HEALTH.mark(symbol, "depth")
     await _on_depth(symbol, bids, asks, ts_ms)
 
 
@@ -589,10 +616,11 @@ async def stream_quote_batches(symbols: Sequence[str], interval_ms: int = 500) -
             seen_syms.add(sym)
             want.append(sym)
 
-    # Ensure ingestion (WS or REST)
+    # Ensure ingestion (WS or REST); held for this stream only
+    consumer = f"sse:{id(want):x}"
     if want:
         with suppress(Exception):
-            await ensure_symbols_subscribed(want)
+            await ensure_symbols_subscribed(want, consumer=consumer)
 
     queue: asyncio.Queue[Dict[str, Any]] = await book_tracker.subscribe()
     try:
@@ -675,6 +703,8 @@ async def stream_quote_batches(symbols: Sequence[str], interval_ms: int = 500) -
                     yield batch
     finally:
         await book_tracker.unsubscribe(queue)
+        if want:
+            await release_symbols(want, consumer=consumer)
 
 
 # ── WS manager + REST fallback ──────────────────────────────────────────────
@@ -689,11 +719,14 @@ except Exception:
 
 _REST_POLL_TASK: Optional[asyncio.Task[None]] = None
 _SUBSCRIBED: Set[str] = set()
+# REST-path holds, ref-counted like the SubscriptionRegistry: symbol → consumers, consumer → symbols
+_REST_HOLDERS: Dict[str, Set[str]] = {}
+_REST_HELD: Dict[str, Set[str]] = {}
 
-_WS_TASK: Optional[asyncio.Task[None]] = None
-_WS_CLIENT: Optional[Any] = None
-_WS_WANTED: Set[str] = set()
-_WS_RUNNING: Set[str] = set()
+try:
+    from app.market_data.subscriptions import get_subscription_registry
+except Exception:
+    get_subscription_registry = None  # type: ignore[assignment]
 
 _DEPTH_TASK: Optional[asyncio.Task[None]] = None
 _DEPTH_SUBSCRIBED: Set[str] = set()
@@ -785,6 +818,83 @@ async def _fetch_depth_gate(client: httpx.AsyncClient, symbol: str, limit: int =
         return None
 
 
+# ── bulk ticker snapshot ────────────────────────────────────────────────────
+# One all-symbols request replaces N per-symbol requests once N reaches this.
+BULK_TICKER_MIN_SYMBOLS = 3
+
+
+def _loads(raw: bytes) -> Any:
+    return _orjson.loads(raw) if _orjson is not None else _json.loads(raw)
+
+
+def _parse_bulk_tickers(data: Any, wanted: Set[str], ts_ms: int) -> List[Dict[str, Any]]:
+    """
+    Pick `wanted` symbols out of an all-symbols payload (MEXC/Binance
+    bookTicker list or Gate /spot/tickers list). Symbols are matched before
+    any float conversion, so the ~2k unwanted rows cost one dict lookup each.
+    """
+    out: List[Dict[str, Any]] = []
+    if not isinstance(data, list):
+        return out
+    gate = _is_gate()
+    for it in data:
+        try:
+            if gate:
+                sym = _from_gate_pair(it.get("currency_pair") or "")
+                if sym not in wanted:
+                    continue
+                bid = float(it.get("highest_bid") or 0.0)
+                ask = float(it.get("lowest_ask") or 0.0)
+                bid_qty = ask_qty = 0.0
+            else:
+                sym = it.get("symbol") or ""
+                if sym not in wanted:
+                    continue
+                bid = float(it.get("bidPrice") or 0.0)
+                ask = float(it.get("askPrice") or 0.0)
+                bid_qty = float(it.get("bidQty") or 0.0)
+                ask_qty = float(it.get("askQty") or 0.0)
+        except Exception:
+            continue
+        out.append({"symbol": sym, "bid": bid, "ask": ask, "bidQty": bid_qty, "askQty": ask_qty, "ts_ms": ts_ms})
+    return out
+
+
+async def _fetch_all_tickers(client: httpx.AsyncClient, symbols: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+    """All-symbols ticker in one request, filtered to `symbols`; None if the call failed."""
+    path = "/spot/tickers" if _is_gate() else "/api/v3/ticker/bookTicker"
+    try:
+        r = await client.get(path, timeout=8.0)
+        if r.status_code != 200:
+            return None
+        data = _loads(r.content)
+    except Exception:
+        return None
+    return _parse_bulk_tickers(data, {s.upper() for s in symbols}, int(time.time() * 1000))
+
+
+async def _fetch_tickers(client: httpx.AsyncClient, symbols: Sequence[str]) -> List[Dict[str, Any]]:
+    """Tickers for `symbols`: bulk snapshot when worthwhile, per-symbol requests otherwise / on failure."""
+    if len(symbols) >= BULK_TICKER_MIN_SYMBOLS:
+        ticks = await _fetch_all_tickers(client, symbols)
+        if ticks is not None:
+            return ticks
+    res = await asyncio.gather(*(_fetch_ticker_generic(client, s) for s in symbols), return_exceptions=True)
+    return [r for r in res if isinstance(r, dict)]
+
+
+async def _apply_tickers(ticks: Sequence[Dict[str, Any]]) -> int:
+    """Single batched BookTracker update; unchanged symbols are skipped inside the tracker."""
+    if not ticks:
+        return 0
+    now_ms = int(time.time() * 1000)
+    rows = [
+        (t["symbol"], t.get("bid", 0.0), t.get("bidQty", 0.0), t.get("ask", 0.0), t.get("askQty", 0.0), t.get("ts_ms", now_ms))
+        for t in ticks
+    ]
+    return await _on_bts(rows)
+
+
 async def _fetch_ticker_generic(client: httpx.AsyncClient, symbol: str) -> Optional[Dict[str, Any]]:
     if _is_gate():
         return await _fetch_ticker_gate(client, symbol)
@@ -809,22 +919,7 @@ async def _rest_poller_loop() -> None:
                     await asyncio.sleep(0.5)
                     continue
 
-                ticker_tasks = [asyncio.create_task(_fetch_ticker_generic(client, s)) for s in syms]
-                ticker_res = await asyncio.gather(*ticker_tasks, return_exceptions=True)
-
-                now_ms = int(time.time() * 1000)
-                for res in ticker_res:
-                    if isinstance(res, Exception) or res is None:
-                        continue
-                    tick = res
-                    await _on_bt(
-                        tick["symbol"],
-                        tick.get("bid", 0.0),
-                        tick.get("bidQty", 0.0),
-                        tick.get("ask", 0.0),
-                        tick.get("askQty", 0.0),
-                        ts_ms=tick.get("ts_ms", now_ms),
-                    )
+                await _apply_tickers(await _fetch_tickers(client, syms))
 
                 depth_tasks: List[asyncio.Task[Optional[Dict[str, Any]]]] = []
                 now = time.monotonic()
@@ -848,23 +943,53 @@ async def _rest_poller_loop() -> None:
         await asyncio.sleep(1.0)
 
 
+def _ws_live_symbols() -> Optional[Set[str]]:
+    """Symbols the subscription registry keeps on WS (None if the registry is unavailable)."""
+    if get_subscription_registry is None:
+        return None
+    try:
+        return set(get_subscription_registry().symbols())
+    except Exception:
+        return None
+
+
 async def _depth_refresher_loop() -> None:
+    """
+    REST backstop for WS symbols: polls depth/ticker only for symbols whose
+    WS feed the supervisor reports as stale (or not yet proven fresh).
+    """
     base = _rest_base_url()
     min_period_s = 0.9
     last_at: Dict[str, float] = {}
     try:
         async with httpx.AsyncClient(base_url=base, headers={"Accept": "application/json"}, timeout=8.0) as client:
             while True:
+                live = _ws_live_symbols()
+                if live is not None and not _DEPTH_SUBSCRIBED.issubset(live):
+                    gone = _DEPTH_SUBSCRIBED - live
+                    _DEPTH_SUBSCRIBED.difference_update(gone)
+                    if _FEED_HEALTH is not None:
+                        _FEED_HEALTH.forget(gone)
                 syms = list(_DEPTH_SUBSCRIBED)
                 if not syms:
                     await asyncio.sleep(0.4)
                     continue
                 now = time.monotonic()
+                depth_syms = _FEED_HEALTH.rest_symbols(syms, "depth") if _FEED_HEALTH is not None else syms
+                ticker_syms = _FEED_HEALTH.rest_symbols(syms, "ticker") if _FEED_HEALTH is not None else []
                 tasks: List[asyncio.Task[Optional[Dict[str, Any]]]] = []
-                for s in syms:
+                for s in depth_syms:
                     if now - last_at.get(s, 0.0) >= min_period_s:
                         last_at[s] = now
                         tasks.append(asyncio.create_task(_fetch_depth_generic(client, s, limit=10)))
+                due_tickers: List[str] = []
+                for s in ticker_syms:
+                    key = f"t:{s}"
+                    if now - last_at.get(key, 0.0) >= min_period_s:
+                        last_at[key] = now
+                        due_tickers.append(s)
+                if due_tickers:
+                    await _apply_tickers(await _fetch_tickers(client, due_tickers))
                 if tasks:
                     res = await asyncio.gather(*tasks, return_exceptions=True)
                     for r in res:
@@ -882,21 +1007,7 @@ async def _rest_seed_symbols(symbols: Sequence[str]) -> None:
     base = _rest_base_url()
     try:
         async with httpx.AsyncClient(base_url=base, headers={"Accept": "application/json"}, timeout=8.0) as client:
-            t_tasks = [asyncio.create_task(_fetch_ticker_generic(client, s)) for s in symbols]
-            ticks = await asyncio.gather(*t_tasks, return_exceptions=True)
-            now_ms = int(time.time() * 1000)
-            for res in ticks:
-                if isinstance(res, Exception) or res is None:
-                    continue
-                tick = res
-                await _on_bt(
-                    tick["symbol"],
-                    tick.get("bid", 0.0),
-                    tick.get("bidQty", 0.0),
-                    tick.get("ask", 0.0),
-                    tick.get("askQty", 0.0),
-                    ts_ms=tick.get("ts_ms", now_ms),
-                )
+            await _apply_tickers(await _fetch_tickers(client, list(symbols)))
             d_tasks = [asyncio.create_task(_fetch_depth_generic(client, s, limit=10)) for s in symbols]
             deps = await asyncio.gather(*d_tasks, return_exceptions=True)
             for res in deps:
@@ -939,58 +1050,177 @@ async def _start_depth_refresher() -> None:
         _DEPTH_TASK = asyncio.create_task(_depth_refresher_loop())
 
 
-async def _stop_ws() -> None:
-    global _WS_TASK, _WS_CLIENT, _WS_RUNNING
-    if _WS_TASK and not _WS_TASK.done():
-        _WS_TASK.cancel()
-        with suppress(Exception):
-            await asyncio.wait_for(_WS_TASK, timeout=3.0)  # 3 sec timeout
-    _WS_TASK = None
-    _WS_CLIENT = None
-    _WS_RUNNING = set()
+def _attached() -> bool:
+    return str(getattr(settings, "market_data_mode", "inproc") or "").strip().lower() == "attach"
 
 
-async def _start_ws(symbols: Set[str]) -> None:
-    global _WS_TASK, _WS_CLIENT, _WS_RUNNING
-    if not _is_mexc():
-        return
-    if not _WSClient or not _WS_PROTO_OK:
-        return
-    await _stop_ws()
-    _WS_CLIENT = _WSClient(sorted(symbols), channels=["BOOK_TICKER", "DEPTH_LIMIT"])  # type: ignore[call-arg]
-    _WS_TASK = asyncio.create_task(_WS_CLIENT.run())  # type: ignore[arg-type]
-    _WS_RUNNING = set(symbols)
+def _ws_usable() -> bool:
+    """MEXC WS feeds are available when MEXC is the trading venue or streams alongside it (MD_VENUES)."""
+    if not (_WSClient and _WS_PROTO_OK and get_subscription_registry is not None):
+        return False
+    if _is_mexc():
+        return True
+    with suppress(Exception):
+        from app.market_data.venues import streaming_venues
+        return "mexc" in streaming_venues(_provider().lower())
+    return False
 
 
-async def ensure_symbols_subscribed(symbols: Sequence[str]) -> None:
+# one-shot callers (REST endpoints, single orders) hold symbols this long
+ONE_SHOT_HOLD_SEC = 60.0
+
+_LEASES: Dict[Tuple[str, str], float] = {}  # (consumer, symbol) → monotonic expiry
+_LEASE_TASK: Optional[asyncio.Task[None]] = None
+
+
+async def ensure_symbols_subscribed(
+    symbols: Sequence[str],
+    consumer: str = "default",
+    channels: Optional[Sequence[str]] = None,
+    ttl_sec: Optional[float] = None,
+) -> None:
+    """
+    Make sure quotes flow for `symbols`. On MEXC the symbols are held for
+    `consumer` in the shared SubscriptionRegistry (incremental WS subscribe,
+    one upstream feed per topic); other providers use the REST poller.
+
+    Long-lived consumers release their hold with release_symbols(). One-shot
+    callers pass `ttl_sec` instead: the hold is dropped automatically once no
+    call has renewed it for that long.
+    """
     norm: Set[str] = set((s or "").upper() for s in symbols if (s or "").strip())
     if not norm:
         return
-    if _is_mexc() and _WSClient and _WS_PROTO_OK:
-        _WS_WANTED.update(norm)
-        if (_WS_TASK is None or _WS_TASK.done()) or (
-            not _WS_WANTED.issubset(_WS_RUNNING) or not _WS_RUNNING.issubset(_WS_WANTED)
-        ):
-            await _start_ws(_WS_WANTED)
-        await _rest_seed_symbols(list(norm))
+    if ttl_sec is not None:
+        _renew_leases(consumer, norm, ttl_sec)
+    if _attached():
+        # the market-data daemon owns the streams; just tell it what we need
+        from app.market_data.daemon import get_quote_mirror
+        await get_quote_mirror().want(norm, consumer=consumer)
+        return
+    if _ws_usable():
+        reg = get_subscription_registry()
+        if channels:
+            fresh = await reg.acquire(consumer, sorted(norm), channels)
+        else:
+            fresh = await reg.acquire(consumer, sorted(norm))
+        if fresh:
+            await _rest_seed_symbols(fresh)
         await _stop_rest_poller()
         _DEPTH_SUBSCRIBED.update(norm)
         await _start_depth_refresher()
         return
+    for sym in norm:
+        _REST_HOLDERS.setdefault(sym, set()).add(consumer)
+    _REST_HELD.setdefault(consumer, set()).update(norm)
     _SUBSCRIBED.update(norm)
     await _start_rest_poller()
     await _rest_seed_symbols(list(norm))
     await _stop_depth_refresher()
 
 
+async def release_symbols(symbols: Optional[Sequence[str]] = None, consumer: str = "default") -> None:
+    """Drop `consumer`'s hold on `symbols` (all of its symbols if None); upstream unsubscribe follows after the grace period."""
+    if _attached():
+        from app.market_data.daemon import get_quote_mirror
+        await get_quote_mirror().release(symbols, consumer=consumer)
+        return
+    if _release_rest(consumer, symbols) and not _SUBSCRIBED:
+        await _stop_rest_poller()
+    if get_subscription_registry is None:
+        return
+    with suppress(Exception):
+        await get_subscription_registry().release(consumer, symbols)
+
+
+def _release_rest(consumer: str, symbols: Optional[Sequence[str]]) -> bool:
+    """Drop `consumer`'s REST holds; a symbol leaves the poller with its last holder. True if any symbol left."""
+    held = _REST_HELD.get(consumer)
+    if not held:
+        return False
+    wanted = set(held) if symbols is None else held & {(s or "").upper() for s in symbols}
+    dropped = False
+    for sym in wanted:
+        held.discard(sym)
+        holders = _REST_HOLDERS.get(sym)
+        if holders is None:
+            continue
+        holders.discard(consumer)
+        if not holders:
+            del _REST_HOLDERS[sym]
+            _SUBSCRIBED.discard(sym)
+            dropped = True
+    if not held:
+        del _REST_HELD[consumer]
+    return dropped
+
+
+def _renew_leases(consumer: str, symbols: Set[str], ttl_sec: float) -> None:
+    global _LEASE_TASK
+    until = time.monotonic() + max(0.0, float(ttl_sec))
+    for sym in symbols:
+        _LEASES[(consumer, sym)] = until
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if _LEASE_TASK is None or _LEASE_TASK.done() or _LEASE_TASK.get_loop() is not loop:
+        _LEASE_TASK = loop.create_task(_lease_loop())
+
+
+async def expire_leases(now: Optional[float] = None) -> int:
+    """Release one-shot holds whose TTL has passed; returns the number released."""
+    now = time.monotonic() if now is None else now
+    expired: Dict[str, List[str]] = {}
+    for (consumer, sym), until in list(_LEASES.items()):
+        if until <= now:
+            _LEASES.pop((consumer, sym), None)
+            expired.setdefault(consumer, []).append(sym)
+    for consumer, syms in expired.items():
+        with suppress(Exception):
+            await release_symbols(sorted(syms), consumer=consumer)
+    return sum(len(v) for v in expired.values())
+
+
+async def _lease_loop() -> None:
+    global _LEASE_TASK
+    try:
+        while _LEASES:
+            await asyncio.sleep(min(5.0, ONE_SHOT_HOLD_SEC))
+            await expire_leases()
+    except asyncio.CancelledError:
+        return
+    finally:
+        if _LEASE_TASK is asyncio.current_task():
+            _LEASE_TASK = None
+
+
 # ── reset hook for provider switching ────────────────────────────────────────
+def reset_quotes() -> None:
+    """Drop quotes, tape aggregates and feed health but keep subscriptions (venue switch without reconnects)."""
+    if _FEED_HEALTH is not None:
+        _FEED_HEALTH.reset()
+    states = getattr(book_tracker, "_states", None)
+    if isinstance(states, dict):
+        states.clear()
+    else:
+        with suppress(Exception):
+            book_tracker.reset()
+    for attr in ("usdpm", "tpm", "recent_trades", "atr_proxy", "vol_pattern"):
+        d = getattr(book_tracker, attr, None)
+        if isinstance(d, dict):
+            d.clear()
+
+
 def reset() -> None:
     """Reset all trackers/caches for provider switch (hook from config_manager)."""
-    global _SUBSCRIBED, _WS_WANTED, _WS_RUNNING, _DEPTH_SUBSCRIBED
+    global _SUBSCRIBED, _DEPTH_SUBSCRIBED
     _SUBSCRIBED.clear()
-    _WS_WANTED.clear()
-    _WS_RUNNING.clear()
+    _REST_HOLDERS.clear()
+    _REST_HELD.clear()
     _DEPTH_SUBSCRIBED.clear()
+    if _FEED_HEALTH is not None:
+        _FEED_HEALTH.reset()
 
     # Try book_tracker.reset() (supports both sync and async)
     try:
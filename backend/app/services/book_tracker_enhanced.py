@@ -19,6 +19,13 @@ from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 import statistics
 
+# ML feature store (optional)
+try:
+    from app.ml.feature_store import get_feature_store
+    FEATURE_STORE_AVAILABLE = True
+except ImportError:
+    FEATURE_STORE_AVAILABLE = False
+
 
 def utc_now() -> datetime:
     """Get current UTC time with timezone"""
@@ -351,7 +358,7 @@ class EnhancedBookTracker:
         else:
             refresh_rate = 0.0
         
-        return BookMetrics(
+        metrics = BookMetrics(
             symbol=symbol,
             avg_order_lifetime_sec=avg_lifetime,
             median_order_lifetime_sec=median_lifetime,
@@ -366,6 +373,22 @@ class EnhancedBookTracker:
             window_sec=self.window_sec,
             calculated_at=utc_now()
         )
+        self._publish_features(metrics)
+        return metrics
+    
+    def _publish_features(self, metrics: BookMetrics) -> None:
+        """Push book features into the online feature store"""
+        if not FEATURE_STORE_AVAILABLE:
+            return
+        try:
+            get_feature_store().update(metrics.symbol, {
+                'spoofing_score': metrics.spoofing_score,
+                'spread_stability': metrics.spread_stability_score,
+                'order_lifetime_avg': metrics.avg_order_lifetime_sec,
+                'book_refresh_rate': metrics.book_refresh_rate,
+            })
+        except Exception:
+            pass
     
     def get_spoofing_signals(self, symbol: str) -> List[SpoofingSignal]:
         """Get recent spoofing signals"""
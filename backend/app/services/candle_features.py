@@ -0,0 +1,412 @@
+# app/services/candle_features.py
+"""
+NumPy candle feature kernels for candles_cache.
+
+Every kernel takes 2-D arrays shaped (symbols, bars) — ascending time on
+the last axis — and returns one value per symbol, so the same code scores
+a single ring (x[None]) or a whole stacked universe in one call.
+Semantics match the original per-candle loops in CandlesCache:
+
+  atr_pct            mean true range over `window` bars / last close (FRACTION)
+  spike_count        bars in the last 90 with wick/range >= 0.40
+  grinder_ratio      share of bars with body/ATR > 0.8 and wick/range < 0.2
+  retrace_median     median |correction|/|impulse| between k-bar swing extrema
+  range_stable_pct   std(close)/mean(close)*100 over `window`
+  vol_pattern        volume stability score 0..100
+  dca_potential      retrace/range based proxy 0..100
+
+RollingFeatures keeps ATR / spike / range / volume sums up to date in O(1)
+per bar (append or live-bar update) so stats don't rescan the window.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ATR_WINDOW = 20
+SPIKE_WINDOW = 90
+GRINDER_WINDOW = 120
+RETRACE_LOOKBACK = 180
+RETRACE_SWING_K = 3
+RANGE_WINDOW = 60
+VOL_WINDOW = 60
+STATS_BARS = 300            # bars used for stats (same as the REST backfill)
+
+O, H, L, C, V = range(5)
+
+
+# ───────────────────────────── kernels ─────────────────────────────
+
+def _wick_ratio(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    rng = np.maximum(h - l, 1e-12)
+    upper = np.maximum(0.0, h - np.maximum(o, c))
+    lower = np.maximum(0.0, np.minimum(o, c) - l)
+    return (upper + lower) / rng
+
+
+def _is_spike(o: float, h: float, l: float, c: float) -> float:
+    """Scalar twin of _wick_ratio(...) >= 0.40 for the per-bar path."""
+    rng = max(h - l, 1e-12)
+    wick = max(0.0, h - max(o, c)) + max(0.0, min(o, c) - l)
+    return 1.0 if wick / rng >= 0.40 else 0.0
+
+
+def _safe_ratio(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    out = np.zeros(np.broadcast(a, b).shape, dtype=np.float64)
+    np.divide(a, b, out=out, where=b != 0)
+    return out
+
+
+def atr_pct(h: np.ndarray, l: np.ndarray, c: np.ndarray, window: int = ATR_WINDOW) -> np.ndarray:
+    n = c.shape[-1]
+    if n < window + 1:
+        return np.zeros(c.shape[0])
+    prev_c = c[:, -window - 1:-1]
+    hh, ll = h[:, -window:], l[:, -window:]
+    tr = np.maximum(hh - ll, np.maximum(np.abs(hh - prev_c), np.abs(ll - prev_c)))
+    return _safe_ratio(tr.mean(axis=1), c[:, -1])
+
+
+def spike_count(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray, window: int = SPIKE_WINDOW) -> np.ndarray:
+    w = slice(-window, None)
+    return (_wick_ratio(o[:, w], h[:, w], l[:, w], c[:, w]) >= 0.40).sum(axis=1)
+
+
+def grinder_ratio(
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    atr_abs: Optional[np.ndarray] = None,
+    window: int = GRINDER_WINDOW,
+) -> np.ndarray:
+    if c.shape[-1] == 0:
+        return np.zeros(c.shape[0])
+    if atr_abs is None:
+        atr_abs = np.maximum(1e-8, h[:, -1] - l[:, -1])
+    w = slice(-window, None)
+    oo, hh, ll, cc = o[:, w], h[:, w], l[:, w], c[:, w]
+    body = np.abs(cc - oo)
+    grind = (body / np.asarray(atr_abs, dtype=np.float64).reshape(-1, 1) > 0.8) & (_wick_ratio(oo, hh, ll, cc) < 0.2)
+    return grind.mean(axis=1)
+
+
+def retrace_median(
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    lookback: int = RETRACE_LOOKBACK,
+    swing_k: int = RETRACE_SWING_K,
+) -> np.ndarray:
+    out = np.full(c.shape[0], 0.35)
+    if c.shape[-1] < max(lookback, swing_k * 2 + 1):
+        return out
+    hh, ll, cc = h[:, -lookback:], l[:, -lookback:], c[:, -lookback:]
+    width = 2 * swing_k + 1
+    core = slice(swing_k, lookback - swing_k)
+    # swing extrema for every symbol at once
+    is_high = hh[:, core] >= sliding_window_view(hh, width, axis=1).max(axis=2)
+    is_low = ll[:, core] <= sliding_window_view(ll, width, axis=1).min(axis=2)
+    ext = is_high | is_low                                   # (S, M), M = lookback - 2k
+    S, M = ext.shape
+    pos = np.arange(M)
+    # index of the previous extremum strictly before each position (-1 if none)
+    last_at = np.maximum.accumulate(np.where(ext, pos, -1), axis=1)
+    prev = np.full((S, M), -1, dtype=np.int64)
+    prev[:, 1:] = last_at[:, :-1]
+    rows = np.arange(S)[:, None]
+    # consecutive extrema triplets (A, B, C) with C at every extremum position
+    b = prev
+    a = np.where(b >= 0, prev[rows, np.maximum(b, 0)], -1)
+    valid = ext & (a >= 0)
+
+    cc = cc[:, swing_k:lookback - swing_k]
+    mid = ((hh + ll) / 2.0)[:, swing_k:lookback - swing_k]
+    bi, ai = np.maximum(b, 0), np.maximum(a, 0)
+    c_a, c_b = cc[rows, ai], cc[rows, bi]
+    impulse = np.abs(c_b - c_a)
+    impulse = np.where(impulse != 0, impulse, np.abs(mid[rows, bi] - mid[rows, ai]))
+    correction = np.abs(cc - c_b)
+    valid &= impulse > 1e-9
+    ratio = np.clip(correction / np.where(valid, impulse, 1.0), 0.0, 1.0)
+
+    # median of the last <= 10 valid retraces per symbol
+    from_end = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1]
+    take = valid & (from_end <= 10)
+    k = take.sum(axis=1)
+    has = k > 0
+    if has.any():
+        srt = np.sort(np.where(take[has], ratio[has], np.inf), axis=1)
+        kk = k[has]
+        r = np.arange(len(kk))
+        out[has] = (srt[r, (kk - 1) // 2] + srt[r, kk // 2]) / 2.0
+    return out
+
+
+def range_stable_pct(c: np.ndarray, window: int = RANGE_WINDOW) -> np.ndarray:
+    if c.shape[-1] < window:
+        return np.zeros(c.shape[0])
+    cc = c[:, -window:]
+    mean = cc.mean(axis=1)
+    std = cc.std(axis=1)
+    return np.where(mean > 0, _safe_ratio(std, mean) * 100.0, 0.0)
+
+
+def _vol_score(mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    ratio = _safe_ratio(std, mean)
+    score = np.clip(100.0 - ratio * 100.0, 0.0, 100.0)
+    out = np.where(ratio < 0.3, np.floor(score), np.floor(score * 0.7))
+    return np.where(mean > 0, out, 0.0).astype(np.int64)
+
+
+def vol_pattern(v: np.ndarray, window: int = VOL_WINDOW) -> np.ndarray:
+    if v.shape[-1] < window or min(window, v.shape[-1]) < 5:
+        return np.zeros(v.shape[0], dtype=np.int64)
+    vv = v[:, -window:]
+    return _vol_score(vv.mean(axis=1), vv.std(axis=1))
+
+
+def dca_potential(retrace: np.ndarray, range_pct: np.ndarray) -> np.ndarray:
+    base = np.clip(np.trunc(100.0 - np.asarray(retrace) * 100.0 * 2), 0, 100)
+    base = base + np.where(np.asarray(range_pct) < 0.1, 20, 0)
+    return np.clip(base, 0, 100).astype(np.int64)
+
+
+# ───────────────────────────── stats ─────────────────────────────
+
+def default_stats(fallback_atr: float) -> Dict[str, float]:
+    return {
+        "atr1m_pct": float(fallback_atr),
+        "spike_count_90m": 0,
+        "pullback_median_retrace": 0.35,
+        "grinder_ratio": 0.30,
+        "imbalance_sigma_hits_60m": 0,
+        "range_stable_pct": 0.0,
+        "vol_pattern": 0,
+        "dca_potential": 0,
+        "bars_1m": 0,
+        "last_candle_ts": 0,
+    }
+
+
+def _stats_row(
+    atr: float, spikes: int, retr: float, grind: float, rng: float, vpat: int, dca: int, bars: int, last_ts: int
+) -> Dict[str, float]:
+    return {
+        "atr1m_pct": float(atr),                      # FRACTION, not percent
+        "spike_count_90m": int(spikes),
+        "pullback_median_retrace": float(retr),
+        "grinder_ratio": float(grind),
+        "imbalance_sigma_hits_60m": 0,                # placeholder
+        "range_stable_pct": float(rng),
+        "vol_pattern": float(vpat),
+        "dca_potential": float(dca),
+        "bars_1m": int(bars),
+        "last_candle_ts": int(last_ts),
+    }
+
+
+def batch_stats(ts: np.ndarray, x: np.ndarray) -> List[Dict[str, float]]:
+    """
+    Stats for a stack of symbols with the same bar count.
+    ts: (S, N) int, x: (S, N, 5) OHLCV. N must be >= 1.
+    """
+    o, h, l, c, v = (x[..., i] for i in range(5))
+    atr = atr_pct(h, l, c)
+    spikes = spike_count(o, h, l, c)
+    grind = grinder_ratio(o, h, l, c)
+    retr = retrace_median(h, l, c)
+    rng = range_stable_pct(c)
+    vpat = vol_pattern(v)
+    dca = dca_potential(retr, rng)
+    n = x.shape[1]
+    return [
+        _stats_row(atr[s], spikes[s], retr[s], grind[s], rng[s], vpat[s], dca[s], n, ts[s, -1])
+        for s in range(x.shape[0])
+    ]
+
+
+def stats_from_arrays(ts: np.ndarray, x: np.ndarray, rolling: Optional["RollingFeatures"] = None) -> Dict[str, float]:
+    """
+    Stats for one symbol (ts[n], x[n, 5]). With an in-sync RollingFeatures the
+    ATR / spike / range / volume terms come from its O(1) sums.
+    """
+    if rolling is None or not rolling.in_sync(ts):
+        return batch_stats(ts[None], x[None])[0]
+    o, h, l, c = (x[None, :, i] for i in range(4))
+    grind = float(grinder_ratio(o, h, l, c)[0])
+    retr = float(retrace_median(h, l, c)[0])
+    rng = rolling.range_stable_pct()
+    return _stats_row(
+        rolling.atr_pct(),
+        rolling.spike_count(),
+        retr,
+        grind,
+        rng,
+        rolling.vol_pattern(),
+        int(dca_potential(np.array([retr]), np.array([rng]))[0]),
+        len(ts),
+        ts[-1],
+    )
+
+
+def group_by_length(items: Iterable[Tuple[str, np.ndarray, np.ndarray]]) -> Dict[int, List[Tuple[str, np.ndarray, np.ndarray]]]:
+    groups: Dict[int, List[Tuple[str, np.ndarray, np.ndarray]]] = {}
+    for key, ts, x in items:
+        if len(ts):
+            groups.setdefault(len(ts), []).append((key, ts, x))
+    return groups
+
+
+# ───────────────────────────── incremental ─────────────────────────────
+
+class _Window:
+    """Running sum / sum of squares over the last `size` pushed values (centered on `ref`)."""
+
+    __slots__ = ("size", "buf", "n", "s1", "s2", "ref")
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.buf = [0.0] * size
+        self.n = 0
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.ref = 0.0
+
+    def push(self, x: float) -> None:
+        x -= self.ref
+        i = self.n % self.size
+        if self.n >= self.size:
+            old = self.buf[i]
+            self.s1 -= old
+            self.s2 -= old * old
+        self.buf[i] = x
+        self.s1 += x
+        self.s2 += x * x
+        self.n += 1
+
+    def replace_last(self, x: float) -> None:
+        x -= self.ref
+        i = (self.n - 1) % self.size
+        old = self.buf[i]
+        self.buf[i] = x
+        self.s1 += x - old
+        self.s2 += x * x - old * old
+
+    @property
+    def full(self) -> bool:
+        return self.n >= self.size
+
+    def mean_std(self) -> Tuple[float, float]:
+        k = min(self.n, self.size)
+        m = self.s1 / k
+        var = max(0.0, self.s2 / k - m * m)
+        return m + self.ref, var ** 0.5
+
+
+class RollingFeatures:
+    """
+    O(1) per-bar maintenance of the window statistics that are plain sums:
+    true range (ATR), wick flags (spikes), close and volume moments (range /
+    volume stability). Windows are re-summed from scratch every
+    `resync_every` bars to stop float drift. Grinder and retrace depend on
+    the latest bar / swing structure and stay as on-demand kernels.
+    """
+
+    def __init__(self, resync_every: int = 1000) -> None:
+        self.resync_every = resync_every
+        self.reset()
+
+    def reset(self) -> None:
+        self._tr = _Window(ATR_WINDOW)
+        self._wick = _Window(SPIKE_WINDOW)
+        self._close = _Window(RANGE_WINDOW)
+        self._vol = _Window(VOL_WINDOW)
+        self._bars = 0
+        self._last_ts = 0
+        self._last_c = 0.0
+        self._prev_c: Optional[float] = None      # close before the live bar
+        self._since_sync = 0
+
+    def rebuild(self, ts: np.ndarray, x: np.ndarray) -> None:
+        """Re-seed from ring arrays (ts[n], x[n, 5])."""
+        self.reset()
+        if len(ts) == 0:
+            return
+        c = x[:, C]
+        self._close.ref = float(c[-1])
+        self._vol.ref = float(x[-1, V])
+        for t, row in zip(ts.tolist(), x.tolist()):
+            self._append(t, *row)
+        self._since_sync = 0
+
+    def in_sync(self, ts: np.ndarray) -> bool:
+        """True if the sums cover the bars in `ts` (a tail of the ring)."""
+        return len(ts) > 0 and self._bars >= len(ts) and self._last_ts == int(ts[-1])
+
+    def _tr_of(self, h: float, l: float) -> Optional[float]:
+        if self._prev_c is None:
+            return None
+        pc = self._prev_c
+        return max(h - l, abs(h - pc), abs(l - pc))
+
+    def _append(self, ts: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        self._prev_c = self._last_c if self._bars else None
+        tr = self._tr_of(h, l)
+        if tr is not None:
+            self._tr.push(tr)
+        self._wick.push(_is_spike(o, h, l, c))
+        self._close.push(c)
+        self._vol.push(v)
+        self._bars += 1
+        self._last_ts = int(ts)
+        self._last_c = c
+
+    def update(self, ts: int, o: float, h: float, l: float, c: float, v: float, *, capacity: int) -> bool:
+        """
+        Apply an appended or live-updated bar. Returns False when the bar is
+        older than the last one (caller must rebuild()).
+        """
+        ts = int(ts)
+        if self._bars and ts == self._last_ts:
+            tr = self._tr_of(h, l)
+            if tr is not None:
+                self._tr.replace_last(tr)
+            self._wick.replace_last(_is_spike(o, h, l, c))
+            self._close.replace_last(c)
+            self._vol.replace_last(v)
+            self._last_c = c
+            return True
+        if self._bars and ts < self._last_ts:
+            return False
+        self._append(ts, o, h, l, c, v)
+        self._bars = min(self._bars, capacity)
+        self._since_sync += 1
+        return True
+
+    @property
+    def needs_resync(self) -> bool:
+        return self._since_sync >= self.resync_every
+
+    # ── outputs (same semantics as the kernels) ──
+    def atr_pct(self) -> float:
+        if self._bars < ATR_WINDOW + 1 or not self._tr.full or self._last_c == 0:
+            return 0.0
+        return (self._tr.s1 / ATR_WINDOW) / self._last_c
+
+    def spike_count(self) -> int:
+        return int(round(self._wick.s1))
+
+    def range_stable_pct(self) -> float:
+        if self._bars < RANGE_WINDOW:
+            return 0.0
+        mean, std = self._close.mean_std()
+        return (std / mean) * 100.0 if mean > 0 else 0.0
+
+    def vol_pattern(self) -> int:
+        if self._bars < VOL_WINDOW:
+            return 0
+        mean, std = self._vol.mean_std()
+        return int(_vol_score(np.array([mean]), np.array([std]))[0])
@@ -4,14 +4,15 @@ from __future__ import annotations
 import asyncio
 import time
 from dataclasses import dataclass
-from statistics import median
 from typing import Dict, List, Optional, Tuple, Iterable, Set
 from contextlib import suppress
 import math
 
 import httpx
+import numpy as np
 
 from app.config.settings import settings
+from app.services import candle_features as cf
 
 
 # ─────────────────────────── helpers ─────────────────────────────
@@ -117,19 +118,6 @@ class Candle1m:
     v: float
 
 
-def _true_range(prev_c: float, h: float, l: float) -> float:
-    return max(h - l, abs(h - prev_c), abs(l - prev_c))
-
-
-def _safe_div(a: float, b: float, default: float = 0.0) -> float:
-    try:
-        if b == 0:
-            return default
-        return a / b
-    except Exception:
-        return default
-
-
 def _log1p_safe(x: float) -> float:
     try:
         return math.log1p(max(0.0, float(x)))
@@ -137,24 +125,114 @@ def _log1p_safe(x: float) -> float:
         return 0.0
 
 
+# ─────────────────────────── ring buffer ─────────────────────────
+
+RING_CAPACITY = 1000          # bars kept per venue/symbol (MEXC REST max)
+
+
+class CandleRing:
+    """
+    Fixed-capacity ring of 1m bars in NumPy arrays (ts + OHLCV).
+
+    upsert() appends a new bar, updates the live (last) bar in place, or
+    patches an older bar that is still inside the window. Nothing is ever
+    reallocated; the oldest bar is overwritten once the ring is full.
+    """
+
+    __slots__ = ("capacity", "_ts", "_ohlcv", "_end", "_count")
+
+    def __init__(self, capacity: int = RING_CAPACITY) -> None:
+        self.capacity = int(capacity)
+        self._ts = np.zeros(self.capacity, dtype=np.int64)
+        self._ohlcv = np.zeros((self.capacity, 5), dtype=np.float64)
+        self._end = 0            # next write slot
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_ts(self) -> int:
+        return int(self._ts[self._end - 1]) if self._count else 0
+
+    def _order(self) -> np.ndarray:
+        start = (self._end - self._count) % self.capacity
+        return (start + np.arange(self._count)) % self.capacity
+
+    def upsert(self, ts: int, o: float, h: float, l: float, c: float, v: float) -> bool:
+        """Insert/update one bar. Returns False for bars older than the window."""
+        ts = int(ts)
+        if self._count and ts == self.last_ts:
+            i = self._end - 1
+        elif self._count == 0 or ts > self.last_ts:
+            i = self._end
+            self._end = (self._end + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+        else:
+            order = self._order()
+            pos = int(np.searchsorted(self._ts[order], ts))
+            if pos >= self._count or int(self._ts[order[pos]]) != ts:
+                return False
+            i = int(order[pos])
+        self._ts[i] = ts
+        self._ohlcv[i] = (o, h, l, c, v)
+        return True
+
+    def extend(self, candles: Iterable[Candle1m]) -> int:
+        n = 0
+        for k in candles:
+            n += self.upsert(k.ts, k.o, k.h, k.l, k.c, k.v)
+        return n
+
+    def arrays(self, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(ts[n], ohlcv[n, 5]) copies in ascending time order, last `limit` bars."""
+        order = self._order()
+        if limit is not None:
+            order = order[-int(limit):] if limit > 0 else order[:0]
+        return self._ts[order], self._ohlcv[order]
+
+    def to_candles(self, limit: Optional[int] = None) -> List[Candle1m]:
+        ts, x = self.arrays(limit)
+        return [
+            Candle1m(ts=int(t), o=float(r[0]), h=float(r[1]), l=float(r[2]), c=float(r[3]), v=float(r[4]))
+            for t, r in zip(ts.tolist(), x)
+        ]
+
+
 # ─────────────────────────── cache ───────────────────────────────
 
 class CandlesCache:
     """
-    Lightweight in-memory cache of 1m candles per venue/symbol (Gate/MEXC spot),
+    Incremental in-memory store of 1m candles per venue/symbol (Gate/MEXC spot),
     plus feature calculators and a dict-like stats interface.
-    Supports venue-specific fetching and computation.
+
+    Each symbol is backfilled once over REST into a CandleRing. After that
+    the ring is kept current by on_kline() (WS kline channels); when no WS
+    bar arrived recently, get_1m() pulls only the bars since the last one
+    (REST delta) once per ttl_sec. HTTP clients are shared per venue.
     """
 
     def __init__(self) -> None:
-        self._candles: Dict[str, List[Candle1m]] = {}         # key: "venue:BASE_QUOTE"
-        self._ts_fetch: Dict[str, float] = {}                 # monotonic ts of last fetch
+        self._candles: Dict[str, CandleRing] = {}             # key: "venue:BASE_QUOTE"
+        self._backfilled: Set[str] = set()
+        self._ts_fetch: Dict[str, float] = {}                 # monotonic ts of last REST fetch
+        self._ts_ws: Dict[str, float] = {}                    # monotonic ts of last WS bar
         self._stats: Dict[str, Dict[str, float]] = {}         # key: "venue:BASEQUOTE" -> stats
-        self.ttl_sec: float = 30.0                            # refresh every 30s
+        self._dirty: Set[str] = set()                         # stats keys with newer bars
+        self._features: Dict[str, cf.RollingFeatures] = {}    # key: "venue:BASE_QUOTE"
+        self.ttl_sec: float = 30.0                            # REST delta cadence without WS
+        self.ws_stale_sec: float = 90.0                       # WS considered live within this window
 
         # hit/miss counters for health/metrics
         self._hits: int = 0
         self._misses: int = 0
+        self._rest_calls: int = 0
+        self._rest_bars: int = 0
+        self._ws_bars: int = 0
+
+        # shared HTTP clients (per venue, bound to the loop that created them)
+        self._clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
 
         # background helpers
         self._batch_sem: asyncio.Semaphore = asyncio.Semaphore(8)  # max concurrent REST calls
@@ -179,6 +257,9 @@ class CandlesCache:
             "hits": float(self._hits),
             "misses": float(self._misses),
             "keys": float(len(self._candles)),
+            "rest_calls": float(self._rest_calls),
+            "rest_bars": float(self._rest_bars),
+            "ws_bars": float(self._ws_bars),
         }
 
     # ---- dict-like helpers ----
@@ -192,8 +273,12 @@ class CandlesCache:
         return key in self._stats
 
     def get_stats_cached(self, symbol: str, venue: str = "gate") -> Dict[str, float]:
-        """Return stats without refreshing network (fast path)."""
+        """Return stats without touching the network; recomputed if newer bars arrived."""
         key = self._norm_key(symbol, venue)
+        if key in self._dirty:
+            pair_key = self._norm_pair(symbol, venue)
+            if pair_key in self._candles:
+                return self._stats_from_ring(pair_key, key)
         return self._stats.get(key, {})
 
     # ---- normalization ----
@@ -227,122 +312,224 @@ class CandlesCache:
             return 0.00135  # ≈ 0.9 * 0.0015 (0.135% of price)
 
     # ---- REST fetch ----
+    def _client(self, venue: str) -> httpx.AsyncClient:
+        """One pooled AsyncClient per venue (re-created if the loop changed or it was closed)."""
+        loop = asyncio.get_running_loop()
+        cur = self._clients.get(venue)
+        if cur is not None and cur[0] is loop and not cur[1].is_closed:
+            return cur[1]
+        base_url = _gate_rest_base() if venue == "gate" else _mexc_rest_base()
+        cli = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Accept": "application/json"},
+            timeout=httpx.Timeout(connect=5.0, read=8.0, write=3.0, pool=5.0),
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        )
+        self._clients[venue] = (loop, cli)
+        return cli
+
+    async def aclose(self) -> None:
+        for _, cli in list(self._clients.values()):
+            with suppress(Exception):
+                await cli.aclose()
+        self._clients.clear()
+
     async def _fetch_gate_candles_1m(self, pair: str, limit: int = 300) -> List[Candle1m]:
         """
         GET /spot/candlesticks?currency_pair=BTC_USDT&interval=1m&limit=300
         Gate returns list of: [t_sec_str, v_quote_str, close_str, high_str, low_str, open_str]
         We parse into Candle1m(o,h,l,c,v) and convert t to seconds.
         """
-        base_url = _gate_rest_base()
-        timeout = httpx.Timeout(connect=5.0, read=8.0, write=3.0)
-        async with httpx.AsyncClient(base_url=base_url, headers={"Accept": "application/json"}, timeout=timeout) as cli:
-            r = await cli.get(
-                "/spot/candlesticks",
-                params={"currency_pair": pair, "interval": "1m", "limit": max(50, min(300, int(limit)))},
-            )
-            r.raise_for_status()
-            arr = r.json()
-            out: List[Candle1m] = []
-            if isinstance(arr, list):
-                for row in arr:
-                    with suppress(Exception):
-                        # Gate spec: [t, v, c, h, l, o]
-                        t = int(float(row[0]))
-                        v = float(row[1]); c = float(row[2])
-                        h = float(row[3]); l = float(row[4]); o = float(row[5])
-                        out.append(Candle1m(ts=t, o=o, h=h, l=l, c=c, v=v))
-            out.sort(key=lambda x: x.ts)  # ascending by time
-            return out
+        cli = self._client("gate")
+        self._rest_calls += 1
+        r = await cli.get(
+            "/spot/candlesticks",
+            params={"currency_pair": pair, "interval": "1m", "limit": max(1, min(300, int(limit)))},
+        )
+        r.raise_for_status()
+        arr = r.json()
+        out: List[Candle1m] = []
+        if isinstance(arr, list):
+            for row in arr:
+                with suppress(Exception):
+                    # Gate spec: [t, v, c, h, l, o]
+                    t = int(float(row[0]))
+                    v = float(row[1]); c = float(row[2])
+                    h = float(row[3]); l = float(row[4]); o = float(row[5])
+                    out.append(Candle1m(ts=t, o=o, h=h, l=l, c=c, v=v))
+        out.sort(key=lambda x: x.ts)  # ascending by time
+        self._rest_bars += len(out)
+        return out
 
     async def _fetch_mexc_klines_1m(self, symbol: str, limit: int = 300) -> List[Candle1m]:
         """
         GET /api/v3/klines?symbol=BTCUSDT&interval=1m&limit=300
         MEXC returns list of: [otime_ms, o_str, h_str, l_str, c_str, v_base_str, ...]
         """
-        base_url = _mexc_rest_base()
-        timeout = httpx.Timeout(connect=5.0, read=8.0, write=3.0)
-        async with httpx.AsyncClient(base_url=base_url, headers={"Accept": "application/json"}, timeout=timeout) as cli:
-            r = await cli.get(
-                "/api/v3/klines",
-                params={"symbol": symbol.upper(), "interval": "1m", "limit": max(50, min(1000, int(limit)))},
-            )
-            r.raise_for_status()
-            arr = r.json()
-            out: List[Candle1m] = []
-            if isinstance(arr, list):
-                for row in arr:
-                    with suppress(Exception):
-                        # MEXC spec: [otime_ms, o, h, l, c, v, ...]
-                        t_ms = int(row[0])
-                        t = t_ms // 1000
-                        o = float(row[1]); h = float(row[2])
-                        l = float(row[3]); c = float(row[4]); v = float(row[5])
-                        out.append(Candle1m(ts=t, o=o, h=h, l=l, c=c, v=v))
-            out.sort(key=lambda x: x.ts)  # ascending by time
-            return out
+        cli = self._client("mexc")
+        self._rest_calls += 1
+        r = await cli.get(
+            "/api/v3/klines",
+            params={"symbol": symbol.upper(), "interval": "1m", "limit": max(1, min(1000, int(limit)))},
+        )
+        r.raise_for_status()
+        arr = r.json()
+        out: List[Candle1m] = []
+        if isinstance(arr, list):
+            for row in arr:
+                with suppress(Exception):
+                    # MEXC spec: [otime_ms, o, h, l, c, v, ...]
+                    t_ms = int(row[0])
+                    t = t_ms // 1000
+                    o = float(row[1]); h = float(row[2])
+                    l = float(row[3]); c = float(row[4]); v = float(row[5])
+                    out.append(Candle1m(ts=t, o=o, h=h, l=l, c=c, v=v))
+        out.sort(key=lambda x: x.ts)  # ascending by time
+        self._rest_bars += len(out)
+        return out
+
+    async def _fetch(self, pair_key: str, venue: str, limit: int) -> List[Candle1m]:
+        pair = pair_key.split(":", 1)[1]
+        if venue == "gate":
+            return await self._fetch_gate_candles_1m(pair, limit=limit)
+        if venue == "mexc":
+            # For MEXC, pair is "venue:BASE_USDT" but fetch uses BASEUSDT
+            return await self._fetch_mexc_klines_1m(pair.replace("_", ""), limit=limit)
+        return []
+
+    def _mark_dirty(self, pair_key: str) -> None:
+        venue, pair = pair_key.split(":", 1)
+        self._dirty.add(f"{venue}:{pair.replace('_', '')}")
 
     async def get_1m(self, symbol: str, venue: str = "gate", *, quote_hint: Optional[str] = None, limit: int = 300) -> List[Candle1m]:
         """
         symbol: "BTCUSDT" | "BTC_USDT" | "BTC/USDT"
         venue: "gate" | "mexc"
-        returns ascending candles (max 300 for Gate, 1000 for MEXC)
+        returns ascending candles (last `limit`, max 300 for Gate, 1000 for MEXC)
         """
-        pair_key = self._norm_pair(symbol, venue)
-        now = time.monotonic()
-        need_fetch = pair_key not in self._candles or (now - self._ts_fetch.get(pair_key, 0.0)) > self.ttl_sec
+        ring = await self._ensure_ring(symbol, venue, limit=limit)
+        return ring.to_candles(limit) if ring is not None else []
 
-        # bump hit/miss before the network call
-        if need_fetch:
-            self._misses += 1
-        else:
-            self._hits += 1
-
-        if need_fetch:
-            try:
-                if venue.lower() == "gate":
-                    data = await self._fetch_gate_candles_1m(pair_key.split(":", 1)[1], limit=limit)
-                elif venue.lower() == "mexc":
-                    # For MEXC, pair is "venue:BASE_USDT" but fetch uses BASEUSDT
-                    data = await self._fetch_mexc_klines_1m(pair_key.split(":", 1)[1].replace("_", ""), limit=limit)
-                else:
-                    data = []
-                if data:
-                    self._candles[pair_key] = data
+    async def _ensure_ring(self, symbol: str, venue: str = "gate", *, limit: int = 300) -> Optional[CandleRing]:
+        """
+        First call backfills over REST. Afterwards the ring is served as-is
+        while WS bars keep arriving; otherwise only the missing bars are
+        fetched (at most once per ttl_sec).
+        """
+        venue = venue.lower()
+        pair_key = self._norm_pair(symbol, venue)
+        lock = self._locks.setdefault(pair_key, asyncio.Lock())
+
+        async with lock:
+            ring = self._candles.get(pair_key)
+            now = time.monotonic()
+            ws_live = (now - self._ts_ws.get(pair_key, -1e9)) < self.ws_stale_sec
+
+            if ring is None or pair_key not in self._backfilled:
+                fetch_limit = limit                                        # one-off backfill
+            elif ws_live or (now - self._ts_fetch.get(pair_key, 0.0)) <= self.ttl_sec:
+                fetch_limit = 0
+            else:
+                # REST delta: bars since the last one (inclusive — it may still be live)
+                missing = int(time.time() - ring.last_ts) // 60 + 1
+                fetch_limit = max(1, min(limit, missing))
+
+            # bump hit/miss before the network call
+            if fetch_limit:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+            if fetch_limit:
+                try:
+                    data = await self._fetch(pair_key, venue, fetch_limit)
+                    if data:
+                        if pair_key not in self._backfilled:
+                            # backfill: REST history first, then replay any WS bars already seen
+                            fresh = CandleRing()
+                            fresh.extend(data)
+                            if ring is not None:
+                                fresh.extend(k for k in ring.to_candles() if k.ts >= fresh.last_ts)
+                            ring = self._candles[pair_key] = fresh
+                            self._backfilled.add(pair_key)
+                            self._rebuild_features(pair_key)
+                        else:
+                            for k in data:
+                                self._apply_bar(pair_key, ring, k.ts, k.o, k.h, k.l, k.c, k.v)
+                        self._mark_dirty(pair_key)
                     self._ts_fetch[pair_key] = now
-            except Exception:
-                # keep old if fetch fails
-                pass
+                except Exception:
+                    # keep old if fetch fails
+                    pass
+
+        return ring
+
+    def _rebuild_features(self, pair_key: str) -> None:
+        ring = self._candles[pair_key]
+        feats = self._features.setdefault(pair_key, cf.RollingFeatures())
+        feats.rebuild(*ring.arrays())
 
-        return self._candles.get(pair_key, [])
+    def _apply_bar(self, pair_key: str, ring: CandleRing, ts: int, o: float, h: float, l: float, c: float, v: float) -> bool:
+        """Upsert into the ring and roll the incremental features forward."""
+        in_order = ts >= ring.last_ts
+        if not ring.upsert(ts, o, h, l, c, v):
+            return False
+        feats = self._features.get(pair_key)
+        if feats is None or not in_order or feats.needs_resync:
+            self._rebuild_features(pair_key)
+        elif not feats.update(ts, o, h, l, c, v, capacity=ring.capacity):
+            self._rebuild_features(pair_key)
+        return True
+
+    def on_kline(
+        self,
+        symbol: str,
+        venue: str,
+        ts: int,
+        o: float,
+        h: float,
+        l: float,
+        c: float,
+        v: float,
+    ) -> None:
+        """
+        WS kline push (open-time `ts` in seconds). Appends a new bar or
+        updates the live one; stats are recomputed lazily on next read.
+        """
+        venue = venue.lower()
+        pair_key = self._norm_pair(symbol, venue)
+        ring = self._candles.get(pair_key)
+        if ring is None:
+            ring = self._candles[pair_key] = CandleRing()
+        if ts > 10_000_000_000:      # ms → sec
+            ts //= 1000
+        if self._apply_bar(pair_key, ring, ts, o, h, l, c, v):
+            self._ws_bars += 1
+            self._ts_ws[pair_key] = time.monotonic()
+            self._mark_dirty(pair_key)
 
     # ───────────── feature calculators ─────────────
+    # List[Candle1m] wrappers over the NumPy kernels in candle_features
+    # (kept for callers that hold candle lists; the cache itself works on
+    # ring arrays).
+
+    @staticmethod
+    def _cols(candles: List[Candle1m]) -> np.ndarray:
+        """(5, 1, n) columns o, h, l, c, v — each shaped (1, n) for the kernels."""
+        x = np.array([(k.o, k.h, k.l, k.c, k.v) for k in candles], dtype=np.float64).reshape(-1, 5)
+        return x.T[:, None, :]
 
     def calc_atr_pct(self, candles: List[Candle1m], window: int = 20) -> float:
-        if len(candles) < window + 1:
-            return 0.0
-        trs: List[float] = []
-        for i in range(-window, 0):
-            prev_c = candles[i - 1].c
-            c = candles[i]
-            trs.append(_true_range(prev_c, c.h, c.l))
-        atr = sum(trs) / float(window)
-        return _safe_div(atr, candles[-1].c, 0.0)  # FRACTION (e.g., 0.0042)
+        o, h, l, c, v = self._cols(candles)
+        return float(cf.atr_pct(h, l, c, window)[0])
 
     def calc_spike_count_90m(self, candles: List[Candle1m]) -> int:
         """
         Count of “wicky” bars in the last 90 bars:
         wick_ratio = (upper_wick + lower_wick) / (high - low), threshold >= 0.40
         """
-        take = candles[-90:] if len(candles) >= 90 else candles
-        cnt = 0
-        for c in take:
-            rng = max(c.h - c.l, 1e-12)
-            upper = max(0.0, c.h - max(c.o, c.c))
-            lower = max(0.0, min(c.o, c.c) - c.l)
-            wick_ratio = (upper + lower) / rng
-            if wick_ratio >= 0.40:
-                cnt += 1
-        return cnt
+        o, h, l, c, v = self._cols(candles)
+        return int(cf.spike_count(o, h, l, c)[0])
 
     def calc_grinder_ratio(self, candles: List[Candle1m], atr_abs: Optional[float] = None, window: int = 120) -> float:
         """
@@ -350,21 +537,9 @@ class CandlesCache:
         - body/ATR > 0.8
         - total wick ratio < 0.2
         """
-        if not candles:
-            return 0.0
-        take = candles[-window:] if len(candles) >= window else candles
-        if atr_abs is None:
-            atr_abs = max(1e-8, (candles[-1].h - candles[-1].l))
-        g = 0
-        for c in take:
-            rng = max(c.h - c.l, 1e-12)
-            body = abs(c.c - c.o)
-            upper = max(0.0, c.h - max(c.o, c.c))
-            lower = max(0.0, min(c.o, c.c) - c.l)
-            wick_ratio = (upper + lower) / rng
-            if (body / atr_abs) > 0.8 and wick_ratio < 0.2:
-                g += 1
-        return g / float(len(take)) if take else 0.0
+        o, h, l, c, v = self._cols(candles)
+        atr = None if atr_abs is None else np.array([atr_abs])
+        return float(cf.grinder_ratio(o, h, l, c, atr, window)[0])
 
     def calc_retrace_median(self, candles: List[Candle1m], lookback: int = 180, swing_k: int = 3) -> float:
         """
@@ -374,154 +549,81 @@ class CandlesCache:
         - retrace depth = |correction| / |impulse|
         return median of last <=10 retraces
         """
-        if len(candles) < max(lookback, swing_k * 2 + 1):
-            return 0.35
-        seg = candles[-lookback:]
-        highs: List[int] = []
-        lows: List[int] = []
-        for i in range(swing_k, len(seg) - swing_k):
-            c = seg[i]
-            if all(c.h >= seg[j].h for j in range(i - swing_k, i + swing_k + 1)):
-                highs.append(i)
-            if all(c.l <= seg[j].l for j in range(i - swing_k, i + swing_k + 1)):
-                lows.append(i)
-        ex_idx = sorted(set(highs + lows))
-        if len(ex_idx) < 3:
-            return 0.35
-        retraces: List[float] = []
-        for a, b, c_idx in zip(ex_idx[:-2], ex_idx[1:-1], ex_idx[2:]):
-            A, B, C = seg[a], seg[b], seg[c_idx]
-            impulse = abs(B.c - A.c) or abs((B.h + B.l) / 2 - (A.h + A.l) / 2)
-            correction = abs(C.c - B.c)
-            if impulse > 1e-9:
-                retraces.append(max(0.0, min(1.0, correction / impulse)))
-        return float(median(retraces[-10:])) if retraces else 0.35
+        o, h, l, c, v = self._cols(candles)
+        return float(cf.retrace_median(h, l, c, lookback, swing_k)[0])
 
     def calc_range_stable_pct(self, candles: List[Candle1m], window: int = 60) -> float:
         """std(close) / mean(close) * 100 (percentage std over last window)."""
-        if len(candles) < window:
-            return 0.0
-        take = candles[-window:]
-        closes = [c.c for c in take]
-        mean_c = sum(closes) / len(closes)
-        if mean_c <= 0:
-            return 0.0
-        std_c = (sum((c - mean_c) ** 2 for c in closes) / len(closes)) ** 0.5
-        pct_std = (std_c / mean_c) * 100.0
-        return pct_std
+        o, h, l, c, v = self._cols(candles)
+        return float(cf.range_stable_pct(c, window)[0])
 
     def calc_vol_pattern_from_v(self, candles: List[Candle1m], window: int = 60) -> int:
         """vol_pattern from candle v: std(v)/mean <0.3 → stable (70+ score)."""
-        if len(candles) < window:
-            return 0
-        vols = [c.v for c in candles[-window:]]
-        if len(vols) < 5:
-            return 0
-        mean_v = sum(vols) / len(vols)
-        if mean_v <= 0:
-            return 0
-        std_v = (sum((v - mean_v) ** 2 for v in vols) / len(vols)) ** 0.5
-        ratio = std_v / mean_v
-        score = max(0, min(100, 100 - (ratio * 100)))  # invert: low ratio → high score
-        return int(score) if ratio < 0.3 else int(score * 0.7)  # bonus for stable
+        o, h, l, c, v = self._cols(candles)
+        return int(cf.vol_pattern(v, window)[0])
 
     def calc_dca_potential_from_retrace(self, candles: List[Candle1m], retrace_med: float) -> int:
         """dca_pot proxy: low retrace → high potential (e.g., if med <0.3 → 80+)."""
-        base_score = max(0, min(100, int(100 - (retrace_med * 100 * 2))))  # 0.5 retrace → 0 score
         pct_std = self.calc_range_stable_pct(candles)
-        if pct_std < 0.1:
-            base_score += 20
-        return max(0, min(100, base_score))
+        return int(cf.dca_potential(np.array([retrace_med]), np.array([pct_std]))[0])
 
     # ───────────── compute & expose stats ─────────────
 
-    async def compute_metrics_gate(self, symbol: str) -> Dict[str, float]:
-        """Pull candles and compute full feature set for Gate tiering."""
-        candles = await self.get_1m(symbol, venue="gate", limit=300)
-        key = self._norm_key(symbol, "gate")
-
-        if not candles:
-            stats = {
-                "atr1m_pct": float(self._fallback_atr_fraction()),
-                "spike_count_90m": 0,
-                "pullback_median_retrace": 0.35,
-                "grinder_ratio": 0.30,
-                "imbalance_sigma_hits_60m": 0,
-                "range_stable_pct": 0.0,
-                "vol_pattern": 0,
-                "dca_potential": 0,
-                "bars_1m": 0,
-                "last_candle_ts": 0,
-            }
-            self._stats[key] = stats
-            return stats
-
-        atr_pct = self.calc_atr_pct(candles)                  # FRACTION
-        spike_90 = self.calc_spike_count_90m(candles)
-        grinder = self.calc_grinder_ratio(candles)
-        retr_med = self.calc_retrace_median(candles)
-        range_stable = self.calc_range_stable_pct(candles)
-        vol_pat = self.calc_vol_pattern_from_v(candles)
-        dca_pot = self.calc_dca_potential_from_retrace(candles, retr_med)
-
-        stats = {
-            "atr1m_pct": float(atr_pct),                      # FRACTION, not percent
-            "spike_count_90m": int(spike_90),
-            "pullback_median_retrace": float(retr_med),
-            "grinder_ratio": float(grinder),
-            "imbalance_sigma_hits_60m": 0,                    # placeholder
-            "range_stable_pct": float(range_stable),
-            "vol_pattern": float(vol_pat),
-            "dca_potential": float(dca_pot),
-            "bars_1m": int(len(candles)),
-            "last_candle_ts": int(candles[-1].ts),
-        }
+    def _stats_from_ring(self, pair_key: str, key: str) -> Dict[str, float]:
+        ring = self._candles.get(pair_key)
+        if ring is None or not len(ring):
+            stats = cf.default_stats(self._fallback_atr_fraction())
+        elif key not in self._dirty and key in self._stats:
+            return self._stats[key]                       # no new bar since last compute
+        else:
+            ts, x = ring.arrays(cf.STATS_BARS)
+            stats = cf.stats_from_arrays(ts, x, self._features.get(pair_key))
         self._stats[key] = stats
+        self._dirty.discard(key)
         return stats
 
+    def batch_stats(self, symbols: Optional[Iterable[str]] = None, venue: str = "gate") -> Dict[str, Dict[str, float]]:
+        """
+        Score many symbols in one vectorized pass over the cached rings (no
+        network). Symbols are stacked by bar count — in steady state that is a
+        single (S, 300, 5) block. Defaults to every cached symbol of `venue`.
+        """
+        venue = venue.lower()
+        if symbols is None:
+            prefix = f"{venue}:"
+            pairs = [(pk.split(":", 1)[1].replace("_", ""), pk) for pk in self._candles if pk.startswith(prefix)]
+        else:
+            pairs = [(sym, self._norm_pair(sym, venue)) for sym in symbols]
+
+        out: Dict[str, Dict[str, float]] = {}
+        items = []
+        for sym, pk in pairs:
+            ring = self._candles.get(pk)
+            if ring is None or not len(ring):
+                out[sym] = self._stats_from_ring(pk, self._norm_key(sym, venue))
+                continue
+            ts, x = ring.arrays(cf.STATS_BARS)
+            items.append((sym, ts, x))
+
+        for group in cf.group_by_length(items).values():
+            ts = np.stack([g[1] for g in group])
+            x = np.stack([g[2] for g in group])
+            for (sym, _, _), stats in zip(group, cf.batch_stats(ts, x)):
+                key = self._norm_key(sym, venue)
+                self._stats[key] = stats
+                self._dirty.discard(key)
+                out[sym] = stats
+        return out
+
+    async def compute_metrics_gate(self, symbol: str) -> Dict[str, float]:
+        """Refresh candles (incremental) and compute full feature set for Gate tiering."""
+        await self._ensure_ring(symbol, venue="gate", limit=300)
+        return self._stats_from_ring(self._norm_pair(symbol, "gate"), self._norm_key(symbol, "gate"))
+
     async def compute_metrics_mexc(self, symbol: str) -> Dict[str, float]:
-        """Pull candles and compute full feature set for MEXC tiering."""
-        candles = await self.get_1m(symbol, venue="mexc", limit=300)
-        key = self._norm_key(symbol, "mexc")
-
-        if not candles:
-            stats = {
-                "atr1m_pct": float(self._fallback_atr_fraction()),
-                "spike_count_90m": 0,
-                "pullback_median_retrace": 0.35,
-                "grinder_ratio": 0.30,
-                "imbalance_sigma_hits_60m": 0,
-                "range_stable_pct": 0.0,
-                "vol_pattern": 0,
-                "dca_potential": 0,
-                "bars_1m": 0,
-                "last_candle_ts": 0,
-            }
-            self._stats[key] = stats
-            return stats
-
-        atr_pct = self.calc_atr_pct(candles)                  # FRACTION
-        spike_90 = self.calc_spike_count_90m(candles)
-        grinder = self.calc_grinder_ratio(candles)
-        retr_med = self.calc_retrace_median(candles)
-        range_stable = self.calc_range_stable_pct(candles)
-        vol_pat = self.calc_vol_pattern_from_v(candles)
-        dca_pot = self.calc_dca_potential_from_retrace(candles, retr_med)
-
-        stats = {
-            "atr1m_pct": float(atr_pct),                      # FRACTION, not percent
-            "spike_count_90m": int(spike_90),
-            "pullback_median_retrace": float(retr_med),
-            "grinder_ratio": float(grinder),
-            "imbalance_sigma_hits_60m": 0,
-            "range_stable_pct": float(range_stable),
-            "vol_pattern": float(vol_pat),
-            "dca_potential": float(dca_pot),
-            "bars_1m": int(len(candles)),
-            "last_candle_ts": int(candles[-1].ts),
-        }
-        self._stats[key] = stats
-        return stats
+        """Refresh candles (incremental) and compute full feature set for MEXC tiering."""
+        await self._ensure_ring(symbol, venue="mexc", limit=300)
+        return self._stats_from_ring(self._norm_pair(symbol, "mexc"), self._norm_key(symbol, "mexc"))
 
     async def compute_metrics(self, symbol: str, venue: str = "gate") -> Dict[str, float]:
         """
@@ -3,11 +3,11 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import time
 from dataclasses import dataclass, asdict
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from app.config.settings import settings
+from app.services.idempotency import get_idempotency_store
 
 __all__ = ["ConfigManager", "ConfigState", "config_manager"]
 
@@ -62,9 +62,8 @@ class ConfigManager:
         self._hook_stop_streams: Optional[Callable[[], Awaitable[None]]] = None
         self._hook_start_streams: Optional[Callable[[Provider, Mode], Awaitable[bool]]] = None
         self._hook_reset_book_tracker: Optional[Callable[[], None]] = None
-
-        # Idempotency cache: key -> (timestamp, state_dict)
-        self._idem_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Optional: re-point market data to an already-streaming venue (True = done, no restart needed)
+        self._hook_switch_venue: Optional[Callable[[Provider], Awaitable[bool]]] = None
 
         # Clients (reload on switch)
         self._private_client: Optional[Any] = None
@@ -78,11 +77,13 @@ class ConfigManager:
         stop_streams: Callable[[], Awaitable[None]],
         start_streams: Callable[[Provider, Mode], Awaitable[bool]],
         reset_book_tracker: Callable[[], None],
+        switch_venue: Optional[Callable[[Provider], Awaitable[bool]]] = None,
     ) -> None:
         self._hook_stop_all_strategies = stop_all_strategies
         self._hook_stop_streams = stop_streams
         self._hook_start_streams = start_streams
         self._hook_reset_book_tracker = reset_book_tracker
+        self._hook_switch_venue = switch_venue
 
     # ─────────────────────────── Initialization ────────────────────────────
     async def init_on_startup(self, db: Any = None) -> None:
@@ -169,14 +170,23 @@ class ConfigManager:
     ) -> Dict[str, Any]:
         """
         Safely switch provider/mode with idempotency and persistence.
+        A repeated X-Idempotency-Key within the window returns the first result
+        (shared IdempotencyStore, scope "config.switch").
         """
-        # Idempotency (fast path)
-        if idempotency_key:
-            cached = self._idem_cache.get(idempotency_key)
-            if cached and (time.time() - cached[0] <= self._IDEMPOTENCY_TTL):
-                logger.info("ConfigManager: idempotent switch hit (%s) — returning cached result.", idempotency_key)
-                return dict(cached[1])
+        if not idempotency_key:
+            return await self._switch(provider, mode, db)
+
+        state, replayed = await get_idempotency_store().execute(
+            "config.switch",
+            idempotency_key,
+            lambda: self._switch(provider, mode, db),
+            ttl=self._IDEMPOTENCY_TTL,
+        )
+        if replayed:
+            logger.info("ConfigManager: idempotent switch hit (%s) — returning cached result.", idempotency_key)
+        return dict(state)
 
+    async def _switch(self, provider: Provider, mode: Mode, db: Optional[Any]) -> Dict[str, Any]:
         provider = (provider or "").strip().lower()
         mode = (mode or "").strip().upper()
 
@@ -190,8 +200,6 @@ class ConfigManager:
             if same:
                 logger.info("ConfigManager: switch requested to same state (%s/%s) — no-op.", provider, mode)
                 state = self._state.to_dict()
-                if idempotency_key:
-                    self._idem_cache[idempotency_key] = (time.time(), state)
                 if db:
                     self._save_to_db(db)
                 return dict(state)
@@ -207,16 +215,29 @@ class ConfigManager:
             except Exception:
                 logger.exception("ConfigManager: stop_all_strategies failed (continuing).")
 
+            # Fast path: the target venue already streams (multi-venue) → re-point market data, no reconnects
+            fast = False
+            if (
+                self._hook_switch_venue
+                and provider != self._state.active.lower()
+                and mode == self._state.mode.upper()
+            ):
+                try:
+                    fast = bool(await self._hook_switch_venue(provider))
+                except Exception:
+                    logger.exception("ConfigManager: switch_venue failed — falling back to stream restart.")
+                    fast = False
+
             # 2) Stop streams
             try:
-                if self._hook_stop_streams:
+                if self._hook_stop_streams and not fast:
                     await self._hook_stop_streams()
             except Exception:
                 logger.exception("ConfigManager: stop_streams failed (continuing).")
 
             # 3) Reset book tracker
             try:
-                if self._hook_reset_book_tracker:
+                if self._hook_reset_book_tracker and not fast:
                     self._hook_reset_book_tracker()
             except Exception:
                 logger.exception("ConfigManager: reset_book_tracker failed (continuing).")
@@ -229,9 +250,9 @@ class ConfigManager:
             self._reload_clients(provider, mode)
 
             # 4) Start streams
-            ws_enabled = False
+            ws_enabled = fast
             try:
-                if self._hook_start_streams:
+                if self._hook_start_streams and not fast:
                     ws_enabled = await self._hook_start_streams(provider, mode)
             except Exception:
                 logger.exception("ConfigManager: start_streams failed — WS disabled.")
@@ -245,22 +266,12 @@ class ConfigManager:
             state = self._state.to_dict()
             logger.info("ConfigManager: switched — %s", state)
 
-            if idempotency_key:
-                self._idem_cache[idempotency_key] = (time.time(), state)
-            self._prune_idem_cache()
-
             if db:
                 self._save_to_db(db)
 
             return dict(state)
 
     # ───────────────────────────── Internals ───────────────────────────────
-    def _prune_idem_cache(self) -> None:
-        now = time.time()
-        stale_keys = [k for k, (ts, _) in self._idem_cache.items() if now - ts > self._IDEMPOTENCY_TTL]
-        for k in stale_keys:
-            self._idem_cache.pop(k, None)
-
     def _reload_clients(self, provider: Provider, mode: Mode) -> None:
         try:
             # --- PRIVATE CLIENT: only for LIVE ---
@@ -227,19 +227,18 @@ async def generate_and_send_daily_report(db: Session) -> bool:
         generator = DailyReportGenerator(db)
         report = await generator.generate_report()
         
-        # Отправка через Telegram
-        from app.services.telegram_bot import get_telegram_service
-        telegram = get_telegram_service()
+        # Отправка через alert outbox (доставка/ретраи — фоновый воркер)
+        from app.services.alert_outbox import enqueue_alert
         
-        success = await telegram.send_message(
-            text=report,
-            parse_mode='HTML'
+        success = enqueue_alert(
+            "INFO", "", report,
+            key=f"daily_report:{datetime.now(timezone.utc).date().isoformat()}",
         )
         
         if success:
-            logger.info("✅ Daily report sent successfully")
+            logger.info("✅ Daily report queued for delivery")
         else:
-            logger.error("❌ Failed to send daily report")
+            logger.error("❌ Failed to queue daily report")
         
         return success
     
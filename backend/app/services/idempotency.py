@@ -1,78 +1,372 @@
 # app/services/idempotency.py
 """
-Idempotency manager for mutation endpoints.
-Caches (key, workspace_id) → response for configurable TTL to prevent duplicate operations.
+Idempotency for mutation endpoints — one store for the whole app.
+
+IdempotencyStore keys results by (scope, key) where scope namespaces the
+operation (e.g. "ui.watchlist.bulk", "config.switch", "1:place_order"):
+
+  • a bounded in-memory LRU (OrderedDict, O(1) get/evict) serves
+    completed results without touching storage;
+  • with IDEMPOTENCY_BACKEND=sqlite, claims and results also live in a
+    small SQLite table (WAL) so several uvicorn workers on one host share
+    them without Redis.
+
+Requests go through claim → store (or release on failure):
+
+  claim()   atomically reserves the key; a concurrent duplicate sees
+            IN_PROGRESS, a finished one DONE with the stored response,
+            a reused key with a different payload hash CONFLICT
+  store()   records the response for `ttl` seconds
+  release() drops an unfinished claim so the client can retry
+
+`execute()` wraps the three around an async action. IdempotencyManager is
+the workspace-scoped facade used by the @idempotent decorator and app
+lifecycle (periodic purge of expired rows).
 """
-import time
 import asyncio
-from typing import Optional, Any
-from dataclasses import dataclass
+import hashlib
+import json
+import sqlite3
+import threading
+import time
 from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Tuple
 
 from app.config.settings import settings
 from app.services.logger import get_logger
 
 logger = get_logger(__name__)
 
+CLAIMED = "claimed"
+DONE = "done"
+IN_PROGRESS = "in_progress"
+CONFLICT = "conflict"
+
+_PENDING = "pending"
+
+
+class IdempotencyConflict(Exception):
+    """Key reused with a different payload."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another request holding the same key has not finished in time."""
+
+
+def payload_hash(payload: Any) -> str:
+    """Stable hash of a JSON-able payload (sorted keys)."""
+    dumped = json.dumps(payload or {}, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(dumped.encode("utf-8")).hexdigest()
+
 
 @dataclass
-class CachedResponse:
-    """Cached idempotent response with metadata."""
-    response: dict[str, Any]
-    cached_at: float  # Unix timestamp
-    ttl_sec: int
-    
-    def is_expired(self) -> bool:
-        """Check if cache entry has expired."""
-        return time.time() > (self.cached_at + self.ttl_sec)
-    
-    def age_seconds(self) -> float:
-        """Return age of cache entry in seconds."""
-        return time.time() - self.cached_at
+class _Entry:
+    status: str                      # pending | done
+    payload_hash: str
+    response: Optional[dict]
+    stored_at: float
+    expires_at: float
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10000,
+        default_ttl: float = 600.0,
+        sqlite_path: Optional[str] = None,
+        pending_ttl: float = 60.0,
+        wait_timeout: float = 10.0,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.default_ttl = float(default_ttl)
+        self.pending_ttl = float(pending_ttl)
+        self.wait_timeout = float(wait_timeout)
+        self._lru: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.sqlite_path = sqlite_path
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+                " scope TEXT NOT NULL, key TEXT NOT NULL, status TEXT NOT NULL,"
+                " payload_hash TEXT NOT NULL DEFAULT '', response TEXT,"
+                " stored_at REAL NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (scope, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_idempotency_expires ON idempotency_keys (expires_at)")
+        self.hits = 0
+        self.misses = 0
+
+    # ───────── LRU ─────────
+    def _lru_get(self, k: Tuple[str, str], now: float) -> Optional[_Entry]:
+        e = self._lru.get(k)
+        if e is None:
+            return None
+        if e.expires_at <= now:
+            del self._lru[k]
+            return None
+        self._lru.move_to_end(k)
+        return e
+
+    def _lru_put(self, k: Tuple[str, str], e: _Entry) -> None:
+        self._lru[k] = e
+        self._lru.move_to_end(k)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    @staticmethod
+    def _verdict(e: _Entry, phash: str) -> Tuple[str, Optional[dict]]:
+        if phash and e.payload_hash and phash != e.payload_hash:
+            return CONFLICT, None
+        if e.status == DONE:
+            return DONE, e.response
+        return IN_PROGRESS, None
+
+    # ───────── claim / store / release ─────────
+    def claim(self, scope: str, key: str, phash: str = "") -> Tuple[str, Optional[dict]]:
+        """Reserve (scope, key). Returns (CLAIMED|DONE|IN_PROGRESS|CONFLICT, response-if-DONE)."""
+        k = (scope, key)
+        now = time.time()
+        with self._lock:
+            e = self._lru_get(k, now)
+            if e is not None and (e.status == DONE or self._db is None):
+                self.hits += e.status == DONE
+                return self._verdict(e, phash)
+            self.misses += 1
+            if self._db is None:
+                self._lru_put(k, _Entry(_PENDING, phash, None, now, now + self.pending_ttl))
+                return CLAIMED, None
+            return self._sql_claim(k, phash, now)
+
+    def _sql_claim(self, k: Tuple[str, str], phash: str, now: float) -> Tuple[str, Optional[dict]]:
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM idempotency_keys WHERE scope=? AND key=? AND expires_at<=?", (*k, now))
+            cur = db.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (scope, key, status, payload_hash, response, stored_at, expires_at)"
+                " VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                (*k, _PENDING, phash, now, now + self.pending_ttl),
+            )
+            if cur.rowcount == 1:
+                db.execute("COMMIT")
+                return CLAIMED, None
+            row = db.execute(
+                "SELECT status, payload_hash, response, stored_at, expires_at FROM idempotency_keys WHERE scope=? AND key=?",
+                k,
+            ).fetchone()
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        status, ph, resp, stored_at, expires_at = row
+        e = _Entry(status, ph, json.loads(resp) if resp else None, stored_at, expires_at)
+        if status == DONE:
+            self._lru_put(k, e)
+        return self._verdict(e, phash)
+
+    def store(self, scope: str, key: str, response: dict, ttl: Optional[float] = None, phash: str = "") -> None:
+        k = (scope, key)
+        now = time.time()
+        exp = now + (self.default_ttl if ttl is None else float(ttl))
+        with self._lock:
+            prev = self._lru.get(k)
+            phash = phash or (prev.payload_hash if prev else "")
+            self._lru_put(k, _Entry(DONE, phash, dict(response), now, exp))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO idempotency_keys (scope, key, status, payload_hash, response, stored_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (scope, key) DO UPDATE SET status=excluded.status, response=excluded.response,"
+                    " stored_at=excluded.stored_at, expires_at=excluded.expires_at,"
+                    " payload_hash=CASE WHEN excluded.payload_hash='' THEN idempotency_keys.payload_hash"
+                    " ELSE excluded.payload_hash END",
+                    (*k, DONE, phash, json.dumps(response, default=str), now, exp),
+                )
+
+    def release(self, scope: str, key: str) -> None:
+        """Drop an unfinished claim (the action failed)."""
+        k = (scope, key)
+        with self._lock:
+            e = self._lru.get(k)
+            if e is not None and e.status == _PENDING:
+                del self._lru[k]
+            if self._db is not None:
+                self._db.execute("DELETE FROM idempotency_keys WHERE scope=? AND key=? AND status=?", (*k, _PENDING))
+
+    def get(self, scope: str, key: str) -> Optional[Tuple[dict, float]]:
+        """Completed response and its store time, if any (no claim)."""
+        k = (scope, key)
+        now = time.time()
+        with self._lock:
+            e = self._lru_get(k, now)
+            if e is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload_hash, response, stored_at, expires_at FROM idempotency_keys"
+                    " WHERE scope=? AND key=? AND status=? AND expires_at>?",
+                    (*k, DONE, now),
+                ).fetchone()
+                if row:
+                    e = _Entry(DONE, row[0], json.loads(row[1]) if row[1] else {}, row[2], row[3])
+                    self._lru_put(k, e)
+            if e is None or e.status != DONE:
+                return None
+            return e.response, e.stored_at
+
+    def delete(self, scope: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Remove entries matching scope and/or key (both None → everything)."""
+        with self._lock:
+            victims = [k for k in self._lru if (scope is None or k[0] == scope) and (key is None or k[1] == key)]
+            for k in victims:
+                del self._lru[k]
+            n = len(victims)
+            if self._db is not None:
+                cur = self._db.execute(
+                    "DELETE FROM idempotency_keys WHERE (? IS NULL OR scope=?) AND (? IS NULL OR key=?)",
+                    (scope, scope, key, key),
+                )
+                n = max(n, cur.rowcount)
+            return n
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            stale = [k for k, e in self._lru.items() if e.expires_at <= now]
+            for k in stale:
+                del self._lru[k]
+            n = len(stale)
+            if self._db is not None:
+                n += self._db.execute("DELETE FROM idempotency_keys WHERE expires_at<=?", (now,)).rowcount
+            return n
+
+    # ───────── convenience ─────────
+    async def execute(
+        self,
+        scope: str,
+        key: str,
+        action: Callable[[], Awaitable[dict]],
+        *,
+        payload: Any = None,
+        ttl: Optional[float] = None,
+    ) -> Tuple[dict, bool]:
+        """
+        Run `action` at most once per (scope, key). Returns (response, replayed).
+        Raises IdempotencyConflict / IdempotencyInProgress.
+        """
+        phash = payload_hash(payload) if payload is not None else ""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            verdict, resp = self.claim(scope, key, phash)
+            if verdict == DONE:
+                return dict(resp or {}), True
+            if verdict == CONFLICT:
+                raise IdempotencyConflict(f"Key {key} reused with different payload")
+            if verdict == CLAIMED:
+                break
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(f"Key {key} is still being processed")
+            await asyncio.sleep(0.05)
+        try:
+            result = await action()
+        except BaseException:
+            self.release(scope, key)
+            raise
+        self.store(scope, key, result, ttl=ttl, phash=phash)
+        return result, False
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            lru_active = sum(1 for e in self._lru.values() if e.expires_at > now)
+            out = {
+                "lru_entries": len(self._lru),
+                "lru_active": lru_active,
+                "lru_max": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "sqlite_path": self.sqlite_path,
+            }
+            if self._db is not None:
+                out["sqlite_entries"] = self._db.execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+            return out
+
+    def close(self) -> None:
+        if self._db is not None:
+            try:
+                self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+
+_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Process-wide store configured from settings (backend: memory | sqlite)."""
+    global _store
+    if _store is None:
+        backend = (settings.idempotency_backend or "memory").lower()
+        sqlite_path = None
+        if backend == "sqlite":
+            sqlite_path = settings.idempotency_sqlite_path
+        elif backend != "memory":
+            logger.warning(f"Idempotency backend {backend!r} is not supported; using in-memory store")
+        _store = IdempotencyStore(
+            max_entries=int(settings.idempotency_max_size),
+            default_ttl=float(settings.idempotency_ttl_seconds),
+            sqlite_path=sqlite_path,
+        )
+    return _store
 
 
 class IdempotencyManager:
     """
-    In-memory idempotency cache with TTL.
-    Thread-safe via asyncio.Lock.
-    
+    Workspace-scoped facade over IdempotencyStore for the @idempotent
+    decorator, plus the periodic purge task.
+
     Usage:
-        manager = IdempotencyManager()
-        
-        # Check cache
-        cached = await manager.get("order-123", workspace_id=1)
-        if cached:
-            return cached  # Return cached response
-        
-        # Execute operation
-        result = await place_order(...)
-        
-        # Store in cache
-        await manager.set("order-123", workspace_id=1, response=result, ttl=600)
+        manager = get_idempotency_manager()
+        response, replayed = await manager.execute("order-123", 1, "place_order", action, ttl=600)
     """
-    
-    def __init__(self):
-        # Cache: (key, workspace_id) → CachedResponse
-        self._cache: OrderedDict[tuple[str, int], CachedResponse] = OrderedDict()
-        self._lock = asyncio.Lock()
+
+    def __init__(self, store: Optional[IdempotencyStore] = None):
+        self._store = store or get_idempotency_store()
         self._cleanup_task: Optional[asyncio.Task] = None
         self._enabled = settings.idempotency_enabled
         self._default_ttl = settings.idempotency_ttl_seconds
-        
+
         logger.info(
             f"IdempotencyManager initialized: "
             f"enabled={self._enabled}, default_ttl={self._default_ttl}s, "
-            f"backend={settings.idempotency_backend}"
+            f"backend={'sqlite' if self._store.sqlite_path else 'memory'}"
         )
-    
+
+    @staticmethod
+    def _scope(workspace_id: int, op: str = "") -> str:
+        return f"{workspace_id}:{op}" if op else str(workspace_id)
+
+    @staticmethod
+    def _decorate(response: dict, stored_at: float) -> dict:
+        out = dict(response)
+        out["idempotent"] = True
+        out["cached_at"] = int(stored_at)
+        out["cache_age_sec"] = round(time.time() - stored_at, 2)
+        return out
+
     async def start(self):
-        """Start background cleanup task."""
+        """Start background purge of expired entries."""
         if self._cleanup_task is None:
             self._cleanup_task = asyncio.create_task(self._cleanup_loop())
             logger.info("Idempotency cleanup task started")
-    
+
     async def stop(self):
-        """Stop background cleanup task."""
+        """Stop background purge task."""
         if self._cleanup_task:
             self._cleanup_task.cancel()
             try:
@@ -81,166 +375,73 @@ class IdempotencyManager:
                 pass
             self._cleanup_task = None
             logger.info("Idempotency cleanup task stopped")
-    
-    async def get(
+
+    async def execute(
         self,
         key: str,
-        workspace_id: int
-    ) -> Optional[dict[str, Any]]:
+        workspace_id: int,
+        op: str,
+        action: Callable[[], Awaitable[dict]],
+        ttl: Optional[int] = None,
+        payload: Any = None,
+    ) -> dict:
         """
-        Get cached response for idempotency key.
-        
-        Args:
-            key: Idempotency key (e.g., UUID from X-Idempotency-Key header)
-            workspace_id: Workspace identifier
-        
-        Returns:
-            Cached response dict if found and not expired, else None
+        Run `action` once per (workspace, op, key); replays carry idempotent/cached_at/cache_age_sec.
+        With `payload`, a reused key with a different payload raises IdempotencyConflict.
         """
-        if not self._enabled:
+        if not self._enabled or not key:
+            return await action()
+        scope = self._scope(workspace_id, op)
+        response, replayed = await self._store.execute(
+            scope, key, action, payload=payload, ttl=ttl if ttl is not None else self._default_ttl
+        )
+        if not replayed:
+            return response
+        hit = self._store.get(scope, key)
+        logger.info(f"Idempotency cache HIT: key={key[:16]}..., scope={scope}")
+        return self._decorate(response, hit[1] if hit else time.time())
+
+    async def get(self, key: str, workspace_id: int, op: str = "") -> Optional[dict[str, Any]]:
+        """Cached response for a key (None if missing/expired/disabled)."""
+        if not self._enabled or not key:
             return None
-        
-        if not key:
+        hit = self._store.get(self._scope(workspace_id, op), key)
+        if hit is None:
             return None
-        
-        cache_key = (key, workspace_id)
-        
-        async with self._lock:
-            entry = self._cache.get(cache_key)
-            
-            if entry is None:
-                return None
-            
-            # Check expiration
-            if entry.is_expired():
-                del self._cache[cache_key]
-                logger.debug(
-                    f"Idempotency key expired: key={key[:16]}..., "
-                    f"workspace={workspace_id}, age={entry.age_seconds():.1f}s"
-                )
-                return None
-            
-            # Cache hit
-            logger.info(
-                f"Idempotency cache HIT: key={key[:16]}..., "
-                f"workspace={workspace_id}, age={entry.age_seconds():.1f}s"
-            )
-            
-            # Return response with metadata
-            response = entry.response.copy()
-            response["idempotent"] = True
-            response["cached_at"] = int(entry.cached_at)
-            response["cache_age_sec"] = round(entry.age_seconds(), 2)
-            
-            return response
-    
-    async def set(
-        self,
-        key: str,
-        workspace_id: int,
-        response: dict[str, Any],
-        ttl: Optional[int] = None
-    ):
-        """
-        Cache response for idempotency key.
-        
-        Args:
-            key: Idempotency key
-            workspace_id: Workspace identifier
-            response: Response dict to cache
-            ttl: Time-to-live in seconds (default: from settings)
-        """
-        if not self._enabled:
-            return
-        
-        if not key:
+        return self._decorate(*hit)
+
+    async def set(self, key: str, workspace_id: int, response: dict[str, Any], ttl: Optional[int] = None, op: str = ""):
+        if not self._enabled or not key:
             return
-        
-        ttl_sec = ttl if ttl is not None else self._default_ttl
-        cache_key = (key, workspace_id)
-        
-        async with self._lock:
-            entry = CachedResponse(
-                response=response.copy(),
-                cached_at=time.time(),
-                ttl_sec=ttl_sec
-            )
-            self._cache[cache_key] = entry
-            
-            logger.info(
-                f"Idempotency cached: key={key[:16]}..., "
-                f"workspace={workspace_id}, ttl={ttl_sec}s"
-            )
-    
+        self._store.store(self._scope(workspace_id, op), key, response, ttl=ttl if ttl is not None else self._default_ttl)
+
     async def clear(self, key: Optional[str] = None, workspace_id: Optional[int] = None):
-        """
-        Clear cache entries.
-        
-        Args:
-            key: If provided, clear only this key for all workspaces
-            workspace_id: If provided (with key), clear only this specific entry
-        """
-        async with self._lock:
-            if key is None and workspace_id is None:
-                # Clear all
-                count = len(self._cache)
-                self._cache.clear()
-                logger.info(f"Idempotency cache cleared: {count} entries removed")
-            elif key and workspace_id:
-                # Clear specific entry
-                cache_key = (key, workspace_id)
-                if cache_key in self._cache:
-                    del self._cache[cache_key]
-                    logger.debug(f"Idempotency entry cleared: key={key[:16]}..., workspace={workspace_id}")
-            elif key:
-                # Clear all entries for this key across workspaces
-                keys_to_remove = [k for k in self._cache.keys() if k[0] == key]
-                for k in keys_to_remove:
-                    del self._cache[k]
-                logger.debug(f"Idempotency entries cleared for key={key[:16]}...: {len(keys_to_remove)} entries")
-    
+        """Clear everything, one key across workspaces, or one (key, workspace) entry."""
+        scope = self._scope(workspace_id) if workspace_id is not None else None
+        n = self._store.delete(scope=scope, key=key)
+        logger.debug(f"Idempotency entries cleared: {n}")
+
     async def stats(self) -> dict[str, Any]:
-        """Get cache statistics."""
-        async with self._lock:
-            total = len(self._cache)
-            expired = sum(1 for entry in self._cache.values() if entry.is_expired())
-            active = total - expired
-            
-            return {
-                "enabled": self._enabled,
-                "backend": settings.idempotency_backend,
-                "total_entries": total,
-                "active_entries": active,
-                "expired_entries": expired,
-                "default_ttl_sec": self._default_ttl
-            }
-    
+        return {
+            "enabled": self._enabled,
+            "backend": "sqlite" if self._store.sqlite_path else "memory",
+            "default_ttl_sec": self._default_ttl,
+            **self._store.stats(),
+        }
+
     async def _cleanup_loop(self):
-        """Background task to remove expired entries."""
         cleanup_interval = 60  # Run every 60 seconds
-        
+
         while True:
             try:
                 await asyncio.sleep(cleanup_interval)
-                await self._cleanup_expired()
+                n = self._store.purge_expired()
+                if n:
+                    logger.debug(f"Idempotency cleanup: removed {n} expired entries")
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Idempotency cleanup error: {e}", exc_info=True)
-    
-    async def _cleanup_expired(self):
-        """Remove expired entries from cache."""
-        async with self._lock:
-            keys_to_remove = [
-                key for key, entry in self._cache.items()
-                if entry.is_expired()
-            ]
-            
-            for key in keys_to_remove:
-                del self._cache[key]
-            
-            if keys_to_remove:
-                logger.debug(f"Idempotency cleanup: removed {len(keys_to_remove)} expired entries")
 
 
 # Global singleton instance
@@ -1,30 +1,201 @@
 # app/services/logger.py
+"""
+Process-wide logging setup.
+
+Records are never written on the caller's thread: the root logger gets a
+QueueHandler and a QueueListener thread drains the queue into the real
+stdout handler, so a burst of strategy/execution logs can't stall the
+event loop on a slow terminal or pipe.
+
+Before a record is queued, RateLimitFilter applies a per-call-site token
+bucket to INFO/DEBUG records of the configured logger prefixes
+(LOG_RATE_LIMITS, e.g. "app.strategy.engine=20" → at most 20 records/s
+per log line, bursting to the same). Dropped records are counted and the
+next one that goes through carries `suppressed=N`.
+
+LOG_JSON=true switches the output to one JSON object per line.
+"""
+import atexit
+import copy
+import json
 import logging
 import sys
-from typing import Optional
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Dict, Optional, Tuple
 
 _LOG_LEVEL = logging.INFO
 _initialized = False
+_console_handler: Optional[logging.Handler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _parse_rate_limits(raw: str) -> Dict[str, float]:
+    """'app.strategy.engine=20, app.services.x=5' → {prefix: records/s}."""
+    out: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        name, sep, val = part.strip().partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rate = float(val)
+        except ValueError:
+            continue
+        if rate > 0:
+            out[name.strip()] = rate
+    return out
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg (+ exc, suppressed)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        doc = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            doc["exc"] = record.exc_text  # rendered by _RecordQueueHandler before queueing
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            doc["suppressed"] = suppressed
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    Queues the record with its message merged but the traceback kept apart
+    in exc_text. The stock prepare() folds the traceback into msg and clears
+    exc_info/exc_text, so the JSON output lost its `exc` field.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None  # tracebacks hold frames; the text is enough
+        return record
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        s = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{s} (+{suppressed} suppressed)" if suppressed else s
 
 
-def setup_logging(level: Optional[int] = None):
-    global _initialized
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per (logger, line) for loggers under a configured prefix.
+    WARNING and above always pass.
+    """
+
+    def __init__(self, limits: Dict[str, float]) -> None:
+        super().__init__()
+        self._limits = dict(limits)
+        self._rate_for: Dict[str, float] = {}             # logger name → rate (0 = unlimited)
+        self._buckets: Dict[Tuple[str, int], list] = {}  # site → [tokens, last_ts, suppressed]
+
+    def _resolve(self, name: str) -> float:
+        best, rate = -1, 0.0
+        for prefix, r in self._limits.items():
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                best, rate = len(prefix), r
+        self._rate_for[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for.get(record.name)
+        if rate is None:
+            rate = self._resolve(record.name)
+        if not rate:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.lineno)
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = [rate, now, 0]
+        b[0] = min(rate, b[0] + (now - b[1]) * rate)
+        b[1] = now
+        if b[0] < 1.0:
+            b[2] += 1
+            return False
+        b[0] -= 1.0
+        if b[2]:
+            record.suppressed = b[2]
+            b[2] = 0
+        return True
+
+
+def _settings_defaults() -> Tuple[bool, str]:
+    try:
+        from app.config.settings import settings
+        return bool(settings.log_json), str(settings.log_rate_limits)
+    except Exception:
+        return False, ""
+
+
+def setup_logging(level: Optional[int] = None, *, json_format: Optional[bool] = None, rate_limits: Optional[str] = None):
+    global _initialized, _console_handler, _listener
     if _initialized:
         return
     log_level = level if level is not None else _LOG_LEVEL
+    cfg_json, cfg_limits = _settings_defaults()
+    use_json = cfg_json if json_format is None else json_format
+    limits = _parse_rate_limits(cfg_limits if rate_limits is None else rate_limits)
+
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
+    if use_json:
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(_TextFormatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+    _console_handler = console_handler
+
+    queue: SimpleQueue = SimpleQueue()
+    _listener = QueueListener(queue, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    queue_handler = _RecordQueueHandler(queue)
+    queue_handler.setLevel(log_level)
+    if limits:
+        queue_handler.addFilter(RateLimitFilter(limits))
+
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
     _initialized = True
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging configured: level={logging.getLevelName(log_level)}")
+    logger.info(f"Logging configured: level={logging.getLevelName(log_level)} json={use_json} rate_limits={limits or 'off'}")
+
+
+def stop_logging() -> None:
+    """Drain the queue and stop the writer thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        _listener = None
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -38,8 +209,10 @@ def set_log_level(level: int):
     root_logger.setLevel(level)
     for handler in root_logger.handlers:
         handler.setLevel(level)
+    if _console_handler is not None:
+        _console_handler.setLevel(level)
     logger = get_logger(__name__)
     logger.info(f"Log level changed to: {logging.getLevelName(level)}")
 
 
-setup_logging()
\ No newline at end of file
+setup_logging()
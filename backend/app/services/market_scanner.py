@@ -24,6 +24,7 @@ import httpx
 from app.config.settings import settings
 from app.scoring.presets import PRESETS
 from app.services.book_tracker import book_tracker  # noqa: F401
+from app.market_data.book_tracker import depth_at_bps
 
 # Import *only* MEXC WS from ws_client; Gate WS is in its canonical module.
 from app.market_data.ws_client import MEXCWebSocketClient  # noqa: F401 (used by other modules at runtime)
@@ -35,6 +36,12 @@ try:
 except Exception:
     candles_cache: Any = {}  # harmless no-op fallback
 
+# ─────────────────────────── optional ML feature store ───────────────────────────
+try:
+    from app.ml.feature_store import get_feature_store
+except Exception:  # pragma: no cover
+    get_feature_store = None  # type: ignore[assignment]
+
 log = logging.getLogger("scanner.gate")
 
 
@@ -410,28 +417,8 @@ def _absorption_usd_in_band(
     """USD sum on each side within ±x_bps from mid. Returns (bid_usd, ask_usd)."""
     if not (mid > 0 and x_bps > 0):
         return 0.0, 0.0
-    band = x_bps / 1e4
-    bid_floor = mid * (1.0 - band)
-    ask_cap = mid * (1.0 + band)
-
-    bid_usd = 0.0
-    for p, q in bids:
-        with suppress(Exception):
-            if p <= 0 or q <= 0:
-                continue
-            if p < bid_floor:
-                break
-            bid_usd += p * q
-
-    ask_usd = 0.0
-    for p, q in asks:
-        with suppress(Exception):
-            if p <= 0 or q <= 0:
-                continue
-            if p > ask_cap:
-                break
-            ask_usd += p * q
-    return bid_usd, ask_usd
+    band = next(iter(depth_at_bps(bids, asks, mid, (x_bps,)).values()))
+    return band["bid_usd"], band["ask_usd"]
 
 
 def _imbalance_from_sizes(bid_qty: float, ask_qty: float) -> float:
@@ -508,16 +495,26 @@ def _build_depth_map(
     if not (bids and asks and mid > 0):
         return depth_map
     
-    for level_bps in levels:
-        bid_usd, ask_usd = _absorption_usd_in_band(bids, asks, mid, float(level_bps))
-        depth_map[level_bps] = {
-            "bid_usd": _round2_half_up(bid_usd),
-            "ask_usd": _round2_half_up(ask_usd),
+    # same one-pass band sums the book tracker caches per update
+    for level_bps, band in depth_at_bps(bids, asks, mid, [float(v) for v in levels]).items():
+        depth_map[int(level_bps)] = {
+            "bid_usd": _round2_half_up(band["bid_usd"]),
+            "ask_usd": _round2_half_up(band["ask_usd"]),
         }
     
     return depth_map
 
 
+def _publish_features(rows: Sequence[ScanRow]) -> None:
+    """Push scored rows into the online feature store (best-effort)."""
+    if get_feature_store is None or not rows:
+        return
+    with suppress(Exception):
+        store = get_feature_store()
+        for r in rows:
+            store.update_scan_row(r)
+
+
 def _log1p_safe(x: float) -> float:
     with suppress(Exception):
         return math.log1p(max(0.0, float(x)))
@@ -1479,6 +1476,7 @@ async def scan_gate_quote(
 
         stage2.sort(key=lambda x: (-(x.score if x.score is not None else -1e9)))
         out = stage2[:limit]
+        _publish_features(stage2)
 
         if use_cache:
             _CACHE[cache_key] = (now, out)
@@ -1881,6 +1879,7 @@ async def scan_mexc_quote(
 
         stage2.sort(key=lambda x: (-(x.score if x.score is not None else -1e9)))
         out = stage2[:limit]
+        _publish_features(stage2)
         if use_cache:
             _CACHE[cache_key] = (now, out)
         return out
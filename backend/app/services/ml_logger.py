@@ -58,6 +58,13 @@ class MLDataLogger:
             f"interval={self.interval_sec}s, exchange={self.exchange}"
         )
         
+        # держим подписку на котировки своих символов, пока логгер работает
+        try:
+            from app.services.book_tracker import ensure_symbols_subscribed
+            await ensure_symbols_subscribed(self.symbols, consumer="ml_logger")
+        except Exception as e:
+            logger.warning(f"MLDataLogger: subscribe failed: {e}")
+        
         self._running = True
         self._task = asyncio.create_task(self._collect_loop())
         
@@ -75,6 +82,12 @@ class MLDataLogger:
             except asyncio.CancelledError:
                 pass
         
+        try:
+            from app.services.book_tracker import release_symbols
+            await release_symbols(None, consumer="ml_logger")
+        except Exception:
+            pass
+        
         logger.info("MLDataLogger stopped")
     
     async def _collect_loop(self):
@@ -12,6 +12,10 @@ from pathlib import Path
 from typing import Dict, Optional
 import pandas as pd
 
+from app.ml.features import FEATURE_INDEX, select as select_features
+from app.ml.feature_store import get_feature_store
+from app.ml.registry import ModelRegistry
+
 logger = logging.getLogger(__name__)
 
 # Try to import xgboost
@@ -68,38 +72,30 @@ class MLPredictor:
         """
         Load XGBoost model from JSON file.
         
+        The model registry (ml_models/registry.json, next to model_path)
+        decides which model is current and its feature order; the plain
+        model_path + model_info.json pair is the fallback.
+        
         ВАЖНО: Эта функция sync - она вызывается из __init__!
         """
         try:
-            if not self.model_path.exists():
-                logger.error(f"[ML] Model file not found: {self.model_path}")
-                self.enabled = False
-                return
+            registry = ModelRegistry(self.model_path.parent)
+            entry = registry.current()
+            if entry is not None and entry.format == "xgb_json":
+                path = registry.resolve(entry)
+                if path.exists():
+                    self.model_path = path
+                    self.model = xgb.XGBClassifier()
+                    self.model.load_model(str(path))
+                    self.features_used = list(entry.feature_names)
+                    self.model_version = entry.version
+                else:
+                    logger.error(f"[ML] Registry model file not found: {path}")
             
-            # Load XGBoost model
-            self.model = xgb.XGBClassifier()
-            self.model.load_model(str(self.model_path))
-            
-            # Load feature info
-            info_path = self.model_path.parent / "model_info.json"
-            if info_path.exists():
-                with open(info_path, 'r') as f:
-                    info = json.load(f)
-                    self.features_used = info.get('feature_names', [])
-                    self.model_version = f"v1_{info.get('training_samples', 0)}"
-            else:
-                # Default features from training
-                self.features_used = [
-                    'spread_bps_entry',
-                    'imbalance_entry',
-                    'sym_ALGOUSDT',
-                    'sym_LINKUSDT',
-                    'sym_SOLUSDT',
-                    'sym_TRXUSDT',
-                    'sym_VETUSDT',
-                    'sym_XRPUSDT',
-                ]
-                self.model_version = "v1_default"
+            if self.model is None:
+                self._load_model_file()
+                if not self.enabled:
+                    return
             
             logger.info(
                 f"[ML] ✅ Model loaded: {self.model_version}, "
@@ -111,6 +107,38 @@ class MLPredictor:
             logger.error(f"[ML] Failed to load model: {e}", exc_info=True)
             self.enabled = False
     
+    def _load_model_file(self):
+        """Legacy layout: model_path + hand-written model_info.json."""
+        if not self.model_path.exists():
+            logger.error(f"[ML] Model file not found: {self.model_path}")
+            self.enabled = False
+            return
+        
+        # Load XGBoost model
+        self.model = xgb.XGBClassifier()
+        self.model.load_model(str(self.model_path))
+        
+        # Load feature info
+        info_path = self.model_path.parent / "model_info.json"
+        if info_path.exists():
+            with open(info_path, 'r') as f:
+                info = json.load(f)
+                self.features_used = info.get('feature_names', [])
+                self.model_version = f"v1_{info.get('training_samples', 0)}"
+        else:
+            # Default features from training
+            self.features_used = [
+                'spread_bps_entry',
+                'imbalance_entry',
+                'sym_ALGOUSDT',
+                'sym_LINKUSDT',
+                'sym_SOLUSDT',
+                'sym_TRXUSDT',
+                'sym_VETUSDT',
+                'sym_XRPUSDT',
+            ]
+            self.model_version = "v1_default"
+    
     async def predict(self, features: Dict[str, float]) -> float:
         """
         Predict TP probability for given features.
@@ -118,8 +146,9 @@ class MLPredictor:
         Args:
             features: Dict with keys:
                 - symbol: str (e.g. "LINKUSDT")
-                - spread_bps_entry: float
-                - imbalance_entry: float
+                - optional *_entry overrides (e.g. spread_bps_entry,
+                  imbalance_entry); everything else comes from the
+                  feature store snapshot
         
         Returns:
             Probability of TP (0.0 to 1.0)
@@ -148,23 +177,17 @@ class MLPredictor:
                 # Update timestamp
                 self._last_prediction[symbol] = now
                 
-                # Create feature dict with one-hot encoding for symbol
-                feature_dict = {
-                    'spread_bps_entry': features.get('spread_bps_entry', 5.0),
-                    'imbalance_entry': features.get('imbalance_entry', 0.5),
-                    'sym_ALGOUSDT': 1 if symbol == 'ALGOUSDT' else 0,
-                    'sym_LINKUSDT': 1 if symbol == 'LINKUSDT' else 0,
-                    'sym_SOLUSDT': 1 if symbol == 'SOLUSDT' else 0,
-                    'sym_TRXUSDT': 1 if symbol == 'TRXUSDT' else 0,
-                    'sym_VETUSDT': 1 if symbol == 'VETUSDT' else 0,
-                    'sym_XRPUSDT': 1 if symbol == 'XRPUSDT' else 0,
-                }
-                
-                # Create DataFrame in correct order
-                df = pd.DataFrame([feature_dict])
+                # Point-in-time features from the online store (same
+                # registry as MLTradeLogger / exports); values passed by the
+                # caller are fresher and override the stored ones.
+                values = get_feature_store().snapshot(symbol).as_dict()
+                for k, v in features.items():
+                    if k in FEATURE_INDEX and v is not None:
+                        values[k] = v
+                row = select_features(values, self.features_used, symbol=symbol)
                 
-                # Ensure columns are in the same order as training
-                df = df[self.features_used]
+                # DataFrame in training column order (sym_* one-hot resolved)
+                df = pd.DataFrame([row], columns=self.features_used)
                 
                 # ═══════════════════════════════════════════════════════════
                 # PREDICTION WITH TIMEOUT
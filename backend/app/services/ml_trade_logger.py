@@ -19,27 +19,57 @@ import time
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
-from dataclasses import asdict
 
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.db.session import SessionLocal
+from app.ml.features import FEATURE_NAMES
+from app.ml.feature_store import get_feature_store
 
 logger = logging.getLogger(__name__)
 
-# Phase 2: Enhanced tracking
-try:
-    from app.services.book_tracker_enhanced import get_enhanced_book_tracker
-    BOOK_ENHANCED_AVAILABLE = True
-except ImportError:
-    BOOK_ENHANCED_AVAILABLE = False
+# ml_trade_outcomes columns; *_entry market features come from the feature
+# registry so the logger, predictor and exports share one layout.
+_TRADE_COLUMNS = (
+    'trade_id', 'symbol', 'exchange', 'workspace_id',
+
+    # Entry
+    'entry_time', 'entry_price', 'entry_qty', 'entry_side',
+
+    # Market features at entry (registry order)
+    *FEATURE_NAMES,
+
+    # Time context
+    'hour_of_day', 'day_of_week', 'minute_of_hour',
+
+    # Strategy params
+    'take_profit_bps', 'stop_loss_bps',
+    'trailing_stop_enabled', 'trail_activation_bps', 'trail_distance_bps',
+    'timeout_seconds', 'exploration_mode',
+
+    # Exit
+    'exit_time', 'exit_price', 'exit_qty', 'exit_reason',
+
+    # Outcome
+    'pnl_usd', 'pnl_bps', 'pnl_percent', 'hold_duration_sec',
+
+    # Performance
+    'max_favorable_excursion_bps', 'max_adverse_excursion_bps',
+    'peak_price', 'lowest_price',
+
+    # ML labels
+    'win', 'hit_tp', 'hit_sl', 'hit_trailing', 'timed_out',
+
+    # Metadata
+    'created_at',
+)
+
+_INSERT_SQL = text(
+    f"INSERT INTO ml_trade_outcomes ({', '.join(_TRADE_COLUMNS)}) "
+    f"VALUES ({', '.join(':' + c for c in _TRADE_COLUMNS)})"
+)
 
-try:
-    from app.services.mm_detector import get_mm_detector
-    MM_DETECTOR_AVAILABLE = True
-except ImportError:
-    MM_DETECTOR_AVAILABLE = False
 
 class MLTradeLogger:
     """
@@ -94,8 +124,8 @@ class MLTradeLogger:
             return
         
         try:
-            # Extract all features from ScanRow
-            entry_snapshot = self._extract_features(scan_row)
+            # Snapshot features from the online store (scan_row merged first)
+            entry_snapshot = self._extract_features(scan_row, symbol)
             
             # Add trade metadata
             entry_snapshot.update({
@@ -224,192 +254,20 @@ class MLTradeLogger:
         except Exception as e:
             logger.error(f"Failed to log exit for {symbol}: {e}", exc_info=True)
     
-    def _extract_features(self, scan_row: Any) -> Dict[str, Any]:
+    def _extract_features(self, scan_row: Any, symbol: Optional[str] = None) -> Dict[str, Any]:
         """
-        Extract all 50+ features from ScanRow.
+        Entry features from the online feature store.
         
-        Returns dict with all market features.
+        The scan_row (ScanRow or dict) is merged into the store first — only
+        changed inputs trigger recomputation — then the symbol's vector is
+        copied out. Same registry as MLPredictor and training exports.
         """
-        # If scan_row is a dataclass, convert to dict
-        if hasattr(scan_row, '__dataclass_fields__'):
-            row_dict = asdict(scan_row)
-        elif isinstance(scan_row, dict):
-            row_dict = scan_row
-        else:
-            # Try to access attributes
-            row_dict = {}
-            for attr in dir(scan_row):
-                if not attr.startswith('_'):
-                    try:
-                        row_dict[attr] = getattr(scan_row, attr)
-                    except:
-                        pass
-        
-        # Extract depth details from depth_at_bps map with fallback to flat fields
-        depth_map = row_dict.get('depth_at_bps', {})
-        
-        # Try nested structure first
-        if isinstance(depth_map, dict) and 5 in depth_map:
-            depth5 = depth_map.get(5, {})
-            depth10 = depth_map.get(10, {})
-        else:
-            # Fallback to empty dicts (will use flat fields below)
-            depth5 = {}
-            depth10 = {}
-        
-        # Get depth values with fallback to flat fields
-        depth5_bid = depth5.get('bid_usd', 0.0) or row_dict.get('depth5_bid_usd', 0.0)
-        depth5_ask = depth5.get('ask_usd', 0.0) or row_dict.get('depth5_ask_usd', 0.0)
-        depth10_bid = depth10.get('bid_usd', 0.0) or row_dict.get('depth10_bid_usd', 0.0)
-        depth10_ask = depth10.get('ask_usd', 0.0) or row_dict.get('depth10_ask_usd', 0.0)
-        
-        features = {
-            # ═══════════════════════════════════════════════════════════
-            # BASE FEATURES (3)
-            # ═══════════════════════════════════════════════════════════
-            'spread_bps_entry': row_dict.get('spread_bps', 0.0),
-            'spread_pct_entry': row_dict.get('spread_pct', 0.0),
-            'spread_abs_entry': row_dict.get('spread_abs', 0.0),
-            'imbalance_entry': row_dict.get('imbalance', 0.5),
-            
-            # ═══════════════════════════════════════════════════════════
-            # EFFECTIVE SPREADS (6)
-            # ═══════════════════════════════════════════════════════════
-            'eff_spread_bps_entry': row_dict.get('eff_spread_bps', 0.0),
-            'eff_spread_pct_entry': row_dict.get('eff_spread_pct', 0.0),
-            'eff_spread_abs_entry': row_dict.get('eff_spread_abs', 0.0),
-            'eff_spread_maker_bps_entry': row_dict.get('eff_spread_bps_maker', 0.0),
-            'eff_spread_taker_bps_entry': row_dict.get('eff_spread_bps_taker', 0.0),
-            
-            # ═══════════════════════════════════════════════════════════
-            # DEPTH FEATURES (8)
-            # ═══════════════════════════════════════════════════════════
-            'depth5_bid_usd_entry': depth5_bid,
-            'depth5_ask_usd_entry': depth5_ask,
-            'depth10_bid_usd_entry': depth10_bid,
-            'depth10_ask_usd_entry': depth10_ask,
-            
-            # ═══════════════════════════════════════════════════════════
-            # VOLUME FEATURES (5)
-            # ═══════════════════════════════════════════════════════════
-            'base_volume_24h_entry': row_dict.get('base_volume_24h', 0.0),
-            'quote_volume_24h_entry': row_dict.get('quote_volume_24h', 0.0),
-            'trades_per_min_entry': row_dict.get('trades_per_min', 0.0),
-            'usd_per_min_entry': row_dict.get('usd_per_min', 0.0),
-            'median_trade_usd_entry': row_dict.get('median_trade_usd', 0.0),
-            
-            # ═══════════════════════════════════════════════════════════
-            # FEE STRUCTURE (3)
-            # ═══════════════════════════════════════════════════════════
-            'maker_fee_entry': row_dict.get('maker_fee', 0.0),
-            'taker_fee_entry': row_dict.get('taker_fee', 0.0),
-            'zero_fee_entry': int(row_dict.get('zero_fee', False)),
-            
-            # ═══════════════════════════════════════════════════════════
-            # VOLATILITY FEATURES - from candles_cache (6)
-            # ═══════════════════════════════════════════════════════════
-            'atr1m_pct_entry': row_dict.get('atr1m_pct', 0.0),
-            'spike_count_90m_entry': row_dict.get('spike_count_90m', 0),
-            'grinder_ratio_entry': row_dict.get('grinder_ratio', 0.0),
-            'pullback_median_retrace_entry': row_dict.get('pullback_median_retrace', 0.35),
-            'range_stable_pct_entry': row_dict.get('range_stable_pct', 0.0),
-            'vol_pattern_entry': row_dict.get('vol_pattern', 0),
-            
-            # ═══════════════════════════════════════════════════════════
-            # PATTERN SCORES (2)
-            # ═══════════════════════════════════════════════════════════
-            'dca_potential_entry': row_dict.get('dca_potential', 0),
-            'scanner_score_entry': row_dict.get('score', 0.0),
-            
-            # ═══════════════════════════════════════════════════════════
-            # WEBSOCKET METRICS (1)
-            # ═══════════════════════════════════════════════════════════
-            'ws_lag_ms_entry': row_dict.get('ws_lag_ms', 0) if row_dict.get('ws_lag_ms') else 0,
-            
-            # ═══════════════════════════════════════════════════════════
-            # DERIVED FEATURES (10)
-            # ═══════════════════════════════════════════════════════════
-            # Depth ratios
-            'depth_imbalance_entry': depth5_bid / depth5_ask if depth5_ask > 0 else 1.0,
-            'depth5_total_usd_entry': depth5_bid + depth5_ask,
-            'depth10_total_usd_entry': depth10_bid + depth10_ask,
-            'depth_ratio_5_to_10_entry': (depth5_bid + depth5_ask) / (depth10_bid + depth10_ask) if (depth10_bid + depth10_ask) > 0 else 0.5,
-            
-            # Spread/depth relationships
-            'spread_to_depth5_ratio_entry': row_dict.get('spread_bps', 0.0) / (depth5_bid + depth5_ask) if (depth5_bid + depth5_ask) > 0 else 0.0,
-            'volume_to_depth_ratio_entry': row_dict.get('usd_per_min', 0.0) / (depth5_bid + depth5_ask) if (depth5_bid + depth5_ask) > 0 else 0.0,
-            
-            # Volume ratios
-            'trades_per_dollar_entry': row_dict.get('trades_per_min', 0.0) / row_dict.get('usd_per_min', 1.0) if row_dict.get('usd_per_min', 0.0) > 0 else 0.0,
-            'avg_trade_size_entry': row_dict.get('usd_per_min', 0.0) / row_dict.get('trades_per_min', 1.0) if row_dict.get('trades_per_min', 0.0) > 0 else 0.0,
-            
-            # Price context
-            'mid_price_entry': (row_dict.get('bid', 0.0) + row_dict.get('ask', 0.0)) / 2.0,
-            'price_precision_entry': len(str(row_dict.get('bid', 0.0)).split('.')[-1]) if '.' in str(row_dict.get('bid', 0.0)) else 0,
-        }
-
-        # ═══════════════════════════════════════════════════════════
-        # PHASE 2 FEATURES (9) - Book Tracker + MM Detector
-        # ═══════════════════════════════════════════════════════════
-        if BOOK_ENHANCED_AVAILABLE:
-            try:
-                from app.services.book_tracker_enhanced import get_enhanced_book_tracker
-                book_tracker = get_enhanced_book_tracker()
-                book_metrics = book_tracker.get_metrics(row_dict.get('symbol', ''))
-                
-                if book_metrics:
-                    features['spoofing_score_entry'] = book_metrics.spoofing_score
-                    features['spread_stability_entry'] = book_metrics.spread_stability_score
-                    features['order_lifetime_avg_entry'] = book_metrics.order_lifetime_avg
-                    features['book_refresh_rate_entry'] = book_metrics.book_refresh_rate
-                else:
-                    features['spoofing_score_entry'] = 0.0
-                    features['spread_stability_entry'] = 0.5
-                    features['order_lifetime_avg_entry'] = 1.0
-                    features['book_refresh_rate_entry'] = 1.0
-            except Exception:
-                features['spoofing_score_entry'] = 0.0
-                features['spread_stability_entry'] = 0.5
-                features['order_lifetime_avg_entry'] = 1.0
-                features['book_refresh_rate_entry'] = 1.0
-        else:
-            features['spoofing_score_entry'] = 0.0
-            features['spread_stability_entry'] = 0.5
-            features['order_lifetime_avg_entry'] = 1.0
-            features['book_refresh_rate_entry'] = 1.0
-        
-        if MM_DETECTOR_AVAILABLE:
-            try:
-                from app.services.mm_detector import get_mm_detector
-                mm_detector = get_mm_detector()
-                mm_pattern = mm_detector.get_pattern(row_dict.get('symbol', ''))
-                
-                if mm_pattern:
-                    features['mm_detected_entry'] = 1
-                    features['mm_confidence_entry'] = mm_pattern.mm_confidence
-                    features['mm_safe_size_entry'] = mm_pattern.safe_order_size_usd
-                    features['mm_lower_bound_entry'] = mm_pattern.mm_lower_bound or 0.0
-                    features['mm_upper_bound_entry'] = mm_pattern.mm_upper_bound or 0.0
-                else:
-                    features['mm_detected_entry'] = 0
-                    features['mm_confidence_entry'] = 0.0
-                    features['mm_safe_size_entry'] = 50.0
-                    features['mm_lower_bound_entry'] = 0.0
-                    features['mm_upper_bound_entry'] = 0.0
-            except Exception:
-                features['mm_detected_entry'] = 0
-                features['mm_confidence_entry'] = 0.0
-                features['mm_safe_size_entry'] = 50.0
-                features['mm_lower_bound_entry'] = 0.0
-                features['mm_upper_bound_entry'] = 0.0
-        else:
-            features['mm_detected_entry'] = 0
-            features['mm_confidence_entry'] = 0.0
-            features['mm_safe_size_entry'] = 50.0
-            features['mm_lower_bound_entry'] = 0.0
-            features['mm_upper_bound_entry'] = 0.0
-        
-        return features
+        store = get_feature_store()
+        if symbol is None:
+            symbol = scan_row.get('symbol') if isinstance(scan_row, dict) else getattr(scan_row, 'symbol', '')
+        if scan_row is not None:
+            store.update_scan_row(scan_row, symbol=symbol)
+        return store.snapshot(symbol or '').as_record()
     
     def _save_to_db(self, record: Dict[str, Any]) -> None:
         """
@@ -418,84 +276,8 @@ class MLTradeLogger:
         db = SessionLocal()
         
         try:
-            # Build INSERT query
-            columns = [
-                'trade_id', 'symbol', 'exchange', 'workspace_id',
-                
-                # Entry
-                'entry_time', 'entry_price', 'entry_qty', 'entry_side',
-                
-                # Market features at entry
-                'spread_bps_entry', 'eff_spread_bps_entry',
-                'depth5_bid_usd_entry', 'depth5_ask_usd_entry',
-                'depth10_bid_usd_entry', 'depth10_ask_usd_entry',
-                'imbalance_entry',
-                'atr1m_pct_entry', 'grinder_ratio_entry', 'pullback_median_retrace_entry',
-                'trades_per_min_entry', 'usd_per_min_entry', 'median_trade_usd_entry',
-                
-                # Additional scanner features
-                'spread_pct_entry', 'spread_abs_entry',
-                'eff_spread_pct_entry', 'eff_spread_abs_entry',
-                'eff_spread_maker_bps_entry', 'eff_spread_taker_bps_entry',
-                'base_volume_24h_entry', 'quote_volume_24h_entry',
-                'maker_fee_entry', 'taker_fee_entry', 'zero_fee_entry',
-                
-                # Additional candle features
-                'spike_count_90m_entry', 'range_stable_pct_entry',
-                'vol_pattern_entry', 'dca_potential_entry',
-                
-                # Scores and metrics
-                'scanner_score_entry', 'ws_lag_ms_entry',
-                # Derived features
-                'depth_imbalance_entry', 'depth5_total_usd_entry', 'depth10_total_usd_entry',
-                'depth_ratio_5_to_10_entry', 'spread_to_depth5_ratio_entry',
-                'volume_to_depth_ratio_entry', 'trades_per_dollar_entry',
-                'avg_trade_size_entry', 'mid_price_entry', 'price_precision_entry',
-                
-                # Phase 2: Book Tracker features
-                'spoofing_score_entry', 'spread_stability_entry',
-                'order_lifetime_avg_entry', 'book_refresh_rate_entry',
-                
-                # Phase 2: MM Detector features
-                'mm_detected_entry', 'mm_confidence_entry', 'mm_safe_size_entry',
-                'mm_lower_bound_entry', 'mm_upper_bound_entry',
-                
-                # Time context
-                'hour_of_day', 'day_of_week', 'minute_of_hour',
-                
-                # Strategy params
-                'take_profit_bps', 'stop_loss_bps',
-                'trailing_stop_enabled', 'trail_activation_bps', 'trail_distance_bps',
-                'timeout_seconds', 'exploration_mode',
-                
-                # Exit
-                'exit_time', 'exit_price', 'exit_qty', 'exit_reason',
-                
-                # Outcome
-                'pnl_usd', 'pnl_bps', 'pnl_percent', 'hold_duration_sec',
-                
-                # Performance
-                'max_favorable_excursion_bps', 'max_adverse_excursion_bps',
-                'peak_price', 'lowest_price',
-                
-                # ML labels
-                'win', 'hit_tp', 'hit_sl', 'hit_trailing', 'timed_out',
-                
-                # Metadata
-                'created_at',
-            ]
-            
-            # Build placeholders
-            placeholders = ', '.join([f':{col}' for col in columns])
-            columns_str = ', '.join(columns)
-            
-            query = text(
-                f"INSERT INTO ml_trade_outcomes ({columns_str}) "
-                f"VALUES ({placeholders})"
-            )
-            
             # Execute
-            db.execute(query, record)
+            db.execute(_INSERT_SQL, record)
             db.commit()
             
             logger.debug(f"✅ Saved to DB: {record['trade_id']}")
@@ -25,6 +25,13 @@ try:
 except ImportError:
     TAPE_AVAILABLE = False
 
+# ML feature store (optional)
+try:
+    from app.ml.feature_store import get_feature_store
+    FEATURE_STORE_AVAILABLE = True
+except ImportError:
+    FEATURE_STORE_AVAILABLE = False
+
 
 def utc_now() -> datetime:
     """Get current UTC time with timezone"""
@@ -238,6 +245,7 @@ class MMDetector:
         )
         
         if confidence < self.min_confidence:
+            self._publish_features(symbol, None)
             return None
         
         # Calculate recommendations
@@ -266,8 +274,31 @@ class MMDetector:
         
         # Cache
         self._patterns[symbol] = pattern
+        self._publish_features(symbol, pattern)
         
         return pattern
+
+    def _publish_features(self, symbol: str, pattern: Optional[MMPattern]) -> None:
+        """Push MM features into the online feature store"""
+        if not FEATURE_STORE_AVAILABLE:
+            return
+        try:
+            if pattern is None:
+                raw = {
+                    'mm_detected': 0, 'mm_confidence': 0.0, 'mm_safe_size': 50.0,
+                    'mm_lower_bound': 0.0, 'mm_upper_bound': 0.0,
+                }
+            else:
+                raw = {
+                    'mm_detected': 1,
+                    'mm_confidence': pattern.mm_confidence,
+                    'mm_safe_size': pattern.safe_order_size_usd,
+                    'mm_lower_bound': pattern.mm_lower_bound or 0.0,
+                    'mm_upper_bound': pattern.mm_upper_bound or 0.0,
+                }
+            get_feature_store().update(symbol, raw)
+        except Exception:
+            pass
     
     def _find_mm_boundary(
         self,
@@ -3,10 +3,16 @@ REST-based price poller as fallback/primary data source.
 Polls MEXC REST API every few seconds and caches prices.
 """
 import asyncio
+import json
 import time
 from typing import Dict, Optional
 import httpx
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 class PricePoller:
     """Polls prices via REST API and caches them."""
@@ -53,25 +59,33 @@ class PricePoller:
             # MEXC ticker endpoint - gets all tickers at once
             resp = await client.get("https://api.mexc.com/api/v3/ticker/bookTicker")
             resp.raise_for_status()
-            data = resp.json()
-            
-            # Update cache
-            now = time.time()
-            for item in data:
-                symbol = item.get("symbol", "").upper()
-                if symbol in [s.upper() for s in symbols]:
-                    bid = float(item.get("bidPrice", 0))
-                    ask = float(item.get("askPrice", 0))
-                    mid = (bid + ask) / 2 if bid and ask else 0
-                    
-                    self.prices[symbol] = {
-                        "bid": bid,
-                        "ask": ask,
-                        "mid": mid,
-                        "timestamp": now
-                    }
+            data = orjson.loads(resp.content) if orjson is not None else json.loads(resp.content)
+            self._apply(data, symbols, time.time())
         except Exception as e:
             print(f"⚠️ Failed to fetch prices: {e}")
+
+    def _apply(self, data: list, symbols: list[str], now: float) -> int:
+        """Update the cache from an all-symbols payload; returns how many prices changed."""
+        wanted = {s.upper() for s in symbols}
+        changed = 0
+        for item in data:
+            symbol = item.get("symbol", "")
+            if symbol not in wanted:
+                continue
+            bid = float(item.get("bidPrice", 0))
+            ask = float(item.get("askPrice", 0))
+            cur = self.prices.get(symbol)
+            if cur is not None and cur["bid"] == bid and cur["ask"] == ask:
+                cur["timestamp"] = now
+                continue
+            self.prices[symbol] = {
+                "bid": bid,
+                "ask": ask,
+                "mid": (bid + ask) / 2 if bid and ask else 0,
+                "timestamp": now,
+            }
+            changed += 1
+        return changed
             
     def get_price(self, symbol: str) -> Optional[dict]:
         """Get cached price for a symbol."""
@@ -5,6 +5,7 @@ Task Scheduler
 
 import asyncio
 import logging
+import time
 from datetime import datetime, time as dt_time, timedelta, timezone
 from typing import Optional
 
@@ -36,6 +37,10 @@ class TaskScheduler:
         # Запустить задачу проверки daily reset для рисков
         daily_reset_task = asyncio.create_task(self._daily_risk_reset_loop())
         self._tasks.append(daily_reset_task)
+
+        # Запустить инкрементальный rollup pnl_ledger → pnl_daily
+        pnl_rollup_task = asyncio.create_task(self._pnl_rollup_loop())
+        self._tasks.append(pnl_rollup_task)
     
     async def stop(self):
         """Остановить планировщик"""
@@ -108,9 +113,9 @@ class TaskScheduler:
             try:
                 success = await generate_and_send_daily_report(db)
                 if success:
-                    logger.info("✅ Daily report sent")
+                    logger.info("✅ Daily report queued")
                 else:
-                    logger.error("❌ Failed to send daily report")
+                    logger.error("❌ Failed to queue daily report")
             finally:
                 db.close()
         
@@ -154,6 +159,72 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"Error in daily risk reset loop: {e}")
 
+    # ═══════════════════════════════════════════════════════════
+    # PNL DAILY ROLLUP TASK
+    # ═══════════════════════════════════════════════════════════
+
+    async def _pnl_rollup_loop(self):
+        """
+        Цикл инкрементального rollup pnl_ledger → pnl_daily
+        (только новые строки леджера после watermark) плюс периодический
+        полный пересчёт вчера+сегодня — подбирает строки, закоммиченные позже
+        (Postgres: id ниже уже сдвинутого watermark)
+        """
+        try:
+            from app.config.settings import settings
+            interval = int(getattr(settings, "pnl_rollup_interval_sec", 60))
+            reconcile = int(getattr(settings, "pnl_rollup_reconcile_sec", 3600))
+        except Exception:
+            interval, reconcile = 60, 3600
+        if interval <= 0:
+            logger.info("📒 PnL rollup task disabled")
+            return
+
+        logger.info(f"📒 PnL rollup task started (every {interval}s, reconcile every {reconcile}s)")
+
+        try:
+            last_reconcile = time.monotonic()
+            while self._running:
+                await asyncio.sleep(interval)
+
+                if not self._running:
+                    break
+
+                do_reconcile = reconcile > 0 and time.monotonic() - last_reconcile >= reconcile
+                try:
+                    await asyncio.to_thread(self._run_pnl_rollup, do_reconcile)
+                    if do_reconcile:
+                        last_reconcile = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Error in PnL rollup: {e}")
+
+        except asyncio.CancelledError:
+            logger.info("📒 PnL rollup task cancelled")
+        except Exception as e:
+            logger.error(f"Error in PnL rollup loop: {e}")
+
+    @staticmethod
+    def _run_pnl_rollup(reconcile: bool = False) -> int:
+        from app.db.session import SessionLocal
+        from app.pnl.eod_rollup import rollup_incremental, rollup_range
+
+        db = SessionLocal()
+        try:
+            if reconcile:
+                today = datetime.now(timezone.utc).date()
+                touched = rollup_range(db, today - timedelta(days=1), today)
+            else:
+                touched = rollup_incremental(db)
+            db.commit()
+            if touched:
+                logger.debug(f"📒 PnL rollup: {touched} pnl_daily rows updated")
+            return touched
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
 
 # ═══════════════════════════════════════════════════════════
 # SINGLETON INSTANCE
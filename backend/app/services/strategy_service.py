@@ -1,22 +1,20 @@
 # app/services/strategy_service.py
 from __future__ import annotations
 
-import json
-import hashlib
-import time
-from typing import Any, Awaitable, Callable, Dict, Tuple, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 from sqlalchemy.orm import Session  # Для DB access в stop_all_symbols
 
 from app.db.session import SessionLocal  # Для local session
 from app.models.strategy_state import StrategyState  # Assume модель для strategy_state table
+from app.services.idempotency import IdempotencyConflict, IdempotencyInProgress, get_idempotency_store
 
 
 class StrategyService:
     """
-    Простейший in-memory сервис идемпотентности (на процесс) + базовая логика стратегий.
+    Идемпотентное выполнение операций стратегий + базовая логика стратегий.
     - Ключ неймспейсится по op_name: (op_name, idempotency_key)
     - Для payload считаем стабильный JSON-хэш (sort_keys=True)
-    - TTL-очистка и мягкий лимит размера кэша
+    - Хранение/TTL — общий IdempotencyStore (app.services.idempotency)
     - stop_all_symbols: очищает strategy_state в DB (stop all per-symbol strategies)
     """
 
@@ -27,14 +25,11 @@ class StrategyService:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, ttl_seconds: int = 30, max_entries: int = 2048):
+    def __init__(self, ttl_seconds: int = 30):
         if hasattr(self, '_initialized'):
             return  # Уже init
         self._initialized = True
         self.ttl_seconds = int(ttl_seconds)
-        self.max_entries = int(max_entries)
-        # store[(op_name, key)] = {"hash": str, "result": dict, "ts": float}
-        self._store: Dict[Tuple[str, str], Dict[str, Any]] = {}
 
     @classmethod
     def get(cls) -> "StrategyService":
@@ -47,24 +42,6 @@ class StrategyService:
     def _norm_key(s: str) -> str:
         return (s or "").strip()
 
-    @staticmethod
-    def _hash_payload(payload: Dict[str, Any]) -> str:
-        dumped = json.dumps(payload or {}, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-        return hashlib.sha256(dumped.encode("utf-8")).hexdigest()
-
-    def _gc(self, now: float) -> None:
-        """TTL-очистка + мягкое ограничение по размеру."""
-        ttl = self.ttl_seconds
-        if ttl > 0:
-            self._store = {k: v for k, v in self._store.items() if now - v.get("ts", 0.0) <= ttl}
-        # мягкий лимит: если много записей — усечём самые старые
-        overflow = len(self._store) - self.max_entries
-        if overflow > 0:
-            # сортировка по ts возр.
-            items = sorted(self._store.items(), key=lambda kv: kv[1].get("ts", 0.0))
-            for k, _ in items[:overflow]:
-                self._store.pop(k, None)
-
     async def execute_idempotent(
         self,
         op_name: str,
@@ -72,9 +49,6 @@ class StrategyService:
         payload: Dict[str, Any],
         action: Callable[[], Awaitable[Dict[str, Any]]],
     ) -> Dict[str, Any]:
-        now = time.time()
-        self._gc(now)
-
         op = self._norm_key(op_name) or "default"
         key = self._norm_key(idempotency_key)
         if not key:
@@ -84,32 +58,29 @@ class StrategyService:
             out.setdefault("idempotent", False)
             return out
 
-        storage_key = (op, key)
-        payload_hash = self._hash_payload(payload)
-
-        if storage_key in self._store:
-            entry = self._store[storage_key]
-            if entry["hash"] != payload_hash:
-                return {
-                    "ok": False,
-                    "error": "IdempotencyKeyConflict",
-                    "detail": f"Key {key} reused with different payload",
-                }
-            out = dict(entry["result"])
-            out["idempotent"] = True
+        async def _run() -> Dict[str, Any]:
+            out = dict(await action())
+            out["idempotent"] = False
             return out
 
-        # Выполнение действия
-        result = await action()
-        out = dict(result)
-        out["idempotent"] = False
-
-        # Сохранение
-        self._store[storage_key] = {
-            "hash": payload_hash,
-            "result": out,
-            "ts": now,
-        }
+        try:
+            out, replayed = await get_idempotency_store().execute(
+                op, key, _run, payload=payload or {}, ttl=self.ttl_seconds
+            )
+        except IdempotencyConflict:
+            return {
+                "ok": False,
+                "error": "IdempotencyKeyConflict",
+                "detail": f"Key {key} reused with different payload",
+            }
+        except IdempotencyInProgress:
+            return {
+                "ok": False,
+                "error": "IdempotencyKeyInProgress",
+                "detail": f"Key {key} is still being processed",
+            }
+        if replayed:
+            out["idempotent"] = True
         return out
 
     async def stop_all_symbols(self, db: Optional[Session] = None) -> Dict[str, Any]:
@@ -0,0 +1,150 @@
+# app/services/symbol_stats.py
+"""
+Materialised per-symbol trade performance (symbol_perf_stats).
+
+record_trade_closed() folds one closed trade into its symbol's row with a
+single INSERT ... ON CONFLICT DO UPDATE (sums are updated in SQL, so
+concurrent closes of the same symbol don't lose updates). Readers such as
+allocation_manager then fetch every symbol in one query via
+load_symbol_stats().
+
+rebuild_symbol_stats() recomputes the table from `trades` in one streamed
+pass — used to backfill on startup and to repair drift.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.symbol_perf_stats import SymbolPerfStats
+from app.models.trades import Trade
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+# decay of the recent_* sums per closed trade (~ last 100 trades)
+RECENT_DECAY = 0.99
+
+_SUMS = ("trade_count", "win_count", "pnl_usd_sum", "pnl_bps_sum", "hold_sec_sum")
+_RECENT = ("recent_weight", "recent_wins", "recent_pnl_bps", "recent_spread_bps")
+
+
+def _contribution(symbol: str, pnl_usd, pnl_bps, hold_sec, spread_bps, exit_time) -> Dict[str, Any]:
+    win = 1 if (pnl_usd or 0) > 0 else 0
+    return {
+        "symbol": symbol,
+        "trade_count": 1,
+        "win_count": win,
+        "pnl_usd_sum": float(pnl_usd or 0.0),
+        "pnl_bps_sum": float(pnl_bps or 0.0),
+        "hold_sec_sum": float(hold_sec or 0.0),
+        "recent_weight": 1.0,
+        "recent_wins": float(win),
+        "recent_pnl_bps": float(pnl_bps or 0.0),
+        "recent_spread_bps": float(spread_bps or 0.0),
+        "last_exit_time": exit_time,
+    }
+
+
+def _upsert_stmt(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as _insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as _insert
+    else:
+        return None
+    t = SymbolPerfStats.__table__
+    stmt = _insert(t)
+    set_ = {c: t.c[c] + stmt.excluded[c] for c in _SUMS}
+    set_.update({c: t.c[c] * RECENT_DECAY + stmt.excluded[c] for c in _RECENT})
+    set_["last_exit_time"] = func.coalesce(stmt.excluded.last_exit_time, t.c.last_exit_time)
+    set_["updated_at"] = func.current_timestamp()
+    return stmt.on_conflict_do_update(index_elements=[t.c.symbol], set_=set_)
+
+
+def record_trade_closed(db: Session, trade: Trade) -> bool:
+    """
+    Fold a just-closed trade into symbol_perf_stats (same transaction, no commit).
+    Runs in a savepoint and never raises: a stats failure must not lose the trade.
+    """
+    if not trade.symbol:
+        return False
+    row = _contribution(trade.symbol, trade.pnl_usd, trade.pnl_bps, trade.hold_duration_sec,
+                        trade.spread_bps_entry, trade.exit_time)
+    try:
+        with db.begin_nested():
+            stmt = _upsert_stmt(db)
+            if stmt is not None:
+                db.execute(stmt, row)
+            else:
+                cur = db.get(SymbolPerfStats, trade.symbol)
+                if cur is None:
+                    db.add(SymbolPerfStats(**row))
+                else:
+                    for c in _SUMS:
+                        setattr(cur, c, getattr(cur, c) + row[c])
+                    for c in _RECENT:
+                        setattr(cur, c, getattr(cur, c) * RECENT_DECAY + row[c])
+                    cur.last_exit_time = row["last_exit_time"] or cur.last_exit_time
+        return True
+    except Exception as e:
+        logger.warning(f"symbol_perf_stats update failed for {trade.symbol}: {e}")
+        return False
+
+
+def rebuild_symbol_stats(db: Session, chunk_rows: int = 1000) -> int:
+    """
+    Recompute symbol_perf_stats from all CLOSED trades (streamed, in close order).
+    Returns the number of symbols written. Does not commit.
+    """
+    q = (
+        select(Trade.symbol, Trade.pnl_usd, Trade.pnl_bps, Trade.hold_duration_sec,
+               Trade.spread_bps_entry, Trade.exit_time)
+        .where(Trade.status == "CLOSED")
+        .order_by(func.coalesce(Trade.exit_time, Trade.created_at), Trade.id)
+        .execution_options(stream_results=True, yield_per=chunk_rows)
+    )
+    acc: Dict[str, Dict[str, Any]] = {}
+    for r in db.execute(q):
+        c = _contribution(*r)
+        cur = acc.get(c["symbol"])
+        if cur is None:
+            acc[c["symbol"]] = c
+            continue
+        for k in _SUMS:
+            cur[k] += c[k]
+        for k in _RECENT:
+            cur[k] = cur[k] * RECENT_DECAY + c[k]
+        cur["last_exit_time"] = c["last_exit_time"] or cur["last_exit_time"]
+
+    db.execute(delete(SymbolPerfStats))
+    if acc:
+        db.execute(SymbolPerfStats.__table__.insert(), list(acc.values()))
+    db.flush()
+    return len(acc)
+
+
+def ensure_symbol_stats(db: Session) -> int:
+    """Backfill symbol_perf_stats once if it is empty but closed trades exist."""
+    if db.execute(select(SymbolPerfStats.symbol).limit(1)).first() is not None:
+        return 0
+    if db.execute(select(Trade.id).where(Trade.status == "CLOSED").limit(1)).first() is None:
+        return 0
+    n = rebuild_symbol_stats(db)
+    db.commit()
+    logger.info(f"symbol_perf_stats backfilled for {n} symbols")
+    return n
+
+
+def load_symbol_stats(db: Session, symbols: Optional[Iterable[str]] = None) -> Dict[str, SymbolPerfStats]:
+    """{symbol: SymbolPerfStats} for the given symbols (all if None) — one query."""
+    q = select(SymbolPerfStats)
+    if symbols is not None:
+        syms = list(symbols)
+        if not syms:
+            return {}
+        q = q.where(SymbolPerfStats.symbol.in_(syms))
+    return {s.symbol: s for s in db.execute(q).scalars()}
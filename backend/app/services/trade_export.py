@@ -0,0 +1,140 @@
+"""
+Streaming trade export (CSV / NDJSON).
+
+Rows are read with a server-side cursor (stream_results + yield_per) as
+plain column tuples — no ORM objects, no identity map — and encoded into
+text chunks of `chunk_rows` rows. Memory stays flat no matter how many
+trades match; the generators are synchronous, so StreamingResponse drives
+them from the threadpool and the event loop is never blocked by the DB.
+
+Usage:
+    from app.services.trade_export import TradeExportFilter, iter_trades_csv
+
+    flt = TradeExportFilter(start=datetime(2026, 1, 1), symbols=["BTCUSDT"])
+    for chunk in iter_trades_csv(flt):
+        out.write(chunk)
+"""
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from io import StringIO
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import desc, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.trades import Trade
+
+DEFAULT_CHUNK_ROWS = 1000
+
+# CSV layout of /api/trades/export: (header, column, format)
+CSV_COLUMNS = [
+    ("Entry Time", "entry_time", None),
+    ("Exit Time", "exit_time", None),
+    ("Symbol", "symbol", None),
+    ("Entry Side", "entry_side", None),
+    ("Status", "status", None),
+    ("Entry Price", "entry_price", "{:.8f}"),
+    ("Exit Price", "exit_price", "{:.8f}"),
+    ("Entry Qty", "entry_qty", "{:.8f}"),
+    ("P&L USD", "pnl_usd", "{:.4f}"),
+    ("P&L %", "pnl_percent", "{:.2f}"),
+    ("Total Fee", "total_fee", "{:.4f}"),
+    ("Hold Duration (sec)", "hold_duration_sec", "{:.2f}"),
+    ("Exit Reason", "exit_reason", None),
+    ("Strategy Tag", "strategy_tag", None),
+]
+
+
+@dataclass
+class TradeExportFilter:
+    """Filters on entry_time [start, end), symbol list and status."""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    symbols: List[str] = field(default_factory=list)
+    status: Optional[str] = None
+
+
+def _query(flt: TradeExportFilter, columns):
+    q = select(*columns).order_by(desc(Trade.entry_time), desc(Trade.id))
+    if flt.start is not None:
+        q = q.where(Trade.entry_time >= flt.start)
+    if flt.end is not None:
+        q = q.where(Trade.entry_time < flt.end)
+    if flt.symbols:
+        syms = [s.strip().upper() for s in flt.symbols if s and s.strip()]
+        q = q.where(Trade.symbol == syms[0]) if len(syms) == 1 else q.where(Trade.symbol.in_(syms))
+    if flt.status:
+        q = q.where(Trade.status == flt.status.upper())
+    return q
+
+
+def _iter_rows(
+    flt: TradeExportFilter,
+    columns,
+    chunk_rows: int,
+    session_factory: Optional[Callable[[], Session]],
+) -> Iterator[list]:
+    """Yield lists of at most `chunk_rows` rows; the session lives as long as the generator."""
+    db = (session_factory or SessionLocal)()
+    try:
+        result = db.execute(
+            _query(flt, columns).execution_options(stream_results=True, yield_per=chunk_rows)
+        )
+        for part in result.partitions():
+            yield part
+    finally:
+        db.close()
+
+
+def _fmt(value, spec: Optional[str]) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if spec is not None:
+        return spec.format(value) if value else ""
+    return str(value)
+
+
+def iter_trades_csv(
+    flt: TradeExportFilter,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> Iterator[str]:
+    """CSV text: header chunk, then one chunk per `chunk_rows` trades."""
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([h for h, _, _ in CSV_COLUMNS])
+    yield buf.getvalue()
+
+    specs = [spec for _, _, spec in CSV_COLUMNS]
+    columns = [Trade.__table__.c[name] for _, name, _ in CSV_COLUMNS]
+    for part in _iter_rows(flt, columns, chunk_rows, session_factory):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([_fmt(v, s) for v, s in zip(row, specs)] for row in part)
+        yield buf.getvalue()
+
+
+def _json_default(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return str(v)
+
+
+def iter_trades_ndjson(
+    flt: TradeExportFilter,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> Iterator[str]:
+    """One JSON object per trade and line (all trade columns, same keys as Trade.to_dict)."""
+    columns = list(Trade.__table__.c)
+    keys = [c.name for c in columns]
+    dumps = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+    for part in _iter_rows(flt, columns, chunk_rows, session_factory):
+        yield "".join(dumps(dict(zip(keys, row))) + "\n" for row in part)
@@ -33,6 +33,7 @@ _db_semaphore = asyncio.Semaphore(5)  # Max 5 concurrent DB operations
 
 from app.models.trades import Trade
 from app.db.session import SessionLocal
+from app.services.symbol_stats import record_trade_closed
 from zoneinfo import ZoneInfo
 
 
@@ -53,8 +54,21 @@ from app.services.mm_detector import get_mm_detector
 from app.services.position_sizer import get_position_sizer, SizingMode
 from app.execution.smart_executor import get_smart_executor
 from app.config.settings import settings
-from app.services.book_tracker import ensure_symbols_subscribed
+from app.services.book_tracker import ensure_symbols_subscribed, release_symbols
+from app.infra.tracing import get_tracer
+from app.services.logger import get_logger
 from app.strategy.risk import get_risk_manager, calculate_dynamic_sl
+from app.strategy.scheduler import (
+    StrategyScheduler,
+    EV_FILL,
+    EV_PARAMS,
+    FLAT,
+    ENTERING,
+    IN_POSITION,
+    EXITING,
+)
+
+logger = get_logger(__name__)
 
 # Metrics are optional; guard imports so the engine never crashes without them
 try:
@@ -81,12 +95,12 @@ try:
     # ✅ ПРОВЕРЯЕМ РЕАЛЬНЫЙ СТАТУС:
     from app.services.exploration import exploration_manager
     if exploration_manager.config.enabled:
-        print(f"[STRAT] ✅ Exploration enabled (rate={exploration_manager.config.exploration_rate:.0%})")
+        logger.info(f"[STRAT] ✅ Exploration enabled (rate={exploration_manager.config.exploration_rate:.0%})")
     else:
-        print("[STRAT] ⚠️ Exploration disabled")
+        logger.warning("[STRAT] ⚠️ Exploration disabled")
 except Exception as e:
     _EXPLORATION_OK = False
-    print(f"[STRAT] ⚠️ Exploration unavailable: {e}")
+    logger.warning(f"[STRAT] ⚠️ Exploration unavailable: {e}")
 # ═══════════════════════════════════════════════════════════════
 
 
@@ -188,6 +202,14 @@ class StrategyEngine:
         self._symbols: Dict[str, SymbolState] = {}
         self._lock = asyncio.Lock()
 
+        # symbol loops park here until a quote / fill / timer / param event
+        self._sched = StrategyScheduler(idle_wake_ms=settings.strategy_idle_wake_ms)
+        try:
+            from app.market_data.book_tracker import book_tracker
+            book_tracker.add_listener(self._sched.on_quote)
+        except Exception:
+            pass
+
     # ───────── public operations ─────────
     async def start_symbols(self, symbols: List[str]) -> None:
         """Start (or restart) trading for the given symbols (respecting max_concurrent_symbols)."""
@@ -198,12 +220,12 @@ class StrategyEngine:
         # Filter out blacklisted symbols
         syms = [s for s in syms if s not in SYMBOL_BLACKLIST]
         if not syms:
-            print("[STRAT] All symbols blacklisted, nothing to start")
+            logger.info("[STRAT] All symbols blacklisted, nothing to start")
             return
 
         # Ensure quotes are flowing (works across providers)
         try:
-            await ensure_symbols_subscribed(syms)
+            await ensure_symbols_subscribed(syms, consumer="strategy")
         except Exception:
             pass
 
@@ -226,6 +248,7 @@ class StrategyEngine:
                 st.running = True
                 st.last_error = ""
                 st.cooldown_reset_at_ms = int(time.time() * 1000)  # clear local cooldown
+                self._sched.register(sym)
                 st.task = asyncio.create_task(self._symbol_loop(sym))
 
                 # Let the execution port warm any per-symbol state
@@ -242,11 +265,11 @@ class StrategyEngine:
                     except Exception:
                         pass
 
-                print(f"[STRAT] ▶ start {sym}")
+                logger.info(f"[STRAT] ▶ start {sym}")
 
             skipped = set(syms) - set(to_start)
             if skipped:
-                print(
+                logger.warning(
                     f"[STRAT] ⚠ max_concurrent_symbols={self._params.max_concurrent_symbols}; "
                     f"skipped: {sorted(skipped)}"
                 )
@@ -299,8 +322,15 @@ class StrategyEngine:
                 # CHANGED: если таск уже завершён — подчистим словарь
                 if not (st.task and not st.task.done()):
                     self._symbols.pop(sym, None)
+                    self._sched.unregister(sym)
+
+                logger.info(f"[STRAT] ⏹ stop {sym}")
 
-                print(f"[STRAT] ⏹ stop {sym}")
+        # upstream feed is dropped after the registry grace period unless someone else holds it
+        try:
+            await release_symbols(syms, consumer="strategy")
+        except Exception:
+            pass
 
     async def stop_all(self, flatten: bool = False) -> None:
         """Stop all active symbols."""
@@ -366,7 +396,7 @@ class StrategyEngine:
             
         except Exception as e:
             # If timezone parsing fails, log and allow trading (fail open)
-            print(f"[SCHEDULE] ⚠️ Error checking schedule: {e}")
+            logger.warning(f"[SCHEDULE] ⚠️ Error checking schedule: {e}")
             return True, "check_error"
     
     def _should_close_before_end(self) -> tuple[bool, str]:
@@ -402,13 +432,13 @@ class StrategyEngine:
             return False, "ok"
             
         except Exception as e:
-            print(f"[SCHEDULE] ⚠️ Error checking close window: {e}")
+            logger.warning(f"[SCHEDULE] ⚠️ Error checking close window: {e}")
             return False, "check_error"
 
     # ───────── per-symbol loop ─────────
     async def _symbol_loop(self, symbol: str) -> None:
         sym = symbol.upper()
-        print(f"[STRAT:{sym}] loop started")
+        logger.info(f"[STRAT:{sym}] loop started")
 
         if _METRICS_OK:
             try:
@@ -416,7 +446,14 @@ class StrategyEngine:
             except Exception:
                 pass
 
-        poll_ms = 50  # ✅ FIX: Faster reaction (was 120ms, price can move 1%+ in 120ms)
+        # Event-driven: instead of re-evaluating every 50 ms, park until the
+        # scheduler sees a quote / fill / armed timer / param change.
+        sched = self._sched
+        tracer = get_tracer()
+
+        async def _park() -> int:
+            sched.set_phase(sym, IN_POSITION if in_pos else FLAT)
+            return await sched.wait(sym)
 
         # ═══════════════════════════════════════════════════════════
         # PYRAMID: Track list of positions (NEW)
@@ -474,7 +511,7 @@ class StrategyEngine:
 
                 # 🚫 BLACKLIST CHECK - safety net in case symbol was started before blacklist
                 if sym in SYMBOL_BLACKLIST:
-                    print(f"[STRAT:{sym}] 🚫 BLACKLISTED - stopping immediately")
+                    logger.warning(f"[STRAT:{sym}] 🚫 BLACKLISTED - stopping immediately")
                     st.running = False
                     return
 
@@ -534,7 +571,7 @@ class StrategyEngine:
                 
                 
                 if bid <= 0.0 or ask <= 0.0 or mid <= 0.0:
-                    await asyncio.sleep(poll_ms / 1000)
+                    await _park()
                     continue
 
                 now = time.time()
@@ -543,7 +580,8 @@ class StrategyEngine:
                 if not in_pos:
                     # re-enter cooldown
                     if (now * 1000 - last_exit_ts_ms) < p.reenter_cooldown_ms:
-                        await asyncio.sleep(poll_ms / 1000)
+                        sched.arm(sym, (last_exit_ts_ms + p.reenter_cooldown_ms) / 1000.0)
+                        await _park()
                         continue
 
                     # ⏰ SCHEDULE CHECK - block entry outside trading window
@@ -551,17 +589,17 @@ class StrategyEngine:
                     if not allowed:
                         if not hasattr(st, '_last_schedule_log') or (now - st._last_schedule_log) > 30:
                             st._last_schedule_log = now
-                            print(f"[STRAT:{sym}] ⏰ Trading not allowed: {reason}")
-                        await asyncio.sleep(poll_ms / 1000)
+                            logger.info(f"[STRAT:{sym}] ⏰ Trading not allowed: {reason}")
+                        await _park()
                         continue
 
 
                     # 🔍 DEBUG: Print what we see every 10 seconds
                     if not hasattr(st, '_last_debug') or (now - st._last_debug) > 10:
                         st._last_debug = now
-                        print(f"[STRAT:{sym}] 🔍 bid={bid:.6f} ask={ask:.6f} mid={mid:.6f} "
-                              f"spread_bps={spread_bps:.2f} imb={imb:.3f} "
-                              f"min_spread={p.min_spread_bps} edge_floor={p.edge_floor_bps}")
+                        logger.debug(f"[STRAT:{sym}] 🔍 bid={bid:.6f} ask={ask:.6f} mid={mid:.6f} "
+                                     f"spread_bps={spread_bps:.2f} imb={imb:.3f} "
+                                     f"min_spread={p.min_spread_bps} edge_floor={p.edge_floor_bps}")
 
                     # debug bypass for demo/testnets
                     if p.debug_force_entry:
@@ -589,8 +627,8 @@ class StrategyEngine:
                                         strategy_edge_bps_at_entry.labels(sym).observe(max(0.0, spread_bps))
                                     except Exception:
                                         pass
-                                print(f"[STRAT:{sym}] DEBUG ENTRY BUY qty={qty_units:.6f} @ {bid}")
-                        await asyncio.sleep(poll_ms / 1000)
+                                logger.info(f"[STRAT:{sym}] DEBUG ENTRY BUY qty={qty_units:.6f} @ {bid}")
+                        await _park()
                         continue
 
                     # entry filters (spot, long-only)
@@ -608,8 +646,9 @@ class StrategyEngine:
                     spread_ok = spread_bps <= MAX_SPREAD_BPS
                     if not spread_ok and not hasattr(st, '_last_spread_warn') or (now - getattr(st, '_last_spread_warn', 0)) > 60:
                         st._last_spread_warn = now
-                        print(f"[STRAT:{sym}] ⚠️ TOXIC SPREAD: {spread_bps:.1f} bps > {MAX_SPREAD_BPS} - SKIPPING ENTRY")
+                        logger.warning(f"[STRAT:{sym}] ⚠️ TOXIC SPREAD: {spread_bps:.1f} bps > {MAX_SPREAD_BPS} - SKIPPING ENTRY")
                     # ═══════════════════════════════════════════════════════════
+                    tracer.mark(sym, "decision")
 
                     # ═══════════════════════════════════════════════════════
                     # RISK CHECKS BEFORE ENTRY
@@ -624,7 +663,7 @@ class StrategyEngine:
                             # Check every 30 seconds if we should log halt reason
                             if not hasattr(st, '_last_halt_log') or (now - st._last_halt_log) > 30:
                                 st._last_halt_log = now
-                                print(f"[STRAT:{sym}] ⚠️ Trading halted: {risk_manager.state.halt_reason or 'unknown'}")
+                                logger.warning(f"[STRAT:{sym}] ⚠️ Trading halted: {risk_manager.state.halt_reason or 'unknown'}")
                         
                         # Check symbol-specific cooldown
                         elif risk_manager.is_symbol_on_cooldown(sym):
@@ -639,12 +678,13 @@ class StrategyEngine:
                             risk_ok = False
                             if not hasattr(st, '_last_limit_log') or (now - st._last_limit_log) > 30:
                                 st._last_limit_log = now
-                                print(f"[STRAT:{sym}] 🚫 Position limit reached or exposure too high")
+                                logger.warning(f"[STRAT:{sym}] 🚫 Position limit reached or exposure too high")
                     
                     except Exception as e:
-                        print(f"[STRAT:{sym}] ⚠️ Risk check failed: {e}")
+                        logger.warning(f"[STRAT:{sym}] ⚠️ Risk check failed: {e}")
                         risk_ok = False
                     # ═══════════════════════════════════════════════════════
+                    tracer.mark(sym, "risk")
 
                     if base_ok and depth_ok and edge_ok and risk_ok and spread_ok:
                         # ═══════════════════════════════════════════════════════
@@ -664,7 +704,7 @@ class StrategyEngine:
                                 # Log once per 30s
                                 if not hasattr(st, '_last_mm_log') or (now - st._last_mm_log) > 30:
                                     st._last_mm_log = now
-                                    print(
+                                    logger.info(
                                         f"[MM] ✅ {sym} conf={mm_pattern.mm_confidence:.2%} "
                                         f"safe=${mm_safe_size:.2f}"
                                     )
@@ -672,14 +712,14 @@ class StrategyEngine:
                                 # No MM - use default
                                 if not hasattr(st, '_last_no_mm_log') or (now - st._last_no_mm_log) > 60:
                                     st._last_no_mm_log = now
-                                    print(f"[MM] ⚠️ {sym} not detected (default size)")
+                                    logger.warning(f"[MM] ⚠️ {sym} not detected (default size)")
                         
                         except Exception as e:
-                            print(f"[MM] ⚠️ {sym} error: {e}")
+                            logger.warning(f"[MM] ⚠️ {sym} error: {e}")
                             mm_ok = True  # Fail open
                         
                         if not mm_ok:
-                            await asyncio.sleep(0.1)
+                            await _park()
                             continue
                         # ═══════════════════════════════════════════════════════
                         # ═══════════════════════════════════════════════════════
@@ -706,24 +746,24 @@ class StrategyEngine:
                                     ml_ok = False
                                     if not hasattr(st, '_last_ml_log') or (now - st._last_ml_log) > 30:
                                         st._last_ml_log = now
-                                        print(f"[ML] ❌ Filtered: {sym} ml_score={ml_score:.3f} < {settings.ML_MIN_CONFIDENCE}")
+                                        logger.info(f"[ML] ❌ Filtered: {sym} ml_score={ml_score:.3f} < {settings.ML_MIN_CONFIDENCE}")
                                 else:
                                     # Log pass only once per 30 seconds to avoid spam
                                     if not hasattr(st, '_last_ml_pass_log') or (now - st._last_ml_pass_log) > 30:
                                         st._last_ml_pass_log = now
-                                        print(f"[ML] ✅ Passed: {sym} ml_score={ml_score:.3f} >= {settings.ML_MIN_CONFIDENCE}")
+                                        logger.info(f"[ML] ✅ Passed: {sym} ml_score={ml_score:.3f} >= {settings.ML_MIN_CONFIDENCE}")
                         
                         except asyncio.TimeoutError:
                             # ML prediction timed out - fail open
-                            print(f"[ML] ⏱️ Timeout for {sym}, allowing entry")
+                            logger.info(f"[ML] ⏱️ Timeout for {sym}, allowing entry")
                             ml_ok = True
                         
                         except Exception as e:
-                            print(f"[ML] ⚠️ Error filtering {sym}: {e}")
+                            logger.warning(f"[ML] ⚠️ Error filtering {sym}: {e}")
                             ml_ok = True  # Fail open - allow trade if ML errors
                         
                         if not ml_ok:
-                            await asyncio.sleep(0.1)
+                            await _park()
                             continue
 
                         # ═══════════════════════════════════════════════════════════
@@ -746,7 +786,7 @@ class StrategyEngine:
                             # Log sizing decision (once per 30s)
                             if not hasattr(st, '_last_size_log') or (now - st._last_size_log) > 30:
                                 st._last_size_log = now
-                                print(
+                                logger.info(
                                     f"[SIZE] {sym} target=${mm_safe_size:.2f} "
                                     f"final=${final_size_usd:.2f} "
                                     f"max_positions={max_positions} "
@@ -755,7 +795,7 @@ class StrategyEngine:
 
                         except Exception as e:
                             # Fallback to mm_safe_size if position sizer fails
-                            print(f"[SIZE] ⚠️ {sym} error: {e}")
+                            logger.warning(f"[SIZE] ⚠️ {sym} error: {e}")
                             final_size_usd = mm_safe_size
                             max_positions = 1
                         # ═══════════════════════════════════════════════════════════
@@ -795,13 +835,13 @@ class StrategyEngine:
                                 actual_timeout = trade_params['timeout_seconds']
                                 
                                 if is_exploration:
-                                    print(
+                                    logger.info(
                                         f"[EXPLORATION] {sym}: TP={actual_tp:.1f}, SL={actual_sl:.1f}, "
                                         f"Trail={'ON' if actual_trailing else 'OFF'}, Timeout={actual_timeout:.0f}s"
                                     )
                             
                             except Exception as e:
-                                print(f"[EXPLORATION] ⚠️ Failed: {e}, using default params")
+                                logger.warning(f"[EXPLORATION] ⚠️ Failed: {e}, using default params")
                                 # Fallback already set above
                         # ═══════════════════════════════════════════════════════
                         else:
@@ -822,7 +862,8 @@ class StrategyEngine:
 
                         if (now_ts - last_trade) < cooldown_seconds:
                             remaining = cooldown_seconds - (now_ts - last_trade)
-                            await asyncio.sleep(0.1)
+                            sched.arm(sym, last_trade + cooldown_seconds)
+                            await _park()
                             continue
 
                         # ═══════════════════════════════════════════════════════════
@@ -834,6 +875,7 @@ class StrategyEngine:
                             # ═══════════════════════════════════════════════════════
                             # SMART EXECUTOR: MM-aware entry with splitting (Phase 2)
                             # ═══════════════════════════════════════════════════════
+                            sched.set_phase(sym, ENTERING)
                             try:
                                 smart_executor = get_smart_executor()
                                 
@@ -855,7 +897,7 @@ class StrategyEngine:
                                 # Log execution quality
                                 if fill_result and not hasattr(st, '_last_exec_log') or (now - st._last_exec_log) > 30:
                                     st._last_exec_log = now
-                                    print(
+                                    logger.info(
                                         f"[EXEC] {sym} quality={fill_result.get('quality', 0):.1%} "
                                         f"slippage={fill_result.get('slippage_bps', 0):.2f}bps "
                                         f"splits={fill_result.get('actual_splits', 1)}"
@@ -863,7 +905,7 @@ class StrategyEngine:
                             
                             except Exception as e:
                                 # Fallback to simple order
-                                print(f"[EXEC] ⚠️ SmartExecutor failed: {e}, using simple order")
+                                logger.warning(f"[EXEC] ⚠️ SmartExecutor failed: {e}, using simple order")
                                 oid = await self._exec.place_maker(sym, "BUY", price=bid, qty=qty_units, tag="mm_entry")
                                 filled_qty = qty_units
                             
@@ -872,6 +914,7 @@ class StrategyEngine:
                             if oid:
                                 # Update last trade time AFTER successful order
                                 _last_trade_time[sym] = now_ts
+                                sched.notify(sym, EV_FILL)  # evaluate exits right away, arm hold/timeout timers
                                 
                                 # ═══ PYRAMID: Add position to tracking list ═══
                                 positions_list.append({
@@ -888,7 +931,7 @@ class StrategyEngine:
                                 entry_ts = now
                                 qty_units = filled_qty or qty_units
                                 
-                                print(f"[PYRAMID] {sym}: Added position #{len(positions_list)}, "
+                                logger.info(f"[PYRAMID] {sym}: Added position #{len(positions_list)}, "
                                     f"total positions={len(positions_list)}, "
                                     f"total_qty={sum(p['qty'] for p in positions_list):.6f}")
                                 
@@ -910,7 +953,7 @@ class StrategyEngine:
                                     base_sl_bps=p.stop_loss_bps
                                 )
                                 st.entry_dynamic_sl = dynamic_sl
-                                print(
+                                logger.info(
                                     f"[STRAT:{sym}] 📊 Dynamic SL: {dynamic_sl:.2f} bps "
                                     f"(ATR:{atr_pct:.2%}, Spread:{spread_bps:.1f}, Imb:{imb:.2f})"
                                 )
@@ -946,7 +989,7 @@ class StrategyEngine:
                                             db.commit()
                                             st.current_trade_db_id = trade.id
                                         except Exception as e:
-                                            print(f"[STRAT:{sym}] ⚠️ Failed to log entry: {e}")
+                                            logger.warning(f"[STRAT:{sym}] ⚠️ Failed to log entry: {e}")
                                         finally:  # ← CHANGE except to finally
                                             if db:  # ← ADD THIS CHECK
                                                 try:
@@ -977,11 +1020,11 @@ class StrategyEngine:
                                                 data = r.json()
                                                 if data and len(data) > 0:
                                                     scan_data = data[0]  # Full scanner row with ALL features
-                                                    print(f"[ML_LOGGER] 📊 Got scanner data: "
+                                                    logger.info(f"[ML_LOGGER] 📊 Got scanner data: "
                                                           f"trades/min={scan_data.get('trades_per_min', 0):.1f}, "
                                                           f"usd/min={scan_data.get('usd_per_min', 0):.1f}")
                                     except Exception as e:
-                                        print(f"[ML_LOGGER] ⚠️ Failed to get scanner data: {e}")
+                                        logger.warning(f"[ML_LOGGER] ⚠️ Failed to get scanner data: {e}")
                                     
                                     # Step 2: Enrich with ALL candle features
                                     if scan_data:
@@ -1001,16 +1044,16 @@ class StrategyEngine:
                                                 scan_data['vol_pattern'] = candle_stats.get('vol_pattern', 0)
                                                 scan_data['dca_potential'] = candle_stats.get('dca_potential', 0)
                                                 
-                                                print(f"[ML_LOGGER] 📈 Got candle data: "
+                                                logger.info(f"[ML_LOGGER] 📈 Got candle data: "
                                                       f"atr={candle_stats.get('atr1m_pct', 0):.4f}, "
                                                       f"grinder={candle_stats.get('grinder_ratio', 0):.2f}, "
                                                       f"spikes={candle_stats.get('spike_count_90m', 0)}")
                                         except Exception as e:
-                                            print(f"[ML_LOGGER] ⚠️ Failed to get candle data: {e}")
+                                            logger.warning(f"[ML_LOGGER] ⚠️ Failed to get candle data: {e}")
                                     
                                     # Step 3: Fallback to basic data if scanner failed completely
                                     if not scan_data:
-                                        print(f"[ML_LOGGER] ⚠️ Using fallback data (scanner unavailable)")
+                                        logger.warning(f"[ML_LOGGER] ⚠️ Using fallback data (scanner unavailable)")
                                         scan_data = {
                                             'spread_bps': spread_bps,
                                             'imbalance': imb,
@@ -1048,10 +1091,10 @@ class StrategyEngine:
                                         trade_id=trade_id,
                                     )
                                     
-                                    print(f"[ML_LOGGER] ✅ Entry logged: {trade_id}")
+                                    logger.info(f"[ML_LOGGER] ✅ Entry logged: {trade_id}")
                                     
                                 except Exception as e:
-                                    print(f"[ML_LOGGER] ⚠️ Failed to log entry: {e}")
+                                    logger.warning(f"[ML_LOGGER] ⚠️ Failed to log entry: {e}")
                                     import traceback
                                     traceback.print_exc()
                                 # ═════════════════════════════════════════════════════
@@ -1063,24 +1106,30 @@ class StrategyEngine:
                                         strategy_edge_bps_at_entry.labels(sym).observe(max(0.0, spread_bps))
                                     except Exception:
                                         pass
-                                print(f"[STRAT:{sym}] ENTRY BUY qty={qty_units:.6f} @ {bid}")
+                                logger.info(f"[STRAT:{sym}] ENTRY BUY qty={qty_units:.6f} @ {bid}")
 
                 else:
                     # ═══ PYRAMID: Calculate PnL for ALL positions ═══
                     if not positions_list:
                         # No positions, skip exit logic
-                        await asyncio.sleep(poll_ms / 1000)
+                        await _park()
                         continue
                     
                     # Use oldest position for timing
                     oldest_pos = positions_list[0]
                     elapsed_s = now - oldest_pos['entry_ts']
 
+                    # time-based exits must fire even without quote events
+                    sched.arm(sym, oldest_pos['entry_ts'] + st.trade_timeout_sec)
+                    if elapsed_s * 1000 < p.min_hold_ms:
+                        sched.arm(sym, oldest_pos['entry_ts'] + p.min_hold_ms / 1000.0)
+
                     # ⚠️ MM GONE CHECK - Emergency exit
                     mm_detector = get_mm_detector()
                     mm_gone, mm_reason = mm_detector.is_mm_gone(sym, spread_bps)
                     if mm_gone:
-                        print(f"[STRAT:{sym}] 🚨 MM GONE: {mm_reason} - EMERGENCY EXIT")
+                        logger.warning(f"[STRAT:{sym}] 🚨 MM GONE: {mm_reason} - EMERGENCY EXIT")
+                        sched.set_phase(sym, EXITING)
                         pos = await self._exec.get_position(sym)
                         actual_qty = float(pos.get("qty", 0.0))
                         if actual_qty > 0:
@@ -1092,7 +1141,7 @@ class StrategyEngine:
                             if _METRICS_OK:
                                 strategy_exits_total.labels(sym, "MM_GONE").inc()
                                 strategy_open_positions.labels(sym).set(0)
-                        await asyncio.sleep(poll_ms / 1000)
+                        await _park()
                         continue
                     
                     # Calculate weighted average PnL
@@ -1116,7 +1165,8 @@ class StrategyEngine:
                     HARD_SL_BPS = -10.0  # Absolute maximum loss per trade
                     
                     if pnl_bps <= HARD_SL_BPS:
-                        print(f"[STRAT:{sym}] 🚨🚨🚨 HARD SL TRIGGERED: pnl_bid={pnl_bps:.2f} bps (mid={pnl_bps_mid:.2f}) <= {HARD_SL_BPS}")
+                        sched.set_phase(sym, EXITING)
+                        logger.warning(f"[STRAT:{sym}] 🚨🚨🚨 HARD SL TRIGGERED: pnl_bid={pnl_bps:.2f} bps (mid={pnl_bps_mid:.2f}) <= {HARD_SL_BPS}")
                         
                         # Get actual position qty
                         pos = await self._exec.get_position(sym)
@@ -1132,14 +1182,14 @@ class StrategyEngine:
                                 exit_price = exit_result.get("fill_price", bid)
                             else:
                                 # Force flatten if market order failed
-                                print(f"[STRAT:{sym}] 🚨 MARKET failed, forcing flatten")
+                                logger.warning(f"[STRAT:{sym}] 🚨 MARKET failed, forcing flatten")
                                 await self._exec.flatten_symbol(sym)
                                 exit_price = bid
                             
                             # Calculate REAL PnL after exit
                             real_pnl_bps = (exit_price - avg_entry) / avg_entry * 1e4 if avg_entry > 0 else 0.0
                             
-                            print(f"[STRAT:{sym}] 🚨 HARD SL EXIT: {actual_qty:.6f} @ {exit_price:.6f} "
+                            logger.warning(f"[STRAT:{sym}] 🚨 HARD SL EXIT: {actual_qty:.6f} @ {exit_price:.6f} "
                                   f"(real_pnl={real_pnl_bps:.2f} bps, intended={pnl_bps:.2f} bps)")
                             
                             # Clean up state
@@ -1206,9 +1256,10 @@ class StrategyEngine:
                                                     exit_reason="HARD_SL",
                                                     exit_fee=0.0
                                                 )
+                                                record_trade_closed(db, trade)
                                                 db.commit()
                                         except Exception as e:
-                                            print(f"[STRAT:{sym}] ⚠️ Failed to log HARD_SL exit: {e}")
+                                            logger.warning(f"[STRAT:{sym}] ⚠️ Failed to log HARD_SL exit: {e}")
                                         finally:
                                             if db:
                                                 try:
@@ -1219,7 +1270,7 @@ class StrategyEngine:
                                 st.current_trade_db_id = None
                                 st.current_trade_id = None
                         
-                        await asyncio.sleep(poll_ms / 1000)
+                        await _park()
                         continue
                     # ═══════════════════════════════════════════════════════════
 
@@ -1228,9 +1279,10 @@ class StrategyEngine:
                     if should_close_window:
                         if not hasattr(st, '_last_window_close_log') or (now - st._last_window_close_log) > 10:
                             st._last_window_close_log = now
-                            print(f"[STRAT:{sym}] ⏰ Closing before end: {close_reason}")
+                            logger.info(f"[STRAT:{sym}] ⏰ Closing before end: {close_reason}")
                         
                         # Force exit with market order
+                        sched.set_phase(sym, EXITING)
                         try:
                             pos = await self._exec.get_position(sym)
                             actual_qty = float(pos.get("qty", 0.0))
@@ -1244,7 +1296,7 @@ class StrategyEngine:
                                 last_exit_ts_ms = time.time() * 1000
                                 st.last_exit_ts = int(last_exit_ts_ms)
 
-                                print(f"[PYRAMID] {sym}: Closed all positions, remaining={len(positions_list)}")
+                                logger.info(f"[PYRAMID] {sym}: Closed all positions, remaining={len(positions_list)}")
                                 
                                 if _METRICS_OK:
                                     try:
@@ -1253,11 +1305,11 @@ class StrategyEngine:
                                     except Exception:
                                         pass
                                 
-                                print(f"[STRAT:{sym}] EXIT WINDOW_CLOSE qty={actual_qty:.6f} (pnl_bps={pnl_bps:.2f})")
+                                logger.info(f"[STRAT:{sym}] EXIT WINDOW_CLOSE qty={actual_qty:.6f} (pnl_bps={pnl_bps:.2f})")
                         except Exception as e:
-                            print(f"[STRAT:{sym}] ⚠️ Failed to close before window: {e}")
+                            logger.warning(f"[STRAT:{sym}] ⚠️ Failed to close before window: {e}")
                         
-                        await asyncio.sleep(poll_ms / 1000)
+                        await _park()
                         continue
 
                     # ═══════════════════════════════════════════════════════════
@@ -1269,7 +1321,7 @@ class StrategyEngine:
                             st.trailing_active = True
                             st.peak_price = mid
                             st.trailing_stop_price = mid - (p.trailing_stop_bps / 1e4 * mid)
-                            print(
+                            logger.info(
                                 f"[STRAT:{sym}] 🎯 Trailing Stop ACTIVATED: "
                                 f"peak={mid:.6f}, trail={st.trailing_stop_price:.6f}, pnl={pnl_bps:.2f}"
                             )
@@ -1281,7 +1333,7 @@ class StrategyEngine:
                             if price_increase_bps >= p.trailing_step_bps:
                                 st.peak_price = mid
                                 st.trailing_stop_price = mid - (p.trailing_stop_bps / 1e4 * mid)
-                                print(
+                                logger.info(
                                     f"[STRAT:{sym}] 📈 Trailing Stop UPDATED: "
                                     f"peak={mid:.6f}, trail={st.trailing_stop_price:.6f}, pnl={pnl_bps:.2f}"
                                 )
@@ -1300,7 +1352,7 @@ class StrategyEngine:
                     if p.enable_trailing_stop and st.trailing_active:
                         can_exit_by_trailing = mid <= st.trailing_stop_price
                         if can_exit_by_trailing:
-                            print(
+                            logger.info(
                                 f"[STRAT:{sym}] 🎯 Trailing Stop TRIGGERED: "
                                 f"mid={mid:.6f} <= trail={st.trailing_stop_price:.6f}, pnl={pnl_bps:.2f}"
                             )
@@ -1322,17 +1374,19 @@ class StrategyEngine:
                         else:
                             reason = "TIMEOUT"
                         
+                        sched.set_phase(sym, EXITING)
+
                         # ═══ GET ACTUAL POSITION QTY ═══
                         # Use real qty from position (handles partial fills)
                         try:
                             pos = await self._exec.get_position(sym)
                             actual_qty = float(pos.get("qty", 0.0))
                             if actual_qty <= 0:
-                                print(f"[STRAT:{sym}] ⚠️ No position to exit (qty={actual_qty})")
+                                logger.warning(f"[STRAT:{sym}] ⚠️ No position to exit (qty={actual_qty})")
                                 in_pos = False
                                 continue
                         except Exception as e:
-                            print(f"[STRAT:{sym}] ⚠️ Failed to get position: {e}")
+                            logger.warning(f"[STRAT:{sym}] ⚠️ Failed to get position: {e}")
                             actual_qty = qty_units  # Fallback to requested qty
                         # ═══════════════════════════════
                         
@@ -1354,7 +1408,7 @@ class StrategyEngine:
                                 new_mid = (new_bid + new_ask) / 2 if new_bid > 0 and new_ask > 0 else mid
                                 new_pnl_bps = (new_mid - avg_entry) / avg_entry * 1e4 if avg_entry > 0 else 0.0
                                 
-                                print(f"[STRAT:{sym}] ⚠️ {original_reason} LIMIT not filled. "
+                                logger.warning(f"[STRAT:{sym}] ⚠️ {original_reason} LIMIT not filled. "
                                       f"Original pnl={pnl_bps:.2f}, new pnl={new_pnl_bps:.2f}")
                                 
                                 # Check if we've hit HARD SL while waiting
@@ -1363,14 +1417,14 @@ class StrategyEngine:
                                 
                                 if new_pnl_bps <= HARD_SL_BPS:
                                     reason = "HARD_SL"
-                                    print(f"[STRAT:{sym}] 🚨 Hit HARD SL while waiting for LIMIT!")
+                                    logger.warning(f"[STRAT:{sym}] 🚨 Hit HARD SL while waiting for LIMIT!")
                                 elif new_pnl_bps >= MIN_TP_FOR_MARKET:
                                     # Still in profit (at least 1 bps), use MARKET
                                     reason = f"{original_reason}_MARKET"
                                 else:
                                     # Lost profit, exit anyway but mark correctly
                                     reason = f"{original_reason}_EXPIRED"
-                                    print(f"[STRAT:{sym}] ⚠️ TP profit evaporated: was {pnl_bps:.2f}, now {new_pnl_bps:.2f}")
+                                    logger.warning(f"[STRAT:{sym}] ⚠️ TP profit evaporated: was {pnl_bps:.2f}, now {new_pnl_bps:.2f}")
                                 
                                 # Update pnl_bps to reflect reality
                                 pnl_bps = new_pnl_bps
@@ -1399,7 +1453,7 @@ class StrategyEngine:
                         # Update reason if "TP" but actually lost money
                         if reason == "TP" and real_pnl_bps < -3.0:  # Lost more than 3 bps
                             reason = "TP_SLIPPAGE"
-                            print(f"[STRAT:{sym}] ⚠️ TP became loss! Expected pnl={pnl_bps:.2f}, actual={real_pnl_bps:.2f} → {reason}")
+                            logger.warning(f"[STRAT:{sym}] ⚠️ TP became loss! Expected pnl={pnl_bps:.2f}, actual={real_pnl_bps:.2f} → {reason}")
                         
                         # Use REAL pnl for all logging
                         pnl_bps = real_pnl_bps
@@ -1409,12 +1463,13 @@ class StrategyEngine:
                         
                         # Only flatten if exit order failed
                         if not exit_oid:
-                            print(f"[STRAT:{sym}] ⚠️ Exit order failed, forcing flatten")
+                            logger.warning(f"[STRAT:{sym}] ⚠️ Exit order failed, forcing flatten")
                             await self._exec.flatten_symbol(sym)
 
                         in_pos = False
                         last_exit_ts_ms = time.time() * 1000
                         st.last_exit_ts = int(last_exit_ts_ms)
+                        sched.notify(sym, EV_FILL)
 
                         st.trailing_active = False
                         st.trailing_stop_price = 0.0
@@ -1431,7 +1486,7 @@ class StrategyEngine:
                             except Exception:
                                 pass
 
-                        print(
+                        logger.info(
                             f"[STRAT:{sym}] EXIT SELL qty={qty_units:.6f} @ {exit_price} [{reason}] "
                             f"(pnl_bps={pnl_bps:.2f}, held={elapsed_s:.2f}s)"
                         )
@@ -1460,10 +1515,10 @@ class StrategyEngine:
                                     lowest_price=None,
                                 )
                                 
-                                print(f"[ML_LOGGER] ✅ Exit logged: {st.current_trade_id}")
+                                logger.info(f"[ML_LOGGER] ✅ Exit logged: {st.current_trade_id}")
                                 
                             except Exception as e:
-                                print(f"[ML_LOGGER] ⚠️ Failed to log exit: {e}")
+                                logger.warning(f"[ML_LOGGER] ⚠️ Failed to log exit: {e}")
                         # ═════════════════════════════════
 
                         # ═══ LOGGING: Close trade ═══
@@ -1485,9 +1540,10 @@ class StrategyEngine:
                                                 exit_reason=reason,
                                                 exit_fee=0.0
                                             )
+                                            record_trade_closed(db, trade)
                                             db.commit()
                                     except Exception as e:
-                                        print(f"[STRAT:{sym}] ⚠️ Failed to log exit: {e}")
+                                        logger.warning(f"[STRAT:{sym}] ⚠️ Failed to log exit: {e}")
                                     finally:
                                         if db:
                                             try:
@@ -1520,14 +1576,14 @@ class StrategyEngine:
                                     risk_manager = get_risk_manager()
                                     pnl_usd = (exit_price - entry_px) * qty_units if entry_px > 0 else 0.0
                                     await risk_manager.track_trade_result(symbol=sym, pnl_usd=pnl_usd)
-                                    print(f"[STRAT:{sym}] 📊 Trade tracked: pnl_usd=${pnl_usd:.2f}, win={pnl_usd > 0}")
+                                    logger.info(f"[STRAT:{sym}] 📊 Trade tracked: pnl_usd=${pnl_usd:.2f}, win={pnl_usd > 0}")
                                 except Exception as e:
-                                    print(f"[STRAT:{sym}] ⚠️ Failed to track trade: {e}")
+                                    logger.warning(f"[STRAT:{sym}] ⚠️ Failed to track trade: {e}")
 
                         asyncio.create_task(_track_result())
                         # ═══════════════════════════════════════════════════════
 
-                await asyncio.sleep(poll_ms / 1000)
+                await _park()
 
         except asyncio.CancelledError:
             pass
@@ -1535,7 +1591,7 @@ class StrategyEngine:
             st = self._symbols.get(sym)
             if st:
                 st.last_error = str(e)
-            print(f"[STRAT:{sym}] ERROR: {e}")
+            logger.error(f"[STRAT:{sym}] ERROR: {e}")
         finally:
             if _METRICS_OK:
                 try:
@@ -1548,12 +1604,16 @@ class StrategyEngine:
                     strategy_symbols_running.dec()
                 except Exception:
                     pass
-            print(f"[STRAT:{sym}] loop stopped")
+            logger.info(f"[STRAT:{sym}] loop stopped")
 
     # For external diagnostics / tuning endpoints
     def params(self) -> StrategyParams:
         return self._params
 
+    def scheduler_stats(self) -> dict:
+        """Per-symbol phase / wake counters and decision latency by phase."""
+        return self._sched.get_stats()
+
     def update_params(self, patch: dict) -> dict:
         """
         Patch StrategyParams with provided keys. Unknown keys are ignored.
@@ -1569,5 +1629,6 @@ class StrategyEngine:
                     setattr(self._params, k, v)
                 except Exception:
                     pass
-        # no cached snapshot used in loop, so hot-apply is immediate
+        # no cached snapshot used in loop; wake every symbol so hot-apply is immediate
+        self._sched.notify_all(EV_PARAMS)
         return asdict(self._params)
\ No newline at end of file
@@ -20,6 +20,7 @@ from typing import Dict, List, Optional
 from datetime import datetime
 
 from app.services.position_slot_manager import get_slot_manager, PositionSlot
+from app.strategy.exit_index import ExitTriggerIndex
 
 # Try to import from main app
 try:
@@ -56,6 +57,7 @@ class HFTStrategyEngine:
         edge_floor_bps: float = EDGE_FLOOR_BPS,
         entry_score_threshold: float = 0.6,
         cycle_ms: int = 100,
+        trail_bps: float = 0.0,
     ):
         self.executor = executor
         self.symbols = [s.upper() for s in symbols]
@@ -69,6 +71,10 @@ class HFTStrategyEngine:
         self.tp_bps = tp_bps
         self.sl_bps = sl_bps
         self.timeout_sec = timeout_sec
+        self.trail_bps = trail_bps  # 0 = no trailing stop
+        
+        # Exit triggers of all open slots, indexed by price (TP/SL) and deadline
+        self._exits = ExitTriggerIndex()
         
         # Entry filters
         self.min_spread_bps = min_spread_bps
@@ -200,6 +206,7 @@ class HFTStrategyEngine:
                                 slot.entry_time_ms = entry_time_ms
                         except:
                             pass
+                        self._index_slot(pos.symbol, slot)
                         
                         print(f"[HFT:{pos.symbol}:S{slot.slot_id}] 📥 Loaded existing position "
                               f"qty={float(pos.qty):.6f} @ {float(pos.entry_price):.6f}")
@@ -277,60 +284,50 @@ class HFTStrategyEngine:
     
     # ===== Exit Logic =====
     
-    async def _check_all_exits(self) -> None:
-        """Check ALL open positions for exit conditions."""
-        all_positions = await self.slot_manager.get_all_open_positions()
-        
-        for symbol, slots in all_positions.items():
-            for slot in slots:
-                await self._check_exit_for_slot(symbol, slot)
-    
-    async def _check_exit_for_slot(self, symbol: str, slot: PositionSlot) -> None:
-        """Check if a specific slot should exit."""
-        if slot.status != "OPEN":
-            return
-        
-        # Get current price
-        try:
-            quote = await self._get_quote(symbol)
-            if not quote:
-                return
-            
-            mid = quote['mid']
-            if mid <= 0:
-                return
-        except Exception:
-            return
-        
-        # Calculate P&L
+    def _index_slot(self, symbol: str, slot: PositionSlot) -> None:
+        """Register an OPEN slot's TP/SL prices and timeout deadline in the exit index."""
         entry_price = float(slot.entry_price) if slot.entry_price else 0.0
-        if entry_price <= 0:
+        if slot.status != "OPEN" or entry_price <= 0:
             return
-        
-        pnl_bps = ((mid - entry_price) / entry_price) * 10000
-        
-        # Calculate hold time
-        now_ms = int(time.time() * 1000)
-        entry_time_ms = getattr(slot, 'entry_time_ms', now_ms)
-        held_ms = now_ms - entry_time_ms
-        held_sec = held_ms / 1000
-        
-        # Exit conditions
-        hit_tp = pnl_bps >= self.tp_bps
-        hit_sl = pnl_bps <= -self.sl_bps
-        timeout = held_sec >= self.timeout_sec
-        
-        if hit_tp or hit_sl or timeout:
-            # Determine reason
-            if hit_tp:
-                reason = "TP"
-            elif hit_sl:
-                reason = "SL"
-            else:
-                reason = "TIMEOUT"
+        entry_time_ms = slot.entry_time_ms or int(time.time() * 1000)
+        self._exits.add(
+            symbol,
+            slot.slot_id,
+            entry_price=entry_price,
+            tp_bps=self.tp_bps,
+            sl_bps=self.sl_bps,
+            deadline=entry_time_ms / 1000 + self.timeout_sec,
+            payload=slot,
+        )
+    
+    async def _check_all_exits(self) -> None:
+        """
+        Check open positions for exits: one quote per symbol, then only the
+        slots whose TP/SL price or deadline was crossed (see ExitTriggerIndex).
+        """
+        for symbol in self._exits.symbols():
+            try:
+                quote = await self._get_quote(symbol)
+                mid = quote['mid'] if quote else 0.0
+            except Exception:
+                continue
+            if mid <= 0:
+                continue
             
-            # Execute exit
-            await self._execute_exit(symbol, slot, reason, mid, pnl_bps, held_sec)
+            now = time.time()
+            for trig, reason in self._exits.crossed(symbol, mid, now):
+                slot = trig.payload
+                if slot.status != "OPEN" or slot.slot_id != trig.key:
+                    continue
+                pnl_bps = ((mid - trig.entry_price) / trig.entry_price) * 10000
+                entry_time_ms = slot.entry_time_ms or int(now * 1000)
+                held_sec = (now * 1000 - entry_time_ms) / 1000
+                await self._execute_exit(symbol, slot, reason, mid, pnl_bps, held_sec)
+                if slot.status == "OPEN":
+                    self._exits.reinsert(symbol, trig)  # exit failed: retry next cycle, trailed stop kept
+            
+            if self.trail_bps > 0:
+                self._exits.trail(symbol, mid, self.trail_bps)
     
     async def _execute_exit(
         self,
@@ -525,13 +522,15 @@ class HFTStrategyEngine:
                     pass
                 
                 # Mark slot as open WITH ACTUAL QTY
-                await self.slot_manager.open_slot(
+                opened = await self.slot_manager.open_slot(
                     symbol=symbol,
                     slot_id=slot.slot_id,
                     entry_price=Decimal(str(bid)),
                     qty=Decimal(str(filled_qty)),  # ← USE FILLED QTY!
                     client_order_id=order_id
                 )
+                if opened:
+                    self._index_slot(symbol, slot)
                 
                 print(
                     f"[HFT:{symbol}:S{slot.slot_id}] 🔺 ENTRY "
@@ -614,6 +613,7 @@ class HFTStrategyEngine:
     
     async def _close_all_positions(self) -> None:
         """Close all open positions across all symbols."""
+        self._exits.clear()
         all_positions = await self.slot_manager.get_all_open_positions()
         
         for symbol, slots in all_positions.items():
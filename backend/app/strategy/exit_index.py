@@ -0,0 +1,178 @@
+# app/strategy/exit_index.py
+"""
+Price-indexed exit triggers for the HFT slot engine.
+
+Per symbol, every open slot contributes three triggers:
+  • TP price  (mid >= tp_px)   — ascending list, hits are a prefix
+  • stop price (mid <= stop_px) — ascending list, hits are a suffix
+  • deadline  (now >= deadline) — min-heap with lazy deletion
+
+`crossed(symbol, mid, now)` therefore costs O(log n + k) for k hits
+instead of a pass over all n slots. Trailing stops need no re-sort:
+raising every stop below `mid * (1 - trail)` to that level rewrites a
+prefix of the (sorted) stop list in place, which keeps it sorted.
+Each list keeps a key → price map so a removal bisects to its price
+instead of scanning for the key.
+"""
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+@dataclass
+class ExitTrigger:
+    key: Hashable
+    entry_price: float
+    tp_px: float
+    sl_px: float            # initial stop; a stop above it is a trailing stop
+    deadline: float         # epoch seconds
+    payload: Any = None     # the engine's slot object
+    stop_px: float = 0.0    # current stop (trailed); set from sl_px on add, updated on removal
+
+
+class _SymbolTriggers:
+    __slots__ = ("tp_px", "tp_key", "tp_at", "stop_px", "stop_key", "stop_at", "deadlines", "live")
+
+    def __init__(self) -> None:
+        self.tp_px: List[float] = []
+        self.tp_key: List[Hashable] = []
+        self.tp_at: Dict[Hashable, float] = {}
+        self.stop_px: List[float] = []
+        self.stop_key: List[Hashable] = []
+        self.stop_at: Dict[Hashable, float] = {}
+        self.deadlines: List[Tuple[float, int, Hashable]] = []
+        self.live: Dict[Hashable, ExitTrigger] = {}
+
+
+def _insert(prices: List[float], keys: List[Hashable], at: Dict[Hashable, float], px: float, key: Hashable) -> None:
+    i = bisect_right(prices, px)
+    prices.insert(i, px)
+    keys.insert(i, key)
+    at[key] = px
+
+
+def _remove(prices: List[float], keys: List[Hashable], at: Dict[Hashable, float], key: Hashable) -> float:
+    px = at.pop(key)
+    # only keys priced exactly px can sit in [lo, hi)
+    i = keys.index(key, bisect_left(prices, px), bisect_right(prices, px))
+    del prices[i]
+    del keys[i]
+    return px
+
+
+class ExitTriggerIndex:
+    """TP / stop / timeout triggers for all open slots, indexed per symbol."""
+
+    def __init__(self) -> None:
+        self._syms: Dict[str, _SymbolTriggers] = {}
+        self._seq = 0  # heap tiebreaker (keys need not be orderable)
+
+    def __len__(self) -> int:
+        return sum(len(s.live) for s in self._syms.values())
+
+    def symbols(self) -> List[str]:
+        return [sym for sym, s in self._syms.items() if s.live]
+
+    def get(self, symbol: str, key: Hashable) -> ExitTrigger | None:
+        s = self._syms.get(symbol)
+        return s.live.get(key) if s else None
+
+    def add(
+        self,
+        symbol: str,
+        key: Hashable,
+        *,
+        entry_price: float,
+        tp_bps: float,
+        sl_bps: float,
+        deadline: float,
+        payload: Any = None,
+    ) -> ExitTrigger:
+        """Index a long slot; same thresholds as pnl_bps >= tp_bps / pnl_bps <= -sl_bps."""
+        self.remove(symbol, key)
+        trig = ExitTrigger(
+            key=key,
+            entry_price=entry_price,
+            tp_px=entry_price * (1.0 + tp_bps / 1e4),
+            sl_px=entry_price * (1.0 - abs(sl_bps) / 1e4),
+            deadline=deadline,
+            payload=payload,
+        )
+        trig.stop_px = trig.sl_px
+        return self._index(symbol, trig)
+
+    def reinsert(self, symbol: str, trig: ExitTrigger) -> ExitTrigger:
+        """Put back a claimed trigger (e.g. its exit order failed), keeping its trailed stop."""
+        self.remove(symbol, trig.key)
+        return self._index(symbol, trig)
+
+    def _index(self, symbol: str, trig: ExitTrigger) -> ExitTrigger:
+        s = self._syms.setdefault(symbol, _SymbolTriggers())
+        key = trig.key
+        s.live[key] = trig
+        _insert(s.tp_px, s.tp_key, s.tp_at, trig.tp_px, key)
+        _insert(s.stop_px, s.stop_key, s.stop_at, trig.stop_px, key)
+        self._seq += 1
+        heapq.heappush(s.deadlines, (trig.deadline, self._seq, key))
+        return trig
+
+    def remove(self, symbol: str, key: Hashable) -> ExitTrigger | None:
+        s = self._syms.get(symbol)
+        trig = s.live.pop(key, None) if s else None
+        if trig is None:
+            return None
+        _remove(s.tp_px, s.tp_key, s.tp_at, key)
+        trig.stop_px = _remove(s.stop_px, s.stop_key, s.stop_at, key)
+        # the heap entry is dropped lazily in crossed()
+        return trig
+
+    def clear(self) -> None:
+        self._syms.clear()
+
+    def crossed(self, symbol: str, mid: float, now: float) -> List[Tuple[ExitTrigger, str]]:
+        """
+        Claim (remove and return) every trigger hit by `mid` / `now` as
+        (trigger, reason), reason ∈ TP | SL | TRAIL | TIMEOUT with the same
+        precedence as the per-slot check: TP, then stop, then timeout.
+        """
+        s = self._syms.get(symbol)
+        if s is None or not s.live:
+            return []
+        hits: Dict[Hashable, str] = {}
+        for key in s.tp_key[: bisect_right(s.tp_px, mid)]:
+            hits[key] = "TP"
+        i = bisect_left(s.stop_px, mid)
+        for px, key in zip(s.stop_px[i:], s.stop_key[i:]):
+            if key not in hits:
+                hits[key] = "SL" if px <= s.live[key].sl_px else "TRAIL"
+        dl = s.deadlines
+        while dl and dl[0][0] <= now:
+            _, _, key = heapq.heappop(dl)
+            trig = s.live.get(key)
+            if trig is not None and trig.deadline <= now and key not in hits:
+                hits[key] = "TIMEOUT"
+        out: List[Tuple[ExitTrigger, str]] = []
+        for key, reason in hits.items():
+            trig = self.remove(symbol, key)
+            if trig is not None:
+                out.append((trig, reason))
+        return out
+
+    def trail(self, symbol: str, mid: float, trail_bps: float) -> int:
+        """Raise every stop below mid*(1 - trail_bps) to that level (one slice write); returns how many moved."""
+        s = self._syms.get(symbol)
+        if s is None or trail_bps <= 0 or mid <= 0:
+            return 0
+        level = mid * (1.0 - trail_bps / 1e4)
+        k = bisect_left(s.stop_px, level)
+        if k:
+            s.stop_px[:k] = [level] * k
+            s.stop_at.update(dict.fromkeys(s.stop_key[:k], level))
+        return k
+
+    def stop_price(self, symbol: str, key: Hashable) -> float | None:
+        s = self._syms.get(symbol)
+        return s.stop_at.get(key) if s else None
@@ -7,7 +7,9 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime, time as dt_time, timezone
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional, Tuple, List
 
 from app.config.risk_settings import RiskSettings, get_risk_settings
@@ -16,6 +18,66 @@ from app.strategy.risk_state import RiskState
 logger = logging.getLogger(__name__)
 
 
+def _parse_hhmm(value: str) -> int:
+    """"HH:MM" → секунды от полуночи UTC"""
+    h, m = map(int, value.split(':'))
+    if not (0 <= h <= 23 and 0 <= m <= 59):
+        raise ValueError(f"Invalid time: {value}")
+    return h * 3600 + m * 60
+
+
+@dataclass(frozen=True)
+class RiskRules:
+    """
+    Неизменяемый снимок RiskSettings для проверок перед входом.
+
+    Собирается один раз при (пере)конфигурации: окно торговых часов уже
+    разобрано в секунды от полуночи, лимиты посчитаны. RiskManager меняет
+    снимок целиком одним присваиванием, поэтому читатели видят либо старые,
+    либо новые правила — без блокировки.
+    """
+    max_positions: int
+    max_position_size_usd: float
+    max_trades_per_hour: int
+    max_trades_per_minute: int
+    hours_enabled: bool = False
+    hours_start_sec: int = 0
+    hours_end_sec: int = 0
+
+    @classmethod
+    def compile(cls, settings: RiskSettings) -> "RiskRules":
+        hours_enabled = bool(settings.trading_hours_enabled)
+        start = end = 0
+        if hours_enabled:
+            try:
+                start = _parse_hhmm(settings.trading_hours_start)
+                end = _parse_hhmm(settings.trading_hours_end)
+            except Exception as e:
+                logger.error(f"Error parsing trading hours: {e}")
+                hours_enabled = False  # При ошибке разрешаем торговлю
+        return cls(
+            max_positions=settings.get_max_positions(),
+            max_position_size_usd=settings.get_max_position_size_usd(),
+            max_trades_per_hour=settings.max_trades_per_hour,
+            max_trades_per_minute=settings.max_trades_per_minute,
+            hours_enabled=hours_enabled,
+            hours_start_sec=start,
+            hours_end_sec=end,
+        )
+
+    def in_trading_hours(self, now_ts: Optional[float] = None) -> bool:
+        """Попадает ли момент (epoch, по умолчанию сейчас) в окно торговых часов UTC"""
+        if not self.hours_enabled:
+            return True
+        sec = (time.time() if now_ts is None else now_ts) % 86400
+        start, end = self.hours_start_sec, self.hours_end_sec
+        if start <= end:
+            # Обычный диапазон (например, 08:00-22:00)
+            return start <= sec <= end
+        # Диапазон через полночь (например, 22:00-08:00)
+        return sec >= start or sec <= end
+
+
 class RiskManager:
     """
     Централизованный менеджер рисков
@@ -32,6 +94,7 @@ class RiskManager:
         self.settings = settings or get_risk_settings()
         self.state = RiskState()
         self._lock = asyncio.Lock()
+        self._rules = RiskRules.compile(self.settings)
         
         # Инициализация
         logger.info(
@@ -150,6 +213,20 @@ class RiskManager:
     # POSITION CHECKS (перед входом)
     # ═══════════════════════════════════════════════════════════
     
+    @property
+    def rules(self) -> RiskRules:
+        """Текущий скомпилированный набор правил"""
+        return self._rules
+    
+    def reconfigure(self) -> RiskRules:
+        """
+        Пересобрать правила из self.settings и атомарно подменить снимок.
+        Вызывать после любого изменения настроек.
+        """
+        rules = RiskRules.compile(self.settings)
+        self._rules = rules
+        return rules
+    
     async def can_open_position(
         self,
         symbol: str,
@@ -167,81 +244,69 @@ class RiskManager:
             - (True, "OK") если можно
             - (False, "reason") если нельзя
         """
-        async with self._lock:
-            # 1. Проверка halt
-            if self.state.trading_halted:
-                return False, f"Trading halted: {self.state.halt_reason}"
-            
-            # 2. Проверка cooldown
-            if self.state.is_symbol_on_cooldown(symbol):
-                remaining = self.state.get_cooldown_remaining_seconds(symbol)
-                return False, f"Symbol on cooldown ({remaining}s remaining)"
-            
-            # 3. Проверка trading hours
-            if not self._is_trading_hours():
-                return False, "Outside trading hours"
-            
-            # 4. Проверка max positions
-            max_positions = self.settings.get_max_positions()
-            if self.state.current_position_count >= max_positions:
-                return False, f"Max positions reached ({max_positions})"
-            
-            # 5. Проверка размера позиции
-            max_position_size = self.settings.get_max_position_size_usd()
-            if size_usd > max_position_size:
-                return False, f"Position too large (${size_usd:.2f} > ${max_position_size:.2f})"
-            
-            # 6. Проверка velocity
+        return self.check_open_position(symbol, size_usd)
+    
+    def check_open_position(self, symbol: str, size_usd: float) -> Tuple[bool, str]:
+        """
+        Синхронная версия can_open_position (без блокировки).
+        
+        Читает один снимок правил; состояние только читается, а точный
+        (медленный) путь с очисткой cooldown/velocity выполняется лишь когда
+        быстрая проверка не может доказать, что вход разрешён.
+        """
+        rules = self._rules
+        state = self.state
+        
+        # 1. Проверка halt
+        if state.trading_halted:
+            return False, f"Trading halted: {state.halt_reason}"
+        
+        # 2. Проверка cooldown (обычно символа нет в словаре)
+        if symbol in state.symbol_cooldowns and state.is_symbol_on_cooldown(symbol):
+            remaining = state.get_cooldown_remaining_seconds(symbol)
+            return False, f"Symbol on cooldown ({remaining}s remaining)"
+        
+        # 3. Проверка trading hours
+        if not rules.in_trading_hours():
+            return False, "Outside trading hours"
+        
+        # 4. Проверка max positions
+        if state.current_position_count >= rules.max_positions:
+            return False, f"Max positions reached ({rules.max_positions})"
+        
+        # 5. Проверка размера позиции
+        if size_usd > rules.max_position_size_usd:
+            return False, f"Position too large (${size_usd:.2f} > ${rules.max_position_size_usd:.2f})"
+        
+        # 6. Проверка velocity: очистка окон только уменьшает счётчики,
+        #    так что при длине ниже лимита её можно пропустить
+        if (len(state.trades_last_hour) >= rules.max_trades_per_hour
+                or len(state.trades_last_minute) >= rules.max_trades_per_minute):
             if not self._is_velocity_ok():
-                trades_hour = self.state.get_trades_last_hour()
-                trades_min = self.state.get_trades_last_minute()
+                trades_hour = state.get_trades_last_hour()
+                trades_min = state.get_trades_last_minute()
                 return False, f"Velocity limit (hour:{trades_hour}, min:{trades_min})"
-            
-            return True, "OK"
+        
+        return True, "OK"
     
     def _is_trading_hours(self) -> bool:
         """
         Проверить находимся ли в торговых часах
         """
-        if not self.settings.trading_hours_enabled:
-            return True
-        
-        now = datetime.now(timezone.utc).time()
-        
-        # Парсинг времени
-        try:
-            start_str = self.settings.trading_hours_start
-            end_str = self.settings.trading_hours_end
-            
-            start_h, start_m = map(int, start_str.split(':'))
-            end_h, end_m = map(int, end_str.split(':'))
-            
-            start_time = dt_time(start_h, start_m)
-            end_time = dt_time(end_h, end_m)
-            
-            # Проверка диапазона
-            if start_time <= end_time:
-                # Обычный диапазон (например, 08:00-22:00)
-                return start_time <= now <= end_time
-            else:
-                # Диапазон через полночь (например, 22:00-08:00)
-                return now >= start_time or now <= end_time
-        
-        except Exception as e:
-            logger.error(f"Error parsing trading hours: {e}")
-            return True  # При ошибке разрешаем торговлю
+        return self._rules.in_trading_hours()
     
     def _is_velocity_ok(self) -> bool:
         """
         Проверить не превышены ли лимиты скорости торговли
         """
+        rules = self._rules
         trades_hour = self.state.get_trades_last_hour()
         trades_min = self.state.get_trades_last_minute()
         
-        if trades_hour >= self.settings.max_trades_per_hour:
+        if trades_hour >= rules.max_trades_per_hour:
             return False
         
-        if trades_min >= self.settings.max_trades_per_minute:
+        if trades_min >= rules.max_trades_per_minute:
             return False
         
         return True
@@ -407,6 +472,7 @@ class RiskManager:
         Обновить баланс депозита (пересчитает все лимиты)
         """
         self.settings.update_balance(new_balance_usd)
+        self.reconfigure()
         logger.info(
             f"Balance updated: ${new_balance_usd:.2f} | "
             f"New daily loss limit: ${self.settings.get_daily_loss_limit_usd():.2f}"
@@ -0,0 +1,244 @@
+# app/strategy/scheduler.py
+"""
+Event-driven wake-up scheduler for StrategyEngine symbol loops.
+
+Instead of every symbol loop sleeping a fixed 50 ms and re-evaluating
+whether anything changed, each loop parks in `wait(symbol)` until one of
+the events that can change a decision arrives:
+
+  • EV_QUOTE  — BookTracker published a new top of book for the symbol
+  • EV_FILL   — an order for the symbol filled (entry or exit)
+  • EV_TIMER  — a deadline armed by the loop expired (cooldown end,
+                min-hold, trade timeout) or the idle heartbeat elapsed
+  • EV_PARAMS — strategy params were patched (all symbols)
+
+Events that arrive while a decision is running coalesce into one wake,
+so a quote burst costs one decision rather than one per tick. CPU use
+therefore follows market activity rather than symbols × 20 Hz.
+
+Per-symbol state is a compact __slots__ record: the phase of the
+symbol's state machine (flat / entering / in_position / exiting), the
+pending event mask, the armed deadline and counters. Time from wake to
+the next park is recorded per phase as the decision latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional
+
+try:
+    from app.infra.metrics import strategy_decision_seconds
+    _METRICS_OK = True
+except Exception:
+    _METRICS_OK = False
+
+# wake reasons (bitmask)
+EV_QUOTE = 1
+EV_FILL = 2
+EV_TIMER = 4
+EV_PARAMS = 8
+
+_EV_NAMES = ((EV_QUOTE, "quote"), (EV_FILL, "fill"), (EV_TIMER, "timer"), (EV_PARAMS, "params"))
+
+# per-symbol state machine
+FLAT, ENTERING, IN_POSITION, EXITING = 0, 1, 2, 3
+PHASES = ("flat", "entering", "in_position", "exiting")
+
+# decision latency buckets, seconds (upper bounds; last bucket is +Inf)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _SymbolSlot:
+    __slots__ = ("symbol", "phase", "pending", "event", "deadline", "woke_at", "woke_phase", "wakes", "decisions")
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.phase = FLAT
+        self.pending = 0
+        self.event = asyncio.Event()
+        self.deadline = 0.0          # epoch seconds; 0 = no timer armed
+        self.woke_at = 0.0           # perf_counter of the last wake; 0 = parked
+        self.woke_phase = FLAT
+        self.wakes = [0, 0, 0, 0]    # by reason, in _EV_NAMES order
+        self.decisions = 0
+
+
+class _LatencyHistogram:
+    __slots__ = ("counts", "total", "n", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def observe(self, dt: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, dt)] += 1
+        self.total += dt
+        self.n += 1
+        if dt > self.max:
+            self.max = dt
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)."""
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.n,
+            "avg_ms": round(self.total / self.n * 1e3, 3) if self.n else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1e3, 3),
+            "p99_ms": round(self.quantile(0.99) * 1e3, 3),
+            "max_ms": round(self.max * 1e3, 3),
+        }
+
+
+class StrategyScheduler:
+    """Wake-up events, timers and decision latency for the per-symbol strategy loops."""
+
+    def __init__(self, idle_wake_ms: int = 1000, retry_park_ms: int = 50) -> None:
+        # upper bound on a park with no timer armed, so slow-changing
+        # conditions (risk halts, schedule windows) are still re-checked
+        self.idle_wake_s = max(0.01, idle_wake_ms / 1000.0)
+        # a deadline armed when it has already passed (e.g. a timeout exit that
+        # was blocked or failed and is retried every pass) parks this long
+        # instead of waking immediately — the old fixed poll interval
+        self.retry_park_s = max(0.001, retry_park_ms / 1000.0)
+        self._slots: Dict[str, _SymbolSlot] = {}
+        self._latency = [_LatencyHistogram() for _ in PHASES]
+
+    # ───────── registration ─────────
+    def register(self, symbol: str) -> None:
+        sym = symbol.upper()
+        if sym not in self._slots:
+            self._slots[sym] = _SymbolSlot(sym)
+
+    def unregister(self, symbol: str) -> None:
+        slot = self._slots.pop(symbol.upper(), None)
+        if slot is not None:
+            slot.event.set()  # release a parked loop
+
+    def symbols(self) -> List[str]:
+        return list(self._slots)
+
+    # ───────── events ─────────
+    def notify(self, symbol: str, reason: int) -> None:
+        slot = self._slots.get(symbol.upper())
+        if slot is not None:
+            slot.pending |= reason
+            slot.event.set()
+
+    def notify_all(self, reason: int) -> None:
+        for slot in self._slots.values():
+            slot.pending |= reason
+            slot.event.set()
+
+    def on_quote(self, payload: Mapping[str, Any]) -> None:
+        """BookTracker listener: wake the symbol's loop on a new top of book."""
+        sym = payload.get("symbol")
+        slot = self._slots.get(sym) if sym else None
+        if slot is not None and (payload.get("bid") or 0.0) > 0.0:
+            slot.pending |= EV_QUOTE
+            slot.event.set()
+
+    # ───────── state machine / timers ─────────
+    def set_phase(self, symbol: str, phase: int) -> None:
+        slot = self._slots.get(symbol.upper())
+        if slot is not None:
+            slot.phase = phase
+
+    def phase(self, symbol: str) -> Optional[str]:
+        slot = self._slots.get(symbol.upper())
+        return PHASES[slot.phase] if slot is not None else None
+
+    def arm(self, symbol: str, deadline: float) -> None:
+        """
+        Wake the symbol at `deadline` (epoch seconds); the earliest armed deadline
+        wins. A deadline that has already passed is re-armed `retry_park_s` from
+        now, so a condition that stays due cannot spin the loop.
+        """
+        slot = self._slots.get(symbol.upper())
+        if slot is None or deadline <= 0.0:
+            return
+        now = time.time()
+        if deadline <= now:
+            deadline = now + self.retry_park_s
+        if slot.deadline <= 0.0 or deadline < slot.deadline:
+            slot.deadline = deadline
+
+    async def wait(self, symbol: str) -> int:
+        """
+        Park until an event or the armed deadline / idle heartbeat; returns the
+        wake reason mask. Closes the decision-latency span opened by the
+        previous wake.
+        """
+        slot = self._slots.get(symbol.upper())
+        if slot is None:
+            await asyncio.sleep(self.idle_wake_s)
+            return EV_TIMER
+
+        if slot.woke_at:
+            dt = time.perf_counter() - slot.woke_at
+            self._latency[slot.woke_phase].observe(dt)
+            slot.decisions += 1
+            if _METRICS_OK:
+                try:
+                    strategy_decision_seconds.labels(PHASES[slot.woke_phase]).observe(dt)
+                except Exception:
+                    pass
+            slot.woke_at = 0.0
+
+        if not slot.pending:
+            timeout = self.idle_wake_s
+            if slot.deadline > 0.0:
+                timeout = min(timeout, max(0.0, slot.deadline - time.time()))
+            if timeout > 0.0:
+                try:
+                    await asyncio.wait_for(slot.event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(0)  # always yield, even with events already pending
+
+        reasons = slot.pending
+        slot.pending = 0
+        slot.event.clear()
+        if slot.deadline > 0.0 and time.time() >= slot.deadline:
+            slot.deadline = 0.0
+            reasons |= EV_TIMER
+        if not reasons:
+            reasons = EV_TIMER  # idle heartbeat
+        for i, (bit, _) in enumerate(_EV_NAMES):
+            if reasons & bit:
+                slot.wakes[i] += 1
+        slot.woke_at = time.perf_counter()
+        slot.woke_phase = slot.phase
+        return reasons
+
+    # ───────── diagnostics ─────────
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "idle_wake_ms": int(self.idle_wake_s * 1000),
+            "symbols": {
+                sym: {
+                    "phase": PHASES[s.phase],
+                    "decisions": s.decisions,
+                    "wakes": {name: s.wakes[i] for i, (_, name) in enumerate(_EV_NAMES)},
+                    "timer_in_ms": int(max(0.0, s.deadline - time.time()) * 1000) if s.deadline else None,
+                }
+                for sym, s in self._slots.items()
+            },
+            "decision_latency": {PHASES[i]: h.as_dict() for i, h in enumerate(self._latency)},
+        }
@@ -4,22 +4,45 @@ Idempotency decorator for FastAPI endpoints.
 Automatically caches responses based on X-Idempotency-Key header.
 """
 import functools
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, Dict
 from fastapi import Header, HTTPException, status
+from pydantic import BaseModel
 
-from app.services.idempotency import get_idempotency_manager
+from app.services.idempotency import IdempotencyConflict, IdempotencyInProgress, get_idempotency_manager
 from app.services.logger import get_logger
 from app.config.settings import settings
 
 logger = get_logger(__name__)
 
+_PLAIN = (str, int, float, bool, type(None), list, tuple, dict)
+
+
+def request_fingerprint(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Endpoint arguments that make up the request (body models, query/path
+    values). Injected objects — Request, Session, BackgroundTasks — and the
+    idempotency key itself are left out.
+    """
+    out: Dict[str, Any] = {}
+    for name, value in kwargs.items():
+        if name == "x_idempotency_key":
+            continue
+        if isinstance(value, BaseModel):
+            out[name] = value.model_dump(mode="json")
+        elif isinstance(value, _PLAIN):
+            out[name] = value
+    return out
+
 
 def idempotent(ttl_seconds: Optional[int] = None):
     """
     Decorator for idempotent endpoints.
     
     Caches response based on X-Idempotency-Key header and workspace_id.
-    If key is provided and found in cache, returns cached response immediately.
+    If key is provided and found in cache, returns cached response immediately;
+    a concurrent duplicate waits for the first request (409 if it takes too long).
+    The request arguments are hashed into the record: reusing a key with a
+    different body is rejected with 422.
     
     Args:
         ttl_seconds: Cache TTL in seconds (default: from settings)
@@ -62,39 +85,22 @@ def idempotent(ttl_seconds: Optional[int] = None):
             
             # Get workspace_id (assume it's in settings for now)
             workspace_id = settings.workspace_id
-            
-            # Get idempotency manager
-            manager = get_idempotency_manager()
-            
-            # Check cache
-            cached_response = await manager.get(idem_key, workspace_id)
-            if cached_response is not None:
-                logger.info(
-                    f"Idempotent request detected: endpoint={func.__name__}, "
-                    f"key={idem_key[:16]}..., returning cached response"
-                )
-                return cached_response
-            
-            # Cache miss - execute function
-            logger.debug(f"Idempotency cache miss for {func.__name__}, executing function")
-            
+            ttl = ttl_seconds if ttl_seconds is not None else settings.idempotency_ttl_seconds
+
+            # Claim the key → run once → store; duplicates get the stored response
+            # (errors release the claim and are not cached)
             try:
-                # Execute the actual endpoint function
-                response = await func(*args, **kwargs)
-                
-                # Cache the response
-                ttl = ttl_seconds if ttl_seconds is not None else settings.idempotency_ttl_seconds
-                await manager.set(idem_key, workspace_id, response, ttl=ttl)
-                
-                logger.info(
-                    f"Response cached: endpoint={func.__name__}, "
-                    f"key={idem_key[:16]}..., ttl={ttl}s"
+                return await get_idempotency_manager().execute(
+                    idem_key, workspace_id, func.__name__, lambda: func(*args, **kwargs), ttl=ttl,
+                    payload=request_fingerprint(kwargs),
                 )
-                
-                return response
-                
+            except IdempotencyConflict as e:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+            except IdempotencyInProgress as e:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+            except HTTPException:
+                raise
             except Exception as e:
-                # Don't cache errors
                 logger.error(
                     f"Error in idempotent endpoint {func.__name__}: {e}",
                     exc_info=True
@@ -0,0 +1,25 @@
+-- Migration: DB-level dedupe for pnl_ledger
+-- Date: 2026-10-18
+-- Purpose: replace the SELECT-before-INSERT dedupe with a unique index so ledger
+--          writes can use INSERT ... ON CONFLICT DO NOTHING (single or batched).
+-- Note: re-runs stop at the ALTER (column exists); fresh DBs get column + index from create_all.
+
+ALTER TABLE pnl_ledger ADD COLUMN dedupe_key VARCHAR(300);
+
+-- Backfill the natural key: trade id, else order id, else event time
+UPDATE pnl_ledger SET dedupe_key = CASE
+    WHEN ref_trade_id IS NOT NULL AND ref_trade_id <> '' THEN 't:' || ref_trade_id
+    WHEN ref_order_id IS NOT NULL AND ref_order_id <> '' THEN 'o:' || ref_order_id
+    ELSE 'ts:' || ts
+END
+WHERE dedupe_key IS NULL;
+
+-- Historical duplicates keep their rows but only the first one keeps the key
+UPDATE pnl_ledger SET dedupe_key = NULL
+WHERE id NOT IN (
+    SELECT MIN(id) FROM pnl_ledger
+    GROUP BY exchange, account_id, symbol, event_type, dedupe_key
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS pnl_ledger_dedupe_uq
+ON pnl_ledger(exchange, account_id, symbol, event_type, dedupe_key);
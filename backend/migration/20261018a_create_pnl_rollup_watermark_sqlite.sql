@@ -0,0 +1,9 @@
+-- Migration: watermark table for the incremental pnl_daily rollup
+-- Date: 2026-10-18
+-- Purpose: remember the last pnl_ledger.id folded into pnl_daily so each
+--          rollup pass aggregates only new ledger rows.
+CREATE TABLE IF NOT EXISTS pnl_rollup_watermark (
+  name            VARCHAR(64) PRIMARY KEY,
+  last_ledger_id  INTEGER NOT NULL DEFAULT 0,
+  updated_at      DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,19 @@
+-- Migration: materialised per-symbol trade performance
+-- Date: 2026-10-18
+-- Purpose: allocation reads all symbols' stats in one query; rows are updated
+--          incrementally as trades close (app/services/symbol_stats.py) and
+--          backfilled from `trades` on startup when empty.
+CREATE TABLE IF NOT EXISTS symbol_perf_stats (
+  symbol             VARCHAR(64) PRIMARY KEY,
+  trade_count        INTEGER NOT NULL DEFAULT 0,
+  win_count          INTEGER NOT NULL DEFAULT 0,
+  pnl_usd_sum        FLOAT NOT NULL DEFAULT 0,
+  pnl_bps_sum        FLOAT NOT NULL DEFAULT 0,
+  hold_sec_sum       FLOAT NOT NULL DEFAULT 0,
+  recent_weight      FLOAT NOT NULL DEFAULT 0,
+  recent_wins        FLOAT NOT NULL DEFAULT 0,
+  recent_pnl_bps     FLOAT NOT NULL DEFAULT 0,
+  recent_spread_bps  FLOAT NOT NULL DEFAULT 0,
+  last_exit_time     DATETIME,
+  updated_at         DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
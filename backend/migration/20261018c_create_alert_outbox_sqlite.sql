@@ -0,0 +1,22 @@
+-- Migration: persistent alert outbox (Telegram notifications)
+-- Date: 2026-10-18
+-- Purpose: producers enqueue alerts here; a background worker dedupes,
+--          coalesces them into digests and delivers with retry/backoff.
+CREATE TABLE IF NOT EXISTS alert_outbox (
+  id               INTEGER PRIMARY KEY AUTOINCREMENT,
+  dedupe_key       VARCHAR(200),
+  level            VARCHAR(16) NOT NULL DEFAULT 'INFO',
+  title            VARCHAR(200) NOT NULL DEFAULT '',
+  body             TEXT NOT NULL DEFAULT '',
+  force            BOOLEAN NOT NULL DEFAULT 0,
+  count            INTEGER NOT NULL DEFAULT 1,
+  status           VARCHAR(16) NOT NULL DEFAULT 'PENDING',  -- PENDING | SENT | FAILED | DROPPED
+  attempts         INTEGER NOT NULL DEFAULT 0,
+  last_error       TEXT,
+  created_at       DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  last_seen_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  next_attempt_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  sent_at          DATETIME
+);
+CREATE INDEX IF NOT EXISTS alert_outbox_due_idx ON alert_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS alert_outbox_key_idx ON alert_outbox(dedupe_key, created_at);
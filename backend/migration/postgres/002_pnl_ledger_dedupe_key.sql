@@ -0,0 +1,26 @@
+-- Migration: DB-level dedupe for pnl_ledger (PostgreSQL)
+-- Date: 2026-10-18
+-- Description: unique natural key so ledger writes use INSERT ... ON CONFLICT DO NOTHING
+
+ALTER TABLE pnl_ledger ADD COLUMN IF NOT EXISTS dedupe_key VARCHAR(300);
+
+UPDATE pnl_ledger SET dedupe_key = CASE
+    WHEN ref_trade_id IS NOT NULL AND ref_trade_id <> '' THEN 't:' || ref_trade_id
+    WHEN ref_order_id IS NOT NULL AND ref_order_id <> '' THEN 'o:' || ref_order_id
+    ELSE 'ts:' || to_char(ts, 'YYYY-MM-DD HH24:MI:SS.US')
+END
+WHERE dedupe_key IS NULL;
+
+-- Historical duplicates keep their rows but only the first one keeps the key
+UPDATE pnl_ledger l SET dedupe_key = NULL
+FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY exchange, account_id, symbol, event_type, dedupe_key ORDER BY id
+    ) AS rn
+    FROM pnl_ledger
+    WHERE dedupe_key IS NOT NULL
+) d
+WHERE l.id = d.id AND d.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS pnl_ledger_dedupe_uq
+ON pnl_ledger (exchange, account_id, symbol, event_type, dedupe_key);
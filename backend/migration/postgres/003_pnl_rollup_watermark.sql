@@ -0,0 +1,9 @@
+-- Migration: watermark table for the incremental pnl_daily rollup (PostgreSQL)
+-- Date: 2026-10-18
+-- Description: last pnl_ledger.id folded into pnl_daily, one row per rollup target
+
+CREATE TABLE IF NOT EXISTS pnl_rollup_watermark (
+    name            VARCHAR(64) PRIMARY KEY,
+    last_ledger_id  INTEGER NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,18 @@
+-- Migration: materialised per-symbol trade performance (PostgreSQL)
+-- Date: 2026-10-18
+-- Description: lifetime + decayed (~last 100 trades) sums per symbol, updated as trades close
+
+CREATE TABLE IF NOT EXISTS symbol_perf_stats (
+    symbol             VARCHAR(64) PRIMARY KEY,
+    trade_count        INTEGER NOT NULL DEFAULT 0,
+    win_count          INTEGER NOT NULL DEFAULT 0,
+    pnl_usd_sum        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pnl_bps_sum        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    hold_sec_sum       DOUBLE PRECISION NOT NULL DEFAULT 0,
+    recent_weight      DOUBLE PRECISION NOT NULL DEFAULT 0,
+    recent_wins        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    recent_pnl_bps     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    recent_spread_bps  DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_exit_time     TIMESTAMP,
+    updated_at         TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,23 @@
+-- Migration: persistent alert outbox (PostgreSQL)
+-- Date: 2026-10-18
+-- Description: queued Telegram notifications, deduped by key and delivered by a background worker
+
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    id               SERIAL PRIMARY KEY,
+    dedupe_key       VARCHAR(200),
+    level            VARCHAR(16) NOT NULL DEFAULT 'INFO',
+    title            VARCHAR(200) NOT NULL DEFAULT '',
+    body             TEXT NOT NULL DEFAULT '',
+    force            BOOLEAN NOT NULL DEFAULT FALSE,
+    count            INTEGER NOT NULL DEFAULT 1,
+    status           VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    last_error       TEXT,
+    created_at       TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at          TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS alert_outbox_due_idx ON alert_outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS alert_outbox_key_idx ON alert_outbox (dedupe_key, created_at);
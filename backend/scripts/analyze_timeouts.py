@@ -703,5 +703,5 @@ print("\n" + "=" * 80)
 print("[OK] Analysis complete!")
 print("=" * 80)
 print("\nFiles to run next:")
-print("  - python scripts/ml_export_with_labels.py  (export data)")
+print("  - python scripts/ml_export_columnar.py     (export data)")
 print("  - python scripts/ml_train_v5.py            (train model)")
@@ -0,0 +1,133 @@
+"""
+BookTracker read-contention benchmark (1 writer, 100 readers)
+=============================================================
+
+One writer coroutine streams book-ticker / depth updates for a set of
+symbols while N reader coroutines call get_quote() in a loop (strategy
+loops, SSE, scanner, executors). Compares:
+
+  locked   the previous design: every read takes the tracker-wide
+           asyncio.Lock and recomputes the metrics snapshot
+  cow      the current design: readers return the snapshot the writer
+           published (copy-on-write), no lock and no recomputation
+
+Reports reads/s, writes/s and read latency percentiles.
+
+Usage:
+    python scripts/bench_book_tracker.py [--readers 100] [--symbols 50] [--seconds 3]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.market_data.book_tracker import BookTracker, _DEFAULT_ABS_BPS
+
+
+class LockedReadTracker(BookTracker):
+    """Reads as they were before copy-on-write: global lock + per-read recompute."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = asyncio.Lock()
+
+    async def update_book_ticker(self, *args, **kwargs) -> None:
+        async with self._lock:
+            await super().update_book_ticker(*args, **kwargs)
+
+    async def update_partial_depth(self, *args, **kwargs) -> None:
+        async with self._lock:
+            await super().update_partial_depth(*args, **kwargs)
+
+    async def get_quote(self, symbol: str, absorption_x_bps: Optional[float] = None) -> Dict[str, Any]:
+        sym = symbol.upper()
+        async with self._lock:
+            st = self._states.get(sym)
+            if not st:
+                return self._empty_snapshot(sym)
+            return self._snapshot(sym, st, _DEFAULT_ABS_BPS)
+
+
+def _pct(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+async def run(tracker: BookTracker, readers: int, symbols: List[str], seconds: float) -> Dict[str, float]:
+    stop = asyncio.Event()
+    writes = 0
+    reads = 0
+    lat: List[float] = []
+    rnd = random.Random(7)
+
+    async def writer() -> None:
+        nonlocal writes
+        px = {s: 100.0 for s in symbols}
+        while not stop.is_set():
+            for s in symbols:
+                p = px[s] = px[s] * (1.0 + rnd.uniform(-1e-4, 1e-4))
+                await tracker.update_book_ticker(s, p - 0.01, 5.0, p + 0.01, 4.0)
+                await tracker.update_partial_depth(
+                    s,
+                    [(p - 0.01 * (i + 1), 1.0 + i) for i in range(10)],
+                    [(p + 0.01 * (i + 1), 1.0 + i) for i in range(10)],
+                )
+                writes += 2
+            await asyncio.sleep(0)
+
+    async def reader(i: int) -> None:
+        nonlocal reads
+        k = i
+        while not stop.is_set():
+            sym = symbols[k % len(symbols)]
+            k += 1
+            t0 = time.perf_counter()
+            q = await tracker.get_quote(sym)
+            lat.append(time.perf_counter() - t0)
+            assert q["symbol"] == sym
+            reads += 1
+            if reads % 16 == 0:
+                await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(writer())] + [asyncio.create_task(reader(i)) for i in range(readers)]
+    t0 = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    dt = time.perf_counter() - t0
+    return {
+        "reads_s": reads / dt,
+        "writes_s": writes / dt,
+        "p50_us": _pct(lat, 0.50) * 1e6,
+        "p99_us": _pct(lat, 0.99) * 1e6,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--readers", type=int, default=100)
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    print(f"1 writer, {args.readers} readers, {args.symbols} symbols, {args.seconds:.1f}s each")
+    base = None
+    for name, cls in (("locked", LockedReadTracker), ("cow", BookTracker)):
+        r = asyncio.run(run(cls(), args.readers, symbols, args.seconds))
+        base = base or r["reads_s"]
+        print(
+            f"  {name:7s}: {r['reads_s']:11,.0f} reads/s  {r['writes_s']:9,.0f} writes/s  "
+            f"read p50 {r['p50_us']:6.2f} µs  p99 {r['p99_us']:6.2f} µs  x{r['reads_s'] / base:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
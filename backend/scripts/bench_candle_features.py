@@ -0,0 +1,232 @@
+"""
+Candle feature benchmark (500 symbols)
+======================================
+
+Compares the previous pure-Python per-candle calculators with the NumPy
+kernels in app/services/candle_features.py:
+
+  legacy       per symbol: List[Candle1m] loops (pre-vectorization code)
+  vector       per symbol: stats_from_arrays on ring arrays
+  batch        all symbols: one batch_stats call over (S, 300, 5)
+  incremental  per new bar: RollingFeatures.update + stats
+
+and checks that all paths agree.
+
+Usage:
+    python scripts/bench_candle_features.py [--symbols 500] [--bars 300] [--repeat 3]
+"""
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+from statistics import median
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import candle_features as cf
+from app.services.candles_cache import Candle1m
+
+
+# ─────────────── legacy calculators (as they were in CandlesCache) ───────────────
+
+def _true_range(prev_c, h, l):
+    return max(h - l, abs(h - prev_c), abs(l - prev_c))
+
+
+def legacy_atr_pct(candles, window=20):
+    if len(candles) < window + 1:
+        return 0.0
+    trs = []
+    for i in range(-window, 0):
+        prev_c = candles[i - 1].c
+        c = candles[i]
+        trs.append(_true_range(prev_c, c.h, c.l))
+    atr = sum(trs) / float(window)
+    return atr / candles[-1].c if candles[-1].c else 0.0
+
+
+def legacy_spike_count_90m(candles):
+    take = candles[-90:] if len(candles) >= 90 else candles
+    cnt = 0
+    for c in take:
+        rng = max(c.h - c.l, 1e-12)
+        upper = max(0.0, c.h - max(c.o, c.c))
+        lower = max(0.0, min(c.o, c.c) - c.l)
+        if (upper + lower) / rng >= 0.40:
+            cnt += 1
+    return cnt
+
+
+def legacy_grinder_ratio(candles, atr_abs: Optional[float] = None, window=120):
+    if not candles:
+        return 0.0
+    take = candles[-window:] if len(candles) >= window else candles
+    if atr_abs is None:
+        atr_abs = max(1e-8, (candles[-1].h - candles[-1].l))
+    g = 0
+    for c in take:
+        rng = max(c.h - c.l, 1e-12)
+        body = abs(c.c - c.o)
+        upper = max(0.0, c.h - max(c.o, c.c))
+        lower = max(0.0, min(c.o, c.c) - c.l)
+        if (body / atr_abs) > 0.8 and (upper + lower) / rng < 0.2:
+            g += 1
+    return g / float(len(take)) if take else 0.0
+
+
+def legacy_retrace_median(candles, lookback=180, swing_k=3):
+    if len(candles) < max(lookback, swing_k * 2 + 1):
+        return 0.35
+    seg = candles[-lookback:]
+    highs: List[int] = []
+    lows: List[int] = []
+    for i in range(swing_k, len(seg) - swing_k):
+        c = seg[i]
+        if all(c.h >= seg[j].h for j in range(i - swing_k, i + swing_k + 1)):
+            highs.append(i)
+        if all(c.l <= seg[j].l for j in range(i - swing_k, i + swing_k + 1)):
+            lows.append(i)
+    ex_idx = sorted(set(highs + lows))
+    if len(ex_idx) < 3:
+        return 0.35
+    retraces = []
+    for a, b, c_idx in zip(ex_idx[:-2], ex_idx[1:-1], ex_idx[2:]):
+        A, B, C = seg[a], seg[b], seg[c_idx]
+        impulse = abs(B.c - A.c) or abs((B.h + B.l) / 2 - (A.h + A.l) / 2)
+        correction = abs(C.c - B.c)
+        if impulse > 1e-9:
+            retraces.append(max(0.0, min(1.0, correction / impulse)))
+    return float(median(retraces[-10:])) if retraces else 0.35
+
+
+def legacy_range_stable_pct(candles, window=60):
+    if len(candles) < window:
+        return 0.0
+    closes = [c.c for c in candles[-window:]]
+    mean_c = sum(closes) / len(closes)
+    if mean_c <= 0:
+        return 0.0
+    std_c = (sum((c - mean_c) ** 2 for c in closes) / len(closes)) ** 0.5
+    return (std_c / mean_c) * 100.0
+
+
+def legacy_vol_pattern(candles, window=60):
+    if len(candles) < window:
+        return 0
+    vols = [c.v for c in candles[-window:]]
+    mean_v = sum(vols) / len(vols)
+    if mean_v <= 0:
+        return 0
+    std_v = (sum((v - mean_v) ** 2 for v in vols) / len(vols)) ** 0.5
+    ratio = std_v / mean_v
+    score = max(0, min(100, 100 - (ratio * 100)))
+    return int(score) if ratio < 0.3 else int(score * 0.7)
+
+
+def legacy_dca(candles, retrace_med):
+    base = max(0, min(100, int(100 - (retrace_med * 100 * 2))))
+    if legacy_range_stable_pct(candles) < 0.1:
+        base += 20
+    return max(0, min(100, base))
+
+
+def legacy_stats(candles):
+    retr = legacy_retrace_median(candles)
+    return {
+        "atr1m_pct": legacy_atr_pct(candles),
+        "spike_count_90m": legacy_spike_count_90m(candles),
+        "pullback_median_retrace": retr,
+        "grinder_ratio": legacy_grinder_ratio(candles),
+        "range_stable_pct": legacy_range_stable_pct(candles),
+        "vol_pattern": float(legacy_vol_pattern(candles)),
+        "dca_potential": float(legacy_dca(candles, retr)),
+    }
+
+
+# ─────────────────────────────── data ───────────────────────────────
+
+def make_universe(symbols: int, bars: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    ret = rng.normal(0, 0.002, size=(symbols, bars))
+    close = 10.0 * np.exp(np.cumsum(ret, axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    spread = np.abs(rng.normal(0, 0.0015, size=(symbols, bars))) * close
+    high = np.maximum(open_, close) + spread * rng.random((symbols, bars))
+    low = np.minimum(open_, close) - spread * rng.random((symbols, bars))
+    vol = rng.lognormal(3, 0.4, size=(symbols, bars))
+    x = np.stack([open_, high, low, close, vol], axis=-1)
+    ts = np.tile(np.arange(bars, dtype=np.int64) * 60 + 1_700_000_000, (symbols, 1))
+    return ts, x
+
+
+def _best(fn, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Candle feature benchmark")
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--bars", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ts, x = make_universe(args.symbols, args.bars)
+    candles = [
+        [Candle1m(ts=int(t), o=r[0], h=r[1], l=r[2], c=r[3], v=r[4]) for t, r in zip(ts[s].tolist(), x[s].tolist())]
+        for s in range(args.symbols)
+    ]
+
+    # parity
+    keys = ["atr1m_pct", "spike_count_90m", "pullback_median_retrace", "grinder_ratio",
+            "range_stable_pct", "vol_pattern", "dca_potential"]
+    batch = cf.batch_stats(ts, x)
+    worst = 0.0
+    for s in range(args.symbols):
+        ref = legacy_stats(candles[s])
+        for k in keys:
+            worst = max(worst, abs(ref[k] - batch[s][k]) / max(1.0, abs(ref[k])))
+    print(f"parity: max rel diff legacy vs batch = {worst:.2e}")
+
+    t_legacy = _best(lambda: [legacy_stats(c) for c in candles], args.repeat)
+    t_vector = _best(lambda: [cf.stats_from_arrays(ts[s], x[s]) for s in range(args.symbols)], args.repeat)
+    t_batch = _best(lambda: cf.batch_stats(ts, x), args.repeat)
+
+    # incremental: one new bar per symbol on warmed-up rolling state
+    rolls = []
+    for s in range(args.symbols):
+        r = cf.RollingFeatures()
+        r.rebuild(ts[s, :-1], x[s, :-1])
+        rolls.append(r)
+    last = x[:, -1].tolist()
+    last_ts = int(ts[0, -1])
+
+    def incremental():
+        for s, r in enumerate(rolls):
+            r.update(last_ts, *last[s], capacity=1000)
+            cf.stats_from_arrays(ts[s], x[s], r)
+
+    t_incr = _best(incremental, args.repeat)
+    inc = cf.stats_from_arrays(ts[0], x[0], rolls[0])
+    full = cf.stats_from_arrays(ts[0], x[0])
+    drift = max(abs(inc[k] - full[k]) for k in keys)
+    print(f"parity: incremental vs full = {drift:.2e}")
+
+    n = args.symbols
+    print(f"\n{n} symbols x {args.bars} bars (best of {args.repeat})")
+    print(f"  legacy python loops : {t_legacy * 1e3:9.1f} ms  ({t_legacy / n * 1e6:7.1f} µs/sym)")
+    print(f"  numpy per symbol    : {t_vector * 1e3:9.1f} ms  ({t_vector / n * 1e6:7.1f} µs/sym)  x{t_legacy / t_vector:.1f}")
+    print(f"  numpy batch         : {t_batch * 1e3:9.1f} ms  ({t_batch / n * 1e6:7.1f} µs/sym)  x{t_legacy / t_batch:.1f}")
+    print(f"  incremental + stats : {t_incr * 1e3:9.1f} ms  ({t_incr / n * 1e6:7.1f} µs/sym)  x{t_legacy / t_incr:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+PnL ledger write benchmark
+==========================
+
+Writes synthetic fills (TRADE_REALIZED + FEE per fill) into a fresh SQLite
+pnl_ledger:
+
+  legacy   per-row SELECT on the natural key, then ORM add + flush
+           (the previous insert_ledger_event(dedupe=True) path)
+  bulk     repo.insert_ledger_events: one INSERT ... ON CONFLICT DO NOTHING
+           executed for all rows, dedupe by the pnl_ledger_dedupe_uq index
+  replay   the same bulk rows again — every one is a duplicate
+
+The legacy path is run on a smaller sample by default because its cost
+grows with the table (the key lookup scans the symbol's rows).
+
+Usage:
+    python scripts/bench_ledger_upsert.py [--rows 100000] [--legacy-rows 10000] [--symbols 50]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models.pnl_ledger import PnlLedger
+from app.pnl import repository as repo
+from app.pnl.domain import PNLEventType, PNLLedgerEvent
+
+
+def _events(n: int, symbols: int):
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for i in range(n // 2):
+        sym = f"SYM{i % symbols}USDT"
+        ts = t0 + timedelta(milliseconds=i)
+        for etype, amt in ((PNLEventType.TRADE_REALIZED, "0.12"), (PNLEventType.FEE, "-0.01")):
+            out.append(PNLLedgerEvent(
+                ts=ts, exchange="mexc", account_id="paper", symbol=sym, base_asset=sym[:-4], quote_asset="USDT",
+                event_type=etype, amount_asset=amt, amount_usd=amt, ref_order_id=str(i), ref_trade_id=f"t{i}",
+                meta={"mode": "bench"},
+            ))
+    return out
+
+
+def _legacy_insert(db: Session, e: PNLLedgerEvent) -> None:
+    ts = e.ts.replace(tzinfo=None)
+    q = (
+        select(PnlLedger)
+        .where(PnlLedger.exchange == e.exchange)
+        .where(PnlLedger.account_id == e.account_id)
+        .where(PnlLedger.symbol == e.symbol)
+        .where(PnlLedger.event_type == e.event_type.value)
+        .where(PnlLedger.ref_trade_id == e.ref_trade_id)
+        .limit(1)
+    )
+    if db.execute(q).scalar_one_or_none():
+        return
+    db.add(PnlLedger(
+        ts=ts, exchange=e.exchange, account_id=e.account_id, symbol=e.symbol, base_asset=e.base_asset,
+        quote_asset=e.quote_asset, event_type=e.event_type.value, amount_asset=Decimal(e.amount_asset),
+        amount_usd=Decimal(e.amount_usd), ref_order_id=e.ref_order_id, ref_trade_id=e.ref_trade_id, meta=e.meta,
+    ))
+    db.flush()
+
+
+def _engine(path: Path):
+    eng = create_engine(f"sqlite:///{path}", future=True)
+    PnlLedger.__table__.create(eng)
+    return eng
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--legacy-rows", type=int, default=10_000)
+    ap.add_argument("--symbols", type=int, default=50)
+    args = ap.parse_args()
+
+    events = _events(args.rows, args.symbols)
+    legacy_events = events[: args.legacy_rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = _engine(Path(tmp) / "legacy.db")
+        with Session(eng) as db:
+            t0 = time.perf_counter()
+            for e in legacy_events:
+                _legacy_insert(db, e)
+            db.commit()
+            t_legacy = time.perf_counter() - t0
+
+        eng = _engine(Path(tmp) / "bulk.db")
+        with Session(eng) as db:
+            t0 = time.perf_counter()
+            written = repo.insert_ledger_events(db, events)
+            db.commit()
+            t_bulk = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            replayed = repo.insert_ledger_events(db, events)
+            db.commit()
+            t_replay = time.perf_counter() - t0
+            total = db.execute(select(func.count()).select_from(PnlLedger)).scalar_one()
+
+    nl, n = len(legacy_events), len(events)
+    print(f"pnl_ledger writes, {args.symbols} symbols (SQLite file)")
+    print(f"  legacy : {nl:>7,} rows {t_legacy:7.2f} s  ({nl / t_legacy:9,.0f} rows/s)")
+    print(f"  bulk   : {n:>7,} rows {t_bulk:7.2f} s  ({n / t_bulk:9,.0f} rows/s)  x{(n / t_bulk) / (nl / t_legacy):.1f}")
+    print(f"  replay : {n:>7,} rows {t_replay:7.2f} s  ({n / t_replay:9,.0f} rows/s)  written={replayed}")
+    print(f"  rows written {written:,}, table rows {total:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+RiskManager entry-check benchmark
+=================================
+
+Measures can_open_position-style checks per second for the "allowed" path
+(no halt, no cooldown, inside trading hours, below all limits):
+
+  legacy   asyncio.Lock around every check, trading hours parsed from the
+           "HH:MM" strings and limits recomputed from RiskSettings each call
+           (the previous can_open_position body)
+  async    RiskManager.can_open_position — compiled RiskRules, no lock
+  sync     RiskManager.check_open_position — same, without the coroutine
+
+Usage:
+    python scripts/bench_risk_checks.py [--checks 200000] [--symbols 50] [--hours]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, time as dt_time, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config.risk_settings import RiskSettings
+from app.strategy.risk import RiskManager
+
+
+async def _legacy_check(rm: RiskManager, symbol: str, size_usd: float):
+    async with rm._lock:
+        if rm.state.trading_halted:
+            return False, "halted"
+        if rm.state.is_symbol_on_cooldown(symbol):
+            return False, "cooldown"
+        if rm.settings.trading_hours_enabled:
+            now = datetime.now(timezone.utc).time()
+            start_h, start_m = map(int, rm.settings.trading_hours_start.split(':'))
+            end_h, end_m = map(int, rm.settings.trading_hours_end.split(':'))
+            start_time, end_time = dt_time(start_h, start_m), dt_time(end_h, end_m)
+            ok = start_time <= now <= end_time if start_time <= end_time else (now >= start_time or now <= end_time)
+            if not ok:
+                return False, "hours"
+        if rm.state.current_position_count >= rm.settings.get_max_positions():
+            return False, "positions"
+        if size_usd > rm.settings.get_max_position_size_usd():
+            return False, "size"
+        if (rm.state.get_trades_last_hour() >= rm.settings.max_trades_per_hour
+                or rm.state.get_trades_last_minute() >= rm.settings.max_trades_per_minute):
+            return False, "velocity"
+        return True, "OK"
+
+
+def _report(name: str, n: int, dt: float) -> None:
+    print(f"{name:<8} {n:>9} checks  {dt * 1000:8.1f} ms  {n / dt:>12,.0f} checks/s  {dt / n * 1e6:6.2f} us/check")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--checks", type=int, default=200_000)
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--hours", action="store_true", help="enable an all-day trading-hours window")
+    args = ap.parse_args()
+
+    settings = RiskSettings(trading_hours_enabled=args.hours, trading_hours_start="00:00",
+                            trading_hours_end="23:59", max_trades_per_hour=200, max_trades_per_minute=50)
+    rm = RiskManager(settings)
+    for _ in range(5):
+        rm.state.track_trade_velocity()
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    n = args.checks
+
+    async def run_legacy():
+        for i in range(n):
+            await _legacy_check(rm, symbols[i % len(symbols)], 10.0)
+
+    async def run_async():
+        for i in range(n):
+            await rm.can_open_position(symbols[i % len(symbols)], 10.0)
+
+    def run_sync():
+        for i in range(n):
+            rm.check_open_position(symbols[i % len(symbols)], 10.0)
+
+    print(f"checks={n} symbols={args.symbols} trading_hours={'on' if args.hours else 'off'}")
+    t = time.perf_counter()
+    asyncio.run(run_legacy())
+    _report("legacy", n, time.perf_counter() - t)
+    t = time.perf_counter()
+    asyncio.run(run_async())
+    _report("async", n, time.perf_counter() - t)
+    t = time.perf_counter()
+    run_sync()
+    _report("sync", n, time.perf_counter() - t)
+
+
+if __name__ == "__main__":
+    main()
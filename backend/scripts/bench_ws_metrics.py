@@ -0,0 +1,106 @@
+"""
+WS per-tick metrics overhead benchmark
+======================================
+
+Simulates the metric work MEXCWebSocketClient does per frame
+(ws_ticks_total{symbol,type}.inc + ws_lag_seconds{symbol}.observe)
+across a few hundred symbols:
+
+  direct      the previous _metric_inc/_metric_observe helpers: label
+              resolution and a locked registry update on every tick
+  aggregated  MetricsAggregator: pre-bound children, plain local counters,
+              one flush per interval (flush cost included)
+
+and checks that both end up with the same series values.
+
+Usage:
+    python scripts/bench_ws_metrics.py [--symbols 300] [--ticks 300000] [--flush-every 20000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.infra.metrics_agg import MetricsAggregator
+
+BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 1, 2, 5, 10)  # as ws_lag_seconds
+
+
+def _series(registry: CollectorRegistry):
+    ticks = Counter("ws_ticks_total", "ticks", ["symbol", "type"], registry=registry)
+    lag = Histogram("ws_lag_seconds", "lag", ["symbol"], buckets=BUCKETS, registry=registry)
+    return ticks, lag
+
+
+def _direct_inc(counter, **labels) -> None:
+    try:
+        counter.labels(**labels).inc()
+    except Exception:
+        pass
+
+
+def _direct_observe(hist, value: float, **labels) -> None:
+    try:
+        hist.labels(**labels).observe(value)
+    except Exception:
+        pass
+
+
+def _dump(registry: CollectorRegistry):
+    out = {}
+    for m in registry.collect():
+        for s in m.samples:
+            if s.name.endswith("_created"):
+                continue
+            out[(s.name, tuple(sorted(s.labels.items())))] = round(s.value, 6)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=300)
+    ap.add_argument("--ticks", type=int, default=300_000)
+    ap.add_argument("--flush-every", type=int, default=20_000, help="ticks between flushes (≈ 1 s of traffic)")
+    args = ap.parse_args()
+
+    rnd = random.Random(1)
+    syms = [f"SYM{i}USDT" for i in range(args.symbols)]
+    stream = [(syms[rnd.randrange(len(syms))], rnd.choice(("book_ticker", "deals")), rnd.random() * 0.6)
+              for _ in range(args.ticks)]
+
+    reg_d = CollectorRegistry()
+    ticks_d, lag_d = _series(reg_d)
+    t0 = time.perf_counter()
+    for sym, typ, lag in stream:
+        _direct_inc(ticks_d, symbol=sym, type=typ)
+        _direct_observe(lag_d, lag, symbol=sym)
+    t_direct = time.perf_counter() - t0
+
+    reg_a = CollectorRegistry()
+    ticks_a, lag_a = _series(reg_a)
+    agg = MetricsAggregator(ticks_a, ("book_ticker", "deals"), lag_a)
+    agg.bind_many(syms)  # on subscribe, outside the hot path
+    t0 = time.perf_counter()
+    for i, (sym, typ, lag) in enumerate(stream, 1):
+        agg.inc(sym, typ)
+        agg.observe(sym, lag)
+        if i % args.flush_every == 0:
+            agg.flush()
+    agg.flush()
+    t_agg = time.perf_counter() - t0
+
+    same = _dump(reg_d) == _dump(reg_a)
+    n = args.ticks
+    print(f"{n:,} ticks over {args.symbols} symbols, flush every {args.flush_every:,} ticks")
+    print(f"  direct     : {t_direct * 1e3:8.1f} ms  ({t_direct / n * 1e9:6.0f} ns/tick)")
+    print(f"  aggregated : {t_agg * 1e3:8.1f} ms  ({t_agg / n * 1e9:6.0f} ns/tick)  x{t_direct / t_agg:.1f}")
+    print(f"  series identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Columnar ML export (incremental)
+================================
+
+Streams ml_trade_outcomes / ml_snapshots into partitioned NumPy columns
+(see app/ml/export.py). Re-running only fetches rows added since the last
+watermark. This is the single training-data export; --csv additionally
+flattens the whole dataset into one CSV (e.g. for Colab notebooks).
+
+Usage:
+    python scripts/ml_export_columnar.py                       # outcomes → ml_data/columnar
+    python scripts/ml_export_columnar.py --dataset snapshots
+    python scripts/ml_export_columnar.py --full --out ml_data/columnar_full
+    python scripts/ml_export_columnar.py --compress            # zlib parts (no mmap)
+    python scripts/ml_export_columnar.py --csv ml_data/outcomes.csv
+"""
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.engine import engine
+from app.ml.export import DATASETS, DEFAULT_CHUNK_ROWS, export_dataset, load_columns
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Columnar ML export")
+    ap.add_argument("--dataset", choices=sorted(DATASETS), default="outcomes")
+    ap.add_argument("--out", default="ml_data/columnar")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    ap.add_argument("--full", action="store_true", help="ignore watermark, export everything")
+    ap.add_argument("--compress", action="store_true", help="write zlib-compressed parts")
+    ap.add_argument("--csv", default=None, help="also write the full dataset to this CSV file")
+    args = ap.parse_args()
+
+    print("=" * 60)
+    print(f"COLUMNAR EXPORT: {args.dataset} → {args.out}")
+    print("=" * 60)
+
+    res = export_dataset(
+        engine,
+        args.out,
+        args.dataset,
+        chunk_rows=args.chunk_rows,
+        full=args.full,
+        compress=args.compress,
+        progress=lambda n: print(f"   ... {n:,} rows"),
+    )
+
+    print(f"\n✅ Rows:      {res.rows:,}")
+    print(f"✅ Parts:     {res.parts:,}")
+    print(f"✅ Watermark: id={res.watermark_id}")
+    print(f"✅ Time:      {res.elapsed_sec:.2f}s")
+
+    if args.csv:
+        cols = load_columns(args.out, args.dataset)
+        names = list(cols)
+        rows = zip(*(
+            [v.decode() for v in arr.tolist()] if arr.dtype.kind == "S" else arr.tolist()
+            for arr in cols.values()
+        ))
+        Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(names)
+            w.writerows(rows)
+        print(f"✅ CSV:       {args.csv} ({len(cols['id']) if names else 0:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
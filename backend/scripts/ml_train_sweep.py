@@ -0,0 +1,129 @@
+"""
+ML hyper-parameter sweep (time-series CV)
+=========================================
+
+Loads the columnar export (scripts/ml_export_columnar.py), cross-validates
+many XGBoost configs with walk-forward folds across all cores, refits the
+best one on the full dataset and records it in ml_models/registry.json.
+MLPredictor picks up the promoted model on next start.
+
+Usage:
+    python scripts/ml_train_sweep.py                      # 200 random configs, all cores
+    python scripts/ml_train_sweep.py --configs 0          # full grid
+    python scripts/ml_train_sweep.py --metric logloss --gap-min 10 --no-promote
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ml.export import feature_matrix, load_columns
+from app.ml.features import FEATURE_NAMES
+from app.ml.registry import ModelRegistry, unknown_features
+from app.ml.training import param_grid, run_sweep, sample_params, xgb_factory
+
+SPACE = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [2, 3, 4, 5, 6],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "min_child_weight": [1, 3, 5, 10],
+    "subsample": [0.7, 0.85, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="XGBoost sweep with time-series CV")
+    ap.add_argument("--data", default="ml_data/columnar")
+    ap.add_argument("--label", default="hit_tp")
+    ap.add_argument("--features", default="", help="comma-separated; default = full feature registry")
+    ap.add_argument("--configs", type=int, default=200, help="random configs to try (0 = full grid)")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--gap-min", type=float, default=5.0, help="purge gap before each test block, minutes")
+    ap.add_argument("--metric", default="auc", choices=["auc", "logloss", "f1", "precision", "accuracy"])
+    ap.add_argument("--workers", type=int, default=0, help="0 = all cores")
+    ap.add_argument("--models", default="ml_models")
+    ap.add_argument("--no-promote", action="store_true")
+    args = ap.parse_args()
+
+    feature_cols = [f.strip() for f in args.features.split(",") if f.strip()] or list(FEATURE_NAMES)
+    bad = unknown_features(feature_cols)
+    if bad:
+        print(f"❌ Not serving features: {bad}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("ML SWEEP (time-series CV)")
+    print("=" * 70)
+
+    cols = load_columns(args.data, "outcomes", columns=["ts_ms", args.label, *feature_cols])
+    if len(cols["ts_ms"]) == 0:
+        print(f"❌ No data in {args.data}/outcomes — run scripts/ml_export_columnar.py")
+        sys.exit(1)
+
+    X = feature_matrix(cols, feature_cols)
+    y = np.asarray(cols[args.label], dtype=np.int64)
+    ts = np.asarray(cols["ts_ms"], dtype=np.int64)
+    ok = np.isfinite(X).all(axis=1)
+    X, y, ts = X[ok], y[ok], ts[ok]
+    print(f"✅ Rows: {len(y):,}  Features: {len(feature_cols)}  Positive rate: {y.mean():.2%}")
+
+    configs = param_grid(SPACE) if args.configs <= 0 else sample_params(SPACE, args.configs)
+    print(f"🔧 Configs: {len(configs)}  Folds: {args.splits}  Gap: {args.gap_min} min")
+
+    def progress(i, n, r):
+        if i % 10 == 0 or i == n:
+            m = r.metrics.get(args.metric, float("nan"))
+            print(f"   [{i}/{n}] {args.metric}={m:.4f} ({r.elapsed_sec:.1f}s)")
+
+    results = run_sweep(
+        X, y, ts, configs,
+        n_splits=args.splits,
+        gap_ms=int(args.gap_min * 60_000),
+        workers=args.workers or None,
+        metric=args.metric,
+        progress=progress,
+    )
+    failed = sum(1 for r in results if r.error)
+    best = results[0]
+    if best.error:
+        print(f"❌ All configs failed, e.g.: {best.error}")
+        sys.exit(1)
+
+    print(f"\n📊 TOP 5 by {args.metric} ({failed} failed):")
+    for r in results[:5]:
+        print(f"   {r.metrics[args.metric]:.4f}  {json.dumps(r.params)}")
+
+    # Refit best config on everything
+    model = xgb_factory({**best.params, "n_jobs": -1})
+    model.fit(X, y)
+
+    out_dir = Path(args.models)
+    out_dir.mkdir(exist_ok=True)
+    version = f"v5_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    model_file = out_dir / f"xgb_{version}.json"
+    model.save_model(str(model_file))
+
+    entry = ModelRegistry(out_dir).register(
+        model_file,
+        feature_cols,
+        version=version,
+        params=best.params,
+        metrics=best.metrics,
+        cv={"splits": args.splits, "gap_ms": int(args.gap_min * 60_000), "metric": args.metric,
+            "folds": best.folds, "configs_tried": len(configs)},
+        train_samples=len(y),
+        promote=not args.no_promote,
+    )
+
+    print(f"\n✅ Model saved: {model_file}")
+    print(f"✅ Registered: {entry.version}{' (current)' if not args.no_promote else ''}")
+
+
+if __name__ == "__main__":
+    main()
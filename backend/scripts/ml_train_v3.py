@@ -1,90 +1,110 @@
-import pandas as pd
-from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, roc_auc_score
-import xgboost as xgb
-import pickle
+"""
+ML Training v3 — fixed single config (time-series CV)
+=====================================================
+
+Same model as the original v3 (depth 4, lr 0.05, min_child_weight 5 — kept
+shallow to avoid overfitting), now trained on the columnar export
+(scripts/ml_export_columnar.py) with the serving feature registry and the
+TP-vs-rest label, validated with walk-forward folds instead of a shuffled
+split, and recorded in ml_models/registry.json instead of xgb_latest.pkl.
+
+Usage:
+    python scripts/ml_train_v3.py
+    python scripts/ml_train_v3.py --splits 3 --gap-min 10 --no-promote
+"""
+import argparse
+import sys
 from datetime import datetime
+from pathlib import Path
 
-DATA = Path('ml_data/features_fills_v3.csv')
-MODELS = Path('ml_models')
-MODELS.mkdir(exist_ok=True)
-
-print("=" * 60)
-print("TRAINING ML MODEL (v3 - No Leakage)")
-print("=" * 60)
-
-df = pd.read_csv(DATA)
-print(f"Samples: {len(df):,}")
-
-# Features (БЕЗ quote_qty!)
-feature_cols = [c for c in df.columns if c not in ['symbol', 'time_bucket', 'target']]
-X = df[feature_cols]
-y = df['target']
-
-print(f"Features: {len(feature_cols)}")
-print(f"  {feature_cols}")
-print(f"\nTarget: {y.value_counts().to_dict()}")
-
-# Split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-print(f"\nTrain: {len(X_train):,}, Test: {len(X_test):,}")
-
-# Train
-print("\n[Training XGBoost...]")
-model = xgb.XGBClassifier(
-    n_estimators=100,
-    max_depth=4,  # Уменьшим depth чтобы не переобучаться
-    learning_rate=0.05,  # Меньше LR
-    min_child_weight=5,  # Больше регуляризация
-    random_state=42
-)
-model.fit(X_train, y_train)
-
-# Evaluate
-y_pred = model.predict(X_test)
-y_proba = model.predict_proba(X_test)[:, 1]
-
-print("\n" + "=" * 60)
-print("MODEL PERFORMANCE")
-print("=" * 60)
-print(classification_report(y_test, y_pred, target_names=['Bad', 'Good']))
-print(f"\nROC AUC: {roc_auc_score(y_test, y_proba):.4f}")
-
-# Feature importance
-imp = pd.DataFrame({
-    'feature': feature_cols,
-    'importance': model.feature_importances_
-}).sort_values('importance', ascending=False)
-
-print("\n" + "=" * 60)
-print("FEATURE IMPORTANCE")
-print("=" * 60)
-print(imp.to_string(index=False))
-
-# Save
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-model_file = MODELS / f'xgb_v3_{timestamp}.pkl'
-
-with open(model_file, 'wb') as f:
-    pickle.dump({
-        'model': model,
-        'features': feature_cols,
-        'roc_auc': roc_auc_score(y_test, y_proba),
-        'timestamp': timestamp
-    }, f)
-
-# Latest
-latest = MODELS / 'xgb_latest.pkl'
-if latest.exists():
-    latest.unlink()
-
-import shutil
-shutil.copy(model_file, latest)
-
-print(f"\n✅ Saved: {model_file.name}")
-print(f"✅ Latest: xgb_latest.pkl")
-print("=" * 60)
\ No newline at end of file
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ml.export import feature_matrix, load_columns, tp_label
+from app.ml.features import FEATURE_NAMES
+from app.ml.registry import ModelRegistry
+from app.ml.training import cross_validate, time_series_splits, xgb_factory
+
+PARAMS = {
+    "n_estimators": 100,
+    "max_depth": 4,
+    "learning_rate": 0.05,
+    "min_child_weight": 5,
+}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Train the v3 XGBoost config")
+    ap.add_argument("--data", default="ml_data/columnar")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--gap-min", type=float, default=5.0, help="purge gap before each test block, minutes")
+    ap.add_argument("--models", default="ml_models")
+    ap.add_argument("--no-promote", action="store_true")
+    args = ap.parse_args()
+
+    feature_cols = list(FEATURE_NAMES)
+
+    print("=" * 60)
+    print("TRAINING ML MODEL (v3 - No Leakage)")
+    print("=" * 60)
+
+    cols = load_columns(args.data, "outcomes", columns=["ts_ms", "exit_reason", "pnl_usd", *feature_cols])
+    if len(cols["ts_ms"]) == 0:
+        print(f"❌ No data in {args.data}/outcomes — run scripts/ml_export_columnar.py")
+        sys.exit(1)
+
+    ts = np.asarray(cols["ts_ms"], dtype=np.int64)
+    order = np.argsort(ts, kind="stable")
+    X = feature_matrix(cols, feature_cols)[order]
+    y = tp_label(cols).astype(np.int64)[order]
+    ts = ts[order]
+    ok = np.isfinite(X).all(axis=1)
+    X, y, ts = X[ok], y[ok], ts[ok]
+    print(f"Samples: {len(y):,}  Features: {len(feature_cols)}  Positive rate: {y.mean():.2%}")
+
+    gap_ms = int(args.gap_min * 60_000)
+    folds = time_series_splits(ts, args.splits, gap_ms=gap_ms)
+    cv = cross_validate(X, y, folds, PARAMS)
+
+    print("\n" + "=" * 60)
+    print("MODEL PERFORMANCE (walk-forward CV mean)")
+    print("=" * 60)
+    for k, v in cv.metrics.items():
+        print(f"  {k:<10} {v:.4f}")
+
+    # Refit on everything
+    model = xgb_factory({**PARAMS, "n_jobs": -1})
+    model.fit(X, y)
+
+    print("\n" + "=" * 60)
+    print("FEATURE IMPORTANCE (top 15)")
+    print("=" * 60)
+    imp = np.asarray(model.feature_importances_)
+    for i in np.argsort(imp)[::-1][:15]:
+        print(f"  {feature_cols[i]:<32} {imp[i]:.4f}")
+
+    out_dir = Path(args.models)
+    out_dir.mkdir(exist_ok=True)
+    version = f"v3_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    model_file = out_dir / f"xgb_{version}.json"
+    model.save_model(str(model_file))
+
+    entry = ModelRegistry(out_dir).register(
+        model_file,
+        feature_cols,
+        version=version,
+        params=PARAMS,
+        metrics=cv.metrics,
+        cv={"splits": args.splits, "gap_ms": gap_ms, "folds": cv.folds},
+        train_samples=len(y),
+        promote=not args.no_promote,
+    )
+
+    print(f"\n✅ Saved: {model_file}")
+    print(f"✅ Registered: {entry.version}{' (current)' if not args.no_promote else ''}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
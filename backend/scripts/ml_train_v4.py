@@ -1,14 +1,23 @@
 """
 ML Model Training - V4
 Train XGBoost to predict TP vs TIMEOUT
+
+Data comes from the columnar export (scripts/ml_export_columnar.py), i.e. the
+ml_trade_outcomes table the engine writes for every trade, not the `trades`
+table the old CSV export read. The label keeps the old rule (app.ml.export
+.tp_label). Order-book depth is the registry feature depth5_total_usd_entry
+(bid+ask within 5 bps) — trades.depth_5bps_entry has no counterpart in
+ml_trade_outcomes.
 """
-import pandas as pd
 import numpy as np
 from pathlib import Path
-import json
-import pickle
+import sys
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.ml.export import feature_matrix, load_columns, tp_label
+from app.ml.registry import ModelRegistry
+
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
@@ -21,52 +30,41 @@ print("=" * 70)
 print("ML MODEL TRAINING - V4")
 print("=" * 70)
 
-# Load data
-data_path = Path('ml_data/training_data_v4.csv')
-if not data_path.exists():
-    print(f"❌ Data not found: {data_path}")
-    print("   Run: python scripts/ml_export_with_labels.py")
+# Load data (memory-mapped columns from scripts/ml_export_columnar.py)
+data_root = Path('ml_data/columnar')
+cols = load_columns(data_root, 'outcomes')
+if len(cols.get('id', ())) == 0:
+    print(f"❌ Data not found: {data_root}/outcomes")
+    print("   Run: python scripts/ml_export_columnar.py")
     exit(1)
 
-df = pd.read_csv(data_path)
-print(f"✅ Loaded {len(df)} trades")
+y_all = tp_label(cols).astype(np.int64)
+print(f"✅ Loaded {len(y_all)} trades")
 
 # Check label distribution
 print(f"\n📊 LABEL DISTRIBUTION:")
-print(df['label'].value_counts())
-print(f"Positive rate: {df['label'].mean():.2%}")
+print(dict(enumerate(np.bincount(y_all, minlength=2))))
+print(f"Positive rate: {y_all.mean():.2%}")
 
 # Feature engineering
 print(f"\n🔧 FEATURE ENGINEERING...")
 
-# Parse strategy_params JSON if exists
-if 'strategy_params' in df.columns:
-    try:
-        params = df['strategy_params'].apply(lambda x: json.loads(x) if pd.notna(x) else {})
-        # Extract useful params if needed
-    except:
-        pass
-
-# Feature set
+# Feature set — serving features only (app.ml.features registry). No outcome
+# columns such as pnl_bps (that is the label leaking in) and no ad-hoc symbol
+# codes: MLPredictor could not compute either at inference.
 feature_cols = [
     'spread_bps_entry',
     'imbalance_entry',
-    'depth_5bps_entry',
-    'pnl_bps',  # Can use for feature but not for prediction
+    'depth5_total_usd_entry',
 ]
 
-# Add symbol as categorical
-df['symbol_cat'] = pd.Categorical(df['symbol']).codes
-
-feature_cols.append('symbol_cat')
+X_all = feature_matrix(cols, feature_cols)
 
 # Drop rows with missing features
-df_clean = df[feature_cols + ['label']].dropna()
-print(f"✅ Clean data: {len(df_clean)} rows")
-
-# Separate features and target
-X = df_clean[feature_cols]
-y = df_clean['label']
+ok = np.isfinite(X_all).all(axis=1)
+X = X_all[ok]
+y = y_all[ok]
+print(f"✅ Clean data: {len(X)} rows")
 
 # Train/test split
 X_train, X_test, y_train, y_test = train_test_split(
@@ -159,36 +157,28 @@ output_dir = Path('ml_models')
 output_dir.mkdir(exist_ok=True)
 
 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-model_file = output_dir / f'xgb_v4_{timestamp}.pkl'
+model_file = output_dir / f'xgb_v4_{timestamp}.json'
+model.save_model(str(model_file))
+
+print(f"\n✅ Model saved: {model_file}")
 
-model_data = {
-    'model': model,
-    'version': f'v4_{timestamp}',
-    'features': feature_cols,
-    'metrics': {
+# Record in the model registry (promote with ModelRegistry.promote() or ml_train_sweep.py)
+entry = ModelRegistry(output_dir).register(
+    model_file,
+    feature_cols,
+    version=f'v4_{timestamp}',
+    params=model.get_params(),
+    metrics={
         'accuracy': accuracy,
         'precision': precision,
         'recall': recall,
         'f1': f1,
         'auc': auc,
     },
-    'trained_at': datetime.now().isoformat(),
-    'train_size': len(X_train),
-    'test_size': len(X_test),
-}
-
-with open(model_file, 'wb') as f:
-    pickle.dump(model_data, f)
-
-print(f"\n✅ Model saved: {model_file}")
-
-# Create symlink to latest
-latest_link = output_dir / 'xgb_latest.pkl'
-if latest_link.exists():
-    latest_link.unlink()
-latest_link.symlink_to(model_file.name)
+    train_samples=len(X_train),
+)
 
-print(f"✅ Symlink created: {latest_link}")
+print(f"✅ Registered: {entry.version}")
 
 # Example predictions
 print(f"\n📊 EXAMPLE PREDICTIONS:")
@@ -197,7 +187,7 @@ print(f"\n📊 EXAMPLE PREDICTIONS:")
 top_indices = y_pred_proba.argsort()[-5:][::-1]
 print("\nTop 5 predicted TPs:")
 for idx in top_indices:
-    actual = y_test.iloc[idx]
+    actual = y_test[idx]
     pred_proba = y_pred_proba[idx]
     print(f"  Actual: {actual}, Predicted: {pred_proba:.3f}")
 
@@ -205,7 +195,7 @@ for idx in top_indices:
 bottom_indices = y_pred_proba.argsort()[:5]
 print("\nTop 5 predicted TIMEOUTs:")
 for idx in bottom_indices:
-    actual = y_test.iloc[idx]
+    actual = y_test[idx]
     pred_proba = y_pred_proba[idx]
     print(f"  Actual: {actual}, Predicted: {pred_proba:.3f}")
 
@@ -217,4 +207,4 @@ print("  1. Review metrics above")
 print("  2. If model is good → integrate into backend")
 print("  3. If model is poor → collect more data or tune hyperparameters")
 print(f"\n  Model file: {model_file}")
-print(f"  Use in code: get_ml_predictor(model_path='{model_file}')")
\ No newline at end of file
+print(f"  Promote:    ModelRegistry('ml_models').promote('{entry.version}')")
\ No newline at end of file
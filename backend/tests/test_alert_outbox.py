@@ -0,0 +1,124 @@
+# tests/test_alert_outbox.py
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.alert_outbox import AlertOutbox
+from app.services.alert_outbox import AlertOutboxService, MemoryTransport, build_messages
+
+
+class _Clock:
+    def __init__(self):
+        self.t = datetime(2026, 1, 1, 12, 0, 0)
+
+    def __call__(self):
+        return self.t
+
+
+def _outbox(tmp_path, **kw):
+    eng = create_engine(f"sqlite:///{tmp_path / 'a.db'}", future=True)
+    AlertOutbox.__table__.create(eng)
+    factory = sessionmaker(bind=eng, future=True)
+    clock = _Clock()
+    transport = MemoryTransport()
+    box = AlertOutboxService(factory, transport, dedupe_window_sec=60, backoff_base_sec=10,
+                             max_attempts=3, now_fn=clock, **kw)
+    return box, transport, clock, factory
+
+
+def _rows(factory):
+    with factory() as db:
+        return db.execute(select(AlertOutbox).order_by(AlertOutbox.id)).scalars().all()
+
+
+def test_burst_is_deduped_and_coalesced_into_one_digest(tmp_path):
+    box, transport, clock, factory = _outbox(tmp_path)
+    for i in range(20):
+        assert box.enqueue("WARNING", "Cooldown: BTCUSDT", f"loss #{i}", key="cooldown:BTCUSDT")
+    box.enqueue("ERROR", "WebSocket Disconnected", "MEXC", key="ws:MEXC")
+    box.enqueue("INFO", "", "<b>Daily report</b>", key="daily_report:2026-01-01")
+    assert box.pending_count() == 3
+
+    assert asyncio.run(box.flush_once()) == 3
+    assert len(transport.sent) == 2
+    assert transport.sent[0] == "<b>Daily report</b>"
+    digest = transport.sent[1]
+    assert digest.startswith("📬 <b>2 alerts</b>") and "×20" in digest and "loss #19" in digest
+
+    # still inside the window: counted on the sent row, not re-sent
+    clock.t += timedelta(seconds=30)
+    box.enqueue("WARNING", "Cooldown: BTCUSDT", "again", key="cooldown:BTCUSDT")
+    assert asyncio.run(box.flush_once()) == 0 and _rows(factory)[0].count == 21
+    # window elapsed: a new alert
+    clock.t += timedelta(seconds=60)
+    box.enqueue("WARNING", "Cooldown: BTCUSDT", "later", key="cooldown:BTCUSDT")
+    assert asyncio.run(box.flush_once()) == 1 and "later" in transport.sent[-1]
+
+
+def test_failed_delivery_backs_off_then_gives_up(tmp_path):
+    box, transport, clock, factory = _outbox(tmp_path)
+    box.enqueue("CRITICAL", "Emergency stop", "halted", key="emergency_stop", force=True)
+
+    transport.fail_next = 10
+    assert asyncio.run(box.flush_once()) == 0
+    row = _rows(factory)[0]
+    assert row.status == "PENDING" and row.attempts == 1 and row.next_attempt_at == clock.t + timedelta(seconds=10)
+    assert asyncio.run(box.flush_once()) == 0 and transport.fail_next == 9  # not due yet, nothing attempted
+
+    clock.t += timedelta(seconds=10)
+    asyncio.run(box.flush_once())
+    assert _rows(factory)[0].next_attempt_at == clock.t + timedelta(seconds=20)
+    transport.fail_next = 0
+    clock.t += timedelta(seconds=20)
+    assert asyncio.run(box.flush_once()) == 1
+    row = _rows(factory)[0]
+    assert row.status == "SENT" and row.attempts == 3 and "Emergency stop" in transport.sent[0]
+
+    box.enqueue("ERROR", "Other", "x", key="other")
+    transport.fail_next = 3
+    for _ in range(3):
+        clock.t += timedelta(minutes=10)
+        asyncio.run(box.flush_once())
+    assert _rows(factory)[-1].status == "FAILED"
+
+
+def test_quiet_hours_drop_non_forced_and_digests_respect_size_limit(tmp_path):
+    box, transport, _, factory = _outbox(tmp_path, quiet_hours=lambda: True)
+    box.enqueue("INFO", "Profit target", "yay", key="profit_target")
+    box.enqueue("CRITICAL", "Daily loss limit", "halt", key="daily_loss_limit", force=True)
+    assert asyncio.run(box.flush_once()) == 1
+    assert [r.status for r in _rows(factory)] == ["DROPPED", "SENT"]
+
+    now = datetime(2026, 1, 1)
+    rows = [{"id": i, "level": "INFO", "title": f"t{i}", "body": "x" * 300, "count": 1, "created_at": now}
+            for i in range(40)]
+    msgs = build_messages(rows, limit=1000)
+    assert all(len(text) <= 1000 for text, _ in msgs)
+    assert sorted(i for _, ids in msgs for i in ids) == list(range(40))
+
+
+def test_disabled_transport_does_not_queue(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'd.db'}", future=True)
+    AlertOutbox.__table__.create(eng)
+    box = AlertOutboxService(sessionmaker(bind=eng), None)
+    assert not box.enqueue("INFO", "x", "y") and box.pending_count() == 0
+
+
+def test_enqueue_never_touches_the_db_and_survives_a_failed_persist(tmp_path):
+    box, transport, _, factory = _outbox(tmp_path)
+    opened = []
+
+    def broken():
+        opened.append(1)
+        raise RuntimeError("database is locked")
+
+    box._session_factory = broken
+    assert box.enqueue("ERROR", "WebSocket Disconnected", "MEXC", key="ws:MEXC")
+    assert opened == []                      # producer side is a memory append
+
+    assert box._persist_buffered() == 0 and len(box._buffer) == 1
+
+    box._session_factory = factory
+    assert asyncio.run(box.flush_once()) == 1 and "WebSocket Disconnected" in transport.sent[0]
@@ -0,0 +1,45 @@
+# tests/test_book_tracker_snapshots.py
+import asyncio
+
+import pytest
+
+from app.market_data.book_tracker import BookTracker
+
+
+async def test_readers_share_the_published_snapshot_until_the_next_update():
+    bt = BookTracker()
+    await bt.update_book_ticker("btcusdt", 100.0, 2.0, 100.2, 1.0, ts_ms=1)
+
+    q1 = await bt.get_quote("BTCUSDT")
+    assert q1 is await bt.get_quote("BTCUSDT")          # no copy, no recompute
+    assert (await bt.get_quotes(["BTCUSDT"]))[0] is q1
+    assert round(q1["imbalance"], 4) == round(2 / 3, 4)
+
+    await bt.update_partial_depth("BTCUSDT", [(100.08, 2.0), (99.0, 5.0)], [(100.2, 1.0)], ts_ms=2)
+    q2 = await bt.get_quote("BTCUSDT")
+    assert q2 is not q1 and q1["absorption_bid_usd"] == 0.0   # old snapshot left untouched
+    assert q2["absorption_bid_usd"] == pytest.approx(200.16)
+    assert bt._states["BTCUSDT"].version == 2
+
+    # a non-default band is computed on demand from the same published state
+    wide = await bt.get_quote("BTCUSDT", absorption_x_bps=200)
+    assert wide["absorption_bid_usd"] == pytest.approx(200.16 + 99.0 * 5.0)
+
+
+async def test_broadcast_runs_on_a_stable_subscriber_list():
+    bt = BookTracker()
+    late = []
+
+    def listener(payload):
+        # subscribing while a broadcast is in flight must not disturb it
+        late.append(asyncio.ensure_future(bt.subscribe()))
+
+    q = await bt.subscribe()
+    bt.add_listener(listener)
+    await bt.update_book_ticker("ETHUSDT", 10.0, 1.0, 10.1, 1.0)
+    q_late = await late[0]
+
+    assert (await q.get())["symbol"] == "ETHUSDT"
+    assert q_late.empty() and len(bt._subscribers) == 2
+    await bt.unsubscribe(q)
+    assert bt._subscribers == [q_late]
@@ -0,0 +1,61 @@
+# tests/test_bulk_tickers.py
+import json
+
+import httpx
+
+from app.market_data.book_tracker import BookTracker
+from app.services import book_tracker as bt
+from app.services.price_poller import PricePoller
+
+_MEXC_ALL = [
+    {"symbol": "BTCUSDT", "bidPrice": "100.0", "bidQty": "1", "askPrice": "100.5", "askQty": "2"},
+    {"symbol": "ETHUSDT", "bidPrice": "10.0", "bidQty": "3", "askPrice": "10.1", "askQty": "4"},
+    {"symbol": "SOLUSDT", "bidPrice": "5.0", "bidQty": "5", "askPrice": "5.1", "askQty": "6"},
+    {"symbol": "XRPUSDT", "bidPrice": "0.5", "bidQty": "7", "askPrice": "0.51", "askQty": "8"},
+]
+
+
+async def test_bulk_snapshot_is_one_request(monkeypatch):
+    monkeypatch.setattr(bt, "_is_gate", lambda: False)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        assert "symbol" not in request.url.params
+        return httpx.Response(200, content=json.dumps(_MEXC_ALL).encode())
+
+    async with httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler)) as client:
+        ticks = await bt._fetch_tickers(client, ["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+
+    assert len(calls) == 1
+    assert sorted(t["symbol"] for t in ticks) == ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    btc = next(t for t in ticks if t["symbol"] == "BTCUSDT")
+    assert (btc["bid"], btc["bidQty"], btc["ask"], btc["askQty"]) == (100.0, 1.0, 100.5, 2.0)
+
+
+def test_gate_bulk_payload_maps_pairs(monkeypatch):
+    monkeypatch.setattr(bt, "_is_gate", lambda: True)
+    data = [
+        {"currency_pair": "BTC_USDT", "highest_bid": "100", "lowest_ask": "101"},
+        {"currency_pair": "DOGE_USDT", "highest_bid": "0.1", "lowest_ask": "0.11"},
+    ]
+    ticks = bt._parse_bulk_tickers(data, {"BTCUSDT"}, ts_ms=1)
+    assert ticks == [{"symbol": "BTCUSDT", "bid": 100.0, "ask": 101.0, "bidQty": 0.0, "askQty": 0.0, "ts_ms": 1}]
+
+
+async def test_batched_update_skips_unchanged():
+    tracker = BookTracker()
+    q = await tracker.subscribe()
+    rows = [("BTCUSDT", 100.0, 1.0, 100.5, 2.0, 1), ("ETHUSDT", 10.0, 3.0, 10.1, 4.0, 1)]
+    assert await tracker.update_book_tickers(rows) == 2
+    assert await tracker.update_book_tickers([("BTCUSDT", 100.0, 1.0, 100.5, 2.0, 2), ("ETHUSDT", 10.0, 3.0, 10.2, 4.0, 2)]) == 1
+    assert q.qsize() == 3
+    assert (await tracker.get_quote("ETHUSDT"))["ask"] == 10.2
+
+
+def test_price_poller_counts_changes():
+    poller = PricePoller()
+    assert poller._apply(_MEXC_ALL, ["btcusdt", "XRPUSDT"], now=1.0) == 2
+    assert poller._apply(_MEXC_ALL, ["BTCUSDT", "XRPUSDT"], now=2.0) == 0
+    assert poller.get_price("BTCUSDT")["timestamp"] == 2.0
+    assert poller.get_mid("XRPUSDT") == (0.5 + 0.51) / 2
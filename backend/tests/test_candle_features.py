@@ -0,0 +1,88 @@
+# tests/test_candle_features.py
+import time
+
+import numpy as np
+import pytest
+
+from app.services import candle_features as cf
+from app.services.candles_cache import Candle1m, CandlesCache
+
+KEYS = ["atr1m_pct", "spike_count_90m", "pullback_median_retrace", "grinder_ratio",
+        "range_stable_pct", "vol_pattern", "dca_potential"]
+
+
+def _universe(symbols=4, bars=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 5.0 * np.exp(np.cumsum(rng.normal(0, 0.003, (symbols, bars)), axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    wick = np.abs(rng.normal(0, 0.002, (symbols, bars))) * close
+    x = np.stack([open_, np.maximum(open_, close) + wick, np.minimum(open_, close) - wick * 0.5,
+                  close, rng.lognormal(2, 0.3, (symbols, bars))], axis=-1)
+    ts = np.tile(np.arange(bars, dtype=np.int64) * 60, (symbols, 1))
+    return ts, x
+
+
+def test_kernels_match_simple_cases():
+    # flat closes, constant TR of 2 → ATR 2 / 10
+    n = 25
+    h, l, c = np.full((1, n), 11.0), np.full((1, n), 9.0), np.full((1, n), 10.0)
+    assert cf.atr_pct(h, l, c)[0] == pytest.approx(0.2)
+    assert cf.atr_pct(h[:, :20], l[:, :20], c[:, :20])[0] == 0.0          # not enough bars
+    assert cf.range_stable_pct(np.full((1, 60), 3.0))[0] == 0.0
+    assert cf.vol_pattern(np.full((1, 60), 5.0))[0] == 100
+    assert cf.retrace_median(h, l, c)[0] == 0.35                          # < lookback
+    assert cf.dca_potential(np.array([0.35]), np.array([0.05]))[0] == 50
+
+
+def test_calc_wrappers_on_candle_lists():
+    cache = CandlesCache()
+    candles = [Candle1m(ts=i * 60, o=10, h=11, l=9, c=10.5 if i % 2 else 10, v=1 + i % 3) for i in range(100)]
+    assert cache.calc_atr_pct(candles) == pytest.approx(2.0 / 10.5)
+    assert cache.calc_spike_count_90m(candles) == 90
+    assert cache.calc_grinder_ratio(candles) == 0.0
+    assert cache.calc_vol_pattern_from_v(candles[:10]) == 0
+
+
+def test_batch_equals_per_symbol():
+    ts, x = _universe()
+    batch = cf.batch_stats(ts, x)
+    for s in range(len(batch)):
+        one = cf.stats_from_arrays(ts[s], x[s])
+        assert [one[k] for k in KEYS] == pytest.approx([batch[s][k] for k in KEYS])
+
+
+def test_rolling_matches_full_recompute():
+    ts, x = _universe(symbols=1, bars=400)
+    ts, x = ts[0], x[0]
+    roll = cf.RollingFeatures()
+    roll.rebuild(ts[:200], x[:200])
+    for i in range(200, 400):
+        live = x[i].copy()
+        live[3] = live[0]                                  # first tick of the bar
+        assert roll.update(ts[i], *live, capacity=1000)
+        assert roll.update(ts[i], *x[i], capacity=1000)    # live bar finalised
+    assert not roll.update(ts[10], *x[10], capacity=1000)  # out of order → rebuild needed
+
+    tail_ts, tail_x = ts[-300:], x[-300:]
+    inc = cf.stats_from_arrays(tail_ts, tail_x, roll)
+    full = cf.stats_from_arrays(tail_ts, tail_x)
+    assert [inc[k] for k in KEYS] == pytest.approx([full[k] for k in KEYS], rel=1e-9)
+
+
+async def test_cache_batch_stats_and_lazy_recompute():
+    ts, x = _universe(symbols=3)
+    cache = CandlesCache()
+    now = int(time.time())
+    for s, sym in enumerate(["AAAUSDT", "BBBUSDT", "CCCUSDT"]):
+        for t, row in zip(ts[s], x[s]):
+            cache.on_kline(sym, "mexc", now - 300 * 60 + int(t), *row)
+    out = cache.batch_stats(venue="mexc")
+    assert set(out) == {"AAAUSDT", "BBBUSDT", "CCCUSDT"}
+    assert out["BBBUSDT"]["bars_1m"] == 300
+
+    # per-symbol path agrees with the batch pass and is cached until a new bar arrives
+    key = cache._norm_key("BBBUSDT", "mexc")
+    cache._dirty.add(key)
+    one = cache.get_stats_cached("BBBUSDT", venue="mexc")
+    assert [one[k] for k in KEYS] == pytest.approx([out["BBBUSDT"][k] for k in KEYS])
+    assert cache._stats_from_ring("mexc:BBB_USDT", key) is one
@@ -0,0 +1,87 @@
+# tests/test_candles_cache.py
+import time
+
+import numpy as np
+
+from app.services.candles_cache import Candle1m, CandleRing, CandlesCache
+
+
+def _bar(ts, c=1.0, v=1.0):
+    return Candle1m(ts=ts, o=c, h=c + 0.1, l=c - 0.1, c=c, v=v)
+
+
+class _FakeRest(CandlesCache):
+    """CandlesCache with REST replaced by an in-memory minute series."""
+
+    def __init__(self, now_ts: int):
+        super().__init__()
+        self.now_ts = now_ts
+        self.calls = []
+
+    async def _fetch(self, pair_key, venue, limit):
+        self.calls.append(limit)
+        last = self.now_ts - self.now_ts % 60
+        return [_bar(last - 60 * i, c=100.0 + i) for i in range(limit)][::-1]
+
+
+def test_ring_append_update_wrap_and_patch():
+    r = CandleRing(capacity=4)
+    for t in (60, 120, 180):
+        assert r.upsert(t, 1, 2, 0.5, 1.5, 10)
+    # live bar updated in place
+    assert r.upsert(180, 1, 3, 0.5, 2.5, 20)
+    assert len(r) == 3 and r.last_ts == 180
+    # wrap: oldest dropped
+    r.upsert(240, 1, 1, 1, 1, 1)
+    r.upsert(300, 1, 1, 1, 1, 1)
+    ts, x = r.arrays()
+    assert ts.tolist() == [120, 180, 240, 300]
+    assert x[1].tolist() == [1, 3, 0.5, 2.5, 20]
+    # older bar inside the window is patched, outside is rejected
+    assert r.upsert(120, 9, 9, 9, 9, 9)
+    assert not r.upsert(60, 9, 9, 9, 9, 9)
+    assert r.to_candles(2)[0].ts == 240
+    assert r.arrays(0)[0].size == 0
+
+
+async def test_backfill_once_then_ws_bars_without_rest():
+    now = int(time.time())
+    cache = _FakeRest(now)
+    candles = await cache.get_1m("LINKUSDT", venue="mexc", limit=300)
+    assert len(candles) == 300 and cache.calls == [300]
+
+    last = candles[-1].ts
+    cache.on_kline("LINK_USDT", "mexc", last, 1, 5, 1, 4, 7)          # live bar update
+    cache.on_kline("LINKUSDT", "mexc", (last + 60) * 1000, 4, 4, 4, 4, 1)  # new bar, ms ts
+    cache._ts_fetch.clear()                                             # TTL expired
+
+    candles = await cache.get_1m("LINKUSDT", venue="mexc", limit=300)
+    assert cache.calls == [300]                                         # WS live → no REST
+    assert candles[-1].ts == last + 60 and candles[-2].h == 5
+    assert cache.stats()["ws_bars"] == 2
+
+
+async def test_rest_delta_when_ws_is_silent():
+    now = int(time.time())
+    cache = _FakeRest(now)
+    await cache.get_1m("SOLUSDT", venue="gate")
+    cache._ts_fetch = {k: time.monotonic() - 60 for k in cache._ts_fetch}
+    await cache.get_1m("SOLUSDT", venue="gate")
+    # only the live bar (and maybe the one just closed) is re-fetched
+    assert cache.calls[0] == 300 and cache.calls[1] <= 2
+
+
+async def test_ws_bars_before_backfill_are_kept_and_stats_refresh():
+    now = int(time.time())
+    cache = _FakeRest(now)
+    live = now - now % 60
+    cache.on_kline("XRPUSDT", "gate", live, 1, 9, 1, 8, 3)
+
+    candles = await cache.get_1m("XRPUSDT", venue="gate", limit=300)
+    assert len(candles) == 300 and candles[-1].c == 8
+
+    st = await cache.get_stats("XRPUSDT", venue="gate")
+    assert st["last_candle_ts"] == live and st["bars_1m"] == 300
+    cache.on_kline("XRPUSDT", "gate", live + 60, 8, 8, 8, 8, 1)
+    assert cache.get_stats_cached("XRPUSDT", venue="gate")["last_candle_ts"] == live + 60
+    assert isinstance(cache._candles["gate:XRP_USDT"].arrays()[1], np.ndarray)
@@ -0,0 +1,64 @@
+# tests/test_derived_metrics.py
+import pytest
+
+from app.market_data.book_tracker import BookTracker, depth_at_bps
+from app.services import market_scanner
+from app.services import book_tracker as svc_book
+from app.services.book_tracker import _with_derived
+
+BIDS = [(99.99, 10.0), (99.95, 5.0), (99.90, 2.0), (99.0, 100.0)]
+ASKS = [(100.01, 8.0), (100.06, 4.0), (100.20, 3.0), (101.0, 100.0)]
+
+
+def _naive(levels, mid, x_bps, bid_side):
+    edge = mid * (1 - x_bps / 1e4) if bid_side else mid * (1 + x_bps / 1e4)
+    return sum(p * q for p, q in levels if (p >= edge if bid_side else p <= edge))
+
+
+def test_one_pass_bands_match_per_band_sums():
+    d = depth_at_bps(BIDS, ASKS, 100.0, [10, 2, 5, 25])
+    assert list(d) == [2, 5, 10, 25]
+    for band, v in d.items():
+        assert v["bid_usd"] == pytest.approx(_naive(BIDS, 100.0, band, True))
+        assert v["ask_usd"] == pytest.approx(_naive(ASKS, 100.0, band, False))
+
+    # the scanner's depth map is the same computation, rounded
+    m = market_scanner._build_depth_map(BIDS, ASKS, 100.0, [5, 10])
+    assert m[10] == {"bid_usd": round(d[10]["bid_usd"], 2), "ask_usd": round(d[10]["ask_usd"], 2)}
+
+
+async def test_metrics_are_computed_once_per_book_change_and_reused():
+    bt = BookTracker()
+    await bt.update_book_ticker("BTCUSDT", 99.99, 10.0, 100.01, 8.0, ts_ms=1)
+    await bt.update_partial_depth("BTCUSDT", BIDS, ASKS, ts_ms=2)
+    assert bt.invalidations == 2
+
+    q = await bt.get_quote("BTCUSDT")
+    for _ in range(100):
+        assert await bt.get_quote("BTCUSDT") is q
+    assert bt.invalidations == 2 and bt.cache_hits == 101
+
+    # a precomputed band is served from the cache; an unknown one is computed
+    q10 = await bt.get_quote("BTCUSDT", absorption_x_bps=10)
+    assert q10["absorption_bid_usd"] == q["depth_at_bps"][10]["bid_usd"] and bt.cache_misses == 0
+    await bt.get_quote("BTCUSDT", absorption_x_bps=7)
+    assert bt.cache_misses == 1
+
+    # the SSE / service shape reuses the tracker's cached band instead of re-summing levels
+    band = q["depth_at_bps"][svc_book.DEFAULT_ABS_BPS]
+    band_imb = band["bid_usd"] / (band["bid_usd"] + band["ask_usd"])
+    out = _with_derived(q)
+    assert (out["absorption_bid_usd"], out["absorption_ask_usd"]) == (band["bid_usd"], band["ask_usd"])
+    assert out["imbalance"] == band_imb and band["bid_usd"] > 0
+
+    # with levels on the quote (service merge path) the cached band still wins
+    l2 = {**q, "bids": [(99.99, 1.0)], "asks": [(100.01, 1.0)]}
+    out = _with_derived(l2)
+    assert (out["absorption_bid_usd"], out["imbalance"]) == (band["bid_usd"], band_imb)
+
+    # levels without a cached band: same depth_at_bps sum; nothing at all: neutral
+    bare = {"symbol": "BTCUSDT", "bid": 99.99, "ask": 100.01, "bids": BIDS, "asks": ASKS}
+    d = depth_at_bps(BIDS, ASKS, 100.0, [svc_book.DEFAULT_ABS_BPS])[svc_book.DEFAULT_ABS_BPS]
+    assert _with_derived(bare)["absorption_bid_usd"] == d["bid_usd"]
+    neutral = _with_derived({"symbol": "BTCUSDT", "bid": 99.99, "ask": 100.01})
+    assert (neutral["absorption_bid_usd"], neutral["absorption_ask_usd"], neutral["imbalance"]) == (0.0, 0.0, 0.5)
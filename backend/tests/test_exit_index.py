@@ -0,0 +1,112 @@
+# tests/test_exit_index.py
+import time
+from decimal import Decimal
+
+from app.services.position_slot_manager import PositionSlotManager
+from app.strategy.engine_hft import HFTStrategyEngine
+from app.strategy.exit_index import ExitTriggerIndex
+
+
+def _index():
+    idx = ExitTriggerIndex()
+    # TP +10bps, SL -20bps, deadlines 10/20/30
+    for key, (entry, deadline) in enumerate([(100.0, 10.0), (100.1, 20.0), (100.2, 30.0)]):
+        idx.add("BTCUSDT", key, entry_price=entry, tp_bps=10, sl_bps=20, deadline=deadline)
+    return idx
+
+
+def test_only_crossed_triggers_fire():
+    idx = _index()
+    assert idx.crossed("BTCUSDT", 100.05, now=0.0) == []
+
+    hits = idx.crossed("BTCUSDT", 100.15, now=0.0)          # >= 100.1 → slot 0 TP
+    assert [(t.key, r) for t, r in hits] == [(0, "TP")]
+
+    hits = idx.crossed("BTCUSDT", 99.95, now=0.0)           # <= 100.2 * 0.998 → slot 2 SL
+    assert [(t.key, r) for t, r in hits] == [(2, "SL")]
+
+    assert idx.crossed("BTCUSDT", 100.05, now=19.9) == []
+    hits = idx.crossed("BTCUSDT", 100.05, now=20.0)
+    assert [(t.key, r) for t, r in hits] == [(1, "TIMEOUT")]
+    assert len(idx) == 0 and idx.symbols() == []
+
+
+def test_trailing_stops_move_in_bulk():
+    idx = _index()
+    # a 15bps trail at mid=100.1 lifts the stops of slots 0 and 1, not slot 2 (99.9996)
+    assert idx.trail("BTCUSDT", 100.1, trail_bps=15) == 2
+    level = 100.1 * (1 - 15 / 1e4)
+    assert idx.stop_price("BTCUSDT", 0) == idx.stop_price("BTCUSDT", 1) == level
+    assert idx.trail("BTCUSDT", 100.0, trail_bps=15) == 0   # stops never move down
+
+    hits = dict((t.key, r) for t, r in idx.crossed("BTCUSDT", level, now=0.0))
+    assert hits == {0: "TRAIL", 1: "TRAIL", 2: "SL"}
+
+
+class _Executor:
+    def __init__(self):
+        self.orders = []
+
+    async def place_maker(self, symbol, side, price, qty, tag):
+        self.orders.append((symbol, tag))
+        return "m1"
+
+    async def place_market(self, symbol, side, qty, tag):
+        self.orders.append((symbol, tag))
+        return "m2"
+
+
+async def test_engine_exits_only_crossed_slots_with_one_quote_per_symbol():
+    ex = _Executor()
+    eng = HFTStrategyEngine(ex, ["AAAUSDT", "BBBUSDT"], max_slots_per_symbol=200, tp_bps=10, sl_bps=20, timeout_sec=60)
+    eng.slot_manager = PositionSlotManager(200)
+    for sym in eng.symbols:
+        await eng.slot_manager.initialize_symbol(sym, 200)
+        for i in range(200):
+            # entries spread from 99.0 to 100.99
+            await eng.slot_manager.open_slot(sym, i, Decimal(str(99 + i / 100)), Decimal("1"), f"{sym}-{i}")
+            eng._index_slot(sym, (await eng.slot_manager.get_open_positions(sym))[-1])
+
+    quotes = []
+
+    async def get_quote(symbol):
+        quotes.append(symbol)
+        return {"bid": 99.99, "ask": 100.01, "mid": 100.0, "spread_bps": 2.0}
+
+    eng._get_quote = get_quote
+    t0 = time.perf_counter()
+    await eng._check_all_exits()
+    assert time.perf_counter() - t0 < 1.0
+    assert sorted(quotes) == ["AAAUSDT", "BBBUSDT"]
+
+    # TP for entries <= 100/1.001 (99.00..99.90), SL for entries >= 100/0.998 (100.21..100.99)
+    tags = [t for s, t in ex.orders if s == "AAAUSDT"]
+    assert tags.count("hft_exit_tp") == 91 and tags.count("hft_exit_sl") == 79
+    assert len(await eng.slot_manager.get_open_positions("AAAUSDT")) == 30
+    assert len(eng._exits) == 60
+
+    ex.orders.clear()
+    await eng._check_all_exits()
+    assert ex.orders == []
+
+
+def test_reinsert_keeps_the_trailed_stop_and_removal_bisects():
+    idx = _index()
+    idx.trail("BTCUSDT", 100.1, trail_bps=15)
+    level = 100.1 * (1 - 15 / 1e4)
+
+    (trig, reason), = idx.crossed("BTCUSDT", 100.12, now=0.0)    # slot 0 TP claimed...
+    assert (trig.key, reason) == (0, "TP") and trig.stop_px == level
+    idx.reinsert("BTCUSDT", trig)                                # ...but its exit order failed
+    assert idx.stop_price("BTCUSDT", 0) == level
+    assert dict((t.key, r) for t, r in idx.crossed("BTCUSDT", level, now=0.0)) == {0: "TRAIL", 1: "TRAIL", 2: "SL"}
+
+    # many equal prices: removal finds the key inside its price group only
+    big = ExitTriggerIndex()
+    for k in range(1000):
+        big.add("X", k, entry_price=100.0 + (k % 3), tp_bps=10, sl_bps=20, deadline=1e9)
+    for k in range(0, 1000, 2):
+        assert big.remove("X", k).key == k
+    assert len(big) == 500 and big.stop_price("X", 1) == 101.0 * (1 - 20 / 1e4)
+    s = big._syms["X"]
+    assert s.stop_px == sorted(s.stop_px) and sorted(s.stop_key) == list(range(1, 1000, 2))
@@ -0,0 +1,85 @@
+# tests/test_feature_store.py
+import math
+
+from app.ml.features import (
+    FEATURE_NAMES,
+    compute_features,
+    iter_feature_rows,
+    normalize_raw,
+    select,
+)
+from app.ml.feature_store import FeatureStore
+from app.services.market_scanner import ScanRow
+
+
+def _row() -> ScanRow:
+    return ScanRow(
+        symbol="LINKUSDT",
+        exchange="mexc",
+        bid=14.123,
+        ask=14.125,
+        spread_bps=1.4,
+        imbalance=0.62,
+        eff_spread_maker_bps=1.4,
+        depth_at_bps={5: {"bid_usd": 1200.0, "ask_usd": 800.0}, 10: {"bid_usd": 3000.0, "ask_usd": 2000.0}},
+        trades_per_min=12.0,
+        usd_per_min=600.0,
+        atr1m_pct=0.12,
+        score=7.5,
+    )
+
+
+def test_defaults_for_unknown_symbol():
+    snap = FeatureStore().snapshot("NOPEUSDT")
+    d = snap.as_dict()
+    assert d["imbalance_entry"] == 0.5
+    assert d["depth_imbalance_entry"] == 1.0
+    assert d["pullback_median_retrace_entry"] == 0.35
+    assert d["mm_safe_size_entry"] == 50.0
+
+
+def test_online_matches_batch():
+    store = FeatureStore()
+    row = _row()
+    store.update_scan_row(row)
+    online = list(store.snapshot("LINKUSDT").values)
+    batch = next(iter_feature_rows([row]))
+    assert online == batch
+    assert online == [compute_features(normalize_raw(row.to_dict()))[n] for n in FEATURE_NAMES]
+
+
+def test_derived_features():
+    store = FeatureStore()
+    store.update_scan_row(_row())
+    snap = store.snapshot("LINKUSDT")
+    assert math.isclose(snap["depth5_total_usd_entry"], 2000.0)
+    assert math.isclose(snap["depth_ratio_5_to_10_entry"], 0.4)
+    assert math.isclose(snap["avg_trade_size_entry"], 50.0)
+    assert snap["eff_spread_maker_bps_entry"] == 1.4
+
+
+def test_incremental_recompute_only_dependents():
+    store = FeatureStore()
+    store.update_scan_row(_row())
+    # unchanged inputs → nothing recomputed
+    assert store.update("LINKUSDT", {"spread_bps": 1.4}) == 0
+    # spread feeds spread_bps_entry + spread_to_depth5_ratio_entry
+    assert store.update("LINKUSDT", {"spread_bps": 2.0}) == 2
+
+
+def test_snapshot_is_isolated_copy():
+    store = FeatureStore()
+    store.update_scan_row(_row())
+    snap = store.snapshot("LINKUSDT")
+    store.update("LINKUSDT", {"imbalance": 0.1})
+    assert snap["imbalance_entry"] == 0.62
+    assert store.snapshot("LINKUSDT")["imbalance_entry"] == 0.1
+
+
+def test_quote_listener_and_select_onehot():
+    store = FeatureStore()
+    store.on_quote({"symbol": "SOLUSDT", "bid": 100.0, "ask": 100.02, "spread_bps": 2.0, "spread": 0.02, "imbalance": 0.7})
+    snap = store.snapshot("SOLUSDT")
+    assert snap["spread_bps_entry"] == 2.0
+    assert snap.select(["imbalance_entry", "sym_SOLUSDT", "sym_XRPUSDT"]) == [0.7, 1.0, 0.0]
+    assert select({}, ["spread_bps_entry", "unknown"]) == [0.0, 0.0]
@@ -0,0 +1,45 @@
+# tests/test_feed_health.py
+from app.market_data.feed_health import FeedHealthSupervisor
+
+
+def _sup():
+    return FeedHealthSupervisor(stale_after_sec=5.0, recover_sec=3.0, fresh_sec=1.0)
+
+
+def test_new_symbol_polls_rest_until_ws_proves_fresh():
+    sup = _sup()
+    assert sup.rest_symbols(["BTCUSDT"], "depth", now=0.0) == ["BTCUSDT"]
+
+    for t in (0.0, 0.5, 1.0, 1.5, 2.0, 2.5):
+        sup.mark("BTCUSDT", "depth", now=t)
+    assert sup.evaluate("BTCUSDT", "depth", now=2.5) == "rest"   # streak 2.5s < recover
+
+    sup.mark("BTCUSDT", "depth", now=3.0)
+    assert sup.rest_symbols(["BTCUSDT"], "depth", now=3.0) == []
+    # ticker is tracked independently
+    assert sup.rest_symbols(["BTCUSDT"], "ticker", now=3.0) == ["BTCUSDT"]
+
+
+def test_hysteresis_between_stale_and_recovered():
+    sup = _sup()
+    t = 0.0
+    while t <= 3.0:
+        sup.mark("ETHUSDT", "depth", now=t)
+        t += 0.5
+    assert sup.evaluate("ETHUSDT", "depth", now=3.0) == "ws"
+
+    # a 4s silence is inside the stale threshold: stays on WS
+    assert sup.evaluate("ETHUSDT", "depth", now=7.0) == "ws"
+    assert sup.evaluate("ETHUSDT", "depth", now=8.1) == "rest"
+
+    # one fresh update is not enough to switch back...
+    sup.mark("ETHUSDT", "depth", now=9.0)
+    assert sup.evaluate("ETHUSDT", "depth", now=9.0) == "rest"
+    # ...a gap-free run of recover_sec is
+    for t in (9.5, 10.0, 10.5, 11.0, 11.5, 12.0):
+        sup.mark("ETHUSDT", "depth", now=t)
+    assert sup.evaluate("ETHUSDT", "depth", now=12.0) == "ws"
+
+    snap = sup.snapshot(now=12.0)
+    assert snap["symbols"]["ETHUSDT"]["depth"]["switches"] == 3
+    assert snap["rest_polled"] == {"ticker": 0, "depth": 0}
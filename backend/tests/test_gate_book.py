@@ -0,0 +1,66 @@
+# tests/test_gate_book.py
+import asyncio
+
+from app.market_data import gate_ws
+from app.market_data.gate_book import GAP, OK, STALE, UNSYNCED, GateOrderBook
+
+
+def test_update_id_validation_and_levels():
+    book = GateOrderBook("BTC_USDT")
+    assert book.apply(1, 2, [], []) == UNSYNCED
+
+    book.load_snapshot(10, [["100", "1"], ["99", "2"]], [["101", "1"], ["102", "3"]])
+    assert book.apply(5, 10, [["100", "9"]], []) == STALE
+    # first diff may straddle the snapshot id
+    assert book.apply(9, 11, [["100", "0"], ["100.5", "4"]], [["101", "2"]]) == OK
+    assert book.top(2) == ([(100.5, 4.0), (99.0, 2.0)], [(101.0, 2.0), (102.0, 3.0)])
+    assert book.apply(12, 12, [], [["102", "0"]]) == OK and book.asks == {101.0: 2.0}
+
+    assert book.apply(14, 15, [], []) == GAP
+    assert not book.synced and book.apply(13, 13, [], []) == UNSYNCED
+
+
+async def test_client_buffers_resyncs_and_publishes(monkeypatch):
+    depth, tops = [], []
+
+    async def on_depth(sym, bids, asks, ts_ms=None):
+        depth.append((sym, bids[0], asks[0]))
+
+    async def on_top(sym, bid, bid_qty, ask, ask_qty, ts_ms=None):
+        tops.append((sym, bid, bid_qty, ask, ask_qty))
+
+    snapshots = [{"id": 6, "bids": [["10", "1"]], "asks": [["11", "1"]]},
+                 {"id": 20, "bids": [["10", "5"]], "asks": [["10.5", "2"]]}]
+
+    async def fetch(pair):
+        return snapshots.pop(0)
+
+    monkeypatch.setattr(gate_ws, "on_partial_depth", on_depth)
+    monkeypatch.setattr(gate_ws, "on_book_ticker", on_top)
+    client = gate_ws.GateWebSocketClient(["BTCUSDT"], depth_limit=5)
+    monkeypatch.setattr(client, "_fetch_snapshot", fetch)
+
+    def upd(first, last, b=(), a=()):
+        return {"channel": "spot.order_book_update", "event": "update",
+                "result": {"s": "BTC_USDT", "U": first, "u": last, "b": list(b), "a": list(a), "t": 1}}
+
+    # diffs before the snapshot are buffered, then replayed on top of it
+    await client._handle_message(upd(5, 6, [["10", "3"]]))
+    await client._handle_message(upd(7, 7, [["10", "4"]]))
+    await asyncio.gather(*client._resync_tasks.values())
+    assert depth[-1] == ("BTCUSDT", (10.0, 4.0), (11.0, 1.0))
+
+    await client._handle_message(upd(8, 8, [], [["11", "0"], ["10.8", "2"]]))
+    assert depth[-1] == ("BTCUSDT", (10.0, 4.0), (10.8, 2.0))
+
+    # a gap triggers a fresh snapshot
+    await client._handle_message(upd(15, 21, [["9.9", "1"]]))
+    await asyncio.gather(*client._resync_tasks.values())
+    assert client.gaps == 1 and client.resyncs == 2
+    assert depth[-1] == ("BTCUSDT", (10.0, 5.0), (10.5, 2.0))
+    assert client._books["BTC_USDT"].last_id == 21
+
+    await client._handle_message({"channel": "spot.book_ticker", "event": "update",
+                                  "result": {"s": "BTC_USDT", "b": "10", "B": "5", "a": "10.5", "A": "2", "t": 2}})
+    assert tops == [("BTCUSDT", 10.0, 5.0, 10.5, 2.0)]
+    await client.stop()
@@ -0,0 +1,98 @@
+# tests/test_idempotency_store.py
+import asyncio
+
+import pytest
+
+from app.services.idempotency import (
+    CLAIMED,
+    CONFLICT,
+    DONE,
+    IN_PROGRESS,
+    IdempotencyConflict,
+    IdempotencyStore,
+    payload_hash,
+)
+
+
+async def test_execute_runs_once_and_concurrent_duplicates_wait():
+    store = IdempotencyStore(max_entries=100)
+    calls = []
+
+    async def action():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"ok": True, "n": len(calls)}
+
+    (r1, rep1), (r2, rep2) = await asyncio.gather(
+        store.execute("op", "k1", action, payload={"a": 1}),
+        store.execute("op", "k1", action, payload={"a": 1}),
+    )
+    assert calls == [1] and r1 == r2 == {"ok": True, "n": 1}
+    assert sorted([rep1, rep2]) == [False, True]
+
+    with pytest.raises(IdempotencyConflict):
+        await store.execute("op", "k1", action, payload={"a": 2})
+    # same key in another scope is a different operation
+    assert (await store.execute("other", "k1", action))[1] is False
+
+
+async def test_failed_action_releases_the_claim():
+    store = IdempotencyStore()
+
+    async def boom():
+        raise RuntimeError("venue down")
+
+    with pytest.raises(RuntimeError):
+        await store.execute("op", "k", boom)
+    assert store.claim("op", "k")[0] == CLAIMED
+
+
+def test_lru_is_bounded():
+    store = IdempotencyStore(max_entries=3)
+    for i in range(5):
+        store.store("op", f"k{i}", {"i": i})
+    assert store.get("op", "k0") is None and store.get("op", "k4")[0] == {"i": 4}
+    assert store.stats()["lru_entries"] == 3
+
+
+def test_sqlite_table_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "idem.db")
+    a = IdempotencyStore(sqlite_path=path)
+    b = IdempotencyStore(sqlite_path=path)   # a second uvicorn worker
+    h = payload_hash({"symbols": ["BTCUSDT"]})
+
+    assert a.claim("ui", "k", h) == (CLAIMED, None)
+    assert b.claim("ui", "k", h) == (IN_PROGRESS, None)
+    a.store("ui", "k", {"ok": True, "revision": 7}, phash=h)
+    assert b.claim("ui", "k", h) == (DONE, {"ok": True, "revision": 7})
+    assert b.claim("ui", "k", payload_hash({"symbols": []}))[0] == CONFLICT
+
+    a.store("ui", "old", {"ok": True}, ttl=-1)
+    assert b.purge_expired() == 1 and b.get("ui", "old") is None
+    a.close()
+    b.close()
+
+
+async def test_decorator_fingerprints_the_request_body():
+    from fastapi import HTTPException
+    from pydantic import BaseModel
+
+    from app.utils.idempotency import idempotent
+
+    class Body(BaseModel):
+        size: float
+
+    calls = []
+
+    @idempotent(ttl_seconds=60)
+    async def handler(body: Body, x_idempotency_key=None):
+        calls.append(body.size)
+        return {"size": body.size}
+
+    assert await handler(body=Body(size=1.0), x_idempotency_key="fp-1") == {"size": 1.0}
+    replay = await handler(body=Body(size=1.0), x_idempotency_key="fp-1")
+    assert replay["idempotent"] is True and calls == [1.0]
+
+    with pytest.raises(HTTPException) as exc:
+        await handler(body=Body(size=2.0), x_idempotency_key="fp-1")
+    assert exc.value.status_code == 422 and calls == [1.0]
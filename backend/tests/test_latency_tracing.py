@@ -0,0 +1,79 @@
+# tests/test_latency_tracing.py
+from app.infra.tracing import LatencyTracer
+from app.market_data.book_tracker import BookTracker
+
+
+def _run(tr: LatencyTracer, sym: str, stages=("decode", "book", "decision", "risk", "submit")) -> None:
+    tr.begin(sym)
+    for s in stages:
+        tr.mark(sym, s)
+    tr.finish(sym)
+
+
+def test_stages_only_advance_and_slowest_are_kept():
+    tr = LatencyTracer(slowest_n=3)
+    for i in range(10):
+        _run(tr, f"S{i}")
+
+    tr.begin("BTCUSDT")
+    tr.mark("BTCUSDT", "risk")
+    tr.mark("BTCUSDT", "decode")        # late stamp for an earlier stage → ignored
+    tr.finish("BTCUSDT")                # never submitted → stays open, not ranked
+    assert tr.get_stats()["open"] == 1 and tr.finished == 10
+
+    slow = tr.slowest()
+    assert len(slow) == 3
+    assert [r["total_ms"] for r in slow] == sorted((r["total_ms"] for r in slow), reverse=True)
+    assert list(slow[0]["stages_ms"]) == ["decode", "book", "decision", "risk", "submit", "persist"]
+
+    stats = tr.get_stats()["stages"]
+    assert stats["decode"]["count"] == 10 and stats["risk"]["count"] == 11
+    assert "recv" not in stats
+
+
+def test_inflight_trace_is_not_replaced_by_newer_frames():
+    tr = LatencyTracer()
+    tr.begin("ETHUSDT", t0=100.0)
+    tr.mark("ETHUSDT", "submit")
+    tr._open["ETHUSDT"].stamps[5] = 100.0   # submitted at t=100
+
+    tr.begin("ETHUSDT", t0=101.0)           # in flight → kept
+    assert tr._open["ETHUSDT"].stamps[0] == 100.0
+    tr.begin("ETHUSDT", t0=106.0)           # older than inflight_timeout → replaced
+    assert tr._open["ETHUSDT"].stamps[0] == 106.0 and tr.dropped == 1
+
+
+async def test_book_publish_stamps_the_open_trace(monkeypatch):
+    tr = LatencyTracer()
+    monkeypatch.setattr("app.market_data.book_tracker.get_tracer", lambda: tr)
+    bt = BookTracker()
+    tr.begin("BTCUSDT")
+    tr.mark("BTCUSDT", "decode")
+    await bt.update_book_ticker("BTCUSDT", 99.99, 1.0, 100.01, 1.0, ts_ms=1)
+    assert tr.get_stats()["stages"]["book"]["count"] == 1
+
+
+async def test_live_order_without_a_persisted_fill_is_not_finished(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.execution import live_executor as le
+
+    tr = LatencyTracer()
+    monkeypatch.setattr(le, "get_tracer", lambda: tr)
+
+    async def no_sub(*a, **kw):
+        return None
+
+    monkeypatch.setattr(le, "ensure_symbols_subscribed", no_sub)
+
+    class _Client:
+        async def place_order(self, req):   # resting LIMIT: accepted, nothing filled
+            return SimpleNamespace(ok=True, client_order_id="c1", filled_qty=0)
+
+    ex = le.LiveExecutor.__new__(le.LiveExecutor)
+    ex._client, ex._session_factory, ex._use_market_for_maker = _Client(), None, False
+
+    tr.begin("BTCUSDT")
+    assert await ex.place_maker("BTCUSDT", "BUY", price=100.0, qty=1.0) == "c1"
+    assert tr.finished == 0 and tr.get_stats()["open"] == 0 and tr.dropped == 1
+    assert tr.get_stats()["stages"]["persist"]["count"] == 0
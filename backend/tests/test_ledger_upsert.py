@@ -0,0 +1,79 @@
+# tests/test_ledger_upsert.py
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.pnl_ledger import PnlLedger
+from app.pnl import repository as repo
+from app.pnl.domain import PNLEventType, PNLLedgerEvent
+from app.pnl.service import PnlService
+
+MIGRATION = Path(__file__).resolve().parents[1] / "migration" / "20261018_pnl_ledger_dedupe_key_sqlite.sql"
+TS = datetime(2026, 1, 5, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def _ev(i, etype=PNLEventType.TRADE_REALIZED, trade_id=None, order_id=None):
+    return PNLLedgerEvent(
+        ts=TS, exchange="mexc", account_id="paper", symbol="BTCUSDT", base_asset="BTC", quote_asset="USDT",
+        event_type=etype, amount_asset=str(i), amount_usd=str(i), ref_order_id=order_id, ref_trade_id=trade_id, meta={},
+    )
+
+
+def _count(db):
+    return db.execute(select(func.count()).select_from(PnlLedger)).scalar_one()
+
+
+def test_bulk_insert_skips_duplicates_in_the_database(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'l.db'}", future=True)
+    PnlLedger.__table__.create(eng)
+    statements = []
+    event.listen(eng, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    with Session(eng) as db:
+        burst = [_ev(i, trade_id=f"T{i}") for i in range(1200)] + [_ev(0, trade_id="T0")]
+        assert repo.insert_ledger_events(db, burst) == 1200
+        assert len([s for s in statements if s.startswith("INSERT")]) == 1
+        assert repo.insert_ledger_events(db, burst[:10]) == 0
+        # same ref id under another event type / order-id / ts fallbacks are distinct keys
+        assert repo.insert_ledger_event(db, _ev(1, PNLEventType.FEE, trade_id="T1"))
+        assert repo.insert_ledger_event(db, _ev(1, order_id="O1"))
+        assert repo.insert_ledger_event(db, _ev(1)) and not repo.insert_ledger_event(db, _ev(2))
+        assert repo.insert_ledger_event(db, _ev(2), dedupe=False)
+        assert _count(db) == 1204
+
+        statements.clear()
+        svc = PnlService()
+        with svc.batch(db):
+            svc.log_trade_realized(db, ts=TS, exchange="mexc", account_id="paper", symbol="ETHUSDT",
+                                   base_asset="ETH", quote_asset="USDT", realized_asset=1, ref_trade_id="X",
+                                   emit_sse=False)
+            svc.log_fee(db, ts=TS, exchange="mexc", account_id="paper", symbol="ETHUSDT",
+                        base_asset="ETH", quote_asset="USDT", fee_asset_delta=-1, ref_trade_id="X",
+                        emit_sse=False)
+            assert statements == []
+        assert len(statements) == 1 and _count(db) == 1206
+
+
+def test_migration_backfills_keys_and_adds_the_unique_index(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", future=True)
+    PnlLedger.__table__.create(eng)
+    with eng.begin() as c:
+        c.execute(text("DROP INDEX pnl_ledger_dedupe_uq"))
+        c.execute(text("ALTER TABLE pnl_ledger DROP COLUMN dedupe_key"))
+        for oid in ("O1", "O1", "O2"):   # a historical duplicate
+            c.execute(text(
+                "INSERT INTO pnl_ledger (ts, exchange, account_id, symbol, base_asset, quote_asset, event_type,"
+                " amount_asset, amount_usd, ref_order_id, meta)"
+                " VALUES ('2026-01-05 12:00:00.123456', 'mexc', 'paper', 'BTCUSDT', 'BTC', 'USDT',"
+                " 'TRADE_REALIZED', 1, 1, :oid, '{}')"), {"oid": oid})
+
+    with eng.connect() as c:
+        c.connection.executescript(MIGRATION.read_text(encoding="utf-8"))
+        keys = [r[0] for r in c.execute(text("SELECT dedupe_key FROM pnl_ledger ORDER BY id"))]
+    assert keys == ["o:O1", None, "o:O2"]
+
+    with Session(eng) as db:
+        assert not repo.insert_ledger_event(db, _ev(1, order_id="O2"))
+        assert repo.insert_ledger_event(db, _ev(1, order_id="O3"))
@@ -0,0 +1,61 @@
+# tests/test_logging_queue.py
+import json
+import logging
+
+from app.services.logger import JsonFormatter, RateLimitFilter, _parse_rate_limits
+
+
+def _record(name: str, lineno: int, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, lineno, "tick %s", ("BTCUSDT",), None)
+
+
+def test_rate_limit_is_per_call_site_and_reports_suppressed(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.logger.time.monotonic", lambda: clock[0])
+    f = RateLimitFilter(_parse_rate_limits("app.strategy=5, bogus, app.strategy.engine=2"))
+
+    passed = [f.filter(_record("app.strategy.engine", 10)) for _ in range(10)]
+    assert passed.count(True) == 2                              # longest prefix wins
+    assert f.filter(_record("app.strategy.engine", 11))          # another line has its own bucket
+    assert f.filter(_record("app.strategy.engine", 10, logging.WARNING))
+    assert all(f.filter(_record("app.other", 10)) for _ in range(50))
+
+    clock[0] += 1.0                                              # refill
+    rec = _record("app.strategy.engine", 10)
+    assert f.filter(rec) and rec.suppressed == 8
+
+
+def test_json_lines():
+    rec = _record("app.strategy.engine", 1)
+    rec.suppressed = 3
+    doc = json.loads(JsonFormatter().format(rec))
+    assert doc["msg"] == "tick BTCUSDT" and doc["level"] == "INFO" and doc["suppressed"] == 3
+    assert doc["logger"] == "app.strategy.engine" and doc["ts"].endswith("+00:00")
+
+
+def test_root_logging_goes_through_the_queue():
+    from logging.handlers import QueueHandler
+    assert any(isinstance(h, QueueHandler) for h in logging.getLogger().handlers)
+
+
+def test_exception_survives_the_queue_into_json():
+    from queue import SimpleQueue
+
+    from app.services.logger import _RecordQueueHandler
+
+    q = SimpleQueue()
+    log = logging.getLogger("test.logging_queue.exc")
+    log.propagate = False
+    handler = _RecordQueueHandler(q)
+    log.addHandler(handler)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("order %s failed", "c1")
+    finally:
+        log.removeHandler(handler)
+
+    doc = json.loads(JsonFormatter().format(q.get_nowait()))
+    assert doc["msg"] == "order c1 failed" and doc["level"] == "ERROR"
+    assert "ValueError: boom" in doc["exc"] and "Traceback" in doc["exc"]
@@ -0,0 +1,37 @@
+# tests/test_metrics_agg.py
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from app.infra.metrics_agg import MetricsAggregator
+
+
+def _value(registry, name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_accumulates_locally_and_flushes_into_the_same_series():
+    reg = CollectorRegistry()
+    ticks = Counter("ws_ticks_total", "t", ["symbol", "type"], registry=reg)
+    lag = Histogram("ws_lag_seconds", "l", ["symbol"], buckets=(0.1, 0.5, 1), registry=reg)
+    agg = MetricsAggregator(ticks, ("book_ticker", "deals"), lag)
+    agg.bind_many(["BTCUSDT"])
+
+    for v in (0.05, 0.2, 0.3, 2.0):
+        agg.inc("BTCUSDT", "book_ticker")
+        agg.observe("BTCUSDT", v)
+    agg.inc("ETHUSDT", "deals")          # bound lazily on first tick
+    agg.inc("BTCUSDT", "unknown_type")   # not a declared type → ignored
+
+    assert _value(reg, "ws_ticks_total", symbol="BTCUSDT", type="book_ticker") == 0.0
+    assert agg.flush() == 2
+
+    assert _value(reg, "ws_ticks_total", symbol="BTCUSDT", type="book_ticker") == 4.0
+    assert _value(reg, "ws_ticks_total", symbol="ETHUSDT", type="deals") == 1.0
+    assert _value(reg, "ws_lag_seconds_bucket", symbol="BTCUSDT", le="0.1") == 1.0
+    assert _value(reg, "ws_lag_seconds_bucket", symbol="BTCUSDT", le="0.5") == 3.0
+    assert _value(reg, "ws_lag_seconds_bucket", symbol="BTCUSDT", le="+Inf") == 4.0
+    assert _value(reg, "ws_lag_seconds_count", symbol="BTCUSDT") == 4.0
+    assert abs(_value(reg, "ws_lag_seconds_sum", symbol="BTCUSDT") - 2.55) < 1e-9
+
+    # nothing pending → the next flush is a no-op
+    assert agg.flush() == 0
+    assert _value(reg, "ws_ticks_total", symbol="BTCUSDT", type="book_ticker") == 4.0
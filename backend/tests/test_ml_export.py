@@ -0,0 +1,145 @@
+# tests/test_ml_export.py
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from app.ml.export import export_dataset, iter_parts, load_columns, read_manifest
+from app.ml.features import FEATURE_NAMES, compute_vector, normalize_raw
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "migration"
+
+
+def _engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'ml.db'}", future=True)
+    with eng.connect() as conn:
+        raw = conn.connection
+        raw.executescript((MIGRATIONS / "20251106_create_ml_trade_outcomes_sqlite.sql").read_text(encoding="utf-8"))
+        raw.executescript((MIGRATIONS / "20251113_add_phase2_features_sqlite.sql").read_text(encoding="utf-8"))
+        raw.executescript((MIGRATIONS / "20251019_create_ml_snapshots_sqlite.sql").read_text(encoding="utf-8"))
+        conn.commit()
+    return eng
+
+
+def _insert_outcomes(eng, start: int, n: int):
+    t0 = datetime(2025, 11, 6, 23, 50, tzinfo=timezone.utc)
+    with eng.begin() as conn:
+        for i in range(start, start + n):
+            conn.execute(
+                text(
+                    "INSERT INTO ml_trade_outcomes (trade_id, symbol, entry_time, entry_price, entry_qty, "
+                    "exit_time, exit_reason, spread_bps_entry, imbalance_entry, pnl_bps, hit_tp) "
+                    "VALUES (:tid, :sym, :et, 1.0, 1.0, :xt, :reason, :spr, NULL, :pnl, :tp)"
+                ),
+                {
+                    "tid": f"t{i}",
+                    "sym": "LINKUSDT" if i % 2 else "SOLUSDT",
+                    "et": t0 + timedelta(minutes=5 * i),
+                    "xt": t0 + timedelta(minutes=5 * i + 1),
+                    "reason": "TP" if i % 3 else "TIMEOUT",
+                    "spr": 1.0 + i,
+                    "pnl": 2.0,
+                    "tp": 1 if i % 3 else 0,
+                },
+            )
+
+
+def test_outcomes_export_partitions_and_types(tmp_path):
+    eng = _engine(tmp_path)
+    _insert_outcomes(eng, 0, 6)
+    out = tmp_path / "columnar"
+
+    res = export_dataset(eng, out, "outcomes", chunk_rows=4)
+    assert res.rows == 6 and res.watermark_id == 6
+
+    dates = {p.split("/")[0] for p in res.partitions}
+    assert dates == {"date=2025-11-06", "date=2025-11-07"}
+
+    cols = load_columns(out, "outcomes")
+    assert cols["spread_bps_entry"].dtype == np.float64
+    assert cols["hit_tp"].dtype == np.int8
+    assert sorted(cols["id"].tolist()) == list(range(1, 7))
+    # NULL → registry default
+    assert set(cols["imbalance_entry"].tolist()) == {0.5}
+
+    # raw parts are views over the mapped file, not copies
+    part = next(iter_parts(out, "outcomes", columns=["id"]))
+    assert not part["id"].flags.owndata and not part["id"].flags.writeable
+
+
+def test_incremental_watermark(tmp_path):
+    eng = _engine(tmp_path)
+    out = tmp_path / "columnar"
+    _insert_outcomes(eng, 0, 3)
+    export_dataset(eng, out, "outcomes")
+    _insert_outcomes(eng, 3, 2)
+
+    res = export_dataset(eng, out, "outcomes")
+    assert res.rows == 2
+    assert read_manifest(out, "outcomes")["rows"] == 5
+    # odd trade indices (1, 3) are LINKUSDT
+    assert sorted(load_columns(out, "outcomes", symbols=["LINKUSDT"])["id"].tolist()) == [2, 4]
+
+
+def test_compressed_parts_roundtrip(tmp_path):
+    eng = _engine(tmp_path)
+    _insert_outcomes(eng, 0, 4)
+    export_dataset(eng, tmp_path / "raw", "outcomes")
+    export_dataset(eng, tmp_path / "z", "outcomes", compress=True)
+    a = load_columns(tmp_path / "raw", "outcomes")
+    b = load_columns(tmp_path / "z", "outcomes")
+    assert a.keys() == b.keys()
+    for n in a:
+        assert np.array_equal(a[n], b[n])
+
+
+def test_snapshot_features_match_registry(tmp_path):
+    eng = _engine(tmp_path)
+    row = {
+        "ts": 1_762_400_000_000, "symbol": "XRPUSDT", "exchange": "mexc",
+        "bid": 2.1, "ask": 2.1004, "spread_bps": 1.9, "imbalance": 0.4,
+        "depth5_bid_usd": 500.0, "depth5_ask_usd": 700.0, "depth10_bid_usd": 900.0, "depth10_ask_usd": 1100.0,
+        "trades_per_min": 8.0, "usd_per_min": 320.0,
+    }
+    with eng.begin() as conn:
+        keys = ", ".join(row)
+        conn.execute(text(f"INSERT INTO ml_snapshots ({keys}) VALUES ({', '.join(':' + k for k in row)})"), row)
+
+    export_dataset(eng, tmp_path / "columnar", "snapshots")
+    cols = load_columns(tmp_path / "columnar", "snapshots")
+    exported = [float(cols[n][0]) for n in FEATURE_NAMES]
+    assert exported == compute_vector(normalize_raw(row))
+
+
+def test_long_exit_reasons_and_tp_label(tmp_path):
+    from app.ml.export import tp_label
+
+    eng = _engine(tmp_path)
+    reasons = ["TP", "TIMEOUT_EXPIRED_MARKET", "TRAIL", "SL", "TP_SLIPPAGE"]
+    pnls = [1.0, 0.4, -0.2, -1.0, 0.3]
+    with eng.begin() as conn:
+        for i, (reason, pnl) in enumerate(zip(reasons, pnls)):
+            conn.execute(
+                text(
+                    "INSERT INTO ml_trade_outcomes (trade_id, symbol, entry_time, entry_price, entry_qty, "
+                    "exit_time, exit_reason, pnl_usd) VALUES (:tid, 'LINKUSDT', :et, 1.0, 1.0, :et, :reason, :pnl)"
+                ),
+                {"tid": f"r{i}", "et": datetime(2025, 11, 6, 12, i), "reason": reason, "pnl": pnl},
+            )
+    export_dataset(eng, tmp_path / "columnar", "outcomes")
+    cols = load_columns(tmp_path / "columnar", "outcomes")
+    assert [r.decode() for r in cols["exit_reason"]] == reasons  # nothing truncated
+    assert tp_label(cols).tolist() == [1, 1, 0, 0, 1]
+
+
+def test_parts_with_narrower_string_dtype_are_widened(tmp_path):
+    from app.ml import export as ex
+
+    day = tmp_path / "x" / "outcomes" / "date=2025-11-06" / "symbol=AUSDT"
+    ex._write_part(day / "part-000000000001.col",
+                   {"id": np.array([1]), "exit_reason": np.array([b"TIMEOUT_MAR"], dtype="S12")}, False)
+    ex._write_part(day / "part-000000000002.col",
+                   {"id": np.array([2]), "exit_reason": np.array([b"TIMEOUT_EXPIRED_MARKET"], dtype="S32")}, False)
+    cols = load_columns(tmp_path / "x", "outcomes")
+    assert cols["exit_reason"].tolist() == [b"TIMEOUT_MAR", b"TIMEOUT_EXPIRED_MARKET"]
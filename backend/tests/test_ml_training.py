@@ -0,0 +1,114 @@
+# tests/test_ml_training.py
+import numpy as np
+import pytest
+
+from app.ml.registry import ModelRegistry
+from app.ml.training import (
+    classification_metrics,
+    param_grid,
+    roc_auc,
+    run_sweep,
+    time_series_splits,
+)
+
+
+class _SignModel:
+    """Tiny picklable estimator: proba = sigmoid(w * x0)."""
+
+    def __init__(self, w: float):
+        self.w = w
+        self.fitted_rows = 0
+
+    def fit(self, X, y):
+        self.fitted_rows = len(y)
+        return self
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.w * np.asarray(X)[:, 0]))
+        return np.column_stack([1 - p, p])
+
+
+def _factory(params):
+    if params["w"] == 0:
+        raise ValueError("degenerate")
+    return _SignModel(params["w"])
+
+
+def _dataset(n=600, seed=1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    y = (X[:, 0] + 0.3 * rng.normal(size=n) > 0).astype(np.int64)
+    ts = np.arange(n, dtype=np.int64) * 60_000
+    perm = rng.permutation(n)          # harness must sort by time itself
+    return X[perm], y[perm], ts[perm]
+
+
+def test_time_series_splits_walk_forward_with_gap():
+    ts = np.arange(12, dtype=np.int64) * 1000
+    folds = time_series_splits(ts, 3)
+    assert folds == [(3, 3, 6), (6, 6, 9), (9, 9, 12)]
+
+    purged = time_series_splits(ts, 3, gap_ms=2000)
+    assert purged == [(1, 3, 6), (4, 6, 9), (7, 9, 12)]
+
+    with pytest.raises(ValueError):
+        time_series_splits(ts[::-1], 3)
+
+
+def test_metrics():
+    y = np.array([0, 0, 1, 1])
+    assert roc_auc(y, np.array([0.1, 0.4, 0.35, 0.8])) == pytest.approx(0.75)
+    assert roc_auc(y, np.array([0.5, 0.5, 0.5, 0.5])) == pytest.approx(0.5)
+    m = classification_metrics(y, np.array([0.1, 0.6, 0.7, 0.9]))
+    assert m["precision"] == pytest.approx(2 / 3)
+    assert m["recall"] == 1.0
+    assert m["accuracy"] == 0.75
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sweep_ranks_configs(workers):
+    X, y, ts = _dataset()
+    configs = param_grid({"w": [-2.0, 0, 0.5, 4.0]})
+    results = run_sweep(X, y, ts, configs, n_splits=4, factory=_factory, workers=workers)
+
+    assert len(results) == 4
+    assert results[-1].params == {"w": 0} and results[-1].error.startswith("ValueError")
+    # positive weights rank perfectly by x0; the negative one inverts it
+    assert results[0].metrics["auc"] > 0.9
+    assert results[0].params["w"] > 0
+    assert results[2].params == {"w": -2.0}
+    assert len(results[0].folds) == 4
+
+    by_logloss = run_sweep(X, y, ts, configs, n_splits=4, factory=_factory, workers=workers, metric="logloss")
+    assert by_logloss[0].params == {"w": 4.0}
+
+
+def test_registry_current_and_promote(tmp_path):
+    reg = ModelRegistry(tmp_path)
+    assert reg.current() is None
+
+    (tmp_path / "a.json").write_text("{}")
+    (tmp_path / "b.json").write_text("{}")
+    a = reg.register(tmp_path / "a.json", ["spread_bps_entry", "sym_LINKUSDT"], version="va",
+                     metrics={"auc": 0.7}, promote=True)
+    reg.register(tmp_path / "b.json", ["imbalance_entry"], version="vb", metrics={"auc": 0.8})
+
+    cur = reg.current()
+    assert cur.version == "va" and cur.feature_names == ["spread_bps_entry", "sym_LINKUSDT"]
+    assert cur.path == "a.json" and reg.resolve(cur) == tmp_path / "a.json"
+
+    reg.promote("vb")
+    assert ModelRegistry(tmp_path).current().version == "vb"
+    assert [m.version for m in reg.list()] == ["va", "vb"]
+    assert a.metrics == {"auc": 0.7}
+    with pytest.raises(KeyError):
+        reg.promote("nope")
+
+
+def test_registry_rejects_non_serving_features(tmp_path):
+    (tmp_path / "m.json").write_text("{}")
+    reg = ModelRegistry(tmp_path)
+    for bad in (["spread_bps_entry", "pnl_bps"], ["symbol_cat"]):
+        with pytest.raises(ValueError):
+            reg.register(tmp_path / "m.json", bad, version="bad")
+    assert reg.list() == []
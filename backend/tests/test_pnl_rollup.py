@@ -0,0 +1,100 @@
+# tests/test_pnl_rollup.py
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.models.pnl_daily import PnlDaily
+from app.models.pnl_ledger import PnlLedger
+from app.models.pnl_rollup_watermark import PnlRollupWatermark
+from app.pnl import eod_rollup
+from app.pnl import repository as repo
+from app.pnl.domain import PNLEventType, PNLLedgerEvent
+
+
+def _engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'r.db'}", future=True)
+    for m in (PnlLedger, PnlDaily, PnlRollupWatermark):
+        m.__table__.create(eng)
+    return eng
+
+
+def _ev(day, amount, etype=PNLEventType.TRADE_REALIZED, symbol="BTCUSDT", hour=12):
+    return PNLLedgerEvent(
+        ts=datetime(2026, 1, day, hour, 0, 0, tzinfo=timezone.utc), exchange="mexc", account_id="paper",
+        symbol=symbol, base_asset=symbol[:-4], quote_asset="USDT", event_type=etype,
+        amount_asset=str(amount), amount_usd=str(amount), meta={},
+    )
+
+
+def _daily(db):
+    rows = db.execute(select(PnlDaily).order_by(PnlDaily.date, PnlDaily.symbol)).scalars().all()
+    return {(r.date.day, r.symbol): (Decimal(str(r.realized_usd)), Decimal(str(r.fees_usd))) for r in rows}
+
+
+def test_incremental_rollup_only_reads_new_rows(tmp_path):
+    eng = _engine(tmp_path)
+    with Session(eng) as db:
+        repo.insert_ledger_events(db, [
+            _ev(1, 10), _ev(1, -1, PNLEventType.FEE), _ev(2, 5, symbol="ETHUSDT"), _ev(2, 3, hour=23),
+        ], dedupe=False)
+        assert eod_rollup.rollup_incremental(db) == 3
+        assert _daily(db) == {(1, "BTCUSDT"): (10, -1), (2, "BTCUSDT"): (3, 0), (2, "ETHUSDT"): (5, 0)}
+        assert eod_rollup.pending_rows(db) == 0
+        assert eod_rollup.rollup_incremental(db) == 0
+
+        repo.insert_ledger_events(db, [_ev(1, 2), _ev(1, -0.5, PNLEventType.FEE), _ev(3, 7)], dedupe=False)
+        selects = []
+        event.listen(eng, "before_cursor_execute", lambda *a: selects.append(a[2]) if "pnl_ledger" in a[2] else None)
+        assert eod_rollup.rollup_incremental(db) == 2
+        assert any("pnl_ledger.id >" in s for s in selects)
+        assert _daily(db)[(1, "BTCUSDT")] == (12, Decimal("-1.5"))
+        assert _daily(db)[(3, "BTCUSDT")] == (7, 0)
+        assert eod_rollup.get_watermark(db) == 7
+
+
+def test_rollup_range_is_idempotent_and_matches_incremental(tmp_path):
+    eng = _engine(tmp_path)
+    with Session(eng) as db:
+        repo.insert_ledger_events(db, [_ev(d, d) for d in range(1, 6)] + [_ev(3, -1, PNLEventType.FEE)], dedupe=False)
+        eod_rollup.rollup_incremental(db)
+        expected = _daily(db)
+
+        # a stale/corrupt window is rewritten with absolute totals, extra rows removed
+        db.add(PnlDaily(date=date(2026, 1, 4), exchange="mexc", account_id="paper", symbol="XRPUSDT",
+                        realized_usd=99, fees_usd=0))
+        db.execute(PnlDaily.__table__.update().values(realized_usd=0))
+        assert eod_rollup.rollup_range(db, date(2026, 1, 1), date(2026, 1, 5)) == 5
+        assert _daily(db) == expected
+        assert eod_rollup.rollup_range(db, date(2026, 1, 1), date(2026, 1, 5)) == 5
+        assert _daily(db) == expected
+
+        # unrolled rows are caught up first, so neither path double counts them
+        repo.insert_ledger_events(db, [_ev(2, 4)], dedupe=False)
+        assert eod_rollup.rollup_day(db, date(2026, 1, 2)) == 1
+        assert eod_rollup.rollup_incremental(db) == 0
+        assert _daily(db)[(2, "BTCUSDT")] == (6, 0)
+
+        # scope limits both the recompute and the cleanup
+        assert eod_rollup.rollup_range(db, date(2026, 1, 1), date(2026, 1, 5), scope={"symbol": "ETHUSDT"}) == 0
+        assert len(_daily(db)) == 5
+
+
+def test_first_incremental_pass_does_not_double_count_existing_daily_rows(tmp_path):
+    eng = _engine(tmp_path)
+    with Session(eng) as db:
+        repo.insert_ledger_events(db, [_ev(1, 10), _ev(2, 5)], dedupe=False)
+        # pnl_daily already filled by the pre-watermark full rollup, no watermark row
+        for d, amount in ((1, 10), (2, 5)):
+            db.add(PnlDaily(date=date(2026, 1, d), exchange="mexc", account_id="paper", symbol="BTCUSDT",
+                            realized_usd=amount, fees_usd=0))
+        db.flush()
+
+        assert eod_rollup.rollup_incremental(db) == 2
+        assert _daily(db) == {(1, "BTCUSDT"): (10, 0), (2, "BTCUSDT"): (5, 0)}
+        assert eod_rollup.get_watermark(db) == 2
+
+        repo.insert_ledger_events(db, [_ev(2, 1)], dedupe=False)
+        assert eod_rollup.rollup_incremental(db) == 1
+        assert _daily(db)[(2, "BTCUSDT")] == (6, 0)
@@ -0,0 +1,83 @@
+# tests/test_risk_fast_path.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.config.risk_settings import RiskSettings
+from app.strategy.risk import RiskManager, RiskRules
+
+
+def _settings(**kw):
+    base = dict(account_balance_usd=1000.0, max_exposure_per_position_pct=20.0,
+                max_trades_per_hour=100, max_trades_per_minute=3)
+    base.update(kw)
+    return RiskSettings(**base)
+
+
+class _NoLock:
+    async def __aenter__(self):
+        raise AssertionError("entry check must not take the lock")
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_trading_hours_window_is_precompiled_and_wraps_midnight():
+    day = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    at = lambda h, m=0, s=0: day + h * 3600 + m * 60 + s
+
+    rules = RiskRules.compile(_settings(trading_hours_enabled=True, trading_hours_start="08:00",
+                                        trading_hours_end="22:00"))
+    assert (rules.hours_start_sec, rules.hours_end_sec) == (8 * 3600, 22 * 3600)
+    assert rules.in_trading_hours(at(8)) and rules.in_trading_hours(at(22))
+    assert not rules.in_trading_hours(at(7, 59, 59)) and not rules.in_trading_hours(at(22, 0, 1))
+
+    night = RiskRules.compile(_settings(trading_hours_enabled=True, trading_hours_start="22:00",
+                                        trading_hours_end="08:00"))
+    assert night.in_trading_hours(at(23)) and night.in_trading_hours(at(3))
+    assert not night.in_trading_hours(at(12))
+    assert RiskRules.compile(_settings()).in_trading_hours(at(12))
+
+
+def test_fast_path_is_lock_free_and_matches_rules():
+    rm = RiskManager(_settings())
+    rm._lock = _NoLock()
+    check = lambda sym="BTCUSDT", size=50.0: asyncio.run(rm.can_open_position(sym, size))
+
+    assert check() == (True, "OK")
+    assert check(size=250.0)[1].startswith("Position too large")
+
+    rm.state.current_position_count = rm.rules.max_positions
+    assert check()[1] == f"Max positions reached ({rm.rules.max_positions})"
+    rm.state.current_position_count = 0
+
+    rm.state.add_cooldown("ETHUSDT", 5)
+    assert check("ETHUSDT")[1].startswith("Symbol on cooldown") and check("BTCUSDT")[0]
+    rm.state.symbol_cooldowns["ETHUSDT"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    assert check("ETHUSDT")[0] and "ETHUSDT" not in rm.state.symbol_cooldowns
+
+    for _ in range(3):
+        rm.state.track_trade_velocity()
+    assert check()[1].startswith("Velocity limit (hour:3, min:3)")
+    stale = datetime.now(timezone.utc) - timedelta(minutes=2)
+    rm.state.trades_last_minute.clear()
+    rm.state.trades_last_minute.extend([stale] * 3)
+    assert check() == (True, "OK")
+
+    rm.state.trading_halted, rm.state.halt_reason = True, "emergency_stop"
+    assert check() == (False, "Trading halted: emergency_stop")
+
+
+def test_reconfigure_swaps_rules_atomically():
+    rm = RiskManager(_settings())
+    before = rm.rules
+    assert rm.check_open_position("BTCUSDT", 150.0)[0]
+
+    rm.settings.max_exposure_per_position_pct = 10.0
+    assert rm.rules is before  # unchanged until reconfigured
+    after = rm.reconfigure()
+    assert rm.rules is after and after.max_position_size_usd == 100.0 and before.max_position_size_usd == 200.0
+    assert not rm.check_open_position("BTCUSDT", 150.0)[0]
+
+    rm.update_balance(5000.0)
+    assert rm.rules.max_position_size_usd == 500.0
+    assert rm.check_open_position("BTCUSDT", 150.0)[0]
@@ -0,0 +1,113 @@
+# tests/test_shm_quotes.py
+import os
+
+from app.market_data.book_tracker import BookTracker
+from app.market_data.daemon import QuoteMirror, QuotePublisher
+from app.market_data.shm_quotes import QuoteTableReader, QuoteTableWriter, read_wants, write_wants
+
+
+def test_roundtrip_and_change_detection(tmp_path):
+    path = str(tmp_path / "q.tbl")
+    w = QuoteTableWriter(path, capacity=4)
+    r = QuoteTableReader(path)
+    assert r.writer_pid() == os.getpid() and r.n_used() == 0
+
+    w.write_top("btcusdt", 100.0, 1.5, 100.2, 2.5, 1000)
+    w.write_depth("BTCUSDT", [(100.0, 1.5), (99.9, 3.0)], [(100.2, 2.5)], 1001)
+    w.write_tape("BTCUSDT", 1234.0, 7.0, 1002)
+    q = r.get("BTCUSDT")
+    assert (q["bid"], q["askQty"], q["ts_ms"]) == (100.0, 2.5, 1000)
+    assert q["bids"] == [(100.0, 1.5), (99.9, 3.0)] and q["asks"] == [(100.2, 2.5)]
+    assert (q["usdpm"], q["tpm"]) == (1234.0, 7.0)
+    assert q["seq"] % 2 == 0
+
+    seqs = r.seqs()
+    w.write_top("ETHUSDT", 10.0, 1.0, 10.1, 1.0, 2000)
+    assert [i for i, _ in r.changed(seqs)] == [1]
+    w.write_top("BTCUSDT", 100.1, 1.0, 100.3, 1.0, 3000)
+    assert [i for i, _ in r.changed(r.seqs())] == []
+
+    # full table: writes are refused, not wrapped
+    for s in ("AAAUSDT", "BBBUSDT"):
+        assert w.write_top(s, 1, 1, 1, 1, 1)
+    assert not w.write_top("CCCUSDT", 1, 1, 1, 1, 1)
+    r.close()
+    w.close()
+
+
+def test_reader_never_returns_torn_slot(tmp_path):
+    path = str(tmp_path / "q.tbl")
+    w = QuoteTableWriter(path, capacity=2)
+    w.write_top("BTCUSDT", 1.0, 1.0, 2.0, 1.0, 1)
+    r = QuoteTableReader(path)
+    rec = w._begin(0)               # writer "in the middle" of an update
+    rec["bid"] = 5.0
+    assert r.read_slot(0) is None
+    w._end(rec)
+    assert r.get("BTCUSDT")["bid"] == 5.0
+    r.close()
+    w.close()
+
+
+def test_want_files_drop_dead_pids(tmp_path):
+    path = str(tmp_path / "q.tbl")
+    write_wants(path, {"BTCUSDT", "ETHUSDT"})
+    write_wants(path, {"XRPUSDT"}, pid=2**22 + 12345)   # no such process
+    assert read_wants(path) == {os.getpid(): {"BTCUSDT", "ETHUSDT"}}
+    assert not os.path.exists(f"{path}.want.{2**22 + 12345}")
+
+
+async def test_publisher_to_mirror(tmp_path, monkeypatch):
+    import app.services.book_tracker as svc
+
+    path = str(tmp_path / "q.tbl")
+    src = BookTracker()
+    pub = QuotePublisher(QuoteTableWriter(path, capacity=8), src)
+    src.add_listener(pub.on_update)
+    src.usdpm, src.tpm = {"SHMTUSDT": 500.0}, {"SHMTUSDT": 4.0}
+
+    await src.update_book_ticker("SHMTUSDT", 1.0, 10.0, 1.01, 20.0, ts_ms=5)
+    await src.update_partial_depth("SHMTUSDT", [(1.0, 10.0)], [(1.01, 20.0), (1.02, 5.0)], ts_ms=6)
+    assert pub.publish_tape(now_ms=7) == 1
+
+    dst = BookTracker()
+    monkeypatch.setattr(svc, "book_tracker", dst)
+    mirror = QuoteMirror(path)
+    assert await mirror.sync_once() == 1
+    q = await dst.get_quote("SHMTUSDT")
+    assert (q["bid"], q["ask"], q["bidQty"]) == (1.0, 1.01, 10.0)
+    assert dst._states["SHMTUSDT"].l2.asks == [(1.01, 20.0), (1.02, 5.0)]
+    assert dst.usdpm["SHMTUSDT"] == 500.0
+
+    assert await mirror.sync_once() == 0          # nothing changed
+    await src.update_book_ticker("SHMTUSDT", 1.001, 10.0, 1.01, 20.0, ts_ms=8)
+    assert await mirror.sync_once() == 1
+    assert (await dst.get_quote("SHMTUSDT"))["bid"] == 1.001
+    await mirror.stop()
+    pub.writer.close()
+
+
+async def test_mirror_remaps_after_writer_restart(tmp_path, monkeypatch):
+    import app.services.book_tracker as svc
+
+    path = str(tmp_path / "q.tbl")
+    old = QuoteTableWriter(path, capacity=4)
+    old.write_top("RSTUSDT", 1.0, 1.0, 1.1, 1.0, ts_ms=10)
+
+    dst = BookTracker()
+    monkeypatch.setattr(svc, "book_tracker", dst)
+    mirror = QuoteMirror(path)
+    assert await mirror.sync_once() == 1
+    first = mirror._reader
+
+    # daemon restart: a new table replaces the file (same pid here, so only the inode tells)
+    new = QuoteTableWriter(path, capacity=4)
+    new.write_top("RSTUSDT", 5.0, 1.0, 5.1, 1.0, ts_ms=20)
+    assert not first.is_current()
+    assert await mirror.sync_once() == 1
+    assert mirror._reader is not first and mirror._reader.is_current()
+    assert (await dst.get_quote("RSTUSDT"))["bid"] == 5.0
+
+    await mirror.stop()
+    old.close()
+    new.close()
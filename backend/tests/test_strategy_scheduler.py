@@ -0,0 +1,91 @@
+# tests/test_strategy_scheduler.py
+import asyncio
+import time
+
+from app.strategy.scheduler import (
+    EV_FILL,
+    EV_PARAMS,
+    EV_QUOTE,
+    EV_TIMER,
+    IN_POSITION,
+    StrategyScheduler,
+)
+
+
+async def test_loops_park_until_an_event_and_bursts_coalesce():
+    sched = StrategyScheduler(idle_wake_ms=5000)
+    sched.register("AAAUSDT")
+    sched.register("BBBUSDT")
+
+    waiter = asyncio.create_task(sched.wait("AAAUSDT"))
+    await asyncio.sleep(0.02)
+    assert not waiter.done()  # no events → parked, no polling
+
+    # a burst of quotes for the symbol (and one for an unknown symbol) wakes it once
+    for _ in range(50):
+        sched.on_quote({"symbol": "AAAUSDT", "bid": 1.0, "ask": 1.1})
+    sched.on_quote({"symbol": "ZZZUSDT", "bid": 1.0, "ask": 1.1})
+    assert await asyncio.wait_for(waiter, 1.0) == EV_QUOTE
+
+    sched.set_phase("AAAUSDT", IN_POSITION)
+    sched.notify("AAAUSDT", EV_FILL)
+    sched.notify_all(EV_PARAMS)
+    assert await sched.wait("AAAUSDT") == EV_FILL | EV_PARAMS
+    assert await sched.wait("BBBUSDT") == EV_PARAMS
+
+    stats = sched.get_stats()
+    a = stats["symbols"]["AAAUSDT"]
+    assert a["phase"] == "in_position" and a["wakes"]["quote"] == 1 and a["decisions"] == 1
+    assert stats["decision_latency"]["flat"]["count"] == 1
+
+
+async def test_armed_timer_wakes_before_idle_heartbeat():
+    sched = StrategyScheduler(idle_wake_ms=5000)
+    sched.register("AAAUSDT")
+    sched.arm("AAAUSDT", time.time() + 0.2)
+    sched.arm("AAAUSDT", time.time() + 0.05)  # earliest deadline wins
+
+    t0 = time.perf_counter()
+    assert await sched.wait("AAAUSDT") == EV_TIMER
+    assert time.perf_counter() - t0 < 1.0
+    assert sched.get_stats()["symbols"]["AAAUSDT"]["timer_in_ms"] is None
+
+    # unregistering releases a parked loop
+    waiter = asyncio.create_task(sched.wait("AAAUSDT"))
+    await asyncio.sleep(0)
+    sched.unregister("AAAUSDT")
+    await asyncio.wait_for(waiter, 1.0)
+
+
+async def test_past_deadline_parks_instead_of_spinning():
+    sched = StrategyScheduler(idle_wake_ms=5000, retry_park_ms=50)
+    sched.register("AAAUSDT")
+    ticks = 0
+
+    async def other():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    bg = asyncio.create_task(other())
+    passes = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < 0.2:
+        # an in-position loop re-arming a timeout that is already overdue
+        sched.arm("AAAUSDT", time.time() - 10.0)
+        assert await sched.wait("AAAUSDT") == EV_TIMER
+        passes += 1
+    bg.cancel()
+
+    assert passes <= 10  # ~50 ms per pass, not tens of thousands
+    assert ticks > 0     # other tasks still get scheduled
+
+    # pending events still return at once, but only after yielding
+    ticks = 0
+    bg = asyncio.create_task(other())
+    await asyncio.sleep(0)
+    sched.notify("AAAUSDT", EV_FILL)
+    assert await sched.wait("AAAUSDT") == EV_FILL
+    bg.cancel()
+    assert ticks >= 2
@@ -0,0 +1,209 @@
+# tests/test_subscriptions.py
+import asyncio
+import json
+
+from app.market_data.subscriptions import SubscriptionRegistry
+
+
+class _FakeFeed:
+    def __init__(self, symbols, channels):
+        self.channels = {s: set(channels) for s in symbols}
+        self.calls = []
+        self.stopped = False
+
+    async def run(self):
+        await asyncio.sleep(3600)
+
+    async def stop(self):
+        self.stopped = True
+
+    async def set_symbol_channels(self, symbol, channels):
+        self.calls.append((symbol, tuple(channels)))
+        if channels:
+            self.channels[symbol] = set(channels)
+        else:
+            self.channels.pop(symbol, None)
+
+
+def _registry(**kw):
+    feeds = []
+
+    def factory(symbols, channels):
+        f = _FakeFeed(symbols, channels)
+        feeds.append(f)
+        return f
+
+    return SubscriptionRegistry(factory, **kw), feeds
+
+
+async def test_refcount_and_incremental_changes():
+    reg, feeds = _registry(grace_sec=0, max_topics=30)
+    fresh = await reg.acquire("sse:1", ["btcusdt", "ETHUSDT"])
+    assert fresh == ["BTCUSDT", "ETHUSDT"]
+    assert len(feeds) == 1  # one connection, second symbol added incrementally
+    assert feeds[0].channels == {"BTCUSDT": {"BOOK_TICKER", "DEPTH_LIMIT"}, "ETHUSDT": {"BOOK_TICKER", "DEPTH_LIMIT"}}
+
+    # a second consumer on the same topics sends nothing upstream
+    assert await reg.acquire("strategy", ["BTCUSDT"]) == []
+    assert feeds[0].calls == [("ETHUSDT", ("BOOK_TICKER", "DEPTH_LIMIT"))]
+
+    await reg.acquire("strategy", ["BTCUSDT"], channels=["DEALS"])
+    assert feeds[0].channels["BTCUSDT"] == {"BOOK_TICKER", "DEALS", "DEPTH_LIMIT"}
+
+    await reg.release("sse:1")
+    assert "ETHUSDT" not in feeds[0].channels
+    assert feeds[0].channels["BTCUSDT"] == {"BOOK_TICKER", "DEALS", "DEPTH_LIMIT"}
+
+    await reg.release("strategy", ["BTCUSDT"])
+    assert reg.symbols() == [] and feeds[0].stopped
+    await reg.stop()
+
+
+async def test_grace_period_defers_unsubscribe():
+    reg, feeds = _registry(grace_sec=30, max_topics=30)
+    await reg.acquire("sse:1", ["SOLUSDT"])
+    await reg.release("sse:1")
+    assert reg.symbols() == ["SOLUSDT"]            # still live during grace
+
+    # re-acquire inside the window: no upstream traffic
+    calls = len(feeds[0].calls)
+    await reg.acquire("sse:2", ["SOLUSDT"])
+    await reg.release("sse:2")
+    assert len(feeds[0].calls) == calls
+
+    assert await reg.sweep() == []
+    assert await reg.sweep(now=10**9) == ["SOLUSDT"]
+    assert reg.symbols() == []
+    await reg.stop()
+
+
+async def test_shards_when_topic_cap_is_reached():
+    reg, feeds = _registry(grace_sec=0, max_topics=4)
+    await reg.acquire("scanner", ["AAAUSDT", "BBBUSDT", "CCCUSDT"])
+    assert len(feeds) == 2
+    owners = [sorted(f.channels) for f in feeds]
+    assert owners == [["AAAUSDT", "BBBUSDT"], ["CCCUSDT"]]
+    assert [s["topics"] for s in reg.get_stats()["shards"]] == [4, 2]
+    await reg.stop()
+    assert all(f.stopped for f in feeds)
+
+
+class _FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, raw):
+        self.sent.append(json.loads(raw))
+
+
+async def test_ws_client_sends_only_topic_diff():
+    from app.market_data.ws_client import MEXCWebSocketClient
+
+    client = MEXCWebSocketClient(["BTCUSDT"], channels=["BOOK_TICKER"])
+    client._want_kline = False
+    client._sub_interval = 0
+    client._ws = _FakeWS()
+    client._connected = True
+
+    await client.set_symbol_channels("ETHUSDT", ["BOOK_TICKER", "DEPTH_LIMIT"])
+    await client.set_symbol_channels("BTCUSDT", [])
+    sent = [(m["method"], m["params"][0]) for m in client._ws.sent]
+    assert [m for m, _ in sent] == ["SUBSCRIPTION", "SUBSCRIPTION", "UNSUBSCRIPTION"]
+    assert all("@ETHUSDT" in t for _, t in sent[:2]) and "@BTCUSDT" in sent[2][1]
+    assert client.symbols == ["ETHUSDT"] and client.topic_count() == 2
+
+    # unsubscribe ACK must not re-register the topic as live
+    await client._handle_text(json.dumps({"id": 1, "code": 0, "msg": sent[2][1]}))
+    assert sent[2][1] not in client._subscribed_topics
+
+
+async def test_one_shot_holds_expire_and_are_released(monkeypatch):
+    import time
+
+    from app.services import book_tracker as svc
+
+    reg, feeds = _registry(grace_sec=0, max_topics=30)
+
+    async def _noop(*a, **k):
+        return None
+
+    monkeypatch.setattr(svc, "get_subscription_registry", lambda: reg)
+    monkeypatch.setattr(svc, "_ws_usable", lambda: True)
+    monkeypatch.setattr(svc, "_attached", lambda: False)
+    for name in ("_rest_seed_symbols", "_stop_rest_poller", "_start_depth_refresher"):
+        monkeypatch.setattr(svc, name, _noop)
+    monkeypatch.setattr(svc, "_LEASES", {})
+
+    await svc.ensure_symbols_subscribed(["BTCUSDT"], consumer="strategy")
+    await svc.ensure_symbols_subscribed(["BTCUSDT", "ETHUSDT"], consumer="api", ttl_sec=30)
+    assert reg.consumers() == {"api": ["BTCUSDT", "ETHUSDT"], "strategy": ["BTCUSDT"]}
+
+    now = time.monotonic()
+    assert await svc.expire_leases(now + 10) == 0
+    await svc.ensure_symbols_subscribed(["ETHUSDT"], consumer="api", ttl_sec=45)  # renewed
+    assert await svc.expire_leases(now + 31) == 1
+    assert reg.consumers() == {"api": ["ETHUSDT"], "strategy": ["BTCUSDT"]}
+    assert await svc.expire_leases(now + 61) == 1
+    assert reg.consumers() == {"strategy": ["BTCUSDT"]} and "ETHUSDT" not in feeds[0].channels
+    await reg.stop()
+
+
+async def test_rest_poller_drops_symbols_with_their_last_holder(monkeypatch):
+    import time
+
+    from app.services import book_tracker as svc
+
+    stopped = []
+
+    async def _noop(*a, **k):
+        return None
+
+    async def _stop():
+        stopped.append(True)
+
+    monkeypatch.setattr(svc, "_ws_usable", lambda: False)
+    monkeypatch.setattr(svc, "_attached", lambda: False)
+    for name in ("_rest_seed_symbols", "_start_rest_poller", "_stop_depth_refresher"):
+        monkeypatch.setattr(svc, name, _noop)
+    monkeypatch.setattr(svc, "_stop_rest_poller", _stop)
+    monkeypatch.setattr(svc, "get_subscription_registry", None)
+    monkeypatch.setattr(svc, "_SUBSCRIBED", set())
+    monkeypatch.setattr(svc, "_REST_HOLDERS", {})
+    monkeypatch.setattr(svc, "_REST_HELD", {})
+    monkeypatch.setattr(svc, "_LEASES", {})
+
+    await svc.ensure_symbols_subscribed(["BTCUSDT", "ETHUSDT"], consumer="strategy")
+    await svc.ensure_symbols_subscribed(["ETHUSDT", "SOLUSDT"], consumer="api", ttl_sec=30)
+    assert svc._SUBSCRIBED == {"BTCUSDT", "ETHUSDT", "SOLUSDT"}
+
+    assert await svc.expire_leases(time.monotonic() + 31) == 2
+    assert svc._SUBSCRIBED == {"BTCUSDT", "ETHUSDT"}  # ETHUSDT is still held by "strategy"
+
+    await svc.release_symbols(["ETHUSDT"], consumer="strategy")
+    assert svc._SUBSCRIBED == {"BTCUSDT"} and not stopped
+    await svc.release_symbols(consumer="strategy")
+    assert svc._SUBSCRIBED == set() and stopped == [True]
+    assert svc._REST_HOLDERS == {} and svc._REST_HELD == {}
+
+
+async def test_release_walks_only_the_consumers_own_holds():
+    reg, _ = _registry(grace_sec=0, max_topics=10**6)
+    await reg.acquire("scanner", [f"S{i}USDT" for i in range(2000)])
+    await reg.acquire("sse:1", ["S1USDT"], channels=["BOOK_TICKER", "DEALS"])
+
+    await reg.release("sse:1", ["S1USDT"], channels=["DEALS"])
+    assert reg.consumers()["sse:1"] == ["S1USDT"] and reg.wanted("S1USDT") == {"BOOK_TICKER", "DEPTH_LIMIT"}
+    await reg.release("sse:1", channels=["BOOK_TICKER"])
+    assert "sse:1" not in reg.consumers() and "sse:1" not in reg._held
+
+    reg._refs = _NoScan(reg._refs)          # reconcile must not iterate over every symbol's refs
+    await reg.release("scanner", ["S5USDT", "S6USDT"])
+    assert reg.wanted("S5USDT") == set() and len(reg.consumers()["scanner"]) == 1998
+    await reg.stop()
+
+
+class _NoScan(dict):
+    def items(self):
+        raise AssertionError("full scan of _refs")
+
+    __iter__ = items
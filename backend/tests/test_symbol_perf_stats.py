@@ -0,0 +1,86 @@
+# tests/test_symbol_perf_stats.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.market_data import book_tracker as bt_mod
+from app.market_data.book_tracker import BookTracker
+from app.models.symbol_perf_stats import SymbolPerfStats
+from app.models.trades import Trade
+from app.services import allocation_manager, symbol_stats
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def db(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 's.db'}", future=True)
+    Trade.__table__.create(eng)
+    SymbolPerfStats.__table__.create(eng)
+    with Session(eng) as s:
+        yield s
+
+
+def _close(db, i, symbol, exit_price, spread=4.0):
+    t = Trade.create_entry(trade_id=f"T{i}", symbol=symbol, entry_time=T0 + timedelta(minutes=i),
+                           entry_price=100.0, entry_qty=1.0, entry_side="BUY", spread_bps=spread)
+    db.add(t)
+    db.flush()
+    t.close_trade(exit_time=T0 + timedelta(minutes=i, seconds=30), exit_price=exit_price, exit_qty=1.0,
+                  exit_side="SELL", exit_reason="TP")
+    assert symbol_stats.record_trade_closed(db, t)
+    db.commit()
+    return t
+
+
+def test_stats_update_incrementally_and_match_rebuild(db):
+    for i, px in enumerate([101, 99, 102, 103, 98, 101]):
+        _close(db, i, "BTCUSDT", px)
+    _close(db, 10, "ETHUSDT", 100.5)
+
+    st = symbol_stats.load_symbol_stats(db)["BTCUSDT"]
+    assert st.trade_count == 6 and st.win_count == 4
+    assert st.avg_hold_sec == pytest.approx(30.0)
+    assert st.avg_pnl_usd == pytest.approx(4 / 6)
+    assert st.recent_weight == pytest.approx(sum(0.99 ** k for k in range(6)))
+    assert st.to_dict()["win_rate"] == pytest.approx(66.67)
+
+    incremental = {s: (r.trade_count, r.win_count, round(r.recent_wins, 9), round(r.recent_pnl_bps, 6))
+                   for s, r in symbol_stats.load_symbol_stats(db).items()}
+    db.expire_all()
+    assert symbol_stats.rebuild_symbol_stats(db) == 2
+    db.expire_all()
+    rebuilt = {s: (r.trade_count, r.win_count, round(r.recent_wins, 9), round(r.recent_pnl_bps, 6))
+               for s, r in symbol_stats.load_symbol_stats(db).items()}
+    assert rebuilt == incremental
+
+
+def test_smart_allocation_reads_stats_in_one_query_and_uses_live_depth(db, monkeypatch):
+    symbols = [f"S{i}USDT" for i in range(120)]
+    db.add_all([SymbolPerfStats(symbol=s, trade_count=10, win_count=6, pnl_usd_sum=1.0, pnl_bps_sum=10.0,
+                                hold_sec_sum=300.0, recent_weight=10.0, recent_wins=6.0 if i % 2 else 2.0,
+                                recent_pnl_bps=10.0, recent_spread_bps=40.0)
+                for i, s in enumerate(symbols)])
+    db.commit()
+
+    tracker = BookTracker()
+    asyncio.run(tracker.update_book_ticker("S1USDT", 99.99, 1, 100.01, 1))
+    asyncio.run(tracker.update_partial_depth("S1USDT", [(99.99, 500.0)], [(100.01, 500.0)]))
+    monkeypatch.setattr(bt_mod, "book_tracker", tracker)
+
+    selects = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda *a: selects.append(a[2]) if a[2].lstrip().upper().startswith("SELECT") else None)
+    alloc = allocation_manager.calculate_smart_allocation(symbols, 12000.0, 10.0, db=db)
+
+    assert len(selects) == 1
+    assert alloc["S1USDT"]["depth_live"] and alloc["S1USDT"]["depth_5bps"] == pytest.approx(100000.0)
+    assert not alloc["S3USDT"]["depth_live"] and alloc["S3USDT"]["depth_5bps"] == allocation_manager.DEFAULT_DEPTH_USD
+    assert alloc["S1USDT"]["smart_score"] > alloc["S3USDT"]["smart_score"] > alloc["S2USDT"]["smart_score"]
+    assert sum(a["allocated_usd"] for a in alloc.values()) == pytest.approx(12000.0, abs=1.0)
+
+    dyn = allocation_manager.calculate_dynamic_allocation(["S1USDT", "S3USDT"], 1000.0, 10.0)
+    assert dyn["S1USDT"]["allocation_pct"] == pytest.approx(66.7, abs=0.1)
@@ -0,0 +1,85 @@
+# tests/test_trade_export.py
+import csv
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+from io import StringIO
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.trades import Trade
+from app.services import trade_export
+from app.services.trade_export import TradeExportFilter, iter_trades_csv, iter_trades_ndjson
+
+T0 = datetime(2026, 1, 1)
+
+
+def _factory(tmp_path, n):
+    eng = create_engine(f"sqlite:///{tmp_path / 't.db'}", future=True)
+    Trade.__table__.create(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(Trade.__table__), [
+            {"trade_id": f"T{i}", "symbol": ("BTCUSDT", "ETHUSDT")[i % 2], "entry_time": T0 + timedelta(minutes=i),
+             "entry_price": 100.0 + i, "entry_qty": 1.0, "pnl_usd": 0.5, "status": "CLOSED",
+             "created_at": T0, "updated_at": T0}
+            for i in range(n)
+        ])
+    return sessionmaker(bind=eng, future=True)
+
+
+def test_csv_and_ndjson_stream_in_chunks_with_filters(tmp_path):
+    factory = _factory(tmp_path, 2500)
+    flt = TradeExportFilter(start=T0 + timedelta(minutes=100), end=T0 + timedelta(minutes=1100), symbols=["btcusdt"])
+
+    chunks = list(iter_trades_csv(flt, chunk_rows=100, session_factory=factory))
+    assert len(chunks) == 1 + 5  # header + 500 rows / 100
+    rows = list(csv.reader(StringIO("".join(chunks))))
+    assert rows[0][:3] == ["Entry Time", "Exit Time", "Symbol"]
+    assert len(rows) == 501 and {r[2] for r in rows[1:]} == {"BTCUSDT"}
+    assert rows[1][0] == (T0 + timedelta(minutes=1098)).isoformat() and rows[1][5] == "1198.00000000"
+
+    lines = "".join(iter_trades_ndjson(flt, chunk_rows=100, session_factory=factory)).splitlines()
+    docs = [json.loads(x) for x in lines]
+    assert len(docs) == 500 and docs[0]["trade_id"] == "T1098"
+    assert set(docs[0]) == set(Trade.__table__.c.keys()) and docs[-1]["entry_time"] == "2026-01-01T01:40:00"
+
+
+def _peak(flt, factory):
+    tracemalloc.start()
+    try:
+        total = sum(len(c) for c in iter_trades_csv(flt, chunk_rows=500, session_factory=factory))
+        return total, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_export_memory_does_not_grow_with_result_size(tmp_path):
+    factory = _factory(tmp_path, 20000)
+    small = TradeExportFilter(end=T0 + timedelta(minutes=2000))
+    _peak(small, factory)  # warm statement/compile caches
+
+    small_bytes, small_peak = _peak(small, factory)
+    big_bytes, big_peak = _peak(TradeExportFilter(), factory)
+    assert big_bytes > 9 * small_bytes
+    assert big_peak < small_peak * 1.25
+
+
+def test_export_endpoint_streams_ndjson(tmp_path, monkeypatch):
+    from app.routers import trades
+
+    factory = _factory(tmp_path, 50)
+    monkeypatch.setattr(trade_export, "SessionLocal", factory)
+    app = FastAPI()
+    app.include_router(trades.router)
+    client = TestClient(app)
+
+    r = client.get("/api/trades/export", params={"format": "ndjson", "start": "2026-01-01", "symbol": "ETHUSDT,BTCUSDT"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    assert len(r.text.splitlines()) == 50
+
+    r = client.get("/api/trades/export", params={"start": "2026-01-01T00:10:00Z", "symbol": "ETHUSDT"})
+    assert r.status_code == 200 and ".csv" in r.headers["content-disposition"]
+    assert len(r.text.splitlines()) == 1 + 20
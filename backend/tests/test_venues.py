@@ -0,0 +1,104 @@
+# tests/test_venues.py
+from app.market_data import venues
+from app.market_data.book_tracker import BookTracker
+from app.market_data.venues import VenueQuoteBook, switch_active_venue, venue_callbacks
+from app.services.config_manager import ConfigManager
+
+
+def test_consolidated_best_across_fresh_venues():
+    book = VenueQuoteBook("gate", stale_after_ms=1000)
+    book.update_top("gate", "BTCUSDT", 100.0, 1.0, 100.4, 1.0, ts_ms=1, now=10.0)
+    book.update_top("mexc", "BTCUSDT", 100.2, 2.0, 100.6, 2.0, ts_ms=1, now=10.5)
+
+    c = book.consolidated("btcusdt", now=10.6)
+    assert (c["best_bid"], c["best_bid_venue"]) == (100.2, "mexc")
+    assert (c["best_ask"], c["best_ask_venue"]) == (100.4, "gate")
+    assert round(c["cross_spread_bps"], 2) == round((100.4 - 100.2) / 100.3 * 1e4, 2)
+    assert not c["crossed"] and c["venues"]["gate"]["active"]
+
+    # gate goes stale: it is reported but no longer contributes to the best prices
+    c = book.consolidated("BTCUSDT", now=11.2)
+    assert c["venues"]["gate"]["stale"] and not c["venues"]["mexc"]["stale"]
+    assert (c["best_ask"], c["best_ask_venue"]) == (100.6, "mexc")
+
+    # Gate depth fills in the sizes its tickers lack
+    book.update_depth("gate", "BTCUSDT", [(100.1, 3.0)], [(100.15, 4.0)], ts_ms=2, now=11.3)
+    c = book.consolidated("BTCUSDT", now=11.3)
+    assert c["venues"]["gate"]["bidQty"] == 3.0
+    assert c["crossed"] and c["cross_spread_bps"] < 0
+
+
+async def test_only_the_trading_venue_reaches_the_tracker(monkeypatch):
+    seen = []
+
+    async def fwd_top(symbol, *args, ts_ms=None):
+        seen.append(("top", symbol))
+
+    async def fwd_depth(symbol, *args, ts_ms=None):
+        seen.append(("depth", symbol))
+
+    monkeypatch.setattr(venues, "_BOOK", VenueQuoteBook("mexc"))
+    monkeypatch.setattr(venues, "_FWD", (fwd_top, fwd_depth))
+    gate_bt, gate_depth = venue_callbacks("gate")
+    mexc_bt, _ = venue_callbacks("mexc")
+
+    await gate_bt("ETHUSDT", 10.0, 0.0, 10.1, 0.0, ts_ms=1)
+    await gate_depth("ETHUSDT", [(10.0, 1.0)], [(10.1, 1.0)], ts_ms=1)
+    await mexc_bt("ETHUSDT", 10.01, 1.0, 10.09, 1.0, ts_ms=1)
+    assert seen == [("top", "ETHUSDT")]
+    assert venues.get_venue_book().get_stats()["symbols"] == {"gate": 1, "mexc": 1}
+
+
+async def test_switch_replays_the_new_venue_without_streams(monkeypatch):
+    import app.services.book_tracker as svc
+
+    book = VenueQuoteBook("mexc")
+    book.update_top("mexc", "VNUSDT", 1.0, 1.0, 1.1, 1.0, ts_ms=5)
+    book.update_top("gate", "VNUSDT", 2.0, 1.0, 2.1, 1.0, ts_ms=5)
+    book.update_depth("gate", "VNUSDT", [(2.0, 7.0), (1.9, 1.0)], [(2.1, 8.0)], ts_ms=6)
+    monkeypatch.setattr(venues, "_BOOK", book)
+
+    dst = BookTracker()
+    await dst.update_book_ticker("VNUSDT", 1.0, 1.0, 1.1, 1.0, ts_ms=5)   # MEXC quote in the tracker
+    monkeypatch.setattr(svc, "book_tracker", dst)
+
+    assert await switch_active_venue("gate") == 1
+    q = await dst.get_quote("VNUSDT")
+    assert (q["bid"], q["ask"], q["bidQty"]) == (2.0, 2.1, 7.0)
+    assert dst._states["VNUSDT"].l2.bids == [(2.0, 7.0), (1.9, 1.0)]
+    assert book.active == "gate" and svc._provider() == "GATE"
+
+
+async def test_config_manager_skips_restart_when_venue_streams():
+    calls = []
+
+    async def noop():
+        calls.append("stop_strategies")
+
+    async def stop_streams():
+        calls.append("stop_streams")
+
+    async def start_streams(provider, mode):
+        calls.append("start_streams")
+        return True
+
+    async def switch_venue(provider):
+        calls.append(f"switch:{provider}")
+        return provider == "gate"
+
+    cm = ConfigManager(initial_provider="mexc", initial_mode="PAPER", available_providers=["gate", "mexc"])
+    cm.set_hooks(
+        stop_all_strategies=noop,
+        stop_streams=stop_streams,
+        start_streams=start_streams,
+        reset_book_tracker=lambda: calls.append("reset"),
+        switch_venue=switch_venue,
+    )
+    state = await cm.switch(provider="gate", mode="PAPER")
+    assert calls == ["stop_strategies", "switch:gate"]
+    assert state["active"] == "gate" and state["ws_enabled"] and state["revision"] == 2
+
+    # a venue that is not streaming falls back to the full restart
+    calls.clear()
+    await cm.switch(provider="mexc", mode="PAPER")
+    assert calls == ["stop_strategies", "switch:mexc", "stop_streams", "reset", "start_streams"]